@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Arquivo binário colunar de sinais vitais por paciente (ver telemonitoramento/arquivo_leituras.py).
+
+Subcomandos:
+    gerar     grava um arquivo por paciente a partir do banco (substitui os existentes)
+    resumir   resume os arquivos por paciente, sem acessar o banco
+
+Exemplo:
+    python scripts/arquivar_leituras.py gerar --diretorio /dados/arquivo_leituras
+    python scripts/arquivar_leituras.py gerar --paciente 12 --paciente 15
+    python scripts/arquivar_leituras.py resumir --data-inicio 2023-01-01 --data-fim 2024-01-01
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import date
+
+import numpy as np
+from dotenv import load_dotenv, find_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import arquivo_leituras
+import instrumentacao
+import perfilamento
+
+# Carrega variáveis do .env
+dotenv_path = find_dotenv()
+load_dotenv(dotenv_path, override=True)
+
+
+def conectar_db():
+    """Estabelece conexão instrumentada com o banco de dados."""
+    return instrumentacao.conectar(
+        host=os.getenv("DB_HOST"),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        port=os.getenv("DB_PORT"),
+    )
+
+
+def gerar(args):
+    def progresso(pacientes, leituras):
+        print(f"⏳ {pacientes} pacientes, {leituras} leituras", end="\r", flush=True)
+
+    conn = conectar_db()
+    inicio = time.perf_counter()
+    try:
+        with instrumentacao.escopo("job:arquivar_leituras"), perfilamento.perfil("job:arquivar_leituras"):
+            pacientes, leituras, tamanho = arquivo_leituras.arquivar_leituras(conn, args.diretorio, args.paciente, progresso)
+    finally:
+        conn.close()
+    print()
+    print(f"✅ {pacientes} arquivos, {leituras} leituras, {tamanho / 1024 / 1024:.1f} MB em {time.perf_counter() - inicio:.1f} s")
+
+
+def resumir(args):
+    arquivos = arquivo_leituras.listar_arquivos(args.diretorio)
+    if args.paciente:
+        arquivos = {p: c for p, c in arquivos.items() if p in args.paciente}
+    if not arquivos:
+        print("Nenhum arquivo encontrado.")
+        return
+    print(f"{'Paciente':>9} {'Leituras':>9} {'Temp. média':>12} {'FC média':>9} {'SpO2 mín.':>10}")
+    for paciente_id, caminho in arquivos.items():
+        with arquivo_leituras.ArquivoLeituras(caminho) as arquivo:
+            colunas = arquivo.ler(args.data_inicio, args.data_fim, ["temperaturas", "frequencias", "saturacoes"])
+            frequencias = colunas["frequencias"][colunas["frequencias"] != arquivo_leituras.AUSENTE]
+            saturacoes = colunas["saturacoes"][colunas["saturacoes"] != arquivo_leituras.AUSENTE]
+            temperaturas = colunas["temperaturas"][~np.isnan(colunas["temperaturas"])]
+            print(f"{paciente_id:>9} {len(colunas['frequencias']):>9} "
+                  f"{temperaturas.mean() if len(temperaturas) else float('nan'):>12.2f} "
+                  f"{frequencias.mean() if len(frequencias) else float('nan'):>9.1f} "
+                  f"{saturacoes.min() if len(saturacoes) else '-':>10}")
+            del colunas, frequencias, saturacoes, temperaturas
+
+
+def criar_parser():
+    """Cria o parser de argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Arquivo binário colunar de sinais vitais por paciente.")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    p_gerar = subparsers.add_parser("gerar", help="Gera os arquivos a partir do banco")
+    p_gerar.add_argument("--diretorio", help="Destino (padrão: ARQUIVO_LEITURAS_DIR)")
+    p_gerar.add_argument("--paciente", type=int, action="append", help="Só este paciente (pode repetir)")
+    p_gerar.set_defaults(func=gerar)
+
+    p_resumir = subparsers.add_parser("resumir", help="Resume os arquivos sem acessar o banco")
+    p_resumir.add_argument("--diretorio", help="Origem (padrão: ARQUIVO_LEITURAS_DIR)")
+    p_resumir.add_argument("--paciente", type=int, action="append", help="Só este paciente (pode repetir)")
+    p_resumir.add_argument("--data-inicio", type=date.fromisoformat)
+    p_resumir.add_argument("--data-fim", type=date.fromisoformat)
+    p_resumir.set_defaults(func=resumir)
+    return parser
+
+
+def main():
+    """Função principal do script."""
+    args = criar_parser().parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos caminhos críticos do sistema de telemonitoramento CEUB.
+
+Executa cenários cronometrados (login, dashboard, listagem de pacientes, filtros de
+relatório, exportação CSV, registro de sinais vitais e avaliação de alertas) contra um
+banco populado por scripts/gerar_dados_sinteticos.py e grava latências p50/p95/p99 e
+número de consultas em JSON, para comparar execuções entre commits.
+
+Exemplo:
+    python scripts/benchmark.py --repeticoes 50 --saida resultado.json
+    python scripts/benchmark.py --saida novo.json --comparar resultado.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+from datetime import datetime, date, timedelta
+
+import pandas as pd
+from dotenv import load_dotenv, find_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import cache_leituras
+import criptografia
+import instrumentacao
+import perfis_alerta
+import tendencias
+from utils import hash_senha
+from alertas import avaliar_alertas, TIPO_ALERTA_LIMITES, TIPO_ALERTA_TENDENCIA
+from consultas import (
+    SQL_AUTENTICAR, SQL_REGISTRAR_AUDITORIA, SQL_INSERIR_SINAIS_VITAIS, SQL_INSERIR_ALERTA,
+    SQL_DASHBOARD_ALERTAS_POR_DIA, SQL_DASHBOARD_PACIENTES_POR_PROFISSIONAL, SQL_DASHBOARD_STATUS_ALERTAS,
+    COLUNAS_RELATORIO_SINAIS,
+    montar_consulta_sinais_vitais, montar_consulta_pacientes, buscar_contagens_dashboard
+)
+
+# Carrega variáveis do .env
+dotenv_path = find_dotenv()
+load_dotenv(dotenv_path, override=True)
+
+SENHA_PADRAO = "Bench@123"
+DOMINIO_EMAIL = "bench.local"
+# Pacientes por página na tela "Pacientes" (POR_PAGINA do app)
+PACIENTES_POR_PAGINA = 50
+
+
+def conectar_db():
+    """Estabelece conexão instrumentada com o banco de dados."""
+    return instrumentacao.conectar(
+        host=os.getenv("DB_HOST"),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        port=os.getenv("DB_PORT"),
+    )
+
+
+def percentil(valores, p):
+    """
+    Calcula o percentil p (0–100) por interpolação linear, como numpy.percentile.
+
+    Args:
+        valores (list): Amostras numéricas.
+        p (float): Percentil desejado.
+    Returns:
+        float or None: Valor do percentil (None se não houver amostras).
+    """
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    posicao = (len(ordenados) - 1) * p / 100
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    fracao = posicao - inferior
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * fracao
+
+
+def resumir_amostras(duracoes_ms, consultas, tempos_db_ms=None):
+    """
+    Resume as amostras de um cenário.
+
+    Args:
+        duracoes_ms (list): Duração de cada iteração em milissegundos.
+        consultas (list): Número de consultas de cada iteração.
+        tempos_db_ms (list, opcional): Tempo de banco de cada iteração em milissegundos.
+    Returns:
+        dict: Estatísticas do cenário.
+    """
+    resumo = {
+        "iteracoes": len(duracoes_ms),
+        "p50_ms": round(percentil(duracoes_ms, 50), 3),
+        "p95_ms": round(percentil(duracoes_ms, 95), 3),
+        "p99_ms": round(percentil(duracoes_ms, 99), 3),
+        "media_ms": round(sum(duracoes_ms) / len(duracoes_ms), 3),
+        "max_ms": round(max(duracoes_ms), 3),
+        "consultas_por_iteracao": round(sum(consultas) / len(consultas), 2),
+    }
+    if tempos_db_ms:
+        resumo["tempo_db_p50_ms"] = round(percentil(tempos_db_ms, 50), 3)
+        resumo["tempo_db_p95_ms"] = round(percentil(tempos_db_ms, 95), 3)
+    return resumo
+
+
+class Contexto:
+    """Amostra de ids e credenciais usada para variar os parâmetros dos cenários."""
+
+    def __init__(self, conn, senha):
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM pacientes ORDER BY id")
+        self.pacientes = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT id FROM usuarios WHERE tipo = 'Profissional' ORDER BY id")
+        self.profissionais = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT email FROM usuarios WHERE email LIKE %s AND status = TRUE ORDER BY id LIMIT 1000", (f"%@{DOMINIO_EMAIL}",))
+        self.emails = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT relname, n_live_tup FROM pg_stat_user_tables")
+        self.tamanhos = dict(cursor.fetchall())
+        conn.rollback()
+        if not self.pacientes or not self.profissionais or not self.emails:
+            raise Exception("Banco sem dados sintéticos. Execute scripts/gerar_dados_sinteticos.py antes.")
+        self.senha_hash = hash_senha(senha)
+        # Cache de leituras recentes e índice de limites do processo, como no app: compartilhados entre as iterações
+        self.cache = cache_leituras.CacheLeituras()
+        self.indice = perfis_alerta.IndiceLimites()
+        try:
+            self.fernet = criptografia.criar_fernet(criptografia.chaves_configuradas())
+        except RuntimeError:
+            self.fernet = None
+
+    def descriptografar(self, dados_cript):
+        if not self.fernet:
+            return None
+        return criptografia.descriptografar_json(self.fernet, dados_cript)
+
+
+# Cenários: cada função recebe (conn, contexto, rng) e reproduz o trabalho de uma tela.
+def cenario_login(conn, ctx, rng):
+    cursor = conn.cursor()
+    email = rng.choice(ctx.emails)
+    cursor.execute(SQL_AUTENTICAR, (email, ctx.senha_hash))
+    usuario = cursor.fetchone()
+    if usuario:
+        cursor.execute(SQL_REGISTRAR_AUDITORIA, (usuario[0], "Login", f"Email: {email}"))
+
+
+def cenario_dashboard(conn, ctx, rng):
+    cursor = conn.cursor()
+    buscar_contagens_dashboard(cursor)
+    cursor.execute(SQL_DASHBOARD_ALERTAS_POR_DIA)
+    pd.DataFrame(cursor.fetchall(), columns=["Data", "Alertas"])
+    cursor.execute(SQL_DASHBOARD_PACIENTES_POR_PROFISSIONAL)
+    pd.DataFrame(cursor.fetchall(), columns=["Profissional", "Pacientes"])
+    cursor.execute(SQL_DASHBOARD_STATUS_ALERTAS)
+    pd.DataFrame(cursor.fetchall(), columns=["Status", "Qtd"])
+
+
+def cenario_pacientes(conn, ctx, rng):
+    # Uma página dos pacientes de um profissional; leituras recentes pelo cache (faltas numa única consulta)
+    cursor = conn.cursor()
+    cursor.execute(*montar_consulta_pacientes(profissional_id=rng.choice(ctx.profissionais), limite=PACIENTES_POR_PAGINA + 1))
+    pacientes = cursor.fetchall()[:PACIENTES_POR_PAGINA]
+    for pid, nome, profissional, dados_med in pacientes:
+        ctx.descriptografar(dados_med)
+    recentes = ctx.cache.leituras_de([pid for pid, *_ in pacientes], conectar_db)
+    for sinais in recentes.values():
+        if sinais:
+            pd.DataFrame(sinais, columns=["Data", "Temperatura", "Pressão", "Frequência", "Saturação"])
+
+
+def _filtros_aleatorios(ctx, rng):
+    hoje = date.today()
+    filtros = {}
+    if rng.random() < 0.5:
+        filtros["paciente_id"] = rng.choice(ctx.pacientes)
+    if rng.random() < 0.5:
+        filtros["profissional_id"] = rng.choice(ctx.profissionais)
+    if rng.random() < 0.5:
+        filtros["data_inicio"] = hoje - timedelta(days=rng.randint(1, 30))
+    if rng.random() < 0.3:
+        filtros["data_fim"] = hoje - timedelta(days=rng.randint(0, 1))
+    return filtros
+
+
+def cenario_relatorio_filtros(conn, ctx, rng):
+    cursor = conn.cursor()
+    query, params = montar_consulta_sinais_vitais(**_filtros_aleatorios(ctx, rng))
+    cursor.execute(query, params)
+    pd.DataFrame(cursor.fetchall(), columns=COLUNAS_RELATORIO_SINAIS)
+
+
+def cenario_exportar_csv(conn, ctx, rng):
+    cursor = conn.cursor()
+    query, params = montar_consulta_sinais_vitais()
+    cursor.execute(query, params)
+    df_rel = pd.DataFrame(cursor.fetchall(), columns=COLUNAS_RELATORIO_SINAIS)
+    df_rel.to_csv(index=False).encode('utf-8')
+
+
+def _leitura_aleatoria(rng):
+    return {
+        "temperatura": round(rng.uniform(34.5, 40.0), 1),
+        "pressao": f"{rng.randint(85, 170)}/{rng.randint(55, 105)}",
+        "frequencia": rng.randint(40, 150),
+        "saturacao": rng.randint(82, 100),
+    }
+
+
+def cenario_inserir_sinais(conn, ctx, rng):
+    # Como cadastrar_sinais_vitais: limites do índice, leitura, alertas e tendência na mesma transação
+    paciente_id = rng.choice(ctx.pacientes)
+    sinais = _leitura_aleatoria(rng)
+    ctx.indice.sincronizar(conectar_db, [paciente_id])
+    alertas = avaliar_alertas(sinais, ctx.indice.limites(paciente_id))
+    cursor = conn.cursor()
+    cursor.execute(SQL_INSERIR_SINAIS_VITAIS, (paciente_id, sinais["temperatura"], sinais["pressao"], sinais["frequencia"], sinais["saturacao"]))
+    registro_id, _ = cursor.fetchone()
+    for alerta in alertas:
+        cursor.execute(SQL_INSERIR_ALERTA, (paciente_id, TIPO_ALERTA_LIMITES, alerta))
+    desvios = tendencias.registrar_leitura(
+        cursor, paciente_id, registro_id, sinais["temperatura"], sinais["pressao"], sinais["frequencia"], sinais["saturacao"]
+    )
+    for desvio in desvios:
+        cursor.execute(SQL_INSERIR_ALERTA, (paciente_id, TIPO_ALERTA_TENDENCIA, desvio))
+
+
+def cenario_avaliar_alertas(conn, ctx, rng):
+    # Limites do índice compilado: só consulta o banco para pacientes ainda desconhecidos
+    paciente_id = rng.choice(ctx.pacientes)
+    ctx.indice.sincronizar(conectar_db, [paciente_id])
+    avaliar_alertas(_leitura_aleatoria(rng), ctx.indice.limites(paciente_id))
+
+
+CENARIOS = {
+    "login": cenario_login,
+    "dashboard": cenario_dashboard,
+    "pacientes": cenario_pacientes,
+    "relatorio_filtros": cenario_relatorio_filtros,
+    "exportar_csv": cenario_exportar_csv,
+    "inserir_sinais": cenario_inserir_sinais,
+    "avaliar_alertas": cenario_avaliar_alertas,
+}
+
+
+def executar_cenario(nome, funcao, ctx, repeticoes, aquecimento, rng):
+    """
+    Executa um cenário várias vezes, cada iteração em conexão própria (como o app faz a cada rerun).
+
+    Toda iteração termina com rollback, de modo que os cenários de escrita não alteram a base.
+
+    Returns:
+        dict: Estatísticas do cenário (ver resumir_amostras).
+    """
+    duracoes = []
+    consultas = []
+    tempos_db = []
+    for i in range(aquecimento + repeticoes):
+        with instrumentacao.escopo(f"benchmark:{nome}") as medicao:
+            inicio = time.perf_counter()
+            conn = conectar_db()
+            try:
+                funcao(conn, ctx, rng)
+            finally:
+                conn.rollback()
+                conn.close()
+            decorrido_ms = (time.perf_counter() - inicio) * 1000
+        if i >= aquecimento:
+            duracoes.append(decorrido_ms)
+            consultas.append(medicao.consultas)
+            tempos_db.append(medicao.tempo_db * 1000)
+    return resumir_amostras(duracoes, consultas, tempos_db)
+
+
+def versao_codigo():
+    """Retorna o commit atual do git (ou None fora de um repositório)."""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(__file__), text=True).strip()
+    except Exception:
+        return None
+
+
+def comparar_resultados(atual, anterior):
+    """
+    Compara dois resultados de benchmark.
+
+    Returns:
+        list: Linhas de texto com a variação de p95 e consultas por cenário.
+    """
+    linhas = []
+    for nome, estat in atual["cenarios"].items():
+        base = anterior.get("cenarios", {}).get(nome)
+        if not base:
+            linhas.append(f"{nome}: sem referência")
+            continue
+        variacao = (estat["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100 if base["p95_ms"] else 0.0
+        linhas.append(
+            f"{nome}: p95 {base['p95_ms']:.1f} -> {estat['p95_ms']:.1f} ms ({variacao:+.1f}%), "
+            f"consultas {base['consultas_por_iteracao']} -> {estat['consultas_por_iteracao']}"
+        )
+    return linhas
+
+
+def criar_parser():
+    """Cria o parser de argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Benchmark dos caminhos críticos do telemonitoramento.")
+    parser.add_argument("--cenarios", nargs="+", choices=sorted(CENARIOS), default=list(CENARIOS))
+    parser.add_argument("--repeticoes", type=int, default=30)
+    parser.add_argument("--aquecimento", type=int, default=3)
+    parser.add_argument("--senha", default=SENHA_PADRAO, help="Senha usada na geração dos dados sintéticos")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="Arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--comparar", help="Resultado JSON anterior para comparação")
+    return parser
+
+
+def main():
+    """Função principal do script."""
+    args = criar_parser().parse_args()
+    rng = random.Random(args.semente)
+    conn = conectar_db()
+    try:
+        ctx = Contexto(conn, args.senha)
+    finally:
+        conn.close()
+
+    resultado = {
+        "versao": versao_codigo(),
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "repeticoes": args.repeticoes,
+        "tamanho_tabelas": ctx.tamanhos,
+        "cenarios": {},
+    }
+    for nome in args.cenarios:
+        print(f"⏱️ Executando cenário '{nome}'...", file=sys.stderr)
+        resultado["cenarios"][nome] = executar_cenario(nome, CENARIOS[nome], ctx, args.repeticoes, args.aquecimento, rng)
+
+    saida = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(saida)
+        print(f"✅ Resultado gravado em {args.saida}", file=sys.stderr)
+    else:
+        print(saida)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            anterior = json.load(f)
+        for linha in comparar_resultados(resultado, anterior):
+            print(linha, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
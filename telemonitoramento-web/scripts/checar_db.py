@@ -14,12 +14,27 @@ DB_PORT = os.getenv("DB_PORT")
 
 TABELAS_ESPERADAS = {
     "usuarios": ["id", "nome", "email", "senha", "tipo", "status", "primeiro_acesso"],
-    "profissionais": ["id", "id_usuario", "especialidade", "registro_profissional"],
-    "pacientes": ["id", "id_usuario", "id_profissional_responsavel", "dados_medicos"],
-    "sinais_vitais": ["id", "paciente_id", "temperatura", "pressao", "frequencia_cardiaca", "saturacao", "data_registro"],
+    "profissionais": ["id", "id_usuario", "especialidade", "registro_profissional", "perfil_alerta_id"],
+    "pacientes": ["id", "id_usuario", "id_profissional_responsavel", "dados_medicos", "diagnostico_indice", "faixa_etaria", "perfil_alerta_id"],
+    "sinais_vitais": ["id", "paciente_id", "temperatura", "pressao", "frequencia_cardiaca", "saturacao", "data_registro", "escore"],
     "alertas": ["id", "paciente_id", "status", "data_hora"],
-    "mensagens": ["id", "id_remetente", "id_destinatario", "texto", "data_envio"],
-    "auditoria": ["id", "usuario_id", "acao", "detalhes", "data_hora"],
+    "mensagens": ["id", "id_remetente", "id_destinatario", "texto", "data_envio", "busca"],
+    "auditoria": ["id", "usuario_id", "acao", "detalhes", "data_hora", "busca"],
+    "auditoria_acoes_dia": ["dia", "acao", "total"],
+    "auditoria_arquivos": ["caminho", "particao", "inicio", "fim", "formato", "linhas", "arquivado_em"],
+    "perfis_alerta": ["id", "nome", "temp_min", "temp_max", "freq_min", "freq_max", "sat_min", "pressao_min", "pressao_max", "atualizado_em"],
+    "limites_paciente": ["paciente_id", "temp_min", "temp_max", "freq_min", "freq_max", "sat_min", "pressao_min", "pressao_max", "atualizado_em"],
+    "adesao_diaria": ["paciente_id", "dia", "registros"],
+    "lembretes": ["paciente_id", "dia", "status", "tentativas", "erro", "criado_em", "enviado_em"],
+    "amostras_continuas": ["paciente_id", "minuto", "quantidade", "instantes", "frequencias", "saturacoes",
+                           "frequencia_media", "frequencia_min", "frequencia_max", "saturacao_media", "saturacao_min", "saturacao_max"],
+    "leituras_continuas": ["paciente_id", "janela", "sinal_id"],
+    "ultimos_sinais": ["paciente_id", "sinal_id", "data_registro", "temperatura", "pressao", "frequencia_cardiaca", "saturacao",
+                       "temperaturas", "frequencias", "saturacoes", "sistolicas", "diastolicas",
+                       "alerta_id", "alerta_tipo", "alerta_descricao", "alerta_status", "alerta_em"],
+    "fila_prioridade": ["paciente_id", "profissional_id", "sinal_id", "escore", "ultima_leitura"],
+    "tendencias_estado": ["paciente_id", "estado", "ultimo_sinal_id", "atualizado_em"],
+    "rotacao_chaves": ["chave_digital", "ultimo_id", "processados", "recriptografados", "falhas", "iniciado_em", "atualizado_em", "concluido_em"],
 }
 
 def checar_tabelas_colunas():
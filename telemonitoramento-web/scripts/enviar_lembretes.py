@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Lembra, por e-mail, todos os pacientes ativos que ainda não registraram sinais vitais no dia.
+
+Uma execução enfileira os lembretes com uma única instrução (anti-join indexado em
+adesao_diaria) e envia os e-mails em lotes, cada lote por uma conexão SMTP. Rodar de novo
+no mesmo dia não duplica lembretes: só reenvia os que falharam (até 3 tentativas).
+Agende, por exemplo, no cron às 18h.
+
+Exemplo:
+    python scripts/enviar_lembretes.py
+    python scripts/enviar_lembretes.py --dia 2024-05-01 --lote 200
+    python scripts/enviar_lembretes.py --apenas-enfileirar
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import date
+from functools import partial
+
+from dotenv import load_dotenv, find_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import adesao
+import instrumentacao
+import perfilamento
+
+# Carrega variáveis do .env
+dotenv_path = find_dotenv()
+load_dotenv(dotenv_path, override=True)
+
+
+def conectar_db():
+    """Estabelece conexão instrumentada com o banco de dados."""
+    return instrumentacao.conectar(
+        host=os.getenv("DB_HOST"),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        port=os.getenv("DB_PORT"),
+    )
+
+
+def criar_parser():
+    """Cria o parser de argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Envia lembretes aos pacientes sem registro de sinais vitais no dia.")
+    parser.add_argument("--dia", type=date.fromisoformat, default=date.today(), help="Dia verificado (padrão: hoje)")
+    parser.add_argument("--lote", type=int, default=adesao.TAMANHO_LOTE_EMAIL, help="E-mails por conexão SMTP")
+    parser.add_argument("--apenas-enfileirar", action="store_true", help="Só enfileira, sem enviar")
+    return parser
+
+
+def main():
+    """Função principal do script."""
+    args = criar_parser().parse_args()
+    enviar = partial(adesao.enviar_por_smtp, remetente=os.getenv("EMAIL_SENDER"), senha=os.getenv("EMAIL_PASSWORD"))
+
+    def progresso(enviados, falhas):
+        print(f"⏳ {enviados} enviados, {falhas} falhas", end="\r", flush=True)
+
+    conn = conectar_db()
+    inicio = time.perf_counter()
+    try:
+        with instrumentacao.escopo("job:enviar_lembretes"), perfilamento.perfil("job:enviar_lembretes"):
+            enfileirados = adesao.enfileirar_lembretes(conn.cursor(), args.dia)
+            conn.commit()
+            print(f"📬 {enfileirados} lembretes enfileirados para {args.dia:%d/%m/%Y}")
+            if args.apenas_enfileirar:
+                return
+            enviados, falhas, dispensados = adesao.enviar_lembretes(conn, args.dia, enviar, args.lote, progresso)
+    finally:
+        conn.close()
+    print()
+    print(f"✅ {enviados} enviados, {falhas} falhas, {dispensados} dispensados (registraram antes do envio) em {time.perf_counter() - inicio:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Exportação de sinais_vitais, alertas, auditoria e pacientes para Parquet particionado por mês
+(ver telemonitoramento/exportacao.py), para análise fora do banco.
+
+Por padrão a exportação é incremental: só as linhas novas desde a anterior, com os mesmos
+filtros. dados_medicos só é exportado (descriptografado) com --descriptografar.
+
+Exemplo:
+    python scripts/exportar_dados.py
+    python scripts/exportar_dados.py --tabela sinais_vitais --tabela alertas --destino /dados/exportacao
+    python scripts/exportar_dados.py --completa --data-inicio 2024-01-01 --profissional 3
+    python scripts/exportar_dados.py --tabela pacientes --descriptografar
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import date
+
+from dotenv import load_dotenv, find_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import criptografia
+import exportacao
+import instrumentacao
+import perfilamento
+
+# Carrega variáveis do .env
+dotenv_path = find_dotenv()
+load_dotenv(dotenv_path, override=True)
+
+
+def conectar_db():
+    """Estabelece conexão instrumentada com o banco de dados."""
+    return instrumentacao.conectar(
+        host=os.getenv("DB_HOST"),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        port=os.getenv("DB_PORT"),
+    )
+
+
+def criar_parser():
+    """Cria o parser de argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Exporta tabelas para Parquet particionado por mês.")
+    parser.add_argument("--destino", help="Diretório raiz (padrão: EXPORTACAO_DIR)")
+    parser.add_argument("--tabela", action="append", choices=list(exportacao.TABELAS),
+                        help="Só esta tabela (pode repetir; padrão: todas)")
+    parser.add_argument("--data-inicio", type=date.fromisoformat, help="A partir desta data (inclusive)")
+    parser.add_argument("--data-fim", type=date.fromisoformat, help="Até esta data (exclusive)")
+    parser.add_argument("--profissional", type=int, help="Só pacientes deste profissional (auditoria: suas ações)")
+    parser.add_argument("--paciente", type=int, help="Só este paciente")
+    parser.add_argument("--completa", action="store_true", help="Reexporta tudo, substituindo as partes anteriores")
+    parser.add_argument("--descriptografar", action="store_true",
+                        help="Inclui idade e diagnóstico de dados_medicos (requer FERNET_KEY)")
+    return parser
+
+
+def main():
+    """Função principal do script."""
+    args = criar_parser().parse_args()
+    fernet = criptografia.criar_fernet(criptografia.chaves_configuradas()) if args.descriptografar else None
+    conn = conectar_db()
+    try:
+        for tabela in args.tabela or list(exportacao.TABELAS):
+            def progresso(linhas):
+                print(f"⏳ {tabela}: {linhas} linhas", end="\r", flush=True)
+
+            inicio = time.perf_counter()
+            with instrumentacao.escopo("job:exportar_dados"), perfilamento.perfil("job:exportar_dados"):
+                resultado = exportacao.exportar_tabela(
+                    conn, tabela, args.destino, args.data_inicio, args.data_fim, args.profissional,
+                    args.paciente, args.completa, fernet, progresso,
+                )
+            print(f"✅ {tabela}: {resultado['linhas']} linhas em {resultado['arquivos']} arquivos "
+                  f"({time.perf_counter() - inicio:.1f} s)")
+            if resultado["falhas"]:
+                print(f"⚠️ {resultado['falhas']} registros com dados médicos que nenhuma chave decifra (exportados sem eles)")
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Gerador de dados sintéticos para benchmarks do sistema de telemonitoramento CEUB.
+
+Popula um PostgreSQL local com profissionais, pacientes, sinais vitais, alertas,
+mensagens e registros de auditoria usando COPY, de forma reprodutível (mesma semente,
+mesmos dados). Nunca execute contra o banco de produção.
+
+Exemplo:
+    python scripts/gerar_dados_sinteticos.py --profissionais 50 --pacientes 5000 --leituras-por-dia 3 --dias 90
+"""
+
+import os
+import io
+import csv
+import sys
+import json
+import random
+import argparse
+from datetime import datetime, timedelta
+
+import psycopg2
+from cryptography.fernet import Fernet
+from dotenv import load_dotenv, find_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+from utils import hash_senha
+from auditoria import garantir_particoes
+from indice_cego import carregar_chave, colunas_indice
+
+# Carrega variáveis do .env
+dotenv_path = find_dotenv()
+load_dotenv(dotenv_path, override=True)
+
+SENHA_PADRAO = "Bench@123"
+DOMINIO_EMAIL = "bench.local"
+TAMANHO_LOTE_COPY = 50000
+
+ESPECIALIDADES = ["Cardiologia", "Pneumologia", "Clínica Médica", "Pediatria", "Geriatria", "Enfermagem"]
+DIAGNOSTICOS = ["Hipertensão", "DPOC", "Insuficiência cardíaca", "Diabetes tipo 2", "Asma", "Pós-operatório", "COVID-19"]
+ACOES_AUDITORIA = ["Login", "Login 2FA", "Envio de mensagem", "Atualização de perfil", "Cadastro de usuário Paciente", "Recuperação de senha"]
+
+TABELAS_SINTETICAS = ["auditoria", "mensagens", "alertas", "sinais_vitais", "pacientes", "profissionais", "usuarios"]
+
+
+def conectar_db():
+    """Estabelece conexão com o banco de dados."""
+    return psycopg2.connect(
+        host=os.getenv("DB_HOST"),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        port=os.getenv("DB_PORT"),
+    )
+
+
+def gerar_usuarios(rng, n_profissionais, n_pacientes, id_inicial, senha_hash):
+    """
+    Gera as linhas da tabela usuarios: primeiro os profissionais, depois os pacientes.
+
+    Returns:
+        generator: Tuplas (id, nome, email, senha, tipo, status, primeiro_acesso).
+    """
+    for i in range(n_profissionais):
+        yield (id_inicial + i, f"Profissional {i + 1}", f"prof{i + 1}@{DOMINIO_EMAIL}", senha_hash, "Profissional", True, False)
+    for i in range(n_pacientes):
+        status = rng.random() > 0.02
+        yield (id_inicial + n_profissionais + i, f"Paciente {i + 1}", f"pac{i + 1}@{DOMINIO_EMAIL}", senha_hash, "Paciente", status, False)
+
+
+def gerar_profissionais(rng, ids_usuarios, id_inicial):
+    """
+    Gera as linhas da tabela profissionais.
+
+    Returns:
+        generator: Tuplas (id, id_usuario, especialidade, registro_profissional).
+    """
+    for i, id_usuario in enumerate(ids_usuarios):
+        yield (id_inicial + i, id_usuario, rng.choice(ESPECIALIDADES), f"CRM-DF {100000 + i}")
+
+
+def gerar_pacientes(rng, ids_usuarios, ids_profissionais_usuario, id_inicial, fernet, chave_indice=None):
+    """
+    Gera as linhas da tabela pacientes com dados médicos criptografados e índices cegos.
+
+    Returns:
+        generator: Tuplas (id, id_usuario, id_profissional_responsavel, dados_medicos, diagnostico_indice, faixa_etaria).
+    """
+    for i, id_usuario in enumerate(ids_usuarios):
+        dados = {"idade": rng.randint(1, 99), "diagnostico": rng.choice(DIAGNOSTICOS)}
+        dados_medicos = fernet.encrypt(json.dumps(dados).encode()).decode()
+        yield (id_inicial + i, id_usuario, rng.choice(ids_profissionais_usuario), dados_medicos, *colunas_indice(chave_indice, dados))
+
+
+def gerar_leitura(rng):
+    """
+    Gera uma leitura de sinais vitais plausível, com uma fração de valores alterados.
+
+    Returns:
+        tuple: (temperatura, pressao, frequencia_cardiaca, saturacao).
+    """
+    temperatura = round(min(max(rng.gauss(36.6, 0.6), 34.0), 41.0), 1)
+    sistolica = int(min(max(rng.gauss(125, 15), 80), 200))
+    diastolica = int(min(max(rng.gauss(80, 10), 50), 120))
+    frequencia = int(min(max(rng.gauss(80, 15), 35), 180))
+    saturacao = int(min(max(rng.gauss(96, 2.5), 75), 100))
+    return temperatura, f"{sistolica}/{diastolica}", frequencia, saturacao
+
+
+def gerar_sinais_vitais(rng, ids_pacientes, leituras_por_dia, dias, data_final, id_inicial):
+    """
+    Gera as leituras de sinais vitais de cada paciente ao longo do período.
+
+    Returns:
+        generator: Tuplas (id, paciente_id, temperatura, pressao, frequencia_cardiaca, saturacao, data_registro).
+    """
+    proximo_id = id_inicial
+    intervalo = timedelta(days=1) / leituras_por_dia
+    for paciente_id in ids_pacientes:
+        inicio = data_final - timedelta(days=dias)
+        for n in range(dias * leituras_por_dia):
+            momento = inicio + n * intervalo + timedelta(minutes=rng.randint(0, 59))
+            yield (proximo_id, paciente_id) + gerar_leitura(rng) + (momento,)
+            proximo_id += 1
+
+
+def gerar_alertas(rng, ids_pacientes, total, dias, data_final, id_inicial):
+    """
+    Gera alertas distribuídos aleatoriamente entre os pacientes.
+
+    Returns:
+        generator: Tuplas (id, paciente_id, tipo_alerta, descricao, status, data_hora).
+    """
+    for i in range(total):
+        momento = data_final - timedelta(seconds=rng.randint(0, dias * 86400))
+        status = "pendente" if rng.random() < 0.3 else "resolvido"
+        yield (id_inicial + i, rng.choice(ids_pacientes), "Sinais vitais", "Saturação baixa: 88% (Mínimo: 90%)", status, momento)
+
+
+def gerar_mensagens(rng, ids_usuarios, total, dias, data_final, id_inicial):
+    """
+    Gera mensagens entre pares aleatórios de usuários.
+
+    Returns:
+        generator: Tuplas (id, id_remetente, id_destinatario, texto, data_envio).
+    """
+    for i in range(total):
+        remetente, destinatario = rng.sample(ids_usuarios, 2)
+        momento = data_final - timedelta(seconds=rng.randint(0, dias * 86400))
+        yield (id_inicial + i, remetente, destinatario, f"Mensagem sintética {i + 1}: como está se sentindo hoje?", momento)
+
+
+def gerar_auditoria(rng, ids_usuarios, total, dias, data_final, id_inicial):
+    """
+    Gera registros de auditoria com ações variadas.
+
+    Returns:
+        generator: Tuplas (id, usuario_id, acao, detalhes, data_hora).
+    """
+    for i in range(total):
+        usuario_id = rng.choice(ids_usuarios)
+        momento = data_final - timedelta(seconds=rng.randint(0, dias * 86400))
+        yield (id_inicial + i, usuario_id, rng.choice(ACOES_AUDITORIA), f"Usuário {usuario_id} (registro sintético)", momento)
+
+
+def copiar_linhas(cursor, tabela, colunas, linhas, tamanho_lote=TAMANHO_LOTE_COPY):
+    """
+    Envia as linhas para o banco via COPY ... FROM STDIN em lotes, sem materializar tudo em memória.
+
+    Returns:
+        int: Número de linhas copiadas.
+    """
+    sql = f"COPY {tabela} ({', '.join(colunas)}) FROM STDIN WITH (FORMAT csv)"
+    total = 0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for linha in linhas:
+        writer.writerow(linha)
+        total += 1
+        if total % tamanho_lote == 0:
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+    if buffer.tell():
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+    return total
+
+
+def proximo_id(cursor, tabela):
+    """Retorna o próximo id livre da tabela."""
+    cursor.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {tabela}")
+    return cursor.fetchone()[0]
+
+
+def ajustar_sequencia(cursor, tabela):
+    """Sincroniza a sequência SERIAL com os ids inseridos explicitamente."""
+    cursor.execute(f"SELECT setval(pg_get_serial_sequence('{tabela}', 'id'), GREATEST(MAX(id), 1)) FROM {tabela}")
+
+
+def gerar_base(conn, args):
+    """
+    Gera e carrega todos os dados sintéticos em uma única transação.
+
+    Returns:
+        dict: Tabela -> número de linhas inseridas.
+    """
+    fernet_key = os.getenv("FERNET_KEY")
+    if not fernet_key:
+        raise Exception("FERNET_KEY não configurada; os dados médicos precisam da mesma chave usada pelo app.")
+    fernet = Fernet(fernet_key.encode())
+    rng = random.Random(args.semente)
+    data_final = datetime.now().replace(microsecond=0)
+    cursor = conn.cursor()
+    resumo = {}
+
+    if args.limpar:
+        cursor.execute(f"TRUNCATE {', '.join(TABELAS_SINTETICAS)} RESTART IDENTITY CASCADE")
+        cursor.execute("TRUNCATE auditoria_acoes_dia")
+
+    id_usuario = proximo_id(cursor, "usuarios")
+    usuarios = list(gerar_usuarios(rng, args.profissionais, args.pacientes, id_usuario, hash_senha(args.senha)))
+    resumo["usuarios"] = copiar_linhas(cursor, "usuarios", ["id", "nome", "email", "senha", "tipo", "status", "primeiro_acesso"], usuarios)
+    ids_usuarios_prof = [u[0] for u in usuarios[:args.profissionais]]
+    ids_usuarios_pac = [u[0] for u in usuarios[args.profissionais:]]
+    ids_usuarios = [u[0] for u in usuarios]
+    del usuarios
+
+    resumo["profissionais"] = copiar_linhas(
+        cursor, "profissionais", ["id", "id_usuario", "especialidade", "registro_profissional"],
+        gerar_profissionais(rng, ids_usuarios_prof, proximo_id(cursor, "profissionais"))
+    )
+
+    id_paciente = proximo_id(cursor, "pacientes")
+    resumo["pacientes"] = copiar_linhas(
+        cursor, "pacientes", ["id", "id_usuario", "id_profissional_responsavel", "dados_medicos", "diagnostico_indice", "faixa_etaria"],
+        gerar_pacientes(rng, ids_usuarios_pac, ids_usuarios_prof, id_paciente, fernet, carregar_chave())
+    )
+    ids_pacientes = list(range(id_paciente, id_paciente + len(ids_usuarios_pac)))
+
+    resumo["sinais_vitais"] = copiar_linhas(
+        cursor, "sinais_vitais", ["id", "paciente_id", "temperatura", "pressao", "frequencia_cardiaca", "saturacao", "data_registro"],
+        gerar_sinais_vitais(rng, ids_pacientes, args.leituras_por_dia, args.dias, data_final, proximo_id(cursor, "sinais_vitais"))
+    )
+    resumo["alertas"] = copiar_linhas(
+        cursor, "alertas", ["id", "paciente_id", "tipo_alerta", "descricao", "status", "data_hora"],
+        gerar_alertas(rng, ids_pacientes, args.alertas, args.dias, data_final, proximo_id(cursor, "alertas"))
+    )
+    resumo["mensagens"] = copiar_linhas(
+        cursor, "mensagens", ["id", "id_remetente", "id_destinatario", "texto", "data_envio"],
+        gerar_mensagens(rng, ids_usuarios, args.mensagens, args.dias, data_final, proximo_id(cursor, "mensagens"))
+    )
+    garantir_particoes(cursor, (data_final - timedelta(days=args.dias)).date())
+    resumo["auditoria"] = copiar_linhas(
+        cursor, "auditoria", ["id", "usuario_id", "acao", "detalhes", "data_hora"],
+        gerar_auditoria(rng, ids_usuarios, args.auditoria, args.dias, data_final, proximo_id(cursor, "auditoria"))
+    )
+
+    for tabela in TABELAS_SINTETICAS:
+        ajustar_sequencia(cursor, tabela)
+    cursor.execute("ANALYZE")
+    conn.commit()
+    return resumo
+
+
+def criar_parser():
+    """Cria o parser de argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos para benchmarks (use apenas em banco local).")
+    parser.add_argument("--profissionais", type=int, default=20)
+    parser.add_argument("--pacientes", type=int, default=1000)
+    parser.add_argument("--leituras-por-dia", type=int, default=3)
+    parser.add_argument("--dias", type=int, default=30)
+    parser.add_argument("--alertas", type=int, default=5000)
+    parser.add_argument("--mensagens", type=int, default=10000)
+    parser.add_argument("--auditoria", type=int, default=50000)
+    parser.add_argument("--senha", default=SENHA_PADRAO, help="Senha de todos os usuários sintéticos")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--limpar", action="store_true", help="Apaga os dados existentes (TRUNCATE) antes de gerar; necessário ao repetir a geração")
+    return parser
+
+
+def main():
+    """Função principal do script."""
+    args = criar_parser().parse_args()
+    if args.profissionais < 1 or args.pacientes < 1 or args.leituras_por_dia < 1:
+        print("❌ São necessários ao menos 1 profissional, 1 paciente e 1 leitura por dia.")
+        sys.exit(1)
+    print("🧪 Gerando dados sintéticos - Telemonitoramento CEUB")
+    conn = conectar_db()
+    try:
+        resumo = gerar_base(conn, args)
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Erro ao gerar dados: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+    for tabela, total in resumo.items():
+        print(f"✅ {tabela}: {total} linhas")
+    print(f"🔑 Senha dos usuários sintéticos: {args.senha}")
+
+
+if __name__ == "__main__":
+    main()
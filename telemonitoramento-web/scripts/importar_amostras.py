@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Importa amostras de alta frequência (oxímetros contínuos) a partir de um CSV.
+
+Colunas: paciente_id, instante, frequencia, saturacao (uma linha por amostra). O arquivo é
+lido em lotes; as amostras de cada paciente são empacotadas em blocos de um minuto e
+mescladas aos blocos já gravados, com um commit por lote.
+
+Em seguida, para cada paciente do arquivo, grava em sinais_vitais uma leitura derivada por
+janela de 15 minutos já encerrada (até a última amostra recebida), com os alertas de
+limites e de tendência. Janelas já derivadas não são repetidas, então o mesmo arquivo ou
+arquivos sobrepostos podem ser importados de novo.
+
+Exemplo:
+    python scripts/importar_amostras.py oximetros.csv
+    python scripts/importar_amostras.py oximetros.csv --linhas-por-lote 200000 --sem-leituras
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+
+import pandas as pd
+from dotenv import load_dotenv, find_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import amostras
+import instrumentacao
+import perfilamento
+import perfis_alerta
+
+# Carrega variáveis do .env
+dotenv_path = find_dotenv()
+load_dotenv(dotenv_path, override=True)
+
+COLUNAS = ["paciente_id", "instante", "frequencia", "saturacao"]
+
+
+def conectar_db():
+    """Estabelece conexão instrumentada com o banco de dados."""
+    return instrumentacao.conectar(
+        host=os.getenv("DB_HOST"),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        port=os.getenv("DB_PORT"),
+    )
+
+
+def criar_parser():
+    """Cria o parser de argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Importa amostras contínuas de pulso e saturação a partir de um CSV.")
+    parser.add_argument("arquivo", help="CSV com paciente_id, instante, frequencia e saturacao")
+    parser.add_argument("--linhas-por-lote", type=int, default=500_000, help="Linhas lidas e gravadas por transação")
+    parser.add_argument("--sem-leituras", action="store_true", help="Não deriva leituras pontuais nem alertas")
+    return parser
+
+
+def importar(conn, arquivo, linhas_por_lote):
+    """
+    Grava as amostras do arquivo, um lote por transação.
+
+    Returns:
+        tuple: (amostras lidas, minutos gravados, dict paciente_id -> (primeiro, último instante)).
+    """
+    lidas = minutos = 0
+    intervalos = {}
+    cursor = conn.cursor()
+    for lote in pd.read_csv(arquivo, usecols=COLUNAS, parse_dates=["instante"], chunksize=linhas_por_lote):
+        for paciente_id, grupo in lote.groupby("paciente_id"):
+            paciente_id = int(paciente_id)
+            minutos += amostras.gravar_amostras(cursor, paciente_id, grupo["instante"].to_numpy(),
+                                                grupo["frequencia"].to_numpy(), grupo["saturacao"].to_numpy())
+            primeiro, ultimo = grupo["instante"].min().to_pydatetime(), grupo["instante"].max().to_pydatetime()
+            anterior = intervalos.get(paciente_id, (primeiro, ultimo))
+            intervalos[paciente_id] = (min(anterior[0], primeiro), max(anterior[1], ultimo))
+        conn.commit()
+        lidas += len(lote)
+        print(f"⏳ {lidas} amostras, {minutos} minutos gravados", end="\r", flush=True)
+    print()
+    return lidas, minutos, intervalos
+
+
+def derivar_leituras(conn, intervalos):
+    """
+    Grava as leituras pontuais (e seus alertas) de cada paciente, um commit por paciente.
+
+    Returns:
+        tuple: (leituras gravadas, alertas gravados).
+    """
+    indice = perfis_alerta.obter_indice()
+    indice.sincronizar(conectar_db, intervalos)
+    leituras = alertas = 0
+    cursor = conn.cursor()
+    agora = datetime.now()
+    for paciente_id, (primeiro, ultimo) in intervalos.items():
+        gravadas, novos = amostras.registrar_pontuais(
+            cursor, paciente_id, primeiro, min(ultimo, agora), indice.limites(paciente_id)
+        )
+        conn.commit()
+        leituras += gravadas
+        alertas += novos
+    return leituras, alertas
+
+
+def main():
+    """Função principal do script."""
+    args = criar_parser().parse_args()
+    conn = conectar_db()
+    inicio = time.perf_counter()
+    try:
+        with instrumentacao.escopo("job:importar_amostras"), perfilamento.perfil("job:importar_amostras"):
+            lidas, minutos, intervalos = importar(conn, args.arquivo, args.linhas_por_lote)
+            print(f"✅ {lidas} amostras de {len(intervalos)} pacientes em {minutos} blocos de um minuto")
+            if not args.sem_leituras:
+                leituras, alertas = derivar_leituras(conn, intervalos)
+                print(f"✅ {leituras} leituras derivadas gravadas em sinais_vitais, {alertas} alertas")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    print(f"⏱️ Concluído em {time.perf_counter() - inicio:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
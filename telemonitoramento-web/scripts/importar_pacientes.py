@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Cadastro de pacientes em lote a partir de um CSV.
+
+Colunas obrigatórias: nome, idade, diagnostico. Opcionais: email (padrão: nome.sobrenome@paciente.com),
+senha (padrão: a senha inicial do formulário) e profissional (e-mail, ID de usuário ou registro
+profissional; sem ela, usa --profissional-padrao).
+
+Cada lote é gravado em uma transação; o relatório por linha (importado, duplicado, inválido
+ou falha) pode ser salvo em CSV com --relatorio.
+
+Exemplo:
+    python scripts/importar_pacientes.py clinica.csv --autor-id 1 --profissional-padrao 12 --relatorio relatorio.csv
+"""
+
+import os
+import sys
+import time
+import argparse
+
+from dotenv import load_dotenv, find_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import criptografia
+import indice_cego
+import instrumentacao
+import perfilamento
+import pacientes_lote
+
+# Carrega variáveis do .env
+dotenv_path = find_dotenv()
+load_dotenv(dotenv_path, override=True)
+
+
+def conectar_db():
+    """Estabelece conexão instrumentada com o banco de dados."""
+    return instrumentacao.conectar(
+        host=os.getenv("DB_HOST"),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        port=os.getenv("DB_PORT"),
+    )
+
+
+def criar_parser():
+    """Cria o parser de argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Cadastra pacientes em lote a partir de um CSV.")
+    parser.add_argument("arquivo", help="CSV de pacientes")
+    parser.add_argument("--autor-id", type=int, required=True, help="ID do administrador registrado na auditoria")
+    parser.add_argument("--profissional-padrao", type=int, help="ID de usuário do profissional das linhas sem profissional")
+    parser.add_argument("--senha-padrao", default=pacientes_lote.SENHA_INICIAL, help="Senha inicial das linhas sem senha")
+    parser.add_argument("--tamanho-lote", type=int, default=pacientes_lote.TAMANHO_LOTE)
+    parser.add_argument("--trabalhadores", type=int, help="Processos de criptografia (padrão: número de CPUs)")
+    parser.add_argument("--relatorio", help="Grava o relatório por linha em CSV")
+    return parser
+
+
+def main():
+    """Função principal do script."""
+    args = criar_parser().parse_args()
+    try:
+        chave = criptografia.chaves_configuradas()[0]
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    def progresso(resultados):
+        print(f"⏳ {len(resultados)} linhas processadas", end="\r", flush=True)
+
+    inicio = time.perf_counter()
+    conn = conectar_db()
+    try:
+        with instrumentacao.escopo("job:importar_pacientes"), perfilamento.perfil("job:importar_pacientes"), \
+                open(args.arquivo, encoding="utf-8-sig", newline="") as arquivo:
+            resultados = pacientes_lote.importar_pacientes(
+                conn, arquivo, chave, args.autor_id, args.profissional_padrao, args.senha_padrao,
+                args.tamanho_lote, args.trabalhadores, progresso, indice_cego.carregar_chave(),
+            )
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+    duracao = time.perf_counter() - inicio
+
+    resumo = pacientes_lote.resumir_resultados(resultados)
+    print(f"✅ {resumo[pacientes_lote.IMPORTADO]} pacientes importados em {duracao:.1f} s")
+    for situacao in (pacientes_lote.DUPLICADO, pacientes_lote.INVALIDO, pacientes_lote.FALHA):
+        if resumo[situacao]:
+            print(f"⚠️ {resumo[situacao]} linhas com situação '{situacao}'")
+    if args.relatorio:
+        with open(args.relatorio, "w", encoding="utf-8", newline="") as destino:
+            pacientes_lote.escrever_relatorio(resultados, destino)
+        print(f"📄 Relatório gravado em {args.relatorio}")
+    else:
+        for resultado in resultados:
+            if resultado.situacao != pacientes_lote.IMPORTADO:
+                print(f"   linha {resultado.linha} ({resultado.email}): {resultado.situacao} - {resultado.detalhe}")
+    sys.exit(1 if resumo[pacientes_lote.FALHA] else 0)
+
+
+if __name__ == "__main__":
+    main()
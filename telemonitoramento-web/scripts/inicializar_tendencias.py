@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Inicializa a linha de base de tendência de cada paciente a partir de sinais_vitais.
+
+Depois disso cada nova leitura registrada pelo sistema atualiza o estado em O(1), sem
+reler o histórico. Rode novamente após cargas feitas por fora do sistema (por exemplo
+scripts/gerar_dados_sinteticos.py): o estado é recalculado do zero para todos os pacientes.
+
+Exemplo:
+    python scripts/inicializar_tendencias.py
+    python scripts/inicializar_tendencias.py --pacientes-por-lote 200
+"""
+
+import os
+import sys
+import time
+import argparse
+
+from dotenv import load_dotenv, find_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import instrumentacao
+import perfilamento
+import tendencias
+
+# Carrega variáveis do .env
+dotenv_path = find_dotenv()
+load_dotenv(dotenv_path, override=True)
+
+
+def conectar_db():
+    """Estabelece conexão instrumentada com o banco de dados."""
+    return instrumentacao.conectar(
+        host=os.getenv("DB_HOST"),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        port=os.getenv("DB_PORT"),
+    )
+
+
+def criar_parser():
+    """Cria o parser de argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Inicializa os estados de tendência a partir do histórico de sinais vitais.")
+    parser.add_argument("--pacientes-por-lote", type=int, default=tendencias.PACIENTES_POR_LOTE,
+                        help="Pacientes lidos e calculados por vez (limita a memória)")
+    return parser
+
+
+def main():
+    """Função principal do script."""
+    args = criar_parser().parse_args()
+
+    def progresso(pacientes, leituras):
+        print(f"⏳ {pacientes} pacientes, {leituras} leituras", end="\r", flush=True)
+
+    conn = conectar_db()
+    inicio = time.perf_counter()
+    try:
+        with instrumentacao.escopo("job:inicializar_tendencias"), perfilamento.perfil("job:inicializar_tendencias"):
+            pacientes, leituras = tendencias.inicializar_estados(conn, args.pacientes_por_lote, progresso)
+    finally:
+        conn.close()
+    print()
+    print(f"✅ Linha de base de {pacientes} pacientes calculada a partir de {leituras} leituras em {time.perf_counter() - inicio:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Manutenção do log de auditoria particionado.
+
+Subcomandos:
+    migrar      converte a tabela auditoria antiga (não particionada) em particionada
+    particoes   cria as partições mensais dos próximos meses (agende diariamente)
+    arquivar    exporta as partições frias para Parquet/CSV.gz e as remove do banco
+    catalogo    recalcula o catálogo de ações por dia
+    consultar   pesquisa nos arquivos exportados, sem acessar o banco
+
+Exemplo:
+    python scripts/manter_auditoria.py particoes --meses-a-frente 3
+    python scripts/manter_auditoria.py arquivar --meses-quentes 6 --formato parquet
+    python scripts/manter_auditoria.py consultar --acao Login --data-inicio 2024-01-01 --data-fim 2024-01-31
+"""
+
+import os
+import sys
+import argparse
+from datetime import date
+
+from dotenv import load_dotenv, find_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import instrumentacao
+import perfilamento
+import auditoria
+
+# Carrega variáveis do .env
+dotenv_path = find_dotenv()
+load_dotenv(dotenv_path, override=True)
+
+
+def conectar_db():
+    """Estabelece conexão instrumentada com o banco de dados."""
+    return instrumentacao.conectar(
+        host=os.getenv("DB_HOST"),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        port=os.getenv("DB_PORT"),
+    )
+
+
+def migrar(args):
+    conn = conectar_db()
+    try:
+        migradas = auditoria.migrar_tabela_simples(conn.cursor())
+        conn.commit()
+    finally:
+        conn.close()
+    if migradas is None:
+        print("✅ A tabela auditoria já é particionada.")
+    else:
+        print(f"✅ Tabela auditoria convertida: {migradas} registros migrados.")
+
+
+def particoes(args):
+    conn = conectar_db()
+    try:
+        criadas = auditoria.garantir_particoes(conn.cursor(), meses_a_frente=args.meses_a_frente)
+        conn.commit()
+    finally:
+        conn.close()
+    print(f"✅ Partições criadas: {', '.join(criadas) if criadas else 'nenhuma (já existiam)'}")
+
+
+def arquivar(args):
+    conn = conectar_db()
+    try:
+        frias = auditoria.particoes_frias(auditoria.listar_particoes(conn.cursor()), quentes=args.meses_quentes)
+        if not frias:
+            print("✅ Nenhuma partição fria para arquivar.")
+        for nome, mes in frias:
+            # Uma transação por partição: uma falha não desfaz os meses já arquivados
+            try:
+                caminho, linhas = auditoria.arquivar_particao(conn, nome, mes, args.diretorio, args.formato)
+            except Exception as e:
+                conn.rollback()
+                print(f"❌ {nome}: {e}")
+                sys.exit(1)
+            print(f"📦 {nome}: {linhas} registros -> {caminho}")
+    finally:
+        conn.close()
+
+
+def catalogo(args):
+    conn = conectar_db()
+    try:
+        auditoria.reconstruir_catalogo(conn.cursor())
+        conn.commit()
+    finally:
+        conn.close()
+    print("✅ Catálogo de ações recalculado.")
+
+
+def consultar(args):
+    df = auditoria.consultar_arquivos(
+        args.diretorio, args.usuario_id, args.acao, args.data_inicio, args.data_fim, args.texto, args.limite
+    )
+    if df.empty:
+        print("Nenhum registro arquivado encontrado para os filtros informados.")
+    elif args.saida:
+        df.to_csv(args.saida, index=False)
+        print(f"✅ {len(df)} registros gravados em {args.saida}")
+    else:
+        print(df.to_string(index=False))
+
+
+def criar_parser():
+    """Cria o parser de argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Manutenção do log de auditoria particionado.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    sub.add_parser("migrar", help="Converte a tabela antiga para particionada").set_defaults(funcao=migrar)
+
+    p = sub.add_parser("particoes", help="Cria as partições dos próximos meses")
+    p.add_argument("--meses-a-frente", type=int, default=3)
+    p.set_defaults(funcao=particoes)
+
+    p = sub.add_parser("arquivar", help="Exporta e remove as partições frias")
+    p.add_argument("--meses-quentes", type=int, default=None, help="Meses mantidos no banco (padrão: AUDITORIA_MESES_QUENTES)")
+    p.add_argument("--formato", choices=["parquet", "csv"], default="parquet")
+    p.add_argument("--diretorio", default=None, help="Destino (padrão: ARQUIVO_AUDITORIA_DIR)")
+    p.set_defaults(funcao=arquivar)
+
+    sub.add_parser("catalogo", help="Recalcula o catálogo de ações por dia").set_defaults(funcao=catalogo)
+
+    p = sub.add_parser("consultar", help="Pesquisa nos arquivos exportados")
+    p.add_argument("--diretorio", default=None)
+    p.add_argument("--usuario-id", type=int)
+    p.add_argument("--acao")
+    p.add_argument("--data-inicio", type=date.fromisoformat)
+    p.add_argument("--data-fim", type=date.fromisoformat)
+    p.add_argument("--texto", help="Trecho procurado nos detalhes")
+    p.add_argument("--limite", type=int, default=100)
+    p.add_argument("--saida", help="Grava o resultado em CSV")
+    p.set_defaults(funcao=consultar)
+    return parser
+
+
+def main():
+    """Função principal do script."""
+    args = criar_parser().parse_args()
+    with instrumentacao.escopo(f"job:auditoria:{args.comando}"), perfilamento.perfil(f"job:auditoria:{args.comando}"):
+        args.funcao(args)
+
+
+if __name__ == "__main__":
+    main()
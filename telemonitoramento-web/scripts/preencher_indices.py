@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Preenche os índices cegos (diagnóstico e faixa etária) dos pacientes já cadastrados.
+
+Percorre os pacientes em lotes ordenados por id, descriptografa os dados médicos de cada
+lote, grava diagnostico_indice/faixa_etaria e confirma o lote. Sem --recalcular, só
+linhas com índice vazio são lidas: uma nova execução continua de onde a anterior parou.
+
+Exemplo:
+    python scripts/preencher_indices.py --tamanho-lote 1000
+    python scripts/preencher_indices.py --recalcular   # após trocar CHAVE_INDICE_CEGO
+"""
+
+import os
+import sys
+import argparse
+
+from dotenv import load_dotenv, find_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import instrumentacao
+import perfilamento
+import criptografia
+import indice_cego
+
+# Carrega variáveis do .env
+dotenv_path = find_dotenv()
+load_dotenv(dotenv_path, override=True)
+
+
+def conectar_db():
+    """Estabelece conexão instrumentada com o banco de dados."""
+    return instrumentacao.conectar(
+        host=os.getenv("DB_HOST"),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        port=os.getenv("DB_PORT"),
+    )
+
+
+def criar_parser():
+    """Cria o parser de argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Preenche os índices cegos dos pacientes existentes.")
+    parser.add_argument("--tamanho-lote", type=int, default=indice_cego.TAMANHO_LOTE)
+    parser.add_argument("--recalcular", action="store_true", help="Recalcula todas as linhas, não só as pendentes")
+    return parser
+
+
+def main():
+    """Função principal do script."""
+    args = criar_parser().parse_args()
+    try:
+        fernet = criptografia.criar_fernet(criptografia.chaves_configuradas())
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    chave = indice_cego.carregar_chave()
+    if chave is None:
+        print("⚠️ CHAVE_INDICE_CEGO não configurada: apenas a faixa etária será preenchida.")
+
+    def progresso(lidas, atualizadas):
+        print(f"⏳ {lidas} pacientes lidos, {atualizadas} atualizados", end="\r", flush=True)
+
+    conn = conectar_db()
+    try:
+        with instrumentacao.escopo("job:preencher_indices"), perfilamento.perfil("job:preencher_indices"):
+            indice_cego.criar_estrutura(conn.cursor())
+            conn.commit()
+            lidas, atualizadas, falhas = indice_cego.preencher_indices(
+                conn, fernet, chave, args.tamanho_lote, args.recalcular, progresso
+            )
+    except KeyboardInterrupt:
+        conn.rollback()
+        print("\n⏸️ Interrompido. Os lotes já confirmados foram mantidos; execute novamente para continuar.")
+        sys.exit(130)
+    finally:
+        conn.close()
+    print()
+    print(f"✅ Índices preenchidos: {lidas} pacientes lidos, {atualizadas} atualizados.")
+    if falhas:
+        print(f"❌ {len(falhas)} pacientes com dados médicos que não puderam ser decifrados (veja o log).")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
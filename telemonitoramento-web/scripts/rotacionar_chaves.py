@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Rotação das chaves de criptografia dos dados médicos, sem parada.
+
+Subcomandos:
+    gerar            gera uma nova chave e mostra os passos da rotação
+    recriptografar   recifra pacientes.dados_medicos com a chave atual (retomável)
+    status           mostra o andamento e quantos registros ainda usam cada chave
+
+Passos:
+    1. python scripts/rotacionar_chaves.py gerar
+    2. mova a FERNET_KEY atual para FERNET_KEYS_ANTIGAS e configure a nova em FERNET_KEY
+    3. reinicie o app (novas gravações já usam a nova chave; as antigas continuam legíveis)
+    4. python scripts/rotacionar_chaves.py recriptografar --linhas-por-segundo 2000
+    5. python scripts/rotacionar_chaves.py status  (nenhum registro na chave antiga) e remova-a
+
+Interromper a recriptografia (Ctrl+C) é seguro: a próxima execução continua do último lote confirmado.
+"""
+
+import os
+import sys
+import argparse
+
+from cryptography.fernet import Fernet
+from dotenv import load_dotenv, find_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import instrumentacao
+import perfilamento
+import criptografia
+
+# Carrega variáveis do .env
+dotenv_path = find_dotenv()
+load_dotenv(dotenv_path, override=True)
+
+
+def conectar_db():
+    """Estabelece conexão instrumentada com o banco de dados."""
+    return instrumentacao.conectar(
+        host=os.getenv("DB_HOST"),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        port=os.getenv("DB_PORT"),
+    )
+
+
+def gerar(args):
+    nova = Fernet.generate_key().decode()
+    atual = os.getenv("FERNET_KEY")
+    antigas = [c for c in os.getenv("FERNET_KEYS_ANTIGAS", "").split(",") if c.strip()]
+    print("🔑 Nova chave gerada. Atualize o .env:")
+    print(f"FERNET_KEY={nova}")
+    if atual:
+        print(f"FERNET_KEYS_ANTIGAS={','.join([atual] + antigas)}")
+    print("Depois reinicie o app e execute: python scripts/rotacionar_chaves.py recriptografar")
+
+
+def recriptografar(args):
+    chaves = criptografia.chaves_configuradas()
+    if len(chaves) == 1:
+        print("ℹ️ Nenhuma chave antiga configurada (FERNET_KEYS_ANTIGAS); os registros só serão conferidos.")
+
+    def progresso(p):
+        total = p.processados + p.restantes
+        percentual = 100 * p.processados / total if total else 100
+        print(f"⏳ {p.processados}/{total} ({percentual:.1f}%) | recifrados: {p.recriptografados} | "
+              f"falhas: {p.falhas} | {p.linhas_por_segundo:.0f} linhas/s | último id: {p.ultimo_id}", end="\r", flush=True)
+
+    conn = conectar_db()
+    try:
+        final = criptografia.recriptografar(
+            conn, chaves, args.tamanho_lote, args.linhas_por_segundo, args.reiniciar, progresso
+        )
+    except KeyboardInterrupt:
+        conn.rollback()
+        print("\n⏸️ Interrompido. Execute novamente para continuar do último lote confirmado.")
+        sys.exit(130)
+    finally:
+        conn.close()
+    print()
+    print(f"✅ Recriptografia concluída: {final.processados} registros conferidos, {final.recriptografados} recifrados.")
+    if final.falhas:
+        print(f"❌ {final.falhas} registros não puderam ser decifrados com nenhuma chave configurada (veja o log).")
+        sys.exit(1)
+
+
+def status(args):
+    chaves = criptografia.chaves_configuradas()
+    digitais = [criptografia.digital_chave(c) for c in chaves]
+    conn = conectar_db()
+    try:
+        cursor = conn.cursor()
+        criptografia.criar_estrutura(cursor)
+        conn.commit()
+        retomada = criptografia.ler_retomada(cursor, digitais[0])
+        contagem = criptografia.contar_por_chave(conn, chaves)
+    finally:
+        conn.close()
+    if retomada is None:
+        print(f"Chave atual {digitais[0]}: recriptografia ainda não executada.")
+    else:
+        ultimo_id, processados, recriptografados, falhas, concluido_em = retomada
+        situacao = f"concluída em {concluido_em:%Y-%m-%d %H:%M}" if concluido_em else f"em andamento (último id {ultimo_id})"
+        print(f"Chave atual {digitais[0]}: {situacao}; {processados} conferidos, {recriptografados} recifrados, {falhas} falhas.")
+    for i, digital in enumerate(digitais):
+        print(f"  {'atual ' if i == 0 else 'antiga'} {digital}: {contagem[digital]} registros")
+    if contagem["nenhuma"]:
+        print(f"  ⚠️ {contagem['nenhuma']} registros não decifram com nenhuma chave configurada")
+
+
+def criar_parser():
+    """Cria o parser de argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Rotação das chaves de criptografia dos dados médicos.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    sub.add_parser("gerar", help="Gera uma nova chave").set_defaults(funcao=gerar)
+
+    p = sub.add_parser("recriptografar", help="Recifra os dados médicos com a chave atual")
+    p.add_argument("--tamanho-lote", type=int, default=criptografia.TAMANHO_LOTE)
+    p.add_argument("--linhas-por-segundo", type=float, default=None, help="Limite de ritmo (padrão: sem limite)")
+    p.add_argument("--reiniciar", action="store_true", help="Ignora o ponto de retomada e recomeça do início")
+    p.set_defaults(funcao=recriptografar)
+
+    sub.add_parser("status", help="Andamento e registros por chave").set_defaults(funcao=status)
+    return parser
+
+
+def main():
+    """Função principal do script."""
+    args = criar_parser().parse_args()
+    try:
+        with instrumentacao.escopo(f"job:chaves:{args.comando}"), perfilamento.perfil(f"job:chaves:{args.comando}"):
+            args.funcao(args)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,25 @@ Cria todas as tabelas necessárias e insere dados iniciais.
 """
 
 import os
+import sys
 import psycopg2
 from dotenv import load_dotenv, find_dotenv
 import hashlib
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import adesao
+import amostras
+import auditoria
+import escore_risco
+import criptografia
+import indice_cego
+import notificacoes
+import perfis_alerta
+import seletores
+import tendencias
+import ultimos_sinais
+
 # Carregar variáveis de ambiente
 dotenv_path = find_dotenv()
 load_dotenv(dotenv_path, override=True)
@@ -19,6 +34,28 @@ DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_PORT = os.getenv("DB_PORT")
 
+# Índices que sustentam os filtros e ordenações das telas (relatórios, mensagens, dashboard);
+# os da auditoria são criados por auditoria.criar_estrutura
+INDICES = [
+    "CREATE INDEX IF NOT EXISTS idx_profissionais_usuario ON profissionais (id_usuario)",
+    "CREATE INDEX IF NOT EXISTS idx_pacientes_usuario ON pacientes (id_usuario)",
+    "CREATE INDEX IF NOT EXISTS idx_pacientes_profissional ON pacientes (id_profissional_responsavel)",
+    "CREATE INDEX IF NOT EXISTS idx_sinais_paciente_data_id ON sinais_vitais (paciente_id, data_registro DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_sinais_data_id ON sinais_vitais (data_registro, id)",
+    "CREATE INDEX IF NOT EXISTS idx_alertas_data ON alertas (data_hora)",
+    "CREATE INDEX IF NOT EXISTS idx_alertas_status_data ON alertas (status, data_hora)",
+    "CREATE INDEX IF NOT EXISTS idx_alertas_paciente ON alertas (paciente_id)",
+    "CREATE INDEX IF NOT EXISTS idx_mensagens_remetente_data ON mensagens (id_remetente, data_envio DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_mensagens_destinatario_data ON mensagens (id_destinatario, data_envio DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_mensagens_data ON mensagens (data_envio DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_mensagens_busca ON mensagens USING GIN (busca)",
+]
+
+# Colunas de busca textual mantidas pelo banco a cada INSERT/UPDATE (a da auditoria fica em auditoria.py)
+COLUNAS_BUSCA = [
+    "ALTER TABLE mensagens ADD COLUMN IF NOT EXISTS busca tsvector GENERATED ALWAYS AS (to_tsvector('portuguese', texto)) STORED",
+]
+
 def hash_senha(senha):
     """Gera hash SHA-256 da senha."""
     return hashlib.sha256(senha.encode()).hexdigest()
@@ -33,6 +70,11 @@ def conectar_db():
         port=DB_PORT,
     )
 
+def verificar_tabela(cursor, tabela):
+    """Indica se a tabela existe no esquema public."""
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (f"public.{tabela}",))
+    return cursor.fetchone()[0]
+
 def criar_tabelas():
     """Cria todas as tabelas necessárias para o sistema."""
     
@@ -79,6 +121,8 @@ def criar_tabelas():
         )
     """)
     print("✅ Tabela 'pacientes' criada/verificada")
+    # Índices cegos (diagnóstico e faixa etária) para busca sem descriptografar
+    indice_cego.criar_estrutura(cursor)
     
     # Tabela de sinais vitais
     cursor.execute("""
@@ -119,16 +163,13 @@ def criar_tabelas():
     """)
     print("✅ Tabela 'mensagens' criada/verificada")
     
-    # Tabela de auditoria
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS auditoria (
-            id SERIAL PRIMARY KEY,
-            usuario_id INTEGER NOT NULL REFERENCES usuarios(id),
-            acao VARCHAR(100) NOT NULL,
-            detalhes TEXT,
-            data_hora TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
+    # Tabela de auditoria (particionada por mês) e catálogo de ações
+    if auditoria.tabela_particionada(cursor) or not verificar_tabela(cursor, "auditoria"):
+        auditoria.criar_estrutura(cursor)
+    else:
+        migradas = auditoria.migrar_tabela_simples(cursor)
+        print(f"✅ Tabela 'auditoria' convertida para particionada ({migradas} registros migrados)")
+    auditoria.garantir_particoes(cursor)
     print("✅ Tabela 'auditoria' criada/verificada")
     
     # Tabela de parâmetros de alerta
@@ -146,6 +187,42 @@ def criar_tabelas():
         )
     """)
     print("✅ Tabela 'parametros_alerta' criada/verificada")
+    # Perfis de limites por paciente/profissional e ajustes individuais (herdam dos globais)
+    perfis_alerta.criar_estrutura(cursor)
+    print("✅ Tabelas 'perfis_alerta' e 'limites_paciente' criadas/verificadas")
+    # Linha de base de cada paciente para os alertas de tendência
+    tendencias.criar_estrutura(cursor)
+    print("✅ Tabela 'tendencias_estado' criada/verificada")
+    # Escore de alerta precoce gravado em cada leitura e fila de prioridades dos profissionais
+    escore_risco.criar_estrutura(cursor)
+    print("✅ Coluna 'sinais_vitais.escore' e tabela 'fila_prioridade' criadas/verificadas")
+    # Adesão diária (mantida por trigger) e fila de lembretes por e-mail
+    adesao.criar_estrutura(cursor)
+    print("✅ Tabelas 'adesao_diaria' e 'lembretes' criadas/verificadas")
+    # Últimos valores e séries recentes de cada paciente (visão geral)
+    ultimos_sinais.criar_estrutura(cursor)
+    print("✅ Tabela 'ultimos_sinais' criada/verificada")
+    # Amostras contínuas de oxímetros, em blocos de um minuto, e suas leituras derivadas
+    amostras.criar_estrutura(cursor)
+    print("✅ Tabelas 'amostras_continuas' e 'leituras_continuas' criadas/verificadas")
+    
+    # Ponto de retomada da recriptografia na rotação de chaves
+    criptografia.criar_estrutura(cursor)
+    print("✅ Tabela 'rotacao_chaves' criada/verificada")
+    
+    # Índices das consultas mais usadas (verificados por scripts/verificar_planos.py)
+    for coluna in COLUNAS_BUSCA:
+        cursor.execute(coluna)
+    for indice in INDICES:
+        cursor.execute(indice)
+    print(f"✅ {len(INDICES)} índices criados/verificados")
+    # Trigramas (pg_trgm) para os seletores com busca de pacientes e usuários
+    seletores.criar_estrutura(cursor)
+    print("✅ Índices de busca dos seletores criados/verificados")
+    
+    # Notificações de alterações (LISTEN/NOTIFY) para o painel ao vivo
+    notificacoes.criar_gatilhos(cursor)
+    print("✅ Triggers de notificação criados/verificados")
     
     conn.commit()
     conn.close()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Simula limites globais de alerta sobre o histórico de sinais vitais.
+
+Compara os alertas que os limites atuais e os candidatos gerariam no período, por dia, por
+sinal vital e por profissional. Campos não informados mantêm o valor atual; perfis e
+ajustes por paciente continuam valendo. Com --aplicar, grava os alertas resultantes
+(status "retroativo"), substituindo os de uma aplicação anterior no mesmo período.
+
+Exemplo:
+    python scripts/simular_alertas.py --sat-min 92 --temp-max 37.8 --dias 365
+    python scripts/simular_alertas.py --sat-min 92 --inicio 2024-01-01 --fim 2024-07-01 --aplicar
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import date, timedelta
+
+from dotenv import load_dotenv, find_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import instrumentacao
+import perfilamento
+import simulador_alertas
+
+# Carrega variáveis do .env
+dotenv_path = find_dotenv()
+load_dotenv(dotenv_path, override=True)
+
+PARAMETROS_CONEXAO = {
+    "host": os.getenv("DB_HOST"),
+    "database": os.getenv("DB_NAME"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASSWORD"),
+    "port": os.getenv("DB_PORT"),
+}
+
+
+def conectar_db():
+    """Estabelece conexão instrumentada com o banco de dados."""
+    return instrumentacao.conectar(**PARAMETROS_CONEXAO)
+
+
+def criar_parser():
+    """Cria o parser de argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Simula limites de alerta sobre o histórico de sinais vitais.")
+    parser.add_argument("--temp-min", type=float)
+    parser.add_argument("--temp-max", type=float)
+    parser.add_argument("--freq-min", type=int)
+    parser.add_argument("--freq-max", type=int)
+    parser.add_argument("--sat-min", type=int)
+    parser.add_argument("--pressao-min", help="Ex.: 90/60")
+    parser.add_argument("--pressao-max", help="Ex.: 140/90")
+    parser.add_argument("--inicio", type=date.fromisoformat, help="Início do período (padrão: --dias atrás)")
+    parser.add_argument("--fim", type=date.fromisoformat, help="Fim do período, exclusivo (padrão: amanhã)")
+    parser.add_argument("--dias", type=int, default=365, help="Tamanho do período quando --inicio não é informado")
+    parser.add_argument("--trabalhadores", type=int, help="Processos (padrão: número de CPUs)")
+    parser.add_argument("--aplicar", action="store_true", help="Grava os alertas resultantes")
+    parser.add_argument("--todos", action="store_true",
+                        help="Com --aplicar, grava também os alertas que os limites atuais já geram (dados anteriores à avaliação na gravação)")
+    return parser
+
+
+def main():
+    """Função principal do script."""
+    args = criar_parser().parse_args()
+    candidatos = {campo: getattr(args, campo) for campo in simulador_alertas.CAMPOS if getattr(args, campo) is not None}
+    fim = args.fim or date.today() + timedelta(days=1)
+    inicio = args.inicio or fim - timedelta(days=args.dias)
+
+    def progresso(concluidas, total):
+        print(f"⏳ {concluidas}/{total} partições avaliadas", end="\r", flush=True)
+
+    conn = conectar_db()
+    inicio_execucao = time.perf_counter()
+    try:
+        with instrumentacao.escopo("job:simular_alertas"), perfilamento.perfil("job:simular_alertas"):
+            resultado = simulador_alertas.simular(
+                conn, PARAMETROS_CONEXAO, candidatos, inicio, fim, args.trabalhadores,
+                aplicar=args.aplicar, apenas_novos=not args.todos, progresso=progresso,
+            )
+            nomes = simulador_alertas.nomes_profissionais(conn.cursor(), resultado.por_profissional)
+    finally:
+        conn.close()
+    print()
+    atuais = sum(a for a, _ in resultado.por_vital.values())
+    novos = sum(c for _, c in resultado.por_vital.values())
+    print(f"✅ {resultado.leituras} leituras de {inicio} a {fim} em {time.perf_counter() - inicio_execucao:.1f} s")
+    print(f"📊 Alertas: {atuais} com os limites atuais, {novos} com os candidatos ({novos - atuais:+d})")
+    print("\nPor sinal vital:")
+    print(simulador_alertas.tabela_resultado(resultado.por_vital, "Sinal").to_string(index=False))
+    print("\nProfissionais com maior variação:")
+    por_profissional = simulador_alertas.tabela_resultado(
+        {nomes.get(k, f"ID {k}"): v for k, v in resultado.por_profissional.items()}, "Profissional"
+    )
+    print(por_profissional.sort_values("Diferença", key=abs, ascending=False).head(10).to_string(index=False))
+    if args.aplicar:
+        print(f"\n✅ {resultado.alertas_gravados} alertas retroativos gravados.")
+
+
+if __name__ == "__main__":
+    main()
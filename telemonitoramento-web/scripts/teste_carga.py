@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Teste de carga com sessões concorrentes executando o script real do Streamlit.
+
+Cada sessão simulada usa o AppTest (streamlit.testing) sobre telemonitoramento/app.py:
+faz login, recebe o código 2FA por um servidor SMTP falso, valida o código e navega
+pelas opções do menu. O script de cada sessão roda em uma thread própria, como no
+servidor do Streamlit, todas no mesmo processo.
+
+Para cada nível de concorrência o relatório traz vazão, latências por etapa
+(p50/p95/p99), conexões abertas no PostgreSQL e memória do processo, e indica o maior
+nível que ainda respeita o SLO informado.
+
+Use um banco populado por scripts/gerar_dados_sinteticos.py, nunca o de produção.
+
+Exemplo:
+    python scripts/teste_carga.py --niveis 10 50 100 200 --navegacoes 5 --saida carga.json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import smtplib
+import argparse
+import threading
+from datetime import datetime
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+from dotenv import load_dotenv, find_dotenv
+
+DIR_APP = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+sys.path.insert(0, DIR_APP)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import instrumentacao
+from scripts.benchmark import percentil
+
+# Carrega variáveis do .env
+dotenv_path = find_dotenv()
+load_dotenv(dotenv_path, override=True)
+
+SCRIPT_APP = os.path.join(DIR_APP, "app.py")
+SENHA_PADRAO = "Bench@123"
+DOMINIO_EMAIL = "bench.local"
+OPCOES_NAVEGACAO = ["Pacientes", "Sinais Vitais", "Relatórios", "Mensagens", "Ajuda"]
+
+
+def conectar_db():
+    """Estabelece conexão com o banco de dados."""
+    return psycopg2.connect(
+        host=os.getenv("DB_HOST"),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        port=os.getenv("DB_PORT"),
+    )
+
+
+class CaixaPostal:
+    """Guarda as mensagens enviadas pelo SMTP falso, por destinatário."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.mensagens = {}
+
+    def entregar(self, msg):
+        corpo = msg.get_payload(decode=True).decode(msg.get_content_charset() or "utf-8")
+        with self.lock:
+            self.mensagens.setdefault(msg["To"], []).append((msg["Subject"], corpo))
+
+    def ultimo_codigo(self, email):
+        """Retorna o último código de 6 dígitos enviado ao e-mail (ou None)."""
+        with self.lock:
+            for assunto, corpo in reversed(self.mensagens.get(email, [])):
+                encontrado = re.search(r"\b(\d{6})\b", corpo)
+                if encontrado:
+                    return encontrado.group(1)
+        return None
+
+
+def criar_smtp_falso(caixa):
+    """Cria uma classe compatível com smtplib.SMTP que entrega as mensagens na caixa postal."""
+
+    class SMTPFalso:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+        def set_debuglevel(self, nivel):
+            pass
+
+        def starttls(self):
+            pass
+
+        def login(self, usuario, senha):
+            pass
+
+        def send_message(self, msg):
+            caixa.entregar(msg)
+
+        def quit(self):
+            pass
+
+    return SMTPFalso
+
+
+def _widget(lista, rotulo):
+    for widget in lista:
+        if widget.label == rotulo:
+            return widget
+    raise LookupError(f"Elemento '{rotulo}' não encontrado na página")
+
+
+def _verificar_excecao(at, etapa):
+    if at.exception:
+        raise Exception(f"{etapa}: {at.exception[0].message}")
+
+
+class Sessao:
+    """Uma sessão simulada de um profissional, registrando a latência de cada etapa."""
+
+    def __init__(self, email, senha, caixa, timeout):
+        from streamlit.testing.v1 import AppTest
+        self.at = AppTest.from_file(SCRIPT_APP, default_timeout=timeout)
+        self.email = email
+        self.senha = senha
+        self.caixa = caixa
+        self.latencias = []
+
+    def _medir(self, etapa, acao):
+        inicio = time.perf_counter()
+        acao()
+        self.latencias.append((etapa, (time.perf_counter() - inicio) * 1000))
+        _verificar_excecao(self.at, etapa)
+
+    def login(self):
+        self._medir("abrir", self.at.run)
+        _widget(self.at.text_input, "E-mail").input(self.email)
+        _widget(self.at.text_input, "Senha").input(self.senha)
+        self._medir("login", _widget(self.at.button, "Entrar").click().run)
+        codigo = self.caixa.ultimo_codigo(self.email)
+        if not codigo:
+            raise Exception("login: código 2FA não recebido (credenciais inválidas?)")
+        # O login termina com st.stop(); a tela do 2FA só aparece no rerun seguinte
+        self._medir("abrir_2fa", self.at.run)
+        _widget(self.at.text_input, "Digite o código enviado para seu e-mail").input(codigo)
+        self._medir("2fa", _widget(self.at.button, "Verificar").click().run)
+
+    def navegar(self, opcao):
+        self._medir(f"navegar:{opcao}", _widget(self.at.sidebar.selectbox, "Escolha uma opção").select(opcao).run)
+
+
+def executar_sessao(email, args, caixa, rng):
+    """
+    Executa uma sessão completa (login, 2FA e navegação).
+
+    Returns:
+        tuple: (lista de (etapa, ms), mensagem de erro ou None).
+    """
+    sessao = None
+    try:
+        sessao = Sessao(email, args.senha, caixa, args.timeout)
+        sessao.login()
+        for _ in range(args.navegacoes):
+            sessao.navegar(rng.choice(args.opcoes))
+        return sessao.latencias, None
+    except Exception as e:
+        return (sessao.latencias if sessao else []), str(e)
+
+
+def memoria_rss_mb():
+    """Memória residente atual do processo em MB (Linux; None em outros sistemas)."""
+    try:
+        with open("/proc/self/status") as f:
+            for linha in f:
+                if linha.startswith("VmRSS:"):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class Monitor(threading.Thread):
+    """Amostra periodicamente as conexões abertas no banco e a memória do processo."""
+
+    def __init__(self, intervalo=0.5):
+        super().__init__(name="monitor-carga", daemon=True)
+        self.intervalo = intervalo
+        self.conexoes = []
+        self.memoria = []
+        self._parar = threading.Event()
+
+    def run(self):
+        conn = conectar_db()
+        conn.autocommit = True
+        cursor = conn.cursor()
+        try:
+            while not self._parar.wait(self.intervalo):
+                cursor.execute("SELECT COUNT(*) FROM pg_stat_activity WHERE datname = current_database() AND pid <> pg_backend_pid()")
+                self.conexoes.append(cursor.fetchone()[0])
+                rss = memoria_rss_mb()
+                if rss is not None:
+                    self.memoria.append(rss)
+        finally:
+            conn.close()
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+
+def resumir_latencias(amostras):
+    """
+    Agrupa latências por etapa ("navegar:X" também entra no total "navegar").
+
+    Returns:
+        dict: Etapa -> {amostras, p50_ms, p95_ms, p99_ms, max_ms}.
+    """
+    por_etapa = {}
+    for etapa, ms in amostras:
+        por_etapa.setdefault(etapa, []).append(ms)
+        if etapa.startswith("navegar:"):
+            por_etapa.setdefault("navegar", []).append(ms)
+    return {
+        etapa: {
+            "amostras": len(valores),
+            "p50_ms": round(percentil(valores, 50), 1),
+            "p95_ms": round(percentil(valores, 95), 1),
+            "p99_ms": round(percentil(valores, 99), 1),
+            "max_ms": round(max(valores), 1),
+        }
+        for etapa, valores in sorted(por_etapa.items())
+    }
+
+
+def executar_nivel(concorrencia, emails, args, caixa, rng):
+    """
+    Executa um nível de carga: `concorrencia` sessões simultâneas.
+
+    Returns:
+        dict: Resultado do nível.
+    """
+    monitor = Monitor()
+    monitor.start()
+    sessoes = [emails[i % len(emails)] for i in range(concorrencia)]
+    sementes = [rng.random() for _ in sessoes]
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        resultados = list(executor.map(lambda par: executar_sessao(par[0], args, caixa, random.Random(par[1])), zip(sessoes, sementes)))
+    duracao = time.perf_counter() - inicio
+    monitor.parar()
+
+    amostras = [a for latencias, _ in resultados for a in latencias]
+    erros = [erro for _, erro in resultados if erro]
+    return {
+        "concorrencia": concorrencia,
+        "duracao_s": round(duracao, 2),
+        "sessoes_ok": len(resultados) - len(erros),
+        "erros": len(erros),
+        "exemplos_erro": sorted(set(erros))[:5],
+        "vazao_etapas_s": round(len(amostras) / duracao, 2),
+        "vazao_sessoes_s": round((len(resultados) - len(erros)) / duracao, 2),
+        "latencias": resumir_latencias(amostras),
+        "conexoes_db": {
+            "max": max(monitor.conexoes, default=0),
+            "media": round(sum(monitor.conexoes) / len(monitor.conexoes), 1) if monitor.conexoes else 0,
+        },
+        "memoria_mb": {
+            "rss_max": round(max(monitor.memoria, default=0), 1),
+            "rss_final": round(memoria_rss_mb() or 0, 1),
+        },
+    }
+
+
+def dentro_do_slo(nivel, slo_ms, taxa_erro_max):
+    """Indica se o nível respeitou o p95 de navegação e a taxa de erros máxima."""
+    total = nivel["sessoes_ok"] + nivel["erros"]
+    if total and nivel["erros"] / total > taxa_erro_max:
+        return False
+    navegacao = nivel["latencias"].get("navegar")
+    return navegacao is not None and navegacao["p95_ms"] <= slo_ms
+
+
+def carregar_emails(limite):
+    """Busca e-mails ativos dos usuários sintéticos (profissionais primeiro)."""
+    conn = conectar_db()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT email FROM usuarios WHERE email LIKE %s AND status = TRUE AND primeiro_acesso = FALSE ORDER BY tipo <> 'Profissional', id LIMIT %s",
+            (f"%@{DOMINIO_EMAIL}", limite),
+        )
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+def criar_parser():
+    """Cria o parser de argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Teste de carga com sessões Streamlit concorrentes.")
+    parser.add_argument("--niveis", type=int, nargs="+", default=[10, 50, 100, 200], help="Números de sessões simultâneas a testar")
+    parser.add_argument("--navegacoes", type=int, default=5, help="Trocas de página por sessão após o login")
+    parser.add_argument("--opcoes", nargs="+", default=OPCOES_NAVEGACAO, help="Opções do menu sorteadas na navegação")
+    parser.add_argument("--senha", default=SENHA_PADRAO)
+    parser.add_argument("--timeout", type=float, default=60, help="Tempo máximo de cada rerun (s)")
+    parser.add_argument("--slo-ms", type=float, default=2000, help="p95 máximo aceitável de navegação")
+    parser.add_argument("--taxa-erro-max", type=float, default=0.01)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="Arquivo JSON de saída (padrão: stdout)")
+    return parser
+
+
+def main():
+    """Função principal do script."""
+    args = criar_parser().parse_args()
+    rng = random.Random(args.semente)
+    emails = carregar_emails(max(args.niveis))
+    if not emails:
+        print("❌ Nenhum usuário sintético encontrado. Execute scripts/gerar_dados_sinteticos.py antes.")
+        sys.exit(1)
+
+    caixa = CaixaPostal()
+    resultado = {"gerado_em": datetime.now().isoformat(timespec="seconds"), "niveis": [], "limite_concorrencia": None}
+    with mock.patch.object(smtplib, "SMTP", criar_smtp_falso(caixa)):
+        for concorrencia in args.niveis:
+            print(f"🚦 {concorrencia} sessões simultâneas...", file=sys.stderr)
+            nivel = executar_nivel(concorrencia, emails, args, caixa, rng)
+            nivel["dentro_do_slo"] = dentro_do_slo(nivel, args.slo_ms, args.taxa_erro_max)
+            resultado["niveis"].append(nivel)
+            navegacao = nivel["latencias"].get("navegar", {})
+            print(
+                f"   {nivel['vazao_etapas_s']} etapas/s, p95 navegação {navegacao.get('p95_ms')} ms, "
+                f"{nivel['erros']} erros, {nivel['conexoes_db']['max']} conexões, {nivel['memoria_mb']['rss_max']} MB",
+                file=sys.stderr,
+            )
+            if nivel["dentro_do_slo"]:
+                resultado["limite_concorrencia"] = concorrencia
+    resultado["consultas_por_pagina"] = instrumentacao.metricas.resumo_paginas()
+
+    saida = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(saida)
+        print(f"✅ Resultado gravado em {args.saida}", file=sys.stderr)
+    else:
+        print(saida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Guarda de regressão dos planos de execução das consultas mais usadas.
+
+Enumera todas as formas das consultas de consultas.py (cada combinação de filtros
+opcionais de sinais vitais, mensagens e auditoria, além das consultas fixas do login,
+dashboard e listagens), executa EXPLAIN (FORMAT JSON) em um banco populado por
+scripts/gerar_dados_sinteticos.py e compara com o snapshot gravado.
+
+Falha (código de saída 1) quando uma consulta passa a fazer Seq Scan em uma tabela
+grande ou quando o custo estimado ultrapassa o fator permitido em relação ao snapshot.
+
+Exemplo:
+    python scripts/verificar_planos.py --atualizar      # grava o snapshot de referência
+    python scripts/verificar_planos.py                  # compara com o snapshot
+"""
+
+import os
+import sys
+import json
+import argparse
+import itertools
+from datetime import datetime, date, timedelta
+
+import psycopg2
+from dotenv import load_dotenv, find_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+from adesao import SQL_NAO_ADERENTES
+from amostras import SQL_AMOSTRAS_BLOCOS, SQL_AMOSTRAS_RESUMOS
+from consultas import (
+    SQL_AUTENTICAR, SQL_DASHBOARD_CONTAGENS, SQL_DASHBOARD_ALERTAS_POR_DIA, SQL_DASHBOARD_PACIENTES_POR_PROFISSIONAL,
+    SQL_DASHBOARD_STATUS_ALERTAS, SQL_FILA_PRIORIDADE, SQL_VISAO_GERAL, SQL_LISTAR_PACIENTES, SQL_ULTIMOS_SINAIS_PACIENTE, SQL_ULTIMOS_SINAIS_PACIENTES, SQL_PARAMETROS_ALERTA,
+    CONSULTAS_AO_VIVO, CONSULTAS_SELETOR, TAMANHO_MINIMO_TRIGRAMA, montar_consulta_sinais_vitais,
+    montar_consulta_mensagens, montar_consulta_auditoria, montar_consulta_ao_vivo, montar_consulta_pacientes,
+    montar_consulta_seletor
+)
+
+# Carrega variáveis do .env
+dotenv_path = find_dotenv()
+load_dotenv(dotenv_path, override=True)
+
+SNAPSHOT_PADRAO = os.path.join(os.path.dirname(__file__), "planos_consultas.json")
+# Linhas por página da fila de prioridades (a tela busca uma a mais para saber se há próxima)
+LINHAS_FILA = 51
+# Linhas da visão geral (ultimos_sinais.LIMITE_VISAO_GERAL)
+LINHAS_VISAO_GERAL = 1000
+# Leituras por paciente do cache de leituras recentes (cache_leituras.TAMANHO_BUFFER)
+LEITURAS_CACHE = 10
+
+# Consultas montadas com filtros opcionais: nome -> (função, argumento -> chave da amostra)
+CONSULTAS_FILTRADAS = {
+    "sinais_vitais": (montar_consulta_sinais_vitais, {
+        "paciente_id": "paciente_id",
+        "profissional_id": "profissional_id",
+        "data_inicio": "data_inicio",
+        "data_fim": "data_fim",
+        "apos": "marca",
+    }),
+    "mensagens": (montar_consulta_mensagens, {
+        "remetente_id": "usuario_id",
+        "destinatario_id": "usuario_id",
+        "termo": "termo",
+    }),
+    "auditoria": (montar_consulta_auditoria, {
+        "usuario_id": "usuario_id",
+        "acao": "acao",
+        "data_inicio": "data_inicio",
+        "data_fim": "data_fim",
+        "termo": "termo",
+    }),
+    "pacientes": (montar_consulta_pacientes, {
+        "diagnostico_indice": "diagnostico_indice",
+        "profissional_id": "profissional_id",
+        "faixas": "faixas",
+    }),
+}
+# Consultas que exigem ao menos um filtro (a forma sem filtros não existe)
+CONSULTAS_COM_FILTRO_OBRIGATORIO = {"pacientes"}
+
+# Consultas fixas: nome -> (sql, chaves da amostra usadas como parâmetros, tabelas em que o Seq Scan é esperado)
+CONSULTAS_FIXAS = {
+    "autenticar": (SQL_AUTENTICAR, ("email", "senha"), ()),
+    "parametros_alerta": (SQL_PARAMETROS_ALERTA, (), ("parametros_alerta",)),
+    "ultimos_sinais_paciente": (SQL_ULTIMOS_SINAIS_PACIENTE, ("paciente_id",), ()),
+    "listar_pacientes": (SQL_LISTAR_PACIENTES, (), ("pacientes", "usuarios")),
+    "dashboard:alertas_por_dia": (SQL_DASHBOARD_ALERTAS_POR_DIA, (), ()),
+    "dashboard:pacientes_por_profissional": (SQL_DASHBOARD_PACIENTES_POR_PROFISSIONAL, (), ("pacientes", "profissionais", "usuarios")),
+    "dashboard:status_alertas": (SQL_DASHBOARD_STATUS_ALERTAS, (), ("alertas",)),
+    # Job de lembretes: percorre todos os pacientes, mas a adesão do dia vem do índice
+    "lembretes:nao_aderentes": (SQL_NAO_ADERENTES, ("data_inicio", "data_inicio"), ("pacientes", "usuarios")),
+    "amostras:blocos": (SQL_AMOSTRAS_BLOCOS, ("paciente_id", "data_inicio", "data_fim"), ()),
+    "amostras:resumos": (SQL_AMOSTRAS_RESUMOS, ("paciente_id", "data_inicio", "data_fim"), ()),
+}
+SEQ_SCAN_PERMITIDO_CONTAGENS = {
+    "total_pacientes": ("pacientes",),
+    "total_profissionais": ("profissionais",),
+    "total_usuarios_ativos": ("usuarios",),
+}
+
+
+def conectar_db():
+    """Estabelece conexão com o banco de dados."""
+    return psycopg2.connect(
+        host=os.getenv("DB_HOST"),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        port=os.getenv("DB_PORT"),
+    )
+
+
+def enumerar_formas(amostra):
+    """
+    Enumera todas as formas de consulta com parâmetros de exemplo.
+
+    Args:
+        amostra (dict): Valores de exemplo (paciente_id, profissional_id, usuario_id, acao, email, senha, datas, termo, marca,
+            diagnostico_indice, faixas).
+    Yields:
+        tuple: (nome, query, params, tabelas com Seq Scan permitido).
+    """
+    for nome, (montar, filtros) in CONSULTAS_FILTRADAS.items():
+        argumentos = list(filtros)
+        minimo = 1 if nome in CONSULTAS_COM_FILTRO_OBRIGATORIO else 0
+        for n in range(minimo, len(argumentos) + 1):
+            for combinacao in itertools.combinations(argumentos, n):
+                query, params = montar(**{arg: amostra[filtros[arg]] for arg in combinacao})
+                yield f"{nome}[{'+'.join(combinacao)}]", query, params, ()
+    for nome, (sql, chaves, permitidas) in CONSULTAS_FIXAS.items():
+        yield nome, sql, tuple(amostra[chave] for chave in chaves), permitidas
+    yield "fila_prioridade", SQL_FILA_PRIORIDADE, (amostra["profissional_id"], LINHAS_FILA, 0), ()
+    yield "visao_geral", SQL_VISAO_GERAL, (amostra["profissional_id"], LINHAS_VISAO_GERAL), ()
+    yield "cache_leituras", SQL_ULTIMOS_SINAIS_PACIENTES, ([amostra["paciente_id"]], LEITURAS_CACHE), ()
+    for nome, sql in SQL_DASHBOARD_CONTAGENS.items():
+        yield f"dashboard:{nome}", sql, (), SEQ_SCAN_PERMITIDO_CONTAGENS.get(nome, ())
+    for tabela in CONSULTAS_AO_VIVO:
+        dono = amostra["usuario_id"] if tabela == "mensagens" else amostra["profissional_id"]
+        for com_dono, com_ids in itertools.product((False, True), repeat=2):
+            query, params = montar_consulta_ao_vivo(tabela, dono if com_dono else None, [1, 2, 3] if com_ids else None)
+            yield f"ao_vivo:{tabela}[{'+'.join(n for n, usar in (('dono', com_dono), ('ids', com_ids)) if usar)}]", query, params, ()
+    for entidade in CONSULTAS_SELETOR:
+        # Termo curto (índice de prefixo) e termo longo (índices de trigramas)
+        for forma, termo in (("prefixo", amostra["termo"][:TAMANHO_MINIMO_TRIGRAMA - 1]), ("trigrama", amostra["termo"])):
+            query, params = montar_consulta_seletor(entidade, termo)
+            yield f"seletor:{entidade}[{forma}]", query, params, ()
+
+
+def analisar_plano(plano):
+    """
+    Resume um plano retornado por EXPLAIN (FORMAT JSON).
+
+    Args:
+        plano (dict): Nó raiz ("Plan") do EXPLAIN.
+    Returns:
+        dict: custo_total, linhas_estimadas, seq_scans, indices e forma (árvore compacta de nós).
+    """
+    seq_scans = set()
+    indices = set()
+
+    def descrever(no):
+        tipo = no["Node Type"]
+        if tipo == "Seq Scan":
+            seq_scans.add(no["Relation Name"])
+        if "Index Name" in no:
+            indices.add(no["Index Name"])
+        alvo = no.get("Index Name") or no.get("Relation Name")
+        texto = f"{tipo}[{alvo}]" if alvo else tipo
+        filhos = [descrever(filho) for filho in no.get("Plans", [])]
+        return f"{texto}({', '.join(filhos)})" if filhos else texto
+
+    forma = descrever(plano)
+    return {
+        "custo_total": plano["Total Cost"],
+        "linhas_estimadas": plano["Plan Rows"],
+        "seq_scans": sorted(seq_scans),
+        "indices": sorted(indices),
+        "forma": forma,
+    }
+
+
+def verificar(atuais, snapshot, tamanhos, linhas_grandes, fator_custo):
+    """
+    Compara os planos atuais com as regras e com o snapshot.
+
+    Args:
+        atuais (dict): Nome -> plano analisado, com a chave "seq_scan_permitido".
+        snapshot (dict): Nome -> plano analisado de referência (pode ser vazio).
+        tamanhos (dict): Tabela -> linhas estimadas (pg_class.reltuples).
+        linhas_grandes (int): A partir de quantas linhas uma tabela é considerada grande.
+        fator_custo (float): Aumento máximo de custo estimado em relação ao snapshot.
+    Returns:
+        tuple: (lista de falhas, lista de avisos).
+    """
+    falhas = []
+    avisos = []
+    for nome, plano in atuais.items():
+        for tabela in plano["seq_scans"]:
+            if tabela not in plano["seq_scan_permitido"] and tamanhos.get(tabela, 0) >= linhas_grandes:
+                falhas.append(f"{nome}: Seq Scan em '{tabela}' (~{int(tamanhos[tabela])} linhas)")
+        anterior = snapshot.get(nome)
+        if anterior is None:
+            avisos.append(f"{nome}: forma nova, sem plano de referência")
+            continue
+        if anterior["custo_total"] > 0 and plano["custo_total"] > anterior["custo_total"] * fator_custo:
+            falhas.append(f"{nome}: custo estimado {anterior['custo_total']:.1f} -> {plano['custo_total']:.1f} (limite {fator_custo}x)")
+        if plano["forma"] != anterior["forma"]:
+            avisos.append(f"{nome}: plano mudou\n    antes:  {anterior['forma']}\n    depois: {plano['forma']}")
+    for nome in snapshot:
+        if nome not in atuais:
+            avisos.append(f"{nome}: forma removida (presente apenas no snapshot)")
+    return falhas, avisos
+
+
+def buscar_amostra(cursor):
+    """Seleciona valores de exemplo estáveis (primeiras linhas) para os parâmetros das consultas."""
+    cursor.execute("SELECT id, id_profissional_responsavel, diagnostico_indice, faixa_etaria FROM pacientes ORDER BY id LIMIT 1")
+    paciente = cursor.fetchone()
+    cursor.execute("SELECT usuario_id, acao FROM auditoria ORDER BY id LIMIT 1")
+    auditoria = cursor.fetchone()
+    cursor.execute("SELECT email, senha FROM usuarios ORDER BY id LIMIT 1")
+    usuario = cursor.fetchone()
+    if not (paciente and auditoria and usuario):
+        raise Exception("Banco sem dados; execute scripts/gerar_dados_sinteticos.py antes.")
+    hoje = date.today()
+    return {
+        "paciente_id": paciente[0],
+        "profissional_id": paciente[1],
+        "usuario_id": auditoria[0],
+        "acao": auditoria[1],
+        "email": usuario[0],
+        "senha": usuario[1],
+        "data_inicio": hoje - timedelta(days=7),
+        "data_fim": hoje,
+        "termo": "consulta",
+        "marca": (datetime.combine(hoje, datetime.min.time()), 0),
+        # Sem índices preenchidos, valores fictícios ainda exercitam os índices
+        "diagnostico_indice": paciente[2] or "0" * 32,
+        "faixas": [paciente[3] if paciente[3] is not None else 40],
+    }
+
+
+def buscar_tamanhos(cursor):
+    """Retorna as linhas estimadas de cada tabela do esquema public."""
+    cursor.execute("SELECT relname, reltuples FROM pg_class WHERE relkind IN ('r', 'p') AND relnamespace = 'public'::regnamespace")
+    return {nome: linhas for nome, linhas in cursor.fetchall()}
+
+
+def explicar_formas(cursor, amostra):
+    """Executa EXPLAIN (FORMAT JSON) em todas as formas de consulta."""
+    planos = {}
+    for nome, query, params, permitidas in enumerar_formas(amostra):
+        cursor.execute("EXPLAIN (FORMAT JSON) " + query, params)
+        resultado = cursor.fetchone()[0]
+        if isinstance(resultado, str):
+            resultado = json.loads(resultado)
+        plano = analisar_plano(resultado[0]["Plan"])
+        plano["seq_scan_permitido"] = list(permitidas)
+        plano["sql"] = " ".join(query.split())
+        planos[nome] = plano
+    return planos
+
+
+def criar_parser():
+    """Cria o parser de argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Verifica regressões nos planos de execução das consultas críticas.")
+    parser.add_argument("--snapshot", default=SNAPSHOT_PADRAO, help="Arquivo JSON com os planos de referência")
+    parser.add_argument("--atualizar", action="store_true", help="Grava os planos atuais como nova referência")
+    parser.add_argument("--linhas-grandes", type=int, default=10000, help="Tamanho a partir do qual um Seq Scan é proibido")
+    parser.add_argument("--fator-custo", type=float, default=2.0, help="Aumento máximo do custo estimado em relação à referência")
+    return parser
+
+
+def main():
+    """Função principal do script."""
+    args = criar_parser().parse_args()
+    conn = conectar_db()
+    try:
+        cursor = conn.cursor()
+        amostra = buscar_amostra(cursor)
+        tamanhos = buscar_tamanhos(cursor)
+        atuais = explicar_formas(cursor, amostra)
+    finally:
+        conn.close()
+
+    snapshot = {}
+    if os.path.exists(args.snapshot) and not args.atualizar:
+        with open(args.snapshot, encoding="utf-8") as f:
+            snapshot = json.load(f)["formas"]
+    falhas, avisos = verificar(atuais, snapshot, tamanhos, args.linhas_grandes, args.fator_custo)
+
+    print(f"🔎 {len(atuais)} formas de consulta verificadas")
+    for aviso in avisos:
+        print(f"⚠️  {aviso}")
+    for falha in falhas:
+        print(f"❌ {falha}")
+
+    if args.atualizar:
+        with open(args.snapshot, "w", encoding="utf-8") as f:
+            json.dump({"gerado_em": datetime.now().isoformat(timespec="seconds"), "tamanhos": tamanhos, "formas": atuais}, f, indent=2, ensure_ascii=False)
+        print(f"✅ Snapshot gravado em {args.snapshot}")
+    if falhas:
+        sys.exit(1)
+    print("✅ Nenhuma regressão de plano encontrada")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+Adesão diária ao registro de sinais vitais e lembretes em lote.
+
+- adesao_diaria guarda quantas leituras cada paciente registrou em cada dia, mantida por
+  trigger de comando em sinais_vitais (uma atualização por INSERT/COPY, não por linha).
+  Saber se o paciente registrou hoje é uma busca pela chave primária, e a sequência de dias
+  e o mapa de calor da tela saem da mesma tabela.
+- O job de lembretes (scripts/enviar_lembretes.py) enfileira em lembretes, com uma única
+  instrução indexada, todos os pacientes ativos sem registro no dia, e depois envia os
+  e-mails em lotes, cada lote por uma única conexão SMTP. Falhas voltam para a fila na
+  execução seguinte (até MAX_TENTATIVAS); quem registrar antes do envio é dispensado.
+"""
+
+import smtplib
+import logging
+from datetime import date, timedelta
+from email.mime.text import MIMEText
+
+import numpy as np
+from psycopg2.extras import execute_values
+
+logger = logging.getLogger("telemonitoramento.adesao")
+
+STATUS_PENDENTE = "pendente"
+STATUS_ENVIADO = "enviado"
+STATUS_FALHA = "falha"
+STATUS_DISPENSADO = "dispensado"
+MAX_TENTATIVAS = 3
+TAMANHO_LOTE_EMAIL = 100
+SEMANAS_MAPA = 12
+
+ASSUNTO_LEMBRETE = "Lembrete: registre seus sinais vitais hoje"
+TEXTO_LEMBRETE = (
+    "Olá {nome},\n\nAinda não recebemos o registro dos seus sinais vitais de {dia:%d/%m/%Y}.\n"
+    "Acesse o sistema de Telemonitoramento CEUB e registre-os assim que possível.\n"
+)
+
+SQL_REGISTROS_DIA = "SELECT registros FROM adesao_diaria WHERE paciente_id = %s AND dia = %s"
+SQL_DIAS_COM_REGISTRO = "SELECT dia FROM adesao_diaria WHERE paciente_id = %s AND dia >= %s ORDER BY dia"
+# Anti-join pelo índice (dia, paciente_id) de adesao_diaria: pacientes ativos sem registro no dia
+SQL_NAO_ADERENTES = """
+    SELECT p.id, %s::date FROM pacientes p JOIN usuarios u ON u.id = p.id_usuario
+    WHERE u.status AND NOT EXISTS (SELECT 1 FROM adesao_diaria a WHERE a.dia = %s AND a.paciente_id = p.id)
+"""
+SQL_ENFILEIRAR = f"""
+    INSERT INTO lembretes (paciente_id, dia)
+    {SQL_NAO_ADERENTES}
+    ON CONFLICT (paciente_id, dia) DO UPDATE SET status = '{STATUS_PENDENTE}'
+    WHERE lembretes.status = '{STATUS_FALHA}' AND lembretes.tentativas < {MAX_TENTATIVAS}
+"""
+SQL_PENDENTES = f"""
+    SELECT l.paciente_id, u.nome, u.email FROM lembretes l
+    JOIN pacientes p ON p.id = l.paciente_id JOIN usuarios u ON u.id = p.id_usuario
+    WHERE l.dia = %s AND l.status = '{STATUS_PENDENTE}'
+    ORDER BY l.paciente_id LIMIT %s
+    FOR UPDATE OF l SKIP LOCKED
+"""
+SQL_DISPENSAR = f"""
+    UPDATE lembretes l SET status = '{STATUS_DISPENSADO}'
+    FROM adesao_diaria a
+    WHERE l.dia = %s AND l.status = '{STATUS_PENDENTE}' AND a.paciente_id = l.paciente_id AND a.dia = l.dia
+"""
+SQL_MARCAR = """
+    UPDATE lembretes l SET status = v.status, erro = v.erro, tentativas = l.tentativas + 1,
+        enviado_em = CASE WHEN v.status = 'enviado' THEN NOW() END
+    FROM (VALUES %s) AS v (paciente_id, dia, status, erro)
+    WHERE l.paciente_id = v.paciente_id AND l.dia = v.dia
+"""
+
+
+def criar_estrutura(cursor):
+    """
+    Cria adesao_diaria (com trigger e preenchimento inicial a partir de sinais_vitais) e a fila de lembretes.
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS adesao_diaria (
+            paciente_id INTEGER NOT NULL REFERENCES pacientes(id) ON DELETE CASCADE,
+            dia DATE NOT NULL,
+            registros INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (paciente_id, dia)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_adesao_diaria_dia ON adesao_diaria (dia, paciente_id)")
+    cursor.execute("""
+        CREATE OR REPLACE FUNCTION adesao_registrar_leituras() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO adesao_diaria (paciente_id, dia, registros)
+            SELECT paciente_id, data_registro::date, COUNT(*) FROM novas GROUP BY 1, 2
+            ON CONFLICT (paciente_id, dia) DO UPDATE SET registros = adesao_diaria.registros + EXCLUDED.registros;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    cursor.execute("DROP TRIGGER IF EXISTS trg_adesao_diaria ON sinais_vitais")
+    cursor.execute("""
+        CREATE TRIGGER trg_adesao_diaria AFTER INSERT ON sinais_vitais
+        REFERENCING NEW TABLE AS novas FOR EACH STATEMENT
+        EXECUTE FUNCTION adesao_registrar_leituras()
+    """)
+    # Histórico anterior ao trigger: só na primeira execução (tabela vazia)
+    cursor.execute("""
+        INSERT INTO adesao_diaria (paciente_id, dia, registros)
+        SELECT paciente_id, data_registro::date, COUNT(*) FROM sinais_vitais
+        WHERE NOT EXISTS (SELECT 1 FROM adesao_diaria)
+        GROUP BY 1, 2
+    """)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS lembretes (
+            paciente_id INTEGER NOT NULL REFERENCES pacientes(id) ON DELETE CASCADE,
+            dia DATE NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT '{STATUS_PENDENTE}',
+            tentativas INTEGER NOT NULL DEFAULT 0,
+            erro TEXT,
+            criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            enviado_em TIMESTAMP,
+            PRIMARY KEY (paciente_id, dia)
+        )
+    """)
+    cursor.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_lembretes_pendentes ON lembretes (dia, paciente_id)
+        WHERE status = '{STATUS_PENDENTE}'
+    """)
+
+
+def registrou_no_dia(cursor, paciente_id, dia=None):
+    """
+    Indica se o paciente registrou sinais vitais no dia (busca pela chave de adesao_diaria).
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+        paciente_id (int): ID do paciente.
+        dia (date, opcional): Dia consultado. Default: hoje.
+    Returns:
+        bool: True se há ao menos um registro no dia.
+    """
+    cursor.execute(SQL_REGISTROS_DIA, (paciente_id, dia or date.today()))
+    linha = cursor.fetchone()
+    return bool(linha and linha[0])
+
+
+def sequencia_atual(dias, hoje):
+    """
+    Dias consecutivos com registro terminando hoje (ou ontem, se hoje ainda não houve registro).
+
+    Args:
+        dias (iterable): Dias (date) com registro.
+        hoje (date): Dia de referência.
+    Returns:
+        int: Tamanho da sequência.
+    """
+    dias = set(dias)
+    dia = hoje if hoje in dias else hoje - timedelta(days=1)
+    sequencia = 0
+    while dia in dias:
+        sequencia += 1
+        dia -= timedelta(days=1)
+    return sequencia
+
+
+def inicio_mapa(hoje, semanas=SEMANAS_MAPA):
+    """Segunda-feira da primeira semana do mapa de calor."""
+    return hoje - timedelta(days=hoje.weekday() + 7 * (semanas - 1))
+
+
+def mapa_adesao(dias, hoje, semanas=SEMANAS_MAPA):
+    """
+    Matriz do mapa de calor: uma linha por dia da semana, uma coluna por semana.
+
+    Args:
+        dias (iterable): Dias (date) com registro.
+        hoje (date): Último dia do mapa.
+        semanas (int, opcional): Semanas exibidas. Default: 12.
+    Returns:
+        tuple: (matriz float 7 x semanas com 1 = registrou, 0 = não registrou e NaN para dias
+        fora do período, datas de início de cada semana).
+    """
+    inicio = inicio_mapa(hoje, semanas)
+    matriz = np.zeros((7, semanas))
+    dias = set(dias)
+    for deslocamento in range(7 * semanas):
+        dia = inicio + timedelta(days=deslocamento)
+        semana, dia_semana = divmod(deslocamento, 7)
+        matriz[dia_semana, semana] = np.nan if dia > hoje else float(dia in dias)
+    return matriz, [inicio + timedelta(weeks=s) for s in range(semanas)]
+
+
+def resumo_adesao(cursor, paciente_id, hoje=None, semanas=SEMANAS_MAPA):
+    """
+    Sequência atual, proporção de dias com registro e mapa de calor do paciente (uma consulta).
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+        paciente_id (int): ID do paciente.
+        hoje (date, opcional): Dia de referência. Default: hoje.
+        semanas (int, opcional): Semanas do mapa. Default: 12.
+    Returns:
+        dict: registrou_hoje, sequencia, proporcao (0 a 1, no período do mapa), mapa, semanas.
+    """
+    hoje = hoje or date.today()
+    # Um ano antes do mapa para a sequência atual
+    cursor.execute(SQL_DIAS_COM_REGISTRO, (paciente_id, inicio_mapa(hoje, semanas) - timedelta(days=365)))
+    dias = [dia for (dia,) in cursor.fetchall()]
+    matriz, inicios = mapa_adesao(dias, hoje, semanas)
+    return {
+        "registrou_hoje": hoje in set(dias),
+        "sequencia": sequencia_atual(dias, hoje),
+        "proporcao": float(np.nanmean(matriz)),
+        "mapa": matriz,
+        "semanas": inicios,
+    }
+
+
+def enfileirar_lembretes(cursor, dia):
+    """
+    Enfileira um lembrete para cada paciente ativo sem registro no dia (e reabre falhas anteriores).
+
+    Args:
+        cursor: Cursor psycopg2 aberto (o commit fica a cargo de quem chama).
+        dia (date): Dia verificado.
+    Returns:
+        int: Lembretes enfileirados.
+    """
+    cursor.execute(SQL_ENFILEIRAR, (dia, dia))
+    return cursor.rowcount
+
+
+def enviar_por_smtp(mensagens, remetente, senha, servidor="smtp.gmail.com", porta=587):
+    """
+    Envia um lote de e-mails por uma única conexão SMTP.
+
+    Args:
+        mensagens (list): Tuplas (destinatário, assunto, corpo).
+        remetente (str): E-mail do remetente (login SMTP).
+        senha (str): Senha de app do remetente.
+        servidor (str, opcional): Servidor SMTP. Default: smtp.gmail.com.
+        porta (int, opcional): Porta STARTTLS. Default: 587.
+    Returns:
+        list: None para cada mensagem enviada ou o texto do erro, na ordem de mensagens.
+    """
+    resultados = []
+    with smtplib.SMTP(servidor, porta) as conexao:
+        conexao.starttls()
+        conexao.login(remetente, senha)
+        for destinatario, assunto, corpo in mensagens:
+            msg = MIMEText(corpo)
+            msg["Subject"] = assunto
+            msg["From"] = remetente
+            msg["To"] = destinatario
+            try:
+                conexao.send_message(msg)
+                resultados.append(None)
+            except smtplib.SMTPException as e:
+                resultados.append(str(e))
+    return resultados
+
+
+def enviar_lembretes(conn, dia, enviar, tamanho_lote=TAMANHO_LOTE_EMAIL, progresso=None):
+    """
+    Envia os lembretes pendentes do dia em lotes.
+
+    Cada lote é reservado com FOR UPDATE SKIP LOCKED (vários jobs podem rodar juntos), enviado
+    com uma chamada a `enviar` e marcado com um único UPDATE; o commit é feito por lote.
+    Pacientes que registraram depois do enfileiramento são dispensados antes do envio.
+
+    Args:
+        conn: Conexão psycopg2 dedicada ao job.
+        dia (date): Dia dos lembretes.
+        enviar (callable): Recebe uma lista de (destinatário, assunto, corpo) e devolve, na
+            mesma ordem, None para cada envio bem-sucedido ou o texto do erro.
+        tamanho_lote (int, opcional): E-mails por lote. Default: 100.
+        progresso (callable, opcional): Chamado após cada lote com (enviados, falhas).
+    Returns:
+        tuple: (enviados, falhas, dispensados).
+    """
+    cursor = conn.cursor()
+    cursor.execute(SQL_DISPENSAR, (dia,))
+    dispensados = cursor.rowcount
+    conn.commit()
+    enviados = falhas = 0
+    while True:
+        cursor.execute(SQL_PENDENTES, (dia, tamanho_lote))
+        lote = cursor.fetchall()
+        if not lote:
+            break
+        mensagens = [(email, ASSUNTO_LEMBRETE, TEXTO_LEMBRETE.format(nome=nome, dia=dia)) for _, nome, email in lote]
+        try:
+            resultados = enviar(mensagens)
+        except Exception as e:  # conexão SMTP indisponível: o lote inteiro falha
+            logger.exception("Falha ao enviar lote de lembretes")
+            resultados = [str(e)] * len(lote)
+        marcas = [(paciente_id, dia, STATUS_FALHA if erro else STATUS_ENVIADO, erro)
+                  for (paciente_id, _, _), erro in zip(lote, resultados)]
+        execute_values(cursor, SQL_MARCAR, marcas, template="(%s, %s::date, %s, %s)")
+        conn.commit()
+        falhas_lote = sum(1 for erro in resultados if erro)
+        enviados += len(lote) - falhas_lote
+        falhas += falhas_lote
+        if progresso:
+            progresso(enviados, falhas)
+    logger.info("Lembretes de %s: %d enviados, %d falhas, %d dispensados", dia, enviados, falhas, dispensados)
+    return enviados, falhas, dispensados
@@ -0,0 +1,100 @@
+"""
+Regras de alerta de sinais vitais, independentes do Streamlit e do banco de dados.
+"""
+
+import re
+import logging
+
+PRESSAO_PATTERN = r'^\d{2,3}/\d{2,3}$'
+# tipo_alerta gravado para leituras fora dos limites do paciente
+TIPO_ALERTA_LIMITES = "Sinais vitais"
+# tipo_alerta gravado quando um sinal se afasta da linha de base do próprio paciente (tendencias.py)
+TIPO_ALERTA_TENDENCIA = "Tendência"
+
+# Limites usados quando a tabela parametros_alerta ainda está vazia
+PARAMETROS_PADRAO = {
+    "temp_min": 35.0, "temp_max": 38.0,
+    "freq_min": 50, "freq_max": 120,
+    "sat_min": 90,
+    "pressao_min": "90/60", "pressao_max": "140/90"
+}
+
+
+def parametros_de_linha(row):
+    """
+    Converte uma linha de parametros_alerta no dicionário de limites.
+
+    Args:
+        row (tuple or None): (temp_min, temp_max, freq_min, freq_max, sat_min, pressao_min, pressao_max).
+    Returns:
+        dict: Limites de alerta (os padrões se row for None).
+    """
+    if not row:
+        return dict(PARAMETROS_PADRAO)
+    temp_min, temp_max, freq_min, freq_max, sat_min, pressao_min, pressao_max = row
+    return {
+        "temp_min": temp_min, "temp_max": temp_max,
+        "freq_min": freq_min, "freq_max": freq_max,
+        "sat_min": sat_min,
+        "pressao_min": pressao_min, "pressao_max": pressao_max
+    }
+
+
+def validar_pressao(pressao):
+    """
+    Valida o formato e os valores da pressão arterial informada.
+
+    Args:
+        pressao (str): Pressão no formato 'sistólica/diastólica' (ex: '120/80').
+    Returns:
+        tuple: (bool, str) indicando se é válida e mensagem de erro (ou vazio).
+    """
+    if not re.match(PRESSAO_PATTERN, pressao):
+        logging.debug(f"Formato de pressão inválido: {pressao}")
+        return False, "Formato inválido. Use: 120/80"
+    try:
+        sist, diast = map(int, pressao.split('/'))
+        if not (90 <= sist <= 180 and 60 <= diast <= 110):
+            logging.debug(f"Valores de pressão fora do intervalo: {pressao}")
+            return False, "Valores fora do intervalo normal"
+        return True, ""
+    except Exception as e:
+        logging.exception(f"Erro ao processar pressão: {pressao}")
+        return False, "Erro ao processar valores"
+
+
+def avaliar_alertas(sinais, params):
+    """
+    Compara os sinais vitais com os limites informados (sinais None não foram medidos e não
+    geram alerta, como temperatura e pressão das leituras derivadas do oxímetro).
+
+    Args:
+        sinais (dict): Dicionário com chaves 'temperatura', 'pressao', 'frequencia', 'saturacao'.
+        params (dict): Limites de alerta (ver PARAMETROS_PADRAO).
+    Returns:
+        list: Lista de strings descrevendo os alertas encontrados (vazia se nenhum).
+    """
+    alertas = []
+    temperatura = sinais['temperatura']
+    pressao = sinais['pressao']
+    frequencia = sinais['frequencia']
+    saturacao = sinais['saturacao']
+
+    if temperatura is not None and (temperatura < params['temp_min'] or temperatura > params['temp_max']):
+        alertas.append(f"Temperatura fora do padrão: {temperatura}°C (Limite: {params['temp_min']}–{params['temp_max']}°C)")
+    valido, msg = validar_pressao(pressao) if pressao is not None else (False, None)
+    if msg:
+        alertas.append(f"Pressão arterial: {msg}")
+    elif valido:
+        sist, diast = map(int, pressao.split('/'))
+        sist_min, diast_min = map(int, params['pressao_min'].split('/'))
+        sist_max, diast_max = map(int, params['pressao_max'].split('/'))
+        if sist > sist_max or diast > diast_max:
+            alertas.append(f"Pressão Alta: {pressao} mmHg (Limite: {params['pressao_max']} mmHg)")
+        if sist < sist_min or diast < diast_min:
+            alertas.append(f"Pressão Baixa: {pressao} mmHg (Limite: {params['pressao_min']} mmHg)")
+    if frequencia is not None and (frequencia < params['freq_min'] or frequencia > params['freq_max']):
+        alertas.append(f"Frequência cardíaca fora do padrão: {frequencia} bpm (Limite: {params['freq_min']}–{params['freq_max']} bpm)")
+    if saturacao is not None and saturacao < params['sat_min']:
+        alertas.append(f"Saturação baixa: {saturacao}% (Mínimo: {params['sat_min']}%)")
+    return alertas
@@ -0,0 +1,383 @@
+"""
+Amostras de alta frequência (oxímetros contínuos: pulso e saturação a cada segundo).
+
+Uma linha por amostra em sinais_vitais daria 86.400 linhas por paciente por dia. Aqui as
+amostras ficam em amostras_continuas, uma linha por paciente por minuto: os instantes
+(milissegundos desde o início do minuto), a frequência e a saturação de cada amostra são
+codificados em delta + zigzag, com 1, 2 ou 4 bytes por valor conforme o maior delta do
+bloco (sinal estável e amostragem regular cabem em 1 e 2 bytes). A linha guarda também
+o resumo do minuto (média, mínimo e máximo), que atende reduções de um minuto ou mais
+sem decodificar os blocos.
+
+gravar_amostras agrupa as amostras por minuto e mescla com blocos já gravados do mesmo
+minuto (os dispositivos enviam lotes de alguns segundos). ler_amostras desempacota um
+intervalo e reduzir_intervalo o resume em janelas. A cada INTERVALO_PONTUAL,
+registrar_pontuais grava em sinais_vitais uma leitura derivada (mediana do pulso e da
+saturação da janela, sem temperatura e pressão), que passa pelas regras de alerta e pela
+linha de base de tendências como qualquer leitura.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import psycopg2
+
+import tendencias
+from alertas import avaliar_alertas, TIPO_ALERTA_LIMITES, TIPO_ALERTA_TENDENCIA
+from consultas import SQL_INSERIR_ALERTA
+
+LARGURAS = (1, 2, 4)
+# Amostras fora destas faixas são artefatos (sensor solto, movimento) e são descartadas
+FAIXA_FREQUENCIA = (20, 300)
+FAIXA_SATURACAO = (50, 100)
+# Janela resumida em cada leitura derivada e mínimo de amostras para derivá-la
+INTERVALO_PONTUAL = timedelta(minutes=15)
+MINIMO_AMOSTRAS_PONTUAL = 60
+RESUMOS = ("frequencia_media", "frequencia_min", "frequencia_max", "saturacao_media", "saturacao_min", "saturacao_max")
+
+SQL_GRAVAR_BLOCOS = f"""
+    INSERT INTO amostras_continuas (paciente_id, minuto, quantidade, instantes, frequencias, saturacoes, {', '.join(RESUMOS)})
+    SELECT %s, * FROM unnest(%s::timestamp[], %s::smallint[], %s::bytea[], %s::bytea[], %s::bytea[],
+                             %s::real[], %s::smallint[], %s::smallint[], %s::real[], %s::smallint[], %s::smallint[])
+    ON CONFLICT (paciente_id, minuto) DO UPDATE SET
+        quantidade = EXCLUDED.quantidade, instantes = EXCLUDED.instantes,
+        frequencias = EXCLUDED.frequencias, saturacoes = EXCLUDED.saturacoes,
+        {', '.join(f'{coluna} = EXCLUDED.{coluna}' for coluna in RESUMOS)}
+"""
+SQL_BLOCOS_EXISTENTES = """
+    SELECT minuto, instantes, frequencias, saturacoes FROM amostras_continuas
+    WHERE paciente_id = %s AND minuto = ANY(%s::timestamp[]) FOR UPDATE
+"""
+SQL_AMOSTRAS_BLOCOS = """
+    SELECT minuto, instantes, frequencias, saturacoes FROM amostras_continuas
+    WHERE paciente_id = %s AND minuto >= date_trunc('minute', %s::timestamp) AND minuto < %s
+    ORDER BY minuto
+"""
+SQL_AMOSTRAS_RESUMOS = f"""
+    SELECT minuto, quantidade, {', '.join(RESUMOS)} FROM amostras_continuas
+    WHERE paciente_id = %s AND minuto >= %s AND minuto < %s
+    ORDER BY minuto
+"""
+# Reserva a janela antes de derivar a leitura: rodar de novo não duplica leituras
+SQL_RESERVAR_JANELA = """
+    INSERT INTO leituras_continuas (paciente_id, janela) VALUES (%s, %s)
+    ON CONFLICT DO NOTHING RETURNING paciente_id
+"""
+SQL_VINCULAR_JANELA = "UPDATE leituras_continuas SET sinal_id = %s WHERE paciente_id = %s AND janela = %s"
+SQL_INSERIR_LEITURA_DERIVADA = """
+    INSERT INTO sinais_vitais (paciente_id, frequencia_cardiaca, saturacao, data_registro)
+    VALUES (%s, %s, %s, %s) RETURNING id
+"""
+
+
+def criar_estrutura(cursor):
+    """
+    Cria amostras_continuas e leituras_continuas e libera temperatura e pressão nulas em
+    sinais_vitais (as leituras derivadas do oxímetro não as medem).
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+    """
+    cursor.execute("ALTER TABLE sinais_vitais ALTER COLUMN temperatura DROP NOT NULL")
+    cursor.execute("ALTER TABLE sinais_vitais ALTER COLUMN pressao DROP NOT NULL")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS amostras_continuas (
+            paciente_id INTEGER NOT NULL REFERENCES pacientes(id) ON DELETE CASCADE,
+            minuto TIMESTAMP NOT NULL,
+            quantidade SMALLINT NOT NULL,
+            instantes BYTEA NOT NULL,
+            frequencias BYTEA NOT NULL,
+            saturacoes BYTEA NOT NULL,
+            frequencia_media REAL,
+            frequencia_min SMALLINT,
+            frequencia_max SMALLINT,
+            saturacao_media REAL,
+            saturacao_min SMALLINT,
+            saturacao_max SMALLINT,
+            PRIMARY KEY (paciente_id, minuto)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS leituras_continuas (
+            paciente_id INTEGER NOT NULL REFERENCES pacientes(id) ON DELETE CASCADE,
+            janela TIMESTAMP NOT NULL,
+            sinal_id INTEGER REFERENCES sinais_vitais(id) ON DELETE SET NULL,
+            PRIMARY KEY (paciente_id, janela)
+        )
+    """)
+
+
+def codificar(valores):
+    """
+    Codifica inteiros em delta + zigzag com a menor largura (1, 2 ou 4 bytes) que comporta o bloco.
+
+    Args:
+        valores (array-like): Inteiros.
+    Returns:
+        bytes: Um byte com a largura seguido dos deltas (little-endian).
+    Raises:
+        ValueError: Se algum delta não couber em 32 bits.
+    """
+    deltas = np.diff(np.asarray(valores, dtype=np.int64), prepend=0)
+    zigzag = ((deltas << 1) ^ (deltas >> 63)).astype(np.uint64)
+    maior = int(zigzag.max()) if len(zigzag) else 0
+    for largura in LARGURAS:
+        if maior < 1 << (8 * largura):
+            return bytes([largura]) + zigzag.astype(f"<u{largura}").tobytes()
+    raise ValueError("Delta grande demais para a codificação (máximo de 32 bits)")
+
+
+def decodificar(blob):
+    """
+    Inverso de codificar.
+
+    Args:
+        blob (bytes or memoryview): Valor codificado.
+    Returns:
+        numpy.ndarray: int64 com os valores.
+    """
+    blob = memoryview(blob)
+    zigzag = np.frombuffer(blob, dtype=f"<u{blob[0]}", offset=1).astype(np.int64)
+    return np.cumsum((zigzag >> 1) ^ -(zigzag & 1))
+
+
+def normalizar(instantes, frequencias, saturacoes):
+    """
+    Ordena as amostras, descarta artefatos e, em instantes repetidos, mantém a última.
+
+    Args:
+        instantes (array-like): Datas das amostras (datetime ou datetime64).
+        frequencias (array-like): Pulso de cada amostra.
+        saturacoes (array-like): Saturação de cada amostra.
+    Returns:
+        tuple: (instantes datetime64[ms], frequencias int64, saturacoes int64).
+    """
+    instantes = np.asarray(instantes, dtype="datetime64[ms]")
+    frequencias = np.asarray(frequencias, dtype=np.float64)
+    saturacoes = np.asarray(saturacoes, dtype=np.float64)
+    validas = ((frequencias >= FAIXA_FREQUENCIA[0]) & (frequencias <= FAIXA_FREQUENCIA[1])
+               & (saturacoes >= FAIXA_SATURACAO[0]) & (saturacoes <= FAIXA_SATURACAO[1])
+               & ~np.isnat(instantes))
+    instantes, frequencias, saturacoes = instantes[validas], frequencias[validas], saturacoes[validas]
+    ordem = np.argsort(instantes, kind="stable")
+    instantes, frequencias, saturacoes = instantes[ordem], frequencias[ordem], saturacoes[ordem]
+    ultimas = np.append(instantes[1:] != instantes[:-1], True) if len(instantes) else np.zeros(0, dtype=bool)
+    return instantes[ultimas], np.rint(frequencias[ultimas]).astype(np.int64), np.rint(saturacoes[ultimas]).astype(np.int64)
+
+
+def empacotar(instantes, frequencias, saturacoes):
+    """
+    Agrupa amostras normalizadas em blocos de um minuto.
+
+    Args:
+        instantes (numpy.ndarray): datetime64[ms] em ordem crescente, sem repetições.
+        frequencias (numpy.ndarray): Pulso de cada amostra.
+        saturacoes (numpy.ndarray): Saturação de cada amostra.
+    Returns:
+        list: Um dict por minuto com minuto (datetime), quantidade, instantes, frequencias,
+        saturacoes (bytes codificados) e as colunas de RESUMOS.
+    """
+    minutos = instantes.astype("datetime64[m]")
+    inicios = np.flatnonzero(np.append(True, minutos[1:] != minutos[:-1]))
+    blocos = []
+    for inicio, fim in zip(inicios, np.append(inicios[1:], len(instantes))):
+        minuto = minutos[inicio]
+        frequencia, saturacao = frequencias[inicio:fim], saturacoes[inicio:fim]
+        blocos.append({
+            "minuto": minuto.astype(datetime),
+            "quantidade": int(fim - inicio),
+            "instantes": codificar((instantes[inicio:fim] - minuto).astype(np.int64)),
+            "frequencias": codificar(frequencia),
+            "saturacoes": codificar(saturacao),
+            "frequencia_media": float(frequencia.mean()), "frequencia_min": int(frequencia.min()), "frequencia_max": int(frequencia.max()),
+            "saturacao_media": float(saturacao.mean()), "saturacao_min": int(saturacao.min()), "saturacao_max": int(saturacao.max()),
+        })
+    return blocos
+
+
+def desempacotar(minuto, instantes, frequencias, saturacoes):
+    """
+    Decodifica um bloco.
+
+    Returns:
+        tuple: (instantes datetime64[ms], frequencias int64, saturacoes int64).
+    """
+    return (np.datetime64(minuto, "ms") + decodificar(instantes).astype("timedelta64[ms]"),
+            decodificar(frequencias), decodificar(saturacoes))
+
+
+def _concatenar(partes):
+    if not partes:
+        return np.zeros(0, dtype="datetime64[ms]"), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return tuple(np.concatenate(coluna) for coluna in zip(*partes))
+
+
+def gravar_amostras(cursor, paciente_id, instantes, frequencias, saturacoes):
+    """
+    Grava amostras de um paciente, mesclando-as aos blocos já gravados dos mesmos minutos.
+
+    Os blocos afetados são bloqueados (FOR UPDATE) e regravados com uma única instrução.
+    Em instantes repetidos vale a amostra nova. O chamador faz o commit.
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+        paciente_id (int): ID do paciente.
+        instantes, frequencias, saturacoes: Amostras (ver normalizar).
+    Returns:
+        int: Minutos gravados.
+    """
+    novas = normalizar(instantes, frequencias, saturacoes)
+    if not len(novas[0]):
+        return 0
+    minutos = [minuto.astype(datetime) for minuto in np.unique(novas[0].astype("datetime64[m]"))]
+    cursor.execute(SQL_BLOCOS_EXISTENTES, (paciente_id, minutos))
+    existentes = [desempacotar(*linha) for linha in cursor.fetchall()]
+    # Existentes primeiro: na normalização, o instante repetido fica com a amostra nova
+    blocos = empacotar(*normalizar(*_concatenar(existentes + [novas])))
+    colunas = ["minuto", "quantidade", "instantes", "frequencias", "saturacoes", *RESUMOS]
+    valores = []
+    for coluna in colunas:
+        valores.append([psycopg2.Binary(b[coluna]) if isinstance(b[coluna], bytes) else b[coluna] for b in blocos])
+    cursor.execute(SQL_GRAVAR_BLOCOS, (paciente_id, *valores))
+    return len(blocos)
+
+
+def ler_amostras(cursor, paciente_id, inicio, fim):
+    """
+    Amostras de um paciente no intervalo [inicio, fim).
+
+    Returns:
+        tuple: (instantes datetime64[ms], frequencias int64, saturacoes int64), em ordem.
+    """
+    cursor.execute(SQL_AMOSTRAS_BLOCOS, (paciente_id, inicio, fim))
+    instantes, frequencias, saturacoes = _concatenar([desempacotar(*linha) for linha in cursor.fetchall()])
+    dentro = (instantes >= np.datetime64(inicio, "ms")) & (instantes < np.datetime64(fim, "ms"))
+    return instantes[dentro], frequencias[dentro], saturacoes[dentro]
+
+
+def reduzir(instantes, frequencias, saturacoes, passo):
+    """
+    Resume amostras em janelas de `passo` (média, mínimo e máximo por janela).
+
+    Args:
+        instantes (numpy.ndarray): datetime64[ms] em ordem crescente.
+        frequencias, saturacoes (numpy.ndarray): Valores de cada amostra.
+        passo (timedelta): Largura das janelas.
+    Returns:
+        pandas.DataFrame: Colunas inicio, amostras e RESUMOS; só janelas com amostras.
+    """
+    passo_ms = np.timedelta64(passo, "ms").astype(np.int64)
+    janelas = instantes.astype(np.int64) // passo_ms
+    inicios = np.flatnonzero(np.append(True, janelas[1:] != janelas[:-1])) if len(janelas) else np.zeros(0, dtype=np.int64)
+    contagens = np.diff(np.append(inicios, len(janelas)))
+    resumo = {"inicio": (janelas[inicios] * passo_ms).astype("datetime64[ms]"), "amostras": contagens}
+    for nome, valores in (("frequencia", frequencias), ("saturacao", saturacoes)):
+        valores = np.asarray(valores, dtype=np.float64)
+        resumo[f"{nome}_media"] = np.add.reduceat(valores, inicios) / contagens if len(inicios) else valores[:0]
+        resumo[f"{nome}_min"] = np.minimum.reduceat(valores, inicios) if len(inicios) else valores[:0]
+        resumo[f"{nome}_max"] = np.maximum.reduceat(valores, inicios) if len(inicios) else valores[:0]
+    return pd.DataFrame(resumo)
+
+
+def reduzir_intervalo(cursor, paciente_id, inicio, fim, passo):
+    """
+    Resume as amostras de um paciente no intervalo [inicio, fim) em janelas de `passo`.
+
+    Com passo múltiplo de um minuto (e intervalo alinhado ao minuto) usa só os resumos
+    gravados em cada bloco, sem decodificar amostras; abaixo disso, desempacota o intervalo.
+
+    Returns:
+        pandas.DataFrame: Ver reduzir.
+    """
+    alinhado = inicio.second == inicio.microsecond == fim.second == fim.microsecond == 0
+    if passo % timedelta(minutes=1) or not alinhado:
+        return reduzir(*ler_amostras(cursor, paciente_id, inicio, fim), passo)
+    cursor.execute(SQL_AMOSTRAS_RESUMOS, (paciente_id, inicio, fim))
+    minutos = pd.DataFrame(cursor.fetchall(), columns=["minuto", "amostras", *RESUMOS])
+    if minutos.empty:
+        return reduzir(np.zeros(0, dtype="datetime64[ms]"), [], [], passo)
+    minutos["inicio"] = minutos["minuto"].dt.floor(pd.Timedelta(passo))
+    for nome in ("frequencia", "saturacao"):
+        minutos[f"{nome}_soma"] = minutos[f"{nome}_media"] * minutos["amostras"]
+    agregado = minutos.groupby("inicio", sort=True).agg(
+        amostras=("amostras", "sum"), frequencia_soma=("frequencia_soma", "sum"), saturacao_soma=("saturacao_soma", "sum"),
+        frequencia_min=("frequencia_min", "min"), frequencia_max=("frequencia_max", "max"),
+        saturacao_min=("saturacao_min", "min"), saturacao_max=("saturacao_max", "max"),
+    ).reset_index()
+    for nome in ("frequencia", "saturacao"):
+        agregado[f"{nome}_media"] = agregado.pop(f"{nome}_soma") / agregado["amostras"]
+    return agregado[["inicio", "amostras", *RESUMOS]]
+
+
+def valores_pontuais(frequencias, saturacoes):
+    """
+    Leitura pontual de uma janela: medianas do pulso e da saturação (robustas a artefatos).
+
+    Returns:
+        tuple or None: (frequencia, saturacao) inteiros, ou None com menos de MINIMO_AMOSTRAS_PONTUAL amostras.
+    """
+    if len(frequencias) < MINIMO_AMOSTRAS_PONTUAL:
+        return None
+    return int(np.rint(np.median(frequencias))), int(np.rint(np.median(saturacoes)))
+
+
+def janelas_completas(inicio, fim):
+    """
+    Janelas de INTERVALO_PONTUAL inteiramente contidas em [inicio, fim), alinhadas à meia-noite.
+
+    Returns:
+        list: Datas de início das janelas.
+    """
+    dia = datetime(inicio.year, inicio.month, inicio.day)
+    primeira = dia + -((dia - inicio) // INTERVALO_PONTUAL) * INTERVALO_PONTUAL
+    janelas = []
+    while primeira + INTERVALO_PONTUAL <= fim:
+        janelas.append(primeira)
+        primeira += INTERVALO_PONTUAL
+    return janelas
+
+
+def registrar_pontuais(cursor, paciente_id, inicio, fim, limites):
+    """
+    Deriva e grava as leituras pontuais das janelas completas de [inicio, fim), com alertas.
+
+    Cada leitura derivada (sem temperatura e pressão, com data no fim da janela) é avaliada
+    pelos limites do paciente e pela linha de base de tendências, na mesma transação.
+    Janelas já derivadas ou com poucas amostras são puladas. O chamador faz o commit.
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+        paciente_id (int): ID do paciente.
+        inicio (datetime): Início do intervalo.
+        fim (datetime): Fim do intervalo (janelas que terminam depois dele ficam para a próxima vez).
+        limites (dict): Limites de alerta do paciente (perfis_alerta.IndiceLimites.limites).
+    Returns:
+        tuple: (leituras gravadas, alertas gravados).
+    """
+    janelas = janelas_completas(inicio, fim)
+    if not janelas:
+        return 0, 0
+    instantes, frequencias, saturacoes = ler_amostras(cursor, paciente_id, janelas[0], janelas[-1] + INTERVALO_PONTUAL)
+    leituras = alertas = 0
+    for janela in janelas:
+        dentro = (instantes >= np.datetime64(janela, "ms")) & (instantes < np.datetime64(janela + INTERVALO_PONTUAL, "ms"))
+        pontual = valores_pontuais(frequencias[dentro], saturacoes[dentro])
+        if pontual is None:
+            continue
+        cursor.execute(SQL_RESERVAR_JANELA, (paciente_id, janela))
+        if cursor.fetchone() is None:
+            continue
+        frequencia, saturacao = pontual
+        cursor.execute(SQL_INSERIR_LEITURA_DERIVADA, (paciente_id, frequencia, saturacao, janela + INTERVALO_PONTUAL))
+        sinal_id = cursor.fetchone()[0]
+        cursor.execute(SQL_VINCULAR_JANELA, (sinal_id, paciente_id, janela))
+        sinais = {"temperatura": None, "pressao": None, "frequencia": frequencia, "saturacao": saturacao}
+        novos = [(TIPO_ALERTA_LIMITES, alerta) for alerta in avaliar_alertas(sinais, limites)]
+        novos += [(TIPO_ALERTA_TENDENCIA, desvio) for desvio in
+                  tendencias.registrar_leitura(cursor, paciente_id, sinal_id, None, None, frequencia, saturacao)]
+        for tipo, descricao in novos:
+            cursor.execute(SQL_INSERIR_ALERTA, (paciente_id, tipo, descricao))
+        leituras += 1
+        alertas += len(novos)
+    return leituras, alertas
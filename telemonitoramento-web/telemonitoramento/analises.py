@@ -0,0 +1,251 @@
+"""
+Relatórios de coorte sobre as exportações em Parquet (ver exportacao.py), sem acessar o banco.
+
+As perguntas pesadas (SpO2 média por profissional e semana em anos de histórico, alertas por
+mês, sinais por faixa etária) rodam sobre os snapshots de sinais_vitais, alertas e pacientes
+com pyarrow.dataset e pyarrow.compute: os filtros de data e de profissional descartam
+partições (ano=/mes=) e row groups na leitura, só as colunas usadas são lidas e as
+agregações são colunares. O resultado reflete a última exportação (ver situacao_exportacao).
+
+Cada relatório de RELATORIOS recebe (origem, data_inicio, data_fim, profissional_id), com
+datas inclusivas, e devolve um pd.DataFrame com as colunas de ROTULOS.
+"""
+
+import os
+from datetime import datetime, time, timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from alertas import PARAMETROS_PADRAO
+from exportacao import diretorio_exportacao, ler_estado
+from indice_cego import rotulo_faixa
+
+MAIS_ALERTAS = 20
+
+ROTULOS = {
+    "profissional": "Profissional",
+    "paciente": "Paciente",
+    "semana": "Semana",
+    "mes": "Mês",
+    "faixa_etaria": "Início da faixa",
+    "faixa": "Faixa etária",
+    "tipo_alerta": "Tipo de alerta",
+    "leituras": "Leituras",
+    "pacientes": "Pacientes",
+    "saturacao_media": "SpO2 média (%)",
+    "saturacao_minima": "SpO2 mínima (%)",
+    "leituras_baixas": "Leituras com SpO2 baixa",
+    "percentual_baixas": "% com SpO2 baixa",
+    "temperatura_media": "Temperatura média (°C)",
+    "frequencia_media": "FC média (bpm)",
+    "escore_medio": "Escore médio",
+    "alertas": "Alertas",
+    "pendentes": "Pendentes",
+}
+
+
+def abrir(origem, tabela):
+    """
+    Dataset Parquet de uma tabela exportada.
+
+    Raises:
+        FileNotFoundError: Se a tabela ainda não foi exportada.
+    """
+    caminho = os.path.join(origem or diretorio_exportacao(), tabela)
+    if not os.path.isdir(caminho):
+        raise FileNotFoundError(f"{tabela} ainda não foi exportada para {os.path.dirname(caminho)} (scripts/exportar_dados.py).")
+    return ds.dataset(caminho, format="parquet", partitioning="hive")
+
+
+def ler(origem, tabela, colunas, coluna_data=None, data_inicio=None, data_fim=None, profissional_id=None):
+    """
+    Lê colunas de uma tabela exportada, filtrando na leitura.
+
+    Args:
+        origem (str): Diretório da exportação (None = EXPORTACAO_DIR).
+        tabela (str): sinais_vitais, alertas ou pacientes.
+        colunas (list): Colunas lidas.
+        coluna_data (str, opcional): Coluna de data dos filtros de período.
+        data_inicio, data_fim (date, opcional): Período (inclusive).
+        profissional_id (int, opcional): Só os pacientes deste profissional.
+    Returns:
+        pyarrow.Table
+    """
+    dataset = abrir(origem, tabela)
+    filtro = None
+
+    def e(condicao):
+        nonlocal filtro
+        filtro = condicao if filtro is None else filtro & condicao
+
+    if coluna_data and data_inicio:
+        # Condição sobre a partição: meses anteriores nem são abertos
+        e(ds.field("ano") >= data_inicio.year)
+        e(ds.field(coluna_data) >= pa.scalar(datetime.combine(data_inicio, time()), pa.timestamp("us")))
+    if coluna_data and data_fim:
+        e(ds.field("ano") <= data_fim.year)
+        e(ds.field(coluna_data) < pa.scalar(datetime.combine(data_fim + timedelta(days=1), time()), pa.timestamp("us")))
+    if profissional_id is not None:
+        e(ds.field("profissional_id") == profissional_id)
+    return dataset.to_table(columns=colunas, filter=filtro)
+
+
+def profissionais(origem=None):
+    """
+    Profissionais do snapshot de pacientes (para filtros, sem consultar o banco).
+
+    Returns:
+        list: (profissional_id, nome) em ordem de nome.
+    """
+    tabela = ler(origem, "pacientes", ["profissional_id", "profissional"])
+    tabela = _agregar(tabela.filter(pc.is_valid(tabela["profissional_id"])), ["profissional_id", "profissional"], [])
+    return sorted(zip(tabela["profissional_id"].to_pylist(), tabela["profissional"].to_pylist()), key=lambda p: p[1] or "")
+
+
+def situacao_exportacao(origem=None):
+    """
+    Data e volume da última exportação de cada tabela.
+
+    Returns:
+        dict: tabela -> {"exportado_em", "total", ...} (ver exportacao.exportar_tabela).
+    """
+    return ler_estado(origem or diretorio_exportacao())
+
+
+def _com_nomes(origem, tabela, chave, colunas_nome):
+    """Acrescenta nomes do snapshot de pacientes (profissional ou paciente) a uma agregação."""
+    nomes = ler(origem, "pacientes", ["id" if chave == "paciente_id" else "profissional_id"] + colunas_nome)
+    if chave == "paciente_id":
+        nomes = nomes.rename_columns(["paciente_id"] + colunas_nome)
+    else:
+        nomes = _agregar(nomes, ["profissional_id"] + colunas_nome, [])
+    return tabela.join(nomes, chave, join_type="left outer")
+
+
+def _agregar(tabela, chaves, agregacoes):
+    """
+    group_by com colunas de saída nomeadas (a ordem das colunas do Arrow muda entre versões).
+
+    Args:
+        agregacoes (list): (coluna, função do pyarrow.compute, nome da saída).
+    Returns:
+        pyarrow.Table: Chaves seguidas das agregações, na ordem pedida.
+    """
+    especificacoes = [(coluna, "count", pc.CountOptions(mode="all")) if funcao == "count_all" else (coluna, funcao)
+                      for coluna, funcao, _ in agregacoes]
+    resultado = tabela.group_by(chaves).aggregate(especificacoes)
+    colunas = {chave: resultado[chave] for chave in chaves}
+    for coluna, funcao, nome in agregacoes:
+        colunas[nome] = resultado[f"{coluna}_{'count' if funcao == 'count_all' else funcao}"]
+    return pa.table(colunas)
+
+
+def _por_periodo(tabela, coluna_data, unidade):
+    return pc.floor_temporal(tabela[coluna_data], unit=unidade, week_starts_monday=True)
+
+
+def _para_pandas(tabela, colunas, ordem):
+    return tabela.sort_by(ordem).select(colunas).to_pandas()
+
+
+def saturacao_semanal(origem=None, data_inicio=None, data_fim=None, profissional_id=None):
+    """SpO2 média e mínima por profissional e semana (segunda a domingo)."""
+    tabela = ler(origem, "sinais_vitais", ["profissional_id", "paciente_id", "data_registro", "saturacao"],
+                 "data_registro", data_inicio, data_fim, profissional_id)
+    tabela = tabela.filter(pc.is_valid(tabela["saturacao"]))
+    tabela = tabela.append_column("semana", _por_periodo(tabela, "data_registro", "week"))
+    tabela = _agregar(tabela, ["profissional_id", "semana"], [
+        ("saturacao", "mean", "saturacao_media"), ("saturacao", "min", "saturacao_minima"),
+        ("saturacao", "count", "leituras"), ("paciente_id", "count_distinct", "pacientes"),
+    ])
+    tabela = tabela.set_column(2, "saturacao_media", pc.round(tabela["saturacao_media"], 1))
+    tabela = _com_nomes(origem, tabela, "profissional_id", ["profissional"])
+    return _para_pandas(tabela, ["profissional", "semana", "saturacao_media", "saturacao_minima", "leituras", "pacientes"],
+                        [("profissional", "ascending"), ("semana", "ascending")])
+
+
+def dessaturacao_mensal(origem=None, data_inicio=None, data_fim=None, profissional_id=None, limite=PARAMETROS_PADRAO["sat_min"]):
+    """Parcela das leituras abaixo do limite de SpO2 por profissional e mês."""
+    tabela = ler(origem, "sinais_vitais", ["profissional_id", "paciente_id", "data_registro", "saturacao"],
+                 "data_registro", data_inicio, data_fim, profissional_id)
+    tabela = tabela.filter(pc.is_valid(tabela["saturacao"]))
+    tabela = tabela.append_column("mes", _por_periodo(tabela, "data_registro", "month"))
+    tabela = tabela.append_column("baixa", pc.cast(pc.less(tabela["saturacao"], limite), pa.int64()))
+    tabela = _agregar(tabela, ["profissional_id", "mes"], [
+        ("saturacao", "count", "leituras"), ("baixa", "sum", "leituras_baixas"), ("paciente_id", "count_distinct", "pacientes"),
+    ])
+    percentual = pc.round(pc.multiply(pc.divide(pc.cast(tabela["leituras_baixas"], pa.float64()), tabela["leituras"]), 100), 1)
+    tabela = tabela.append_column("percentual_baixas", percentual)
+    tabela = _com_nomes(origem, tabela, "profissional_id", ["profissional"])
+    return _para_pandas(tabela, ["profissional", "mes", "leituras", "leituras_baixas", "percentual_baixas", "pacientes"],
+                        [("profissional", "ascending"), ("mes", "ascending")])
+
+
+def alertas_mensais(origem=None, data_inicio=None, data_fim=None, profissional_id=None):
+    """Alertas por mês e tipo, com os que seguiam pendentes na exportação."""
+    tabela = ler(origem, "alertas", ["paciente_id", "tipo_alerta", "status", "data_hora"],
+                 "data_hora", data_inicio, data_fim, profissional_id)
+    tabela = tabela.append_column("mes", _por_periodo(tabela, "data_hora", "month"))
+    tabela = tabela.append_column("pendente", pc.cast(pc.equal(tabela["status"], "pendente"), pa.int64()))
+    tabela = _agregar(tabela, ["mes", "tipo_alerta"], [
+        ("paciente_id", "count_all", "alertas"), ("pendente", "sum", "pendentes"), ("paciente_id", "count_distinct", "pacientes"),
+    ])
+    return _para_pandas(tabela, ["mes", "tipo_alerta", "alertas", "pendentes", "pacientes"],
+                        [("mes", "ascending"), ("alertas", "descending")])
+
+
+def sinais_por_faixa_etaria(origem=None, data_inicio=None, data_fim=None, profissional_id=None):
+    """Médias dos sinais vitais e do escore por faixa etária (início numérico, para ordenar, e rótulo "40-49")."""
+    tabela = ler(origem, "sinais_vitais", ["paciente_id", "temperatura", "frequencia_cardiaca", "saturacao", "escore"],
+                 "data_registro", data_inicio, data_fim, profissional_id)
+    tabela = _com_nomes(origem, tabela, "paciente_id", ["faixa_etaria"])
+    tabela = _agregar(tabela, ["faixa_etaria"], [
+        ("temperatura", "mean", "temperatura_media"), ("frequencia_cardiaca", "mean", "frequencia_media"),
+        ("saturacao", "mean", "saturacao_media"), ("escore", "mean", "escore_medio"),
+        ("paciente_id", "count_all", "leituras"), ("paciente_id", "count_distinct", "pacientes"),
+    ])
+    for nome, casas in (("temperatura_media", 2), ("frequencia_media", 1), ("saturacao_media", 1), ("escore_medio", 2)):
+        indice = tabela.schema.get_field_index(nome)
+        tabela = tabela.set_column(indice, nome, pc.round(tabela[nome], casas))
+    df = _para_pandas(tabela, ["faixa_etaria", "leituras", "pacientes", "temperatura_media", "frequencia_media",
+                               "saturacao_media", "escore_medio"], [("faixa_etaria", "ascending")])
+    # Pacientes sem idade válida ficam sem faixa
+    df.insert(1, "faixa", [rotulo_faixa(int(faixa)) if pd.notna(faixa) else None
+                           for faixa in df["faixa_etaria"]])
+    return df
+
+
+def pacientes_mais_alertas(origem=None, data_inicio=None, data_fim=None, profissional_id=None):
+    """Os MAIS_ALERTAS pacientes com mais alertas no período."""
+    tabela = ler(origem, "alertas", ["paciente_id", "status"], "data_hora", data_inicio, data_fim, profissional_id)
+    tabela = tabela.append_column("pendente", pc.cast(pc.equal(tabela["status"], "pendente"), pa.int64()))
+    tabela = _agregar(tabela, ["paciente_id"], [("paciente_id", "count_all", "alertas"), ("pendente", "sum", "pendentes")])
+    tabela = tabela.sort_by([("alertas", "descending"), ("paciente_id", "ascending")]).slice(0, MAIS_ALERTAS)
+    tabela = _com_nomes(origem, tabela, "paciente_id", ["nome", "profissional"])
+    tabela = tabela.set_column(tabela.schema.get_field_index("nome"), "paciente", tabela["nome"])
+    return _para_pandas(tabela, ["paciente", "profissional", "alertas", "pendentes"],
+                        [("alertas", "descending"), ("paciente", "ascending")])
+
+
+RELATORIOS = {
+    "saturacao_semanal": {"titulo": "SpO2 média por profissional e semana", "funcao": saturacao_semanal},
+    "dessaturacao_mensal": {"titulo": "Leituras com SpO2 baixa por profissional e mês", "funcao": dessaturacao_mensal},
+    "alertas_mensais": {"titulo": "Alertas por mês e tipo", "funcao": alertas_mensais},
+    "sinais_por_faixa_etaria": {"titulo": "Sinais vitais por faixa etária", "funcao": sinais_por_faixa_etaria},
+    "pacientes_mais_alertas": {"titulo": f"{MAIS_ALERTAS} pacientes com mais alertas", "funcao": pacientes_mais_alertas},
+}
+
+
+def executar(relatorio, origem=None, data_inicio=None, data_fim=None, profissional_id=None):
+    """
+    Executa um relatório de RELATORIOS.
+
+    Returns:
+        pd.DataFrame: Colunas de ROTULOS (ainda sem renomear).
+    Raises:
+        FileNotFoundError: Se uma tabela usada ainda não foi exportada.
+    """
+    return RELATORIOS[relatorio]["funcao"](origem, data_inicio, data_fim, profissional_id)
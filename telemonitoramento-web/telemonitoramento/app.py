@@ -1,6 +1,5 @@
 # Bibliotecas padrão
 import os
-import re
 import logging
 import hashlib
 import smtplib
@@ -13,16 +12,45 @@ import psycopg2
 import pandas as pd
 import matplotlib.pyplot as plt
 from dotenv import load_dotenv, find_dotenv
-from io import BytesIO
+from io import BytesIO, TextIOWrapper
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from streamlit_extras.add_vertical_space import add_vertical_space
 from streamlit_extras.let_it_rain import rain
-from cryptography.fernet import Fernet
 import random
 import string
 import plotly.express as px
 
+# Módulos do projeto
+import adesao
+import analises
+import cache_leituras
+import criptografia
+import escore_risco
+import indice_cego
+import instrumentacao
+import notificacoes
+import perfilamento
+import perfis_alerta
+from alertas import validar_pressao, avaliar_alertas, parametros_de_linha, TIPO_ALERTA_LIMITES, TIPO_ALERTA_TENDENCIA
+from auditoria import listar_acoes, contagens_por_dia, listar_arquivos, consultar_arquivos
+from incremental import obter_janela
+from usuarios import TIPOS_USUARIO, alterar_status_em_lote, ler_csv_usuarios, importar_usuarios
+import pacientes_lote
+import seletores
+import simulador_alertas
+import tendencias
+import ultimos_sinais
+from consultas import (
+    SQL_AUTENTICAR, SQL_REGISTRAR_AUDITORIA, SQL_PARAMETROS_ALERTA, SQL_INSERIR_SINAIS_VITAIS,
+    SQL_INSERIR_ALERTA, SQL_NOTIFICACAO_SINAIS,
+    SQL_DASHBOARD_ALERTAS_POR_DIA, SQL_DASHBOARD_PACIENTES_POR_PROFISSIONAL, SQL_DASHBOARD_STATUS_ALERTAS,
+    COLUNAS_RELATORIO_SINAIS,
+    montar_consulta_sinais_vitais, montar_consulta_mensagens, montar_consulta_auditoria, montar_consulta_ao_vivo,
+    montar_consulta_usuarios,
+    buscar_contagens_dashboard
+)
+
 # Configuração de logging
 logging.basicConfig(
     level=logging.INFO,
@@ -41,6 +69,8 @@ DB_NAME = os.getenv("DB_NAME")
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_PORT = os.getenv("DB_PORT")
+# Usados pelos processos que abrem conexões próprias (ex.: simulação de alertas)
+PARAMETROS_CONEXAO = {"host": DB_HOST, "database": DB_NAME, "user": DB_USER, "password": DB_PASSWORD, "port": DB_PORT}
 
 # Debug de configuração
 logging.debug(f"Arquivo .env encontrado em: {dotenv_path}")
@@ -66,24 +96,44 @@ SAT_MIN = 90
 SAT_MAX = 100
 SAT_MIN_ALERTA = 90
 
-PRESSAO_PATTERN = r'^\d{2,3}/\d{2,3}$'
+# Linhas por página nas listagens paginadas (Mensagens, Auditoria)
+POR_PAGINA = 50
+
+# Leituras mantidas na listagem incremental de Sinais Vitais / Relatórios
+LIMITE_RELATORIO_SINAIS = 100
 
-# Chave de criptografia para dados sensíveis (em produção, armazene em local seguro)
-FERNET_KEY = os.getenv("FERNET_KEY") or Fernet.generate_key().decode()
-fernet = Fernet(FERNET_KEY.encode())
+# Intervalo em que o painel ao vivo confere eventos pendentes (em memória, sem consultar o banco)
+INTERVALO_AO_VIVO = f"{os.getenv('AO_VIVO_INTERVALO_S', '3')}s"
+LIMITE_CACHE_LEITURAS = int(os.getenv("CACHE_LEITURAS_MB", "16")) * 1024 * 1024
+
+# Chaves de criptografia dos dados sensíveis: FERNET_KEY cifra; FERNET_KEYS_ANTIGAS ainda decifram.
+# Sem chave configurada o app não inicia: uma chave aleatória tornaria ilegíveis os dados já gravados.
+try:
+    CHAVES_FERNET = criptografia.chaves_configuradas()
+except RuntimeError as e:
+    st.error(str(e))
+    st.stop()
+    # Fora do Streamlit (testes, import direto) st.stop() não interrompe: falha com o erro de configuração
+    raise
+FERNET_KEY = CHAVES_FERNET[0]
+fernet = criptografia.criar_fernet(CHAVES_FERNET)
+# Chave HMAC dos índices cegos (busca por diagnóstico sem descriptografar todos os pacientes)
+CHAVE_INDICE_CEGO = indice_cego.carregar_chave()
 
 # Funções de banco de dados
 def conectar_db():
     """
     Estabelece conexão com o banco de dados PostgreSQL usando as variáveis de ambiente.
 
+    As conexões são instrumentadas: cada consulta é medida e atribuída à página em execução.
+
     Returns:
         connection (psycopg2.extensions.connection): Conexão ativa com o banco de dados.
     Raises:
         Exception: Se houver falha na conexão, detalha o erro ocorrido.
     """
     try:
-        return psycopg2.connect(
+        return instrumentacao.conectar(
             host=DB_HOST,
             database=DB_NAME,
             user=DB_USER,
@@ -111,10 +161,7 @@ def registrar_auditoria(usuario_id, acao, detalhes):
     """
     conn = conectar_db()
     cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO auditoria (usuario_id, acao, detalhes, data_hora) VALUES (%s, %s, %s, NOW())",
-        (usuario_id, acao, detalhes)
-    )
+    cursor.execute(SQL_REGISTRAR_AUDITORIA, (usuario_id, acao, detalhes))
     conn.commit()
     conn.close()
 
@@ -173,80 +220,52 @@ def enviar_mensagem(id_remetente, id_destinatario, texto):
 def buscar_parametros_alerta():
     conn = conectar_db()
     cursor = conn.cursor()
-    cursor.execute("SELECT temp_min, temp_max, freq_min, freq_max, sat_min, pressao_min, pressao_max FROM parametros_alerta ORDER BY id DESC LIMIT 1")
+    cursor.execute(SQL_PARAMETROS_ALERTA)
     row = cursor.fetchone()
     conn.close()
-    if row:
-        temp_min, temp_max, freq_min, freq_max, sat_min, pressao_min, pressao_max = row
-    else:
-        temp_min, temp_max = 35.0, 38.0
-        freq_min, freq_max = 50, 120
-        sat_min = 90
-        pressao_min, pressao_max = "90/60", "140/90"
-    return {
-        "temp_min": temp_min, "temp_max": temp_max,
-        "freq_min": freq_min, "freq_max": freq_max,
-        "sat_min": sat_min,
-        "pressao_min": pressao_min, "pressao_max": pressao_max
-    }
+    return parametros_de_linha(row)
 
-# Funções de validação
-def validar_pressao(pressao):
+def indice_limites(pacientes=()):
     """
-    Valida o formato e os valores da pressão arterial informada.
+    Retorna o índice de limites de alerta do processo, sincronizado com as alterações notificadas.
 
     Args:
-        pressao (str): Pressão no formato 'sistólica/diastólica' (ex: '120/80').
+        pacientes (iterable, opcional): Pacientes que serão avaliados (carregados se ainda desconhecidos).
     Returns:
-        tuple: (bool, str) indicando se é válida e mensagem de erro (ou vazio).
+        perfis_alerta.IndiceLimites: Índice compartilhado pelas sessões do processo.
     """
-    if not re.match(PRESSAO_PATTERN, pressao):
-        logging.debug(f"Formato de pressão inválido: {pressao}")
-        return False, "Formato inválido. Use: 120/80"
-    try:
-        sist, diast = map(int, pressao.split('/'))
-        if not (90 <= sist <= 180 and 60 <= diast <= 110):
-            logging.debug(f"Valores de pressão fora do intervalo: {pressao}")
-            return False, "Valores fora do intervalo normal"
-        return True, ""
-    except Exception as e:
-        logging.exception(f"Erro ao processar pressão: {pressao}")
-        return False, "Erro ao processar valores"
+    ouvinte = notificacoes.obter_ouvinte(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASSWORD, port=DB_PORT)
+    indice = perfis_alerta.obter_indice(ouvinte)
+    indice.sincronizar(conectar_db, pacientes)
+    return indice
 
-def checar_alertas(sinais):
+def leituras_recentes(pacientes):
     """
-    Verifica se há alertas nos sinais vitais registrados, comparando com limites definidos.
+    Retorna as últimas leituras de pacientes pelo cache do processo (o banco só é consultado
+    para pacientes fora do cache, numa única consulta).
+
+    Args:
+        pacientes (iterable): IDs dos pacientes.
+    Returns:
+        dict: paciente_id -> lista de (data, temperatura, pressão, frequência, saturação), da mais recente.
+    """
+    ouvinte = notificacoes.obter_ouvinte(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASSWORD, port=DB_PORT)
+    return cache_leituras.obter_cache(ouvinte, LIMITE_CACHE_LEITURAS).leituras_de(pacientes, conectar_db)
+
+# Funções de validação
+def checar_alertas(sinais, paciente_id=None):
+    """
+    Verifica se há alertas nos sinais vitais registrados, comparando com os limites do paciente.
+
+    Os limites vêm do índice compilado (globais → perfil → ajustes do paciente), sem consulta por leitura.
 
     Args:
         sinais (dict): Dicionário com chaves 'temperatura', 'pressao', 'frequencia', 'saturacao'.
+        paciente_id (int, opcional): Paciente da leitura (None usa os limites globais).
     Returns:
         list: Lista de strings descrevendo os alertas encontrados (vazia se nenhum).
     """
-    params = buscar_parametros_alerta()
-    alertas = []
-    temperatura = sinais['temperatura']
-    pressao = sinais['pressao']
-    frequencia = sinais['frequencia']
-    saturacao = sinais['saturacao']
-
-    if temperatura < params['temp_min'] or temperatura > params['temp_max']:
-        alertas.append(f"Temperatura fora do padrão: {temperatura}°C (Limite: {params['temp_min']}–{params['temp_max']}°C)")
-    valido, msg = validar_pressao(pressao)
-    if not valido:
-        alertas.append(f"Pressão arterial: {msg}")
-    else:
-        sist, diast = map(int, pressao.split('/'))
-        sist_min, diast_min = map(int, params['pressao_min'].split('/'))
-        sist_max, diast_max = map(int, params['pressao_max'].split('/'))
-        if sist > sist_max or diast > diast_max:
-            alertas.append(f"Pressão Alta: {pressao} mmHg (Limite: {params['pressao_max']} mmHg)")
-        if sist < sist_min or diast < diast_min:
-            alertas.append(f"Pressão Baixa: {pressao} mmHg (Limite: {params['pressao_min']} mmHg)")
-    if frequencia < params['freq_min'] or frequencia > params['freq_max']:
-        alertas.append(f"Frequência cardíaca fora do padrão: {frequencia} bpm (Limite: {params['freq_min']}–{params['freq_max']} bpm)")
-    if saturacao < params['sat_min']:
-        alertas.append(f"Saturação baixa: {saturacao}% (Mínimo: {params['sat_min']}%)")
-    return alertas
+    return avaliar_alertas(sinais, indice_limites([paciente_id]).limites(paciente_id))
 
 def enviar_alerta_email(paciente_nome, alertas, paciente_email, profissional_email):
     """
@@ -299,7 +318,7 @@ def enviar_alerta_email(paciente_nome, alertas, paciente_email, profissional_ema
         raise Exception(f"Erro ao enviar alertas por email: {str(e)}")
 
 # Funções de envio de email
-def enviar_notificacao_profissional(paciente_nome, sinais_vitais, profissional_email, is_critico=True):
+def enviar_notificacao_profissional(paciente_nome, sinais_vitais, profissional_email, is_critico=True, escore=None, nivel=None):
     """
     Envia notificação por e-mail ao profissional de saúde sobre os sinais vitais do paciente.
 
@@ -308,16 +327,20 @@ def enviar_notificacao_profissional(paciente_nome, sinais_vitais, profissional_e
         sinais_vitais (dict): Dicionário com os valores dos sinais vitais.
         profissional_email (str): E-mail do profissional de saúde.
         is_critico (bool, opcional): Se True, envia como notificação crítica. Default: True.
+        escore (int, opcional): Escore de alerta precoce da leitura (vai no assunto).
+        nivel (str, opcional): Nível de risco correspondente ao escore.
     Raises:
         Exception: Se houver erro no envio do e-mail.
     """
     try:
-        assunto = f"[CRÍTICO] Sinais Vitais - {paciente_nome}" if is_critico else f"[ALERTA] Sinais Vitais - {paciente_nome}"
+        sufixo = f" - NEWS {escore} ({nivel})" if escore is not None else ""
+        assunto = f"[CRÍTICO] Sinais Vitais - {paciente_nome}{sufixo}" if is_critico else f"[ALERTA] Sinais Vitais - {paciente_nome}{sufixo}"
         corpo = f"""
         {'⚠️ REGISTRO CRÍTICO DE SINAIS VITAIS ⚠️' if is_critico else '🔔 ALERTA DE SINAIS VITAIS'}
         
         Paciente: {paciente_nome}
         Data/Hora: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
+        Escore de alerta precoce: {escore if escore is not None else '-'} ({nivel or 'não calculado'})
         
         Sinais Vitais Registrados:
         - Temperatura: {sinais_vitais['temperatura']}°C
@@ -398,7 +421,7 @@ def buscar_pacientes_do_profissional(profissional_id):
     Retorna todos os pacientes vinculados a um profissional específico.
 
     Args:
-        profissional_id (int): ID do profissional de saúde.
+        profissional_id (int): ID de usuário do profissional de saúde.
     Returns:
         list: Lista de tuplas (id, nome) dos pacientes vinculados.
     Raises:
@@ -411,8 +434,8 @@ def buscar_pacientes_do_profissional(profissional_id):
         cursor.execute("""
             SELECT p.id, u.nome
             FROM pacientes p
-            JOIN usuarios u ON p.usuario_id = u.id
-            WHERE p.profissional_responsavel_id = %s
+            JOIN usuarios u ON p.id_usuario = u.id
+            WHERE p.id_profissional_responsavel = %s
         """, (profissional_id,))
         pacientes = cursor.fetchall()
         logging.debug(f"Encontrados {len(pacientes)} pacientes para o profissional {profissional_id}")
@@ -522,7 +545,7 @@ def cadastrar_profissional(usuario_id, especialidade, registro_profissional):
         if conn:
             conn.close()
 
-def cadastrar_paciente(usuario_id, id_profissional_responsavel, dados_medicos=None):
+def cadastrar_paciente(usuario_id, id_profissional_responsavel, dados_medicos=None, indices=(None, None)):
     """
     Cadastra um novo paciente na tabela pacientes.
 
@@ -530,6 +553,7 @@ def cadastrar_paciente(usuario_id, id_profissional_responsavel, dados_medicos=No
         usuario_id (int): ID do usuário vinculado.
         id_profissional_responsavel (int): ID do profissional responsável.
         dados_medicos (str, opcional): Dados médicos criptografados.
+        indices (tuple, opcional): (diagnostico_indice, faixa_etaria) de indice_cego.colunas_indice.
     Returns:
         bool: True se cadastrado com sucesso, False caso contrário.
     """
@@ -538,8 +562,8 @@ def cadastrar_paciente(usuario_id, id_profissional_responsavel, dados_medicos=No
         conn = conectar_db()
         cursor = conn.cursor()
         cursor.execute(
-            "INSERT INTO pacientes (id_usuario, id_profissional_responsavel, dados_medicos) VALUES (%s, %s, %s)",
-            (usuario_id, id_profissional_responsavel, dados_medicos)
+            "INSERT INTO pacientes (id_usuario, id_profissional_responsavel, dados_medicos, diagnostico_indice, faixa_etaria) VALUES (%s, %s, %s, %s, %s)",
+            (usuario_id, id_profissional_responsavel, dados_medicos, *indices)
         )
         conn.commit()
         return True
@@ -554,7 +578,8 @@ def cadastrar_paciente(usuario_id, id_profissional_responsavel, dados_medicos=No
 
 def cadastrar_sinais_vitais(paciente_id, temperatura, pressao, frequencia, saturacao):
     """
-    Registra os sinais vitais de um paciente e notifica o profissional responsável.
+    Registra os sinais vitais de um paciente, grava os alertas da leitura (limites e tendência)
+    e notifica o profissional responsável.
 
     Args:
         paciente_id (int): ID do paciente.
@@ -566,41 +591,46 @@ def cadastrar_sinais_vitais(paciente_id, temperatura, pressao, frequencia, satur
         Exception: Se houver erro ao registrar os sinais vitais.
     """
     logging.info(f"Registrando sinais vitais para paciente_id={paciente_id}")
+    sinais = {
+        'temperatura': temperatura,
+        'pressao': pressao,
+        'frequencia': frequencia,
+        'saturacao': saturacao
+    }
     conn = None
     try:
+        alertas = checar_alertas(sinais, paciente_id)
         conn = conectar_db()
         cursor = conn.cursor()
-        # Primeiro registra no banco
-        cursor.execute(
-            "INSERT INTO sinais_vitais (paciente_id, temperatura, pressao, frequencia_cardiaca, saturacao) VALUES (%s, %s, %s, %s, %s) RETURNING id",
-            (paciente_id, temperatura, pressao, frequencia, saturacao)
-        )
-        registro_id = cursor.fetchone()[0]
+        # Primeiro registra no banco (leitura e alertas na mesma transação)
+        cursor.execute(SQL_INSERIR_SINAIS_VITAIS, (paciente_id, temperatura, pressao, frequencia, saturacao))
+        registro_id, data_registro = cursor.fetchone()
+        for alerta in alertas:
+            cursor.execute(SQL_INSERIR_ALERTA, (paciente_id, TIPO_ALERTA_LIMITES, alerta))
+        # Linha de base do paciente: atualizada em O(1), na mesma transação
+        desvios = tendencias.registrar_leitura(cursor, paciente_id, registro_id, temperatura, pressao, frequencia, saturacao)
+        for desvio in desvios:
+            cursor.execute(SQL_INSERIR_ALERTA, (paciente_id, TIPO_ALERTA_TENDENCIA, desvio))
         conn.commit()
-        logging.info(f"Sinais vitais registrados com sucesso (id={registro_id})")
+        logging.info(f"Sinais vitais registrados com sucesso (id={registro_id}, {len(alertas)} alertas, {len(desvios)} tendências)")
+        cache_leituras.obter_cache().registrar(paciente_id, registro_id, data_registro, temperatura, pressao, frequencia, saturacao)
         # Depois busca dados para notificação
-        cursor.execute("""
-            SELECT u.nome, up.email as prof_email
-            FROM pacientes p
-            JOIN usuarios u ON p.usuario_id = u.id
-            JOIN usuarios up ON p.profissional_responsavel_id = up.id
-            WHERE p.id = %s
-        """, (paciente_id,))
+        cursor.execute(SQL_NOTIFICACAO_SINAIS, (paciente_id,))
         dados = cursor.fetchone()
         if not dados:
             logging.error(f"Dados não encontrados para paciente_id={paciente_id}")
             st.warning("⚠️ Sinais vitais registrados, mas não foi possível identificar o profissional para notificação.")
             return
         paciente_nome, profissional_email = dados
+        # Crítico só pelo nível de risco (o mesmo escore gravado na leitura), não por qualquer limite cruzado
+        escore, pontos = escore_risco.calcular_escore(temperatura, pressao, frequencia, saturacao)
+        nivel = escore_risco.classificar(escore, pontos)
         # Tenta enviar email, mas não reverte registro em caso de falha
-        sinais = {
-            'temperatura': temperatura,
-            'pressao': pressao,
-            'frequencia': frequencia,
-            'saturacao': saturacao
-        }
         try:
-            enviar_notificacao_profissional(paciente_nome, sinais, profissional_email, is_critico=True)
+            enviar_notificacao_profissional(
+                paciente_nome, sinais, profissional_email,
+                is_critico=nivel in escore_risco.NIVEIS_CRITICOS, escore=escore, nivel=nivel
+            )
             st.success("✅ Sinais vitais registrados e profissional notificado!")
         except Exception as e:
             logging.exception("Falha ao enviar notificação")
@@ -725,6 +755,242 @@ def mostrar_ultimos_registros(df):
         logging.exception("Erro ao exibir tabela de registros")
         st.error("Não foi possível exibir os registros")
 
+def pagina_atual(chave, filtros):
+    """
+    Retorna a página (a partir de 0) de uma listagem paginada, voltando à primeira quando os filtros mudam.
+
+    Args:
+        chave (str): Chave da listagem no session_state.
+        filtros (tuple): Valores dos filtros aplicados.
+    Returns:
+        int: Página atual.
+    """
+    if st.session_state.get(f"{chave}_filtros") != filtros:
+        st.session_state[f"{chave}_filtros"] = filtros
+        st.session_state[chave] = 0
+    return st.session_state[chave]
+
+def mostrar_paginacao(chave, tem_proxima):
+    """
+    Exibe os botões de página anterior/próxima de uma listagem paginada.
+
+    Args:
+        chave (str): Chave da listagem no session_state.
+        tem_proxima (bool): Se existe uma próxima página.
+    """
+    col1, col2, col3 = st.columns([1, 1, 4])
+    if col1.button("◀ Anterior", key=f"{chave}_anterior", disabled=st.session_state[chave] == 0):
+        st.session_state[chave] -= 1
+        st.rerun()
+    if col2.button("Próxima ▶", key=f"{chave}_proxima", disabled=not tem_proxima):
+        st.session_state[chave] += 1
+        st.rerun()
+    col3.caption(f"Página {st.session_state[chave] + 1}")
+
+def seletor_busca(rotulo, entidade, chave, opcao_vazia="Todos"):
+    """
+    Seletor de paciente/usuário com busca no servidor (substitui selectboxes com a lista completa).
+
+    O usuário digita parte do nome ou do e-mail e escolhe entre as melhores correspondências.
+    A opção escolhida continua disponível enquanto a busca é refinada, e as buscas recentes
+    ficam no cache da sessão.
+
+    Args:
+        rotulo (str): Rótulo do seletor.
+        entidade (str): "usuarios", "profissionais", "profissionais_ativos" ou "pacientes".
+        chave (str): Chave do widget no session_state.
+        opcao_vazia (str, opcional): Texto da opção sem filtro (None para exigir uma escolha).
+    Returns:
+        int or None: ID escolhido (de pacientes para "pacientes", de usuarios para os demais).
+    """
+    cache = st.session_state.setdefault("seletores_cache", seletores.CacheBusca())
+    rotulos = st.session_state.setdefault(f"{chave}_rotulos", {})
+    col1, col2 = st.columns([1, 2])
+    termo = col1.text_input(f"🔎 {rotulo}", key=f"{chave}_termo", placeholder="Nome ou e-mail")
+    opcoes = seletores.buscar_opcoes(conectar_db, entidade, termo, cache)
+    rotulos.update(opcoes)
+    ids = [id_ for id_, _ in opcoes]
+    escolhido = st.session_state.get(chave)
+    if escolhido is not None and escolhido not in ids:
+        ids.insert(0, escolhido)
+    valores = ([None] if opcao_vazia else []) + ids
+    ajuda = None if termo.strip() else "Digite parte do nome ou do e-mail para buscar."
+    return col2.selectbox(
+        rotulo, valores, key=chave, help=ajuda,
+        format_func=lambda v: opcao_vazia if v is None else rotulos.get(v, f"ID {v}")
+    )
+
+def campos_limites(atuais, prefixo):
+    """
+    Exibe os campos de limites de um perfil ou ajuste de paciente (campo vazio = herdado).
+
+    Args:
+        atuais (dict): Valores atuais (None nos campos herdados).
+        prefixo (str): Prefixo das chaves dos widgets.
+    Returns:
+        dict: Campo -> valor informado (None quando vazio).
+    """
+    col1, col2 = st.columns(2)
+    limites = {
+        "temp_min": col1.number_input("Temperatura mínima (°C)", value=atuais["temp_min"], min_value=25.0, max_value=45.0, step=0.1, key=f"{prefixo}_temp_min"),
+        "temp_max": col2.number_input("Temperatura máxima (°C)", value=atuais["temp_max"], min_value=25.0, max_value=45.0, step=0.1, key=f"{prefixo}_temp_max"),
+        "freq_min": col1.number_input("Frequência mínima (bpm)", value=atuais["freq_min"], min_value=20, max_value=220, key=f"{prefixo}_freq_min"),
+        "freq_max": col2.number_input("Frequência máxima (bpm)", value=atuais["freq_max"], min_value=20, max_value=220, key=f"{prefixo}_freq_max"),
+        "sat_min": col1.number_input("Saturação mínima (%)", value=atuais["sat_min"], min_value=50, max_value=100, key=f"{prefixo}_sat_min"),
+        "pressao_min": col1.text_input("Pressão mínima (Ex: 90/60)", value=atuais["pressao_min"] or "", key=f"{prefixo}_pressao_min"),
+        "pressao_max": col2.text_input("Pressão máxima (Ex: 140/90)", value=atuais["pressao_max"] or "", key=f"{prefixo}_pressao_max"),
+    }
+    for campo in ("pressao_min", "pressao_max"):
+        limites[campo] = limites[campo].strip() or None
+    return limites
+
+def assinatura_ao_vivo(usuario_id, usuario_tipo):
+    """
+    Retorna a assinatura de eventos ao vivo da sessão, criando-a no primeiro uso.
+
+    Profissionais acompanham apenas os próprios pacientes; administradores, todos. A lista de
+    pacientes é relida a cada exibição do painel, então pacientes atribuídos depois do login
+    (cadastro, importação, transferência) entram sem novo login.
+
+    Args:
+        usuario_id (int): ID do usuário logado.
+        usuario_tipo (str): Tipo do usuário logado.
+    Returns:
+        notificacoes.Assinatura: Assinatura registrada na thread ouvinte do processo.
+    """
+    pacientes = None
+    if usuario_tipo != "Administrador":
+        pacientes = [pid for pid, _ in buscar_pacientes_do_profissional(usuario_id)]
+    if "assinatura_ao_vivo" in st.session_state:
+        if pacientes is not None:
+            st.session_state["assinatura_ao_vivo"].acompanhar(pacientes)
+    else:
+        ouvinte = notificacoes.obter_ouvinte(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASSWORD, port=DB_PORT)
+        assinatura = notificacoes.Assinatura(notificacoes.TABELAS_NOTIFICADAS, pacientes, usuario_id)
+        st.session_state["assinatura_ao_vivo"] = ouvinte.assinar(assinatura)
+    return st.session_state["assinatura_ao_vivo"]
+
+def atualizar_quadro_ao_vivo(tabela, dono_id, indice_ordem, limite=10):
+    """
+    Atualiza as linhas de um quadro do painel ao vivo com base nos eventos pendentes.
+
+    Sem eventos, devolve as linhas já exibidas sem consultar o banco; com eventos, busca
+    apenas as linhas notificadas e as mescla nas exibidas.
+
+    Args:
+        tabela (str): "alertas", "sinais_vitais" ou "mensagens".
+        dono_id (int or None): Filtro do quadro (profissional responsável ou destinatário).
+        indice_ordem (int): Coluna de data usada para ordenar as linhas.
+        limite (int, opcional): Linhas exibidas. Default: 10.
+    Returns:
+        list: Linhas do quadro.
+    """
+    chave = f"ao_vivo_{tabela}"
+    ids = st.session_state["assinatura_ao_vivo"].consumir(tabela)
+    if ids is None or chave not in st.session_state:
+        query, params = montar_consulta_ao_vivo(tabela, dono_id, limite=limite)
+    elif ids:
+        query, params = montar_consulta_ao_vivo(tabela, dono_id, ids=ids, limite=len(ids))
+    else:
+        return st.session_state[chave]
+    with instrumentacao.escopo(f"fragmento:{tabela}"):
+        conn = conectar_db()
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        linhas = cursor.fetchall()
+        conn.close()
+    if ids and chave in st.session_state:
+        linhas = notificacoes.mesclar_linhas(st.session_state[chave], linhas, indice_ordem, limite)
+    st.session_state[chave] = linhas
+    return linhas
+
+@st.fragment(run_every=INTERVALO_AO_VIVO)
+def quadro_alertas_ao_vivo(dono_id):
+    st.markdown("**🚨 Alertas recentes**")
+    linhas = atualizar_quadro_ao_vivo("alertas", dono_id, 5)
+    if linhas:
+        st.dataframe(pd.DataFrame(linhas, columns=["ID", "Paciente", "Tipo", "Descrição", "Status", "Data/Hora"]), hide_index=True)
+    else:
+        st.caption("Nenhum alerta.")
+
+@st.fragment(run_every=INTERVALO_AO_VIVO)
+def quadro_sinais_ao_vivo(dono_id):
+    st.markdown("**💓 Últimos sinais vitais**")
+    linhas = atualizar_quadro_ao_vivo("sinais_vitais", dono_id, 6)
+    if linhas:
+        st.dataframe(pd.DataFrame(linhas, columns=["ID", "Paciente", "Temperatura", "Pressão", "Frequência", "Saturação", "Data"]), hide_index=True)
+    else:
+        st.caption("Nenhum registro.")
+
+@st.fragment(run_every=INTERVALO_AO_VIVO)
+def quadro_mensagens_ao_vivo(usuario_id):
+    st.markdown("**💬 Mensagens recebidas**")
+    linhas = atualizar_quadro_ao_vivo("mensagens", usuario_id, 3)
+    if linhas:
+        st.dataframe(pd.DataFrame(linhas, columns=["ID", "Remetente", "Texto", "Data Envio"]), hide_index=True)
+    else:
+        st.caption("Nenhuma mensagem.")
+
+def mostrar_painel_ao_vivo(usuario_id, usuario_tipo):
+    """
+    Exibe o painel ao vivo (alertas, sinais vitais e mensagens), atualizado por notificações do banco.
+
+    Args:
+        usuario_id (int): ID do usuário logado.
+        usuario_tipo (str): Tipo do usuário logado.
+    """
+    assinatura_ao_vivo(usuario_id, usuario_tipo)
+    dono_id = None if usuario_tipo == "Administrador" else usuario_id
+    with st.expander("🔔 Ao vivo", expanded=True):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            quadro_alertas_ao_vivo(dono_id)
+        with col2:
+            quadro_sinais_ao_vivo(dono_id)
+        with col3:
+            quadro_mensagens_ao_vivo(usuario_id)
+
+def mostrar_relatorio_sinais(chave, paciente_id, profissional_id, data_inicio, data_fim):
+    """
+    Exibe a listagem de sinais vitais com carga incremental e destaque do que chegou desde a última visita.
+
+    Enquanto os filtros não mudam, cada rerun busca apenas as leituras posteriores à mais
+    recente já carregada; mudar um filtro recarrega a listagem.
+
+    Args:
+        chave (str): Chave da janela no session_state (uma por página).
+        paciente_id (int or None): Filtro de paciente.
+        profissional_id (int or None): Filtro de profissional.
+        data_inicio (date or None): Data inicial.
+        data_fim (date or None): Data final.
+    """
+    filtros = (paciente_id, profissional_id, data_inicio, data_fim)
+    janela, nova = obter_janela(st.session_state, chave, filtros, LIMITE_RELATORIO_SINAIS, COLUNAS_RELATORIO_SINAIS.index("Data Registro"))
+    if not nova and st.session_state.get("entrou_na_pagina"):
+        janela.marcar_visita()
+    conn = conectar_db()
+    cursor = conn.cursor()
+    query, params = montar_consulta_sinais_vitais(*filtros, limite=LIMITE_RELATORIO_SINAIS, apos=janela.marca)
+    cursor.execute(query, params)
+    janela.acrescentar(cursor.fetchall())
+    conn.close()
+    if nova:
+        janela.marcar_visita()
+    if janela.linhas:
+        novas = [janela.nova(linha) for linha in janela.linhas]
+        df_rel = pd.DataFrame(janela.linhas, columns=COLUNAS_RELATORIO_SINAIS)
+        if any(novas):
+            st.caption(f"🆕 {sum(novas)} leitura(s) nova(s) desde a sua última visita (destacadas).")
+        st.dataframe(df_rel.style.apply(
+            lambda linha: ["background-color: #fff3cd" if novas[linha.name] else ""] * len(linha), axis=1
+        ))
+        # Exportar CSV
+        csv = df_rel.to_csv(index=False).encode('utf-8')
+        st.download_button("Exportar CSV", data=csv, file_name="relatorio_sinais_vitais.csv", mime="text/csv")
+        st.info("Exportação PDF e gráficos interativos: Em breve!")
+    else:
+        st.info("Nenhum dado encontrado para os filtros selecionados.")
+
 def verificar_registro_hoje(paciente_id):
     """
     Verifica se o paciente já registrou sinais vitais no dia atual.
@@ -737,17 +1003,10 @@ def verificar_registro_hoje(paciente_id):
     conn = None
     try:
         conn = conectar_db()
-        cursor = conn.cursor()
-        hoje = date.today()
-        cursor.execute("""
-            SELECT COUNT(*) 
-            FROM sinais_vitais 
-            WHERE paciente_id = %s 
-            AND DATE(data_registro) = %s
-        """, (paciente_id, hoje))
-        registrado = cursor.fetchone()[0]
-        logging.debug(f"Verificação de registro do dia para paciente {paciente_id}: {registrado > 0}")
-        return registrado > 0
+        # Busca pela chave de adesao_diaria (mantida por trigger a cada leitura)
+        registrado = adesao.registrou_no_dia(conn.cursor(), paciente_id, date.today())
+        logging.debug(f"Verificação de registro do dia para paciente {paciente_id}: {registrado}")
+        return registrado
     except Exception as e:
         logging.exception("Erro ao verificar registro do dia")
         return False
@@ -769,6 +1028,30 @@ def mostrar_lembrete_registro(paciente_id):
         logging.warning(f"Paciente {paciente_id} ainda não registrou sinais vitais hoje")
         st.warning("⏰ Lembrete: você ainda não registrou seus sinais vitais hoje!")
 
+def mostrar_adesao(cursor, paciente_id):
+    """
+    Exibe o lembrete do dia, a sequência de dias com registro e o mapa de calor das últimas semanas.
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+        paciente_id (int): ID do paciente.
+    """
+    resumo = adesao.resumo_adesao(cursor, paciente_id)
+    if resumo["registrou_hoje"]:
+        st.success("✅ Você já registrou seus sinais vitais hoje. Obrigado pelo comprometimento!")
+    else:
+        st.warning("⏰ Lembrete: você ainda não registrou seus sinais vitais hoje!")
+    col1, col2 = st.columns(2)
+    col1.metric("Sequência atual", f"{resumo['sequencia']} dia(s)", "🔥")
+    col2.metric(f"Adesão ({adesao.SEMANAS_MAPA} semanas)", f"{resumo['proporcao']:.0%}")
+    fig = px.imshow(
+        resumo["mapa"], x=[f"{inicio:%d/%m}" for inicio in resumo["semanas"]],
+        y=["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"],
+        color_continuous_scale=[[0, "#eeeeee"], [1, "#388e3c"]], zmin=0, zmax=1, aspect="auto",
+    )
+    fig.update_layout(coloraxis_showscale=False, height=220, margin=dict(l=0, r=0, t=10, b=0))
+    st.plotly_chart(fig, use_container_width=True)
+
 def obter_registros_sinais(paciente_id, dias=7):
     """
     Obtém os registros de sinais vitais do paciente no período especificado.
@@ -832,7 +1115,7 @@ def autenticar(email, senha):
         conn = conectar_db()
         cursor = conn.cursor()
         senha_hash = hash_senha(senha)
-        cursor.execute("SELECT * FROM usuarios WHERE email=%s AND senha=%s", (email, senha_hash))
+        cursor.execute(SQL_AUTENTICAR, (email, senha_hash))
         usuario = cursor.fetchone()
         if usuario:
             if not usuario[5]:  # status (ativo/inativo)
@@ -853,31 +1136,25 @@ def autenticar(email, senha):
 # Função para criptografar dados médicos
 def criptografar_dados(dados):
     """
-    Criptografa um dicionário de dados sensíveis usando Fernet.
+    Criptografa um dicionário de dados sensíveis com a chave Fernet atual.
 
     Args:
         dados (dict): Dados a serem criptografados.
     Returns:
         str: Dados criptografados em base64.
     """
-    if not dados:
-        return None
-    import json
-    return fernet.encrypt(json.dumps(dados).encode()).decode()
+    return criptografia.criptografar_json(fernet, dados)
 
 def descriptografar_dados(dados_cript):
     """
-    Descriptografa dados criptografados com Fernet.
+    Descriptografa dados criptografados com qualquer chave Fernet configurada (atual ou antiga).
 
     Args:
         dados_cript (str): Dados criptografados em base64.
     Returns:
         dict: Dados originais descriptografados.
     """
-    if not dados_cript:
-        return None
-    import json
-    return json.loads(fernet.decrypt(dados_cript.encode()).decode())
+    return criptografia.descriptografar_json(fernet, dados_cript)
 
 def checar_alerta_custom(tipo_sinal, valor):
     """
@@ -922,16 +1199,12 @@ def set_parametro_alerta(tipo_sinal, min_valor, max_valor, mensagem):
         cursor = conn.cursor()
         
         # Buscar parâmetros atuais
-        cursor.execute("SELECT temp_min, temp_max, freq_min, freq_max, sat_min, pressao_min, pressao_max FROM parametros_alerta ORDER BY id DESC LIMIT 1")
-        row = cursor.fetchone()
-        
-        if row:
-            temp_min, temp_max, freq_min, freq_max, sat_min, pressao_min, pressao_max = row
-        else:
-            temp_min, temp_max = 35.0, 38.0
-            freq_min, freq_max = 50, 120
-            sat_min = 90
-            pressao_min, pressao_max = "90/60", "140/90"
+        cursor.execute(SQL_PARAMETROS_ALERTA)
+        params = parametros_de_linha(cursor.fetchone())
+        temp_min, temp_max = params["temp_min"], params["temp_max"]
+        freq_min, freq_max = params["freq_min"], params["freq_max"]
+        sat_min = params["sat_min"]
+        pressao_min, pressao_max = params["pressao_min"], params["pressao_max"]
         
         # Atualizar valores baseado no tipo
         if tipo_sinal == 'Temperatura':
@@ -955,7 +1228,25 @@ def set_parametro_alerta(tipo_sinal, min_valor, max_valor, mensagem):
         logging.error(f"Erro ao definir parâmetros de alerta: {e}")
         raise
 
+def encerrar_rerun():
+    """
+    Finaliza o perfil e a medição de consultas do rerun atual.
+    """
+    perfilamento.encerrar_perfil()
+    instrumentacao.encerrar_escopo()
+
+def parar():
+    """
+    Interrompe a execução do script (st.stop) após finalizar as medições do rerun.
+    """
+    encerrar_rerun()
+    st.stop()
+
 # Início do app Streamlit
+instrumentacao.iniciar_servidor_metricas()
+instrumentacao.iniciar_escopo("pagina:Login")
+perfilamento.iniciar_perfil("pagina:Login", sessao=st.session_state.get("perfilamento_sessao", False))
+
 if "usuario" not in st.session_state:
     st.session_state.usuario = None
 
@@ -993,7 +1284,7 @@ if not st.session_state.get("2fa_validado") and not st.session_state.get("2fa_co
                 st.error(f"Erro ao enviar código 2FA: {e}")
         else:
             st.error("Credenciais inválidas ou usuário inativo!")
-        st.stop()
+        parar()
     if esqueci_btn:
         if not email:
             st.warning("Digite seu e-mail para recuperar a senha.")
@@ -1024,7 +1315,7 @@ if not st.session_state.get("2fa_validado") and not st.session_state.get("2fa_co
                 except Exception as e:
                     st.error(f"Erro ao enviar código de recuperação: {e}")
                 st.session_state["rec_codigo_enviado"] = True
-        st.stop()
+        parar()
 if st.session_state.get("rec_codigo_enviado") and not st.session_state.get("rec_senha_trocada"):
     st.title("🔑 Recuperação de Senha")
     codigo = st.text_input("Digite o código enviado para seu e-mail")
@@ -1051,7 +1342,7 @@ if st.session_state.get("rec_codigo_enviado") and not st.session_state.get("rec_
                 if k in st.session_state:
                     del st.session_state[k]
             st.experimental_rerun()
-    st.stop()
+    parar()
 if st.session_state.get("2fa_codigo_enviado") and not st.session_state.get("2fa_validado"):
     st.title("🔐 Verificação em Duas Etapas (2FA)")
     codigo = st.text_input("Digite o código enviado para seu e-mail")
@@ -1064,7 +1355,7 @@ if st.session_state.get("2fa_codigo_enviado") and not st.session_state.get("2fa_
             st.rerun()
         else:
             st.error("Código incorreto. Tente novamente.")
-    st.stop()
+    parar()
 
 # Após login 2FA, exigir troca de senha se primeiro_acesso for True
 if st.session_state.get("2fa_validado") and st.session_state.usuario:
@@ -1097,7 +1388,7 @@ if st.session_state.get("2fa_validado") and st.session_state.usuario:
                         if k in st.session_state:
                             del st.session_state[k]
                     st.experimental_rerun()
-        st.stop()
+        parar()
 
 # Protege o acesso a usuario_tipo
 if st.session_state.usuario is not None:
@@ -1105,7 +1396,7 @@ if st.session_state.usuario is not None:
 else:
     usuario_tipo = None
     st.info("Por favor, faça login para acessar o sistema.")
-    st.stop()
+    parar()
 
 # Layout CEUB moderno e interativo
 st.set_page_config(page_title="Telemonitoramento CEUB", page_icon="🩺", layout="wide")
@@ -1155,15 +1446,36 @@ if 'opcoes_menu' not in st.session_state:
 if usuario_tipo == "Paciente" and "Meu Perfil" not in st.session_state['opcoes_menu']:
     st.session_state['opcoes_menu'].append("Meu Perfil")
 
+# Fila de prioridades para profissionais (a própria) e administradores (de qualquer profissional)
+if usuario_tipo in ["Administrador", "Profissional", "Profissional de Saúde"] and "Prioridades" not in st.session_state['opcoes_menu']:
+    st.session_state['opcoes_menu'].insert(st.session_state['opcoes_menu'].index("Pacientes"), "Prioridades")
+if usuario_tipo in ["Administrador", "Profissional", "Profissional de Saúde"] and "Visão Geral" not in st.session_state['opcoes_menu']:
+    st.session_state['opcoes_menu'].insert(st.session_state['opcoes_menu'].index("Pacientes"), "Visão Geral")
+
+# Importação de pacientes em lote só para administradores
+if usuario_tipo == "Administrador" and "Importar Pacientes" not in st.session_state['opcoes_menu']:
+    st.session_state['opcoes_menu'].insert(st.session_state['opcoes_menu'].index("Pacientes") + 1, "Importar Pacientes")
+# Análises sobre as exportações em Parquet só para administradores
+if usuario_tipo == "Administrador" and "Análises" not in st.session_state['opcoes_menu']:
+    st.session_state['opcoes_menu'].insert(st.session_state['opcoes_menu'].index("Relatórios") + 1, "Análises")
+
 opcoes_menu = st.session_state['opcoes_menu']
 opcao = st.sidebar.selectbox("Escolha uma opção", opcoes_menu)
+instrumentacao.renomear_escopo(f"pagina:{opcao}")
+st.session_state["entrou_na_pagina"] = st.session_state.get("pagina_atual") != opcao
+st.session_state["pagina_atual"] = opcao
+perfilamento.renomear_perfil(f"pagina:{opcao}")
 
 menu_itens = {
     "Dashboard": "🏠",
     "Usuários": "👤",
+    "Prioridades": "🚦",
+    "Visão Geral": "🛏️",
     "Pacientes": "🧑‍⚕️",
+    "Importar Pacientes": "📥",
     "Sinais Vitais": "💓",
     "Relatórios": "📊",
+    "Análises": "🔬",
     "Mensagens": "💬",
     "Auditoria": "🕵️",
     "Parâmetros de Alerta": "⚠️",
@@ -1174,6 +1486,10 @@ for item, emoji in menu_itens.items():
     if item in opcoes_menu:
         st.sidebar.markdown(f'<div class="sidebar-link">{emoji} {item}</div>', unsafe_allow_html=True)
 
+# Perfilamento sob demanda da sessão (vale a partir do próximo rerun)
+if usuario_tipo == "Administrador":
+    st.sidebar.checkbox("🔬 Perfilar esta sessão", key="perfilamento_sessao", help="Grava perfis de CPU de cada página desta sessão no diretório de perfis do servidor.")
+
 # Tema customizado Streamlit
 st.markdown("""
     <style>
@@ -1190,39 +1506,25 @@ st.markdown("""
 if opcao == "Dashboard":
     if usuario_tipo != "Administrador":
         st.error("Acesso negado. Apenas administradores podem acessar o dashboard gerencial.")
-        st.stop()
+        parar()
     
     st.header("🏥 Painel Gerencial do Administrador")
     # Cards de resumo
     conn = conectar_db()
     cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM pacientes")
-    total_pacientes = cursor.fetchone()[0]
-    cursor.execute("SELECT COUNT(*) FROM profissionais")
-    total_profissionais = cursor.fetchone()[0]
-    cursor.execute("SELECT COUNT(*) FROM alertas WHERE data_hora >= NOW() - INTERVAL '30 days'")
-    total_alertas_30d = cursor.fetchone()[0]
-    cursor.execute("SELECT COUNT(*) FROM usuarios WHERE status = TRUE")
-    total_usuarios_ativos = cursor.fetchone()[0]
-    cursor.execute("SELECT COUNT(*) FROM alertas WHERE status = 'pendente' AND data_hora >= NOW() - INTERVAL '7 days'")
-    alertas_pendentes = cursor.fetchone()[0]
+    contagens = buscar_contagens_dashboard(cursor)
     conn.close()
     col1, col2, col3, col4, col5 = st.columns(5)
-    col1.metric("Pacientes", total_pacientes, "🧑‍⚕️")
-    col2.metric("Profissionais", total_profissionais, "👨‍⚕️")
-    col3.metric("Usuários Ativos", total_usuarios_ativos, "✅")
-    col4.metric("Alertas 30 dias", total_alertas_30d, "⚠️")
-    col5.metric("Alertas Pendentes", alertas_pendentes, "🚨")
+    col1.metric("Pacientes", contagens["total_pacientes"], "🧑‍⚕️")
+    col2.metric("Profissionais", contagens["total_profissionais"], "👨‍⚕️")
+    col3.metric("Usuários Ativos", contagens["total_usuarios_ativos"], "✅")
+    col4.metric("Alertas 30 dias", contagens["total_alertas_30d"], "⚠️")
+    col5.metric("Alertas Pendentes", contagens["alertas_pendentes"], "🚨")
     st.markdown("---")
     # Gráfico de alertas por dia (últimos 30 dias)
     conn = conectar_db()
     cursor = conn.cursor()
-    cursor.execute("""
-        SELECT DATE(data_hora), COUNT(*) FROM alertas
-        WHERE data_hora >= NOW() - INTERVAL '30 days'
-        GROUP BY DATE(data_hora)
-        ORDER BY DATE(data_hora)
-    """)
+    cursor.execute(SQL_DASHBOARD_ALERTAS_POR_DIA)
     rows = cursor.fetchall()
     conn.close()
     if rows:
@@ -1232,13 +1534,7 @@ if opcao == "Dashboard":
     # Gráfico de pacientes por profissional
     conn = conectar_db()
     cursor = conn.cursor()
-    cursor.execute("""
-        SELECT u.nome, COUNT(p.id) FROM profissionais pr
-        JOIN usuarios u ON pr.id_usuario = u.id
-        LEFT JOIN pacientes p ON pr.id = p.id_profissional_responsavel
-        GROUP BY u.nome
-        ORDER BY COUNT(p.id) DESC
-    """)
+    cursor.execute(SQL_DASHBOARD_PACIENTES_POR_PROFISSIONAL)
     rows = cursor.fetchall()
     conn.close()
     if rows:
@@ -1248,7 +1544,7 @@ if opcao == "Dashboard":
     # Gráfico de status de alertas
     conn = conectar_db()
     cursor = conn.cursor()
-    cursor.execute("SELECT status, COUNT(*) FROM alertas GROUP BY status")
+    cursor.execute(SQL_DASHBOARD_STATUS_ALERTAS)
     rows = cursor.fetchall()
     conn.close()
     if rows:
@@ -1256,19 +1552,93 @@ if opcao == "Dashboard":
         fig3 = px.pie(df_status, names="Status", values="Qtd", title="Status dos Alertas")
         st.plotly_chart(fig3, use_container_width=True)
 
+elif opcao == "Prioridades":
+    if usuario_tipo not in ["Administrador", "Profissional", "Profissional de Saúde"]:
+        st.error("Acesso negado. Apenas profissionais e administradores têm fila de prioridades.")
+        parar()
+
+    st.header("🚦 Fila de Prioridades")
+    st.caption("Pacientes pelo escore de alerta precoce (NEWS2) da última leitura; no empate, quem está há mais tempo sem leitura vem primeiro.")
+    if usuario_tipo == "Administrador":
+        profissional_fila = seletor_busca("Profissional", "profissionais", "fila_profissional", opcao_vazia=None)
+    else:
+        profissional_fila = st.session_state.usuario[0]
+    if profissional_fila is None:
+        st.info("Busque e escolha um profissional para ver a fila.")
+    else:
+        pagina = pagina_atual("fila_pagina", (profissional_fila,))
+        conn = conectar_db()
+        fila = escore_risco.listar_fila(conn.cursor(), profissional_fila, POR_PAGINA + 1, pagina * POR_PAGINA)
+        conn.close()
+        if not fila:
+            st.info("Nenhum paciente sob responsabilidade deste profissional.")
+        else:
+            icones = {"Alto": "🔴", "Médio": "🟠", "Baixo-médio": "🟡", "Baixo": "🟢"}
+            st.dataframe(pd.DataFrame(
+                [(nome, escore, f"{icones[nivel]} {nivel}" if nivel else "Sem leitura", ultima, temp, pressao, freq, sat)
+                 for _, nome, escore, ultima, temp, pressao, freq, sat, nivel in fila[:POR_PAGINA]],
+                columns=["Paciente", "Escore", "Nível", "Última Leitura", "Temperatura", "Pressão", "Frequência", "Saturação"]
+            ), use_container_width=True, hide_index=True)
+            mostrar_paginacao("fila_pagina", len(fila) > POR_PAGINA)
+
+elif opcao == "Visão Geral":
+    if usuario_tipo not in ["Administrador", "Profissional", "Profissional de Saúde"]:
+        st.error("Acesso negado. Apenas profissionais e administradores têm visão geral dos pacientes.")
+        parar()
+
+    st.header("🛏️ Visão Geral dos Pacientes")
+    st.caption(f"Última leitura, último alerta e as {ultimos_sinais.TAMANHO_SERIE} leituras mais recentes de cada paciente, "
+               "mais graves primeiro.")
+    if usuario_tipo == "Administrador":
+        profissional_visao = seletor_busca("Profissional", "profissionais", "visao_profissional", opcao_vazia=None)
+    else:
+        profissional_visao = st.session_state.usuario[0]
+    if profissional_visao is None:
+        st.info("Busque e escolha um profissional para ver os pacientes.")
+    else:
+        conn = conectar_db()
+        visao = ultimos_sinais.listar_visao_geral(conn.cursor(), profissional_visao)
+        conn.close()
+        if not visao:
+            st.info("Nenhum paciente sob responsabilidade deste profissional.")
+        else:
+            colunas_nivel = st.columns(len(ultimos_sinais.ICONES_NIVEL) + 1)
+            for coluna, (nivel, icone) in zip(colunas_nivel, ultimos_sinais.ICONES_NIVEL.items()):
+                coluna.metric(f"{icone} {nivel}", sum(1 for linha in visao if linha["nivel"] == nivel))
+            colunas_nivel[-1].metric("🚨 Alertas pendentes", sum(1 for linha in visao if linha["alerta_status"] == "pendente"))
+            st.dataframe(
+                pd.DataFrame(visao),
+                column_order=["nome", "situacao", "data_registro", "temperaturas", "frequencias", "saturacoes", "sistolicas",
+                              "pressao", "alerta", "alerta_em"],
+                column_config={
+                    "nome": "Paciente",
+                    "situacao": "Situação",
+                    "data_registro": st.column_config.DatetimeColumn("Última Leitura", format="DD/MM/YYYY HH:mm"),
+                    "temperaturas": st.column_config.LineChartColumn("Temperatura", y_min=34, y_max=41),
+                    "frequencias": st.column_config.LineChartColumn("Frequência", y_min=30, y_max=180),
+                    "saturacoes": st.column_config.LineChartColumn("Saturação", y_min=80, y_max=100),
+                    "sistolicas": st.column_config.LineChartColumn("Sistólica", y_min=70, y_max=220),
+                    "pressao": "Pressão",
+                    "alerta": "Último Alerta",
+                    "alerta_em": st.column_config.DatetimeColumn("Alerta em", format="DD/MM/YYYY HH:mm"),
+                },
+                use_container_width=True, hide_index=True, height=min(38 * (len(visao) + 1), 900)
+            )
+
 elif opcao == "Usuários":
     if usuario_tipo != "Administrador":
         st.error("Acesso negado. Apenas administradores podem gerenciar usuários.")
-        st.stop()
+        parar()
     
     st.header("👤 Gerenciamento de Usuários")
+    admin_id = st.session_state.usuario[0]
     # Formulário de cadastro
     with st.expander("Cadastrar novo usuário"):
         with st.form("form_cadastro_usuario"):
             nome_novo = st.text_input("Nome")
             email_novo = st.text_input("E-mail")
             senha_novo = st.text_input("Senha", type="password")
-            tipo_novo = st.selectbox("Tipo", ["Administrador", "Profissional", "Paciente"])
+            tipo_novo = st.selectbox("Tipo", TIPOS_USUARIO)
             cadastrar_btn = st.form_submit_button("Cadastrar")
             if cadastrar_btn:
                 if not nome_novo or not email_novo or not senha_novo:
@@ -1277,32 +1647,82 @@ elif opcao == "Usuários":
                     usuario_id = cadastrar_usuario_novo(nome_novo, email_novo, senha_novo, tipo_novo)
                     if usuario_id:
                         st.success("Usuário cadastrado com sucesso!")
-                        st.experimental_rerun()
-    # Listagem e ativação/inativação
+                        st.rerun()
+    # Importação em lote
+    with st.expander("📥 Importar usuários (CSV)"):
+        st.caption("Colunas: nome, email, senha, tipo (Administrador, Profissional ou Profissional de Saúde) e, opcionalmente, "
+                   "status. Os usuários importados trocam a senha no primeiro acesso; e-mails já cadastrados são ignorados. "
+                   "Pacientes são importados na tela Importar Pacientes.")
+        arquivo_csv = st.file_uploader("Arquivo CSV", type=["csv"], key="usuarios_csv")
+        if arquivo_csv is not None:
+            try:
+                linhas_csv, erros_csv = ler_csv_usuarios(arquivo_csv.getvalue())
+            except ValueError as e:
+                st.error(str(e))
+                linhas_csv, erros_csv = [], []
+            if erros_csv:
+                st.warning(f"{len(erros_csv)} linhas rejeitadas:")
+                st.dataframe(pd.DataFrame(erros_csv, columns=["Linha", "Motivo"]), hide_index=True)
+            if linhas_csv and st.button(f"Importar {len(linhas_csv)} usuários", key="usuarios_importar"):
+                conn = conectar_db()
+                try:
+                    inseridos, existentes = importar_usuarios(conn.cursor(), linhas_csv, admin_id)
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    st.error(f"Erro ao importar usuários: {str(e)}")
+                else:
+                    st.success(f"{len(inseridos)} usuários importados.")
+                    if existentes:
+                        st.info(f"{len(existentes)} e-mails já cadastrados foram ignorados: {', '.join(existentes[:20])}"
+                                + (" ..." if len(existentes) > 20 else ""))
+                finally:
+                    conn.close()
+    # Listagem paginada com ativação/inativação em lote
+    col1, col2 = st.columns([3, 1])
+    busca_usuario = col1.text_input("Buscar por nome ou e-mail", key="usuarios_busca").strip()
+    tipo_filtro = col2.selectbox("Tipo", ["Todos", *TIPOS_USUARIO], key="usuarios_tipo")
+    tipo_filtro = None if tipo_filtro == "Todos" else tipo_filtro
+    pagina = pagina_atual("usuarios_pagina", (busca_usuario, tipo_filtro))
     conn = conectar_db()
     cursor = conn.cursor()
-    cursor.execute("SELECT id, nome, email, tipo, status FROM usuarios")
+    # Uma linha a mais indica se existe próxima página
+    cursor.execute(*montar_consulta_usuarios(busca_usuario or None, tipo_filtro, POR_PAGINA + 1, pagina * POR_PAGINA))
     usuarios = cursor.fetchall()
     conn.close()
+    tem_proxima = len(usuarios) > POR_PAGINA
+    usuarios = usuarios[:POR_PAGINA]
     if usuarios:
-        df_usuarios = pd.DataFrame(usuarios, columns=["ID", "Nome", "E-mail", "Tipo", "Status"])
-        for idx, row in df_usuarios.iterrows():
-            col1, col2, col3, col4, col5, col6 = st.columns([1,2,3,2,1,2])
-            col1.write(row["ID"])
-            col2.write(row["Nome"])
-            col3.write(row["E-mail"])
-            col4.write(row["Tipo"])
-            status_label = "Ativo" if row["Status"] else "Inativo"
-            col5.write(status_label)
-            if col6.button(f"{'Inativar' if row['Status'] else 'Ativar'}", key=f"status_{row['ID']}"):
-                conn = conectar_db()
-                cursor = conn.cursor()
-                cursor.execute("UPDATE usuarios SET status = %s WHERE id = %s", (not row["Status"], row["ID"]))
+        df_usuarios = pd.DataFrame(usuarios, columns=["ID", "Nome", "E-mail", "Tipo", "Ativo"])
+        df_usuarios.insert(0, "Selecionar", False)
+        editado = st.data_editor(
+            df_usuarios,
+            hide_index=True,
+            use_container_width=True,
+            disabled=["ID", "Nome", "E-mail", "Tipo", "Ativo"],
+            column_config={"Selecionar": st.column_config.CheckboxColumn("✔", width="small")},
+            key=f"usuarios_grade_{pagina}_{busca_usuario}_{tipo_filtro}",
+        )
+        selecionados = editado.loc[editado["Selecionar"], "ID"].tolist()
+        col1, col2, col3 = st.columns([1, 1, 3])
+        ativar = col1.button("✅ Ativar selecionados", disabled=not selecionados)
+        inativar = col2.button("⛔ Inativar selecionados", disabled=not selecionados)
+        col3.caption(f"{len(selecionados)} selecionados")
+        if ativar or inativar:
+            if inativar and admin_id in selecionados:
+                st.warning("Você não pode inativar a própria conta.")
+                selecionados.remove(admin_id)
+            conn = conectar_db()
+            try:
+                alterados = alterar_status_em_lote(conn.cursor(), selecionados, ativar, admin_id)
                 conn.commit()
+            finally:
                 conn.close()
-                st.experimental_rerun()
+            st.toast(f"{len(alterados)} usuários {'ativados' if ativar else 'inativados'}.")
+            st.rerun()
+        mostrar_paginacao("usuarios_pagina", tem_proxima)
     else:
-        st.info("Nenhum usuário cadastrado.")
+        st.info("Nenhum usuário encontrado." if busca_usuario or tipo_filtro else "Nenhum usuário cadastrado.")
 
 elif opcao == "Pacientes":
     st.header("🧑‍⚕️ Meus Dados" if usuario_tipo == "Paciente" else "🧑‍⚕️ Gerenciamento de Pacientes")
@@ -1317,7 +1737,7 @@ elif opcao == "Pacientes":
                 # Seleção do profissional responsável
                 conn = conectar_db()
                 cursor = conn.cursor()
-                cursor.execute("SELECT id, nome FROM usuarios WHERE tipo = 'Profissional'")
+                cursor.execute("SELECT id, nome FROM usuarios WHERE tipo IN ('Profissional', 'Profissional de Saúde')")
                 profissionais = cursor.fetchall()
                 conn.close()
                 if profissionais:
@@ -1332,13 +1752,14 @@ elif opcao == "Pacientes":
                     if not nome_pac or not diagnostico_pac or prof_id is None:
                         st.warning("Preencha todos os campos!")
                     else:
-                        dados_medicos = criptografar_dados({"idade": idade_pac, "diagnostico": diagnostico_pac})
-                        usuario_id = cadastrar_usuario_novo(nome_pac, f"{nome_pac.lower().replace(' ','.')}@paciente.com", "Senha@123", "Paciente")
+                        dados_pac = {"idade": idade_pac, "diagnostico": diagnostico_pac}
+                        dados_medicos = criptografar_dados(dados_pac)
+                        usuario_id = cadastrar_usuario_novo(nome_pac, pacientes_lote.email_padrao_paciente(nome_pac), pacientes_lote.SENHA_INICIAL, "Paciente")
                         if usuario_id:
-                            ok = cadastrar_paciente(usuario_id, prof_id, dados_medicos)
+                            ok = cadastrar_paciente(usuario_id, prof_id, dados_medicos, indice_cego.colunas_indice(CHAVE_INDICE_CEGO, dados_pac))
                             if ok:
                                 st.success("Paciente cadastrado com sucesso!")
-                                st.experimental_rerun()
+                                st.rerun()
     
     # Listagem de pacientes
     conn = conectar_db()
@@ -1354,9 +1775,9 @@ elif opcao == "Pacientes":
                 dados = descriptografar_dados(dados_med)
                 st.write(f"**Idade:** {dados.get('idade', '-') if dados else '-'}")
                 st.write(f"**Diagnóstico:** {dados.get('diagnostico', '-') if dados else '-'}")
-                # Histórico de sinais vitais
-                cursor.execute("SELECT data_registro, temperatura, pressao, frequencia_cardiaca, saturacao FROM sinais_vitais WHERE paciente_id = %s ORDER BY data_registro DESC LIMIT 10", (pid,))
-                sinais = cursor.fetchall()
+                mostrar_adesao(cursor, pid)
+                # Histórico de sinais vitais (cache do processo)
+                sinais = leituras_recentes([pid])[pid]
                 if sinais:
                     st.write("**Últimos sinais vitais:**")
                     st.dataframe(pd.DataFrame(sinais, columns=["Data", "Temperatura", "Pressão", "Frequência", "Saturação"]))
@@ -1365,256 +1786,242 @@ elif opcao == "Pacientes":
         else:
             st.info("Seu perfil de paciente não foi encontrado.")
     else:
-        # Admin/Profissional vê todos os pacientes
-        cursor.execute("SELECT p.id, u.nome, p.dados_medicos FROM pacientes p JOIN usuarios u ON p.id_usuario = u.id")
-        pacientes = cursor.fetchall()
-        if pacientes:
-            for pid, nome, dados_med in pacientes:
-                with st.expander(f"Paciente: {nome} (ID {pid})"):
-                    dados = descriptografar_dados(dados_med)
-                    st.write(f"**Idade:** {dados.get('idade', '-') if dados else '-'}")
-                    st.write(f"**Diagnóstico:** {dados.get('diagnostico', '-') if dados else '-'}")
-                    # Histórico de sinais vitais
-                    cursor.execute("SELECT data_registro, temperatura, pressao, frequencia_cardiaca, saturacao FROM sinais_vitais WHERE paciente_id = %s ORDER BY data_registro DESC LIMIT 10", (pid,))
-                    sinais = cursor.fetchall()
-                    if sinais:
-                        st.write("**Últimos sinais vitais:**")
-                        st.dataframe(pd.DataFrame(sinais, columns=["Data", "Temperatura", "Pressão", "Frequência", "Saturação"]))
-                    else:
-                        st.info("Nenhum registro de sinais vitais para este paciente.")
+        mostrar_painel_ao_vivo(st.session_state.usuario[0], usuario_tipo)
+        # Busca pelos índices cegos: só os pacientes da página exibida são descriptografados
+        st.subheader("🔎 Buscar pacientes")
+        if usuario_tipo == "Administrador":
+            profissional_busca = seletor_busca("Profissional responsável", "profissionais", "pac_profissional")
+        else:
+            profissional_busca = st.session_state.usuario[0]
+            st.caption("Busca entre os seus pacientes.")
+        col1, col2 = st.columns(2)
+        diagnostico_busca = col1.text_input("Diagnóstico (exato; maiúsculas e acentos são ignorados)", key="pac_diagnostico").strip()
+        faixas_busca = col2.multiselect("Faixa etária", indice_cego.FAIXAS, format_func=indice_cego.rotulo_faixa, key="pac_faixas")
+        if not (diagnostico_busca or profissional_busca or faixas_busca):
+            st.info("Escolha um profissional, um diagnóstico ou uma faixa etária para listar os pacientes.")
         else:
-            st.info("Nenhum paciente cadastrado.")
+            pagina = pagina_atual("pac_pagina", (profissional_busca, diagnostico_busca, tuple(faixas_busca)))
+            try:
+                encontrados = indice_cego.buscar_pacientes(
+                    cursor, fernet, CHAVE_INDICE_CEGO, diagnostico_busca or None, profissional_busca, faixas_busca,
+                    limite=POR_PAGINA + 1, deslocamento=pagina * POR_PAGINA
+                )
+            except ValueError as e:
+                st.warning(str(e))
+            else:
+                tem_proxima = len(encontrados) > POR_PAGINA
+                encontrados = encontrados[:POR_PAGINA]
+                if encontrados:
+                    recentes = leituras_recentes([paciente.id for paciente in encontrados])
+                    for paciente in encontrados:
+                        with st.expander(f"Paciente: {paciente.nome} (ID {paciente.id})"):
+                            st.write(f"**Profissional:** {paciente.profissional or '-'}")
+                            st.write(f"**Idade:** {paciente.idade if paciente.idade is not None else '-'}")
+                            st.write(f"**Diagnóstico:** {paciente.diagnostico or '-'}")
+                            # Histórico de sinais vitais
+                            sinais = recentes[paciente.id]
+                            if sinais:
+                                st.write("**Últimos sinais vitais:**")
+                                st.dataframe(pd.DataFrame(sinais, columns=["Data", "Temperatura", "Pressão", "Frequência", "Saturação"]))
+                            else:
+                                st.info("Nenhum registro de sinais vitais para este paciente.")
+                elif not pagina:
+                    st.info("Nenhum paciente encontrado.")
+                if encontrados or pagina:
+                    mostrar_paginacao("pac_pagina", tem_proxima)
     
     conn.close()
 
+elif opcao == "Importar Pacientes":
+    if usuario_tipo != "Administrador":
+        st.error("Acesso negado. Apenas administradores podem importar pacientes.")
+        parar()
+
+    st.header("📥 Importação de Pacientes em Lote")
+    st.caption("CSV com as colunas nome, idade e diagnostico; opcionalmente email, senha e profissional "
+               "(e-mail, ID de usuário ou registro profissional). Cada lote é gravado em uma única transação.")
+    prof_padrao = seletor_busca("Profissional responsável para linhas sem profissional", "profissionais_ativos", "imp_profissional", opcao_vazia="Nenhum")
+    tamanho_lote = st.number_input("Linhas por transação", min_value=100, max_value=10000, value=pacientes_lote.TAMANHO_LOTE, step=100)
+    arquivo_pac = st.file_uploader("Arquivo CSV", type=["csv"], key="pacientes_csv")
+    if arquivo_pac is not None and st.button("Importar pacientes"):
+        barra = st.progress(0.0, text="Importando...")
+        tamanho_arquivo = max(arquivo_pac.size, 1)
+
+        def progresso(resultados):
+            barra.progress(min(arquivo_pac.tell() / tamanho_arquivo, 1.0), text=f"{len(resultados)} linhas processadas")
+
+        conn = conectar_db()
+        try:
+            resultados = pacientes_lote.importar_pacientes(
+                conn, TextIOWrapper(arquivo_pac, encoding="utf-8-sig", newline=""), FERNET_KEY,
+                st.session_state.usuario[0], prof_padrao, tamanho_lote=int(tamanho_lote),
+                progresso=progresso, chave_indice=CHAVE_INDICE_CEGO,
+            )
+        except ValueError as e:
+            st.error(str(e))
+            resultados = None
+        finally:
+            conn.close()
+        barra.empty()
+        if resultados is not None:
+            resumo = pacientes_lote.resumir_resultados(resultados)
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Importados", resumo[pacientes_lote.IMPORTADO])
+            col2.metric("Duplicados", resumo[pacientes_lote.DUPLICADO])
+            col3.metric("Inválidos", resumo[pacientes_lote.INVALIDO])
+            col4.metric("Falhas", resumo[pacientes_lote.FALHA])
+            df_relatorio = pd.DataFrame(resultados, columns=["Linha", "E-mail", "Situação", "Detalhe"])
+            problemas = df_relatorio[df_relatorio["Situação"] != pacientes_lote.IMPORTADO]
+            if not problemas.empty:
+                st.dataframe(problemas, hide_index=True, use_container_width=True)
+            st.download_button("Baixar relatório (CSV)", df_relatorio.to_csv(index=False).encode("utf-8"), "relatorio_importacao.csv", "text/csv")
+
 elif opcao == "Sinais Vitais":
     st.header("💓 Registros de Sinais Vitais")
+    if usuario_tipo != "Paciente":
+        mostrar_painel_ao_vivo(st.session_state.usuario[0], usuario_tipo)
     # Filtros
     params_alerta = buscar_parametros_alerta()
     st.info(f"Limites atuais: Temperatura {params_alerta['temp_min']}–{params_alerta['temp_max']}°C | Frequência {params_alerta['freq_min']}–{params_alerta['freq_max']} bpm | Saturação mínima {params_alerta['sat_min']}% | Pressão {params_alerta['pressao_min']}–{params_alerta['pressao_max']} mmHg")
-    conn = conectar_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT p.id, u.nome FROM pacientes p JOIN usuarios u ON p.id_usuario = u.id")
-    pacientes = cursor.fetchall()
-    cursor.execute("SELECT id, nome FROM usuarios WHERE tipo = 'Profissional'")
-    profissionais = cursor.fetchall()
-    conn.close()
-    paciente_id_filtro = None
-    profissional_id_filtro = None
-    if pacientes:
-        pac_opcoes = {f"{nome} (ID {pid})": pid for pid, nome in pacientes}
-        pac_selecionado = st.selectbox("Filtrar por paciente", ["Todos"] + list(pac_opcoes.keys()), key="rel_pac")
-        if pac_selecionado != "Todos":
-            paciente_id_filtro = pac_opcoes[pac_selecionado]
-    if profissionais:
-        prof_opcoes = {f"{nome} (ID {pid})": pid for pid, nome in profissionais}
-        prof_selecionado = st.selectbox("Filtrar por profissional", ["Todos"] + list(prof_opcoes.keys()), key="rel_prof")
-        if prof_selecionado != "Todos":
-            profissional_id_filtro = prof_opcoes[prof_selecionado]
+    paciente_id_filtro = seletor_busca("Filtrar por paciente", "pacientes", "rel_pac")
+    profissional_id_filtro = seletor_busca("Filtrar por profissional", "profissionais", "rel_prof")
     data_inicio = st.date_input("Data inicial", value=None, key="rel_data_inicio")
     data_fim = st.date_input("Data final", value=None, key="rel_data_fim")
-    # Consulta dos registros
-    conn = conectar_db()
-    cursor = conn.cursor()
-    query = "SELECT s.id, u.nome, pr.nome, s.temperatura, s.pressao, s.frequencia_cardiaca, s.saturacao, s.data_registro FROM sinais_vitais s JOIN pacientes p ON s.paciente_id = p.id JOIN usuarios u ON p.id_usuario = u.id JOIN usuarios pr ON p.id_profissional_responsavel = pr.id"
-    filtros = []
-    params = []
-    if paciente_id_filtro:
-        filtros.append("s.paciente_id = %s")
-        params.append(paciente_id_filtro)
-    if profissional_id_filtro:
-        filtros.append("p.id_profissional_responsavel = %s")
-        params.append(profissional_id_filtro)
-    if data_inicio:
-        filtros.append("s.data_registro >= %s")
-        params.append(str(data_inicio))
-    if data_fim:
-        filtros.append("s.data_registro <= %s")
-        params.append(str(data_fim))
-    if filtros:
-        query += " WHERE " + " AND ".join(filtros)
-    query += " ORDER BY s.data_registro DESC LIMIT 100"
-    cursor.execute(query, tuple(params))
-    registros = cursor.fetchall()
-    conn.close()
-    if registros:
-        df_rel = pd.DataFrame(registros, columns=["ID", "Paciente", "Profissional", "Temperatura", "Pressão", "Frequência", "Saturação", "Data Registro"])
-        st.dataframe(df_rel)
-        # Exportar CSV
-        csv = df_rel.to_csv(index=False).encode('utf-8')
-        st.download_button("Exportar CSV", data=csv, file_name="relatorio_sinais_vitais.csv", mime="text/csv")
-        st.info("Exportação PDF e gráficos interativos: Em breve!")
-    else:
-        st.info("Nenhum dado encontrado para os filtros selecionados.")
+    mostrar_relatorio_sinais(f"janela_{opcao}", paciente_id_filtro, profissional_id_filtro, data_inicio, data_fim)
 
 elif opcao == "Relatórios":
     st.header("📊 Relatórios e Gráficos")
     # Filtros
-    conn = conectar_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT p.id, u.nome FROM pacientes p JOIN usuarios u ON p.id_usuario = u.id")
-    pacientes = cursor.fetchall()
-    cursor.execute("SELECT id, nome FROM usuarios WHERE tipo = 'Profissional'")
-    profissionais = cursor.fetchall()
-    conn.close()
-    paciente_id_filtro = None
-    profissional_id_filtro = None
-    if pacientes:
-        pac_opcoes = {f"{nome} (ID {pid})": pid for pid, nome in pacientes}
-        pac_selecionado = st.selectbox("Filtrar por paciente", ["Todos"] + list(pac_opcoes.keys()), key="rel_pac")
-        if pac_selecionado != "Todos":
-            paciente_id_filtro = pac_opcoes[pac_selecionado]
-    if profissionais:
-        prof_opcoes = {f"{nome} (ID {pid})": pid for pid, nome in profissionais}
-        prof_selecionado = st.selectbox("Filtrar por profissional", ["Todos"] + list(prof_opcoes.keys()), key="rel_prof")
-        if prof_selecionado != "Todos":
-            profissional_id_filtro = prof_opcoes[prof_selecionado]
+    paciente_id_filtro = seletor_busca("Filtrar por paciente", "pacientes", "rel_pac")
+    profissional_id_filtro = seletor_busca("Filtrar por profissional", "profissionais", "rel_prof")
     data_inicio = st.date_input("Data inicial", value=None, key="rel_data_inicio")
     data_fim = st.date_input("Data final", value=None, key="rel_data_fim")
-    # Consulta dos registros
-    conn = conectar_db()
-    cursor = conn.cursor()
-    query = "SELECT s.id, u.nome, pr.nome, s.temperatura, s.pressao, s.frequencia_cardiaca, s.saturacao, s.data_registro FROM sinais_vitais s JOIN pacientes p ON s.paciente_id = p.id JOIN usuarios u ON p.id_usuario = u.id JOIN usuarios pr ON p.id_profissional_responsavel = pr.id"
-    filtros = []
-    params = []
-    if paciente_id_filtro:
-        filtros.append("s.paciente_id = %s")
-        params.append(paciente_id_filtro)
-    if profissional_id_filtro:
-        filtros.append("p.id_profissional_responsavel = %s")
-        params.append(profissional_id_filtro)
-    if data_inicio:
-        filtros.append("s.data_registro >= %s")
-        params.append(str(data_inicio))
-    if data_fim:
-        filtros.append("s.data_registro <= %s")
-        params.append(str(data_fim))
-    if filtros:
-        query += " WHERE " + " AND ".join(filtros)
-    query += " ORDER BY s.data_registro DESC LIMIT 100"
-    cursor.execute(query, tuple(params))
-    registros = cursor.fetchall()
-    conn.close()
-    if registros:
-        df_rel = pd.DataFrame(registros, columns=["ID", "Paciente", "Profissional", "Temperatura", "Pressão", "Frequência", "Saturação", "Data Registro"])
-        st.dataframe(df_rel)
-        # Exportar CSV
-        csv = df_rel.to_csv(index=False).encode('utf-8')
-        st.download_button("Exportar CSV", data=csv, file_name="relatorio_sinais_vitais.csv", mime="text/csv")
-        st.info("Exportação PDF e gráficos interativos: Em breve!")
-    else:
-        st.info("Nenhum dado encontrado para os filtros selecionados.")
+    mostrar_relatorio_sinais(f"janela_{opcao}", paciente_id_filtro, profissional_id_filtro, data_inicio, data_fim)
 
 elif opcao == "Mensagens":
     st.header("💬 Mensagens Internas")
     # Filtros
-    conn = conectar_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, nome FROM usuarios")
-    usuarios = cursor.fetchall()
-    conn.close()
-    remetente_id_filtro = None
-    destinatario_id_filtro = None
-    if usuarios:
-        user_opcoes = {f"{nome} (ID {uid})": uid for uid, nome in usuarios}
-        rem_selecionado = st.selectbox("Filtrar por remetente", ["Todos"] + list(user_opcoes.keys()), key="msg_rem")
-        if rem_selecionado != "Todos":
-            remetente_id_filtro = user_opcoes[rem_selecionado]
-        dest_selecionado = st.selectbox("Filtrar por destinatário", ["Todos"] + list(user_opcoes.keys()), key="msg_dest")
-        if dest_selecionado != "Todos":
-            destinatario_id_filtro = user_opcoes[dest_selecionado]
-    # Formulário de envio
+    remetente_id_filtro = seletor_busca("Filtrar por remetente", "usuarios", "msg_rem")
+    destinatario_id_filtro = seletor_busca("Filtrar por destinatário", "usuarios", "msg_dest")
+    # Formulário de envio (o destinatário fica fora do form: a busca precisa atualizar a cada termo digitado)
     with st.expander("Enviar nova mensagem"):
+        dest_id_envio = seletor_busca("Destinatário", "usuarios", "envio_dest", opcao_vazia=None)
         with st.form("form_envio_msg"):
-            if usuarios:
-                dest_envio = st.selectbox("Destinatário", list(user_opcoes.keys()), key="envio_dest")
-                dest_id_envio = user_opcoes[dest_envio]
-                texto_msg = st.text_area("Mensagem")
-                enviar_btn = st.form_submit_button("Enviar")
-                if enviar_btn:
-                    if not texto_msg.strip():
-                        st.warning("Digite uma mensagem!")
-                    else:
-                        ok = enviar_mensagem(st.session_state.usuario[0], dest_id_envio, texto_msg)
-                        if ok:
-                            st.success("Mensagem enviada!")
-                            st.experimental_rerun()
-            else:
-                st.info("Cadastre usuários para enviar mensagens.")
-    # Listagem das mensagens
+            texto_msg = st.text_area("Mensagem")
+            enviar_btn = st.form_submit_button("Enviar")
+            if enviar_btn:
+                if dest_id_envio is None:
+                    st.warning("Escolha o destinatário!")
+                elif not texto_msg.strip():
+                    st.warning("Digite uma mensagem!")
+                else:
+                    ok = enviar_mensagem(st.session_state.usuario[0], dest_id_envio, texto_msg)
+                    if ok:
+                        st.success("Mensagem enviada!")
+                        st.rerun()
+    # Listagem das mensagens (busca textual ordenada por relevância)
+    termo_msg = st.text_input("🔎 Buscar no texto das mensagens", key="msg_busca", help='Ex.: febre alta, "pressão arterial", dor -cabeça').strip()
+    pagina = pagina_atual("msg_pagina", (remetente_id_filtro, destinatario_id_filtro, termo_msg))
     conn = conectar_db()
     cursor = conn.cursor()
-    query = "SELECT m.id, u1.nome, u2.nome, m.texto, m.data_envio FROM mensagens m JOIN usuarios u1 ON m.id_remetente = u1.id JOIN usuarios u2 ON m.id_destinatario = u2.id"
-    filtros = []
-    params = []
-    if remetente_id_filtro:
-        filtros.append("m.id_remetente = %s")
-        params.append(remetente_id_filtro)
-    if destinatario_id_filtro:
-        filtros.append("m.id_destinatario = %s")
-        params.append(destinatario_id_filtro)
-    if filtros:
-        query += " WHERE " + " AND ".join(filtros)
-    query += " ORDER BY m.data_envio DESC LIMIT 50"
-    cursor.execute(query, tuple(params))
+    query, params = montar_consulta_mensagens(
+        remetente_id_filtro, destinatario_id_filtro, termo_msg or None, limite=POR_PAGINA + 1, deslocamento=pagina * POR_PAGINA
+    )
+    cursor.execute(query, params)
     msgs = cursor.fetchall()
     conn.close()
     if msgs:
-        st.dataframe(pd.DataFrame(msgs, columns=["ID", "Remetente", "Destinatário", "Texto", "Data Envio"]))
+        st.dataframe(pd.DataFrame(msgs[:POR_PAGINA], columns=["ID", "Remetente", "Destinatário", "Texto", "Data Envio"]))
     else:
         st.info("Nenhuma mensagem encontrada para os filtros selecionados.")
+    if msgs or pagina:
+        mostrar_paginacao("msg_pagina", len(msgs) > POR_PAGINA)
+
+elif opcao == "Análises":
+    if usuario_tipo != "Administrador":
+        st.error("Acesso negado. Apenas administradores podem executar as análises.")
+        parar()
+
+    st.header("🔬 Análises de Coortes")
+    st.caption("Relatórios sobre a última exportação em Parquet (scripts/exportar_dados.py), sem consultar o banco.")
+    situacao = analises.situacao_exportacao()
+    if not situacao:
+        st.info("Nenhuma exportação encontrada. Execute scripts/exportar_dados.py para gerar os arquivos analisados aqui.")
+        parar()
+    st.dataframe(pd.DataFrame(
+        [(tabela, estado.get("exportado_em"), estado.get("total")) for tabela, estado in situacao.items()],
+        columns=["Tabela", "Exportado em", "Registros"]
+    ), hide_index=True)
+    relatorio = st.selectbox(
+        "Relatório", list(analises.RELATORIOS), key="ana_relatorio",
+        format_func=lambda nome: analises.RELATORIOS[nome]["titulo"]
+    )
+    try:
+        nomes_profissionais = dict(analises.profissionais())
+    except FileNotFoundError:
+        nomes_profissionais = {}
+    profissional_id = st.selectbox(
+        "Filtrar por profissional", [None] + list(nomes_profissionais), key="ana_profissional",
+        format_func=lambda id_: "Todos" if id_ is None else nomes_profissionais[id_]
+    )
+    col1, col2 = st.columns(2)
+    data_inicio = col1.date_input("Data inicial", value=None, key="ana_data_inicio")
+    data_fim = col2.date_input("Data final", value=None, key="ana_data_fim")
+    if st.button("Executar", key="ana_executar"):
+        try:
+            with st.spinner("Executando sobre os arquivos exportados..."):
+                st.session_state["ana_resultado"] = (relatorio, analises.executar(relatorio, None, data_inicio, data_fim, profissional_id))
+        except FileNotFoundError as e:
+            st.session_state.pop("ana_resultado", None)
+            st.warning(str(e))
+    if "ana_resultado" in st.session_state:
+        executado, df_analise = st.session_state["ana_resultado"]
+        st.subheader(analises.RELATORIOS[executado]["titulo"])
+        if df_analise.empty:
+            st.info("Nenhum dado exportado para os filtros selecionados.")
+        else:
+            if executado == "saturacao_semanal":
+                st.line_chart(df_analise.pivot_table(index="semana", columns="profissional", values="saturacao_media"))
+            st.dataframe(df_analise.rename(columns=analises.ROTULOS), hide_index=True)
+            csv = df_analise.rename(columns=analises.ROTULOS).to_csv(index=False).encode('utf-8')
+            st.download_button("Exportar CSV", data=csv, file_name=f"{executado}.csv", mime="text/csv")
 
 elif opcao == "Auditoria":
     if usuario_tipo != "Administrador":
         st.error("Acesso negado. Apenas administradores podem visualizar a auditoria.")
-        st.stop()
+        parar()
     
     st.header("🕵️ Auditoria de Ações")
     # Filtros
     conn = conectar_db()
     cursor = conn.cursor()
-    cursor.execute("SELECT id, nome FROM usuarios")
-    usuarios = cursor.fetchall()
-    cursor.execute("SELECT DISTINCT acao FROM auditoria")
-    acoes = [row[0] for row in cursor.fetchall()]
+    totais_acoes = dict(listar_acoes(cursor))
+    acoes = list(totais_acoes)
     conn.close()
-    usuario_id_filtro = None
     acao_filtro = None
-    if usuarios:
-        user_opcoes = {f"{nome} (ID {uid})": uid for uid, nome in usuarios}
-        user_selecionado = st.selectbox("Filtrar por usuário", ["Todos"] + list(user_opcoes.keys()), key="aud_user")
-        if user_selecionado != "Todos":
-            usuario_id_filtro = user_opcoes[user_selecionado]
+    usuario_id_filtro = seletor_busca("Filtrar por usuário", "usuarios", "aud_user")
     if acoes:
-        acao_selecionada = st.selectbox("Filtrar por ação", ["Todas"] + acoes, key="aud_acao")
+        acao_selecionada = st.selectbox(
+            "Filtrar por ação", ["Todas"] + acoes, key="aud_acao",
+            format_func=lambda acao: acao if acao == "Todas" else f"{acao} ({totais_acoes[acao]})"
+        )
         if acao_selecionada != "Todas":
             acao_filtro = acao_selecionada
     data_inicio = st.date_input("Data inicial", value=None, key="aud_data_inicio")
     data_fim = st.date_input("Data final", value=None, key="aud_data_fim")
+    termo_aud = st.text_input("🔎 Buscar nos detalhes", key="aud_busca", help='Ex.: nome do paciente, "troca de senha", login -2FA').strip()
+    pagina = pagina_atual("aud_pagina", (usuario_id_filtro, acao_filtro, data_inicio, data_fim, termo_aud))
     # Consulta dos registros
     conn = conectar_db()
     cursor = conn.cursor()
-    query = "SELECT a.id, u.nome, a.acao, a.detalhes, a.data_hora FROM auditoria a JOIN usuarios u ON a.usuario_id = u.id"
-    filtros = []
-    params = []
-    if usuario_id_filtro:
-        filtros.append("a.usuario_id = %s")
-        params.append(usuario_id_filtro)
-    if acao_filtro:
-        filtros.append("a.acao = %s")
-        params.append(acao_filtro)
-    if data_inicio:
-        filtros.append("a.data_hora >= %s")
-        params.append(str(data_inicio))
-    if data_fim:
-        filtros.append("a.data_hora <= %s")
-        params.append(str(data_fim))
-    if filtros:
-        query += " WHERE " + " AND ".join(filtros)
-    query += " ORDER BY a.data_hora DESC LIMIT 100"
-    cursor.execute(query, tuple(params))
+    query, params = montar_consulta_auditoria(
+        usuario_id_filtro, acao_filtro, data_inicio, data_fim, termo_aud or None, limite=POR_PAGINA + 1, deslocamento=pagina * POR_PAGINA
+    )
+    cursor.execute(query, params)
     aud = cursor.fetchall()
     conn.close()
+    tem_proxima = len(aud) > POR_PAGINA
+    aud = aud[:POR_PAGINA]
     if aud:
         df_aud = pd.DataFrame(aud, columns=["ID", "Usuário", "Ação", "Detalhes", "Data/Hora"])
         st.dataframe(df_aud)
@@ -1623,11 +2030,38 @@ elif opcao == "Auditoria":
         st.download_button("Exportar CSV", data=csv, file_name="auditoria.csv", mime="text/csv")
     else:
         st.info("Nenhum registro de auditoria encontrado para os filtros selecionados.")
+    if aud or pagina:
+        mostrar_paginacao("aud_pagina", tem_proxima)
+    # Volume diário (catálogo de ações, sem varrer a auditoria)
+    conn = conectar_db()
+    cursor = conn.cursor()
+    por_dia = contagens_por_dia(cursor, acao_filtro, data_inicio or (datetime.now().date() - timedelta(days=90)), data_fim)
+    arquivos = listar_arquivos(cursor)
+    conn.close()
+    if por_dia:
+        st.subheader("Registros por dia")
+        st.bar_chart(pd.DataFrame(por_dia, columns=["Dia", "Registros"]).set_index("Dia"))
+    if arquivos:
+        with st.expander(f"📦 Registros arquivados ({len(arquivos)} arquivos)"):
+            st.caption("Meses antigos são exportados para arquivos compactados e removidos do banco. A busca abaixo lê os arquivos diretamente.")
+            st.dataframe(pd.DataFrame(
+                [(inicio, fim, formato, linhas) for _, inicio, fim, _, formato, linhas in arquivos],
+                columns=["Início", "Fim", "Formato", "Registros"]
+            ))
+            texto_arquivo = st.text_input("Trecho nos detalhes (opcional)", key="aud_arquivo_texto")
+            if st.button("Pesquisar no arquivo", key="aud_arquivo_buscar"):
+                df_arq = consultar_arquivos(
+                    usuario_id=usuario_id_filtro, acao=acao_filtro, data_inicio=data_inicio, data_fim=data_fim, texto=texto_arquivo or None
+                )
+                if df_arq.empty:
+                    st.info("Nenhum registro arquivado encontrado para os filtros selecionados.")
+                else:
+                    st.dataframe(df_arq.rename(columns={"id": "ID", "usuario_id": "ID Usuário", "acao": "Ação", "detalhes": "Detalhes", "data_hora": "Data/Hora"}))
 
 elif opcao == "Parâmetros de Alerta":
     if usuario_tipo != "Administrador":
         st.error("Acesso negado. Apenas administradores podem configurar parâmetros de alerta.")
-        st.stop()
+        parar()
     
     st.header("⚠️ Parâmetros de Alerta")
     # Checar/criar tabela de parâmetros se necessário
@@ -1644,16 +2078,13 @@ elif opcao == "Parâmetros de Alerta":
     """)
     conn.commit()
     # Buscar parâmetros atuais
-    cursor.execute("SELECT temp_min, temp_max, freq_min, freq_max, sat_min, pressao_min, pressao_max FROM parametros_alerta ORDER BY id DESC LIMIT 1")
-    row = cursor.fetchone()
+    cursor.execute(SQL_PARAMETROS_ALERTA)
+    params = parametros_de_linha(cursor.fetchone())
     conn.close()
-    if row:
-        temp_min, temp_max, freq_min, freq_max, sat_min, pressao_min, pressao_max = row
-    else:
-        temp_min, temp_max = 35.0, 38.0
-        freq_min, freq_max = 50, 120
-        sat_min = 90
-        pressao_min, pressao_max = "90/60", "140/90"
+    temp_min, temp_max = params["temp_min"], params["temp_max"]
+    freq_min, freq_max = params["freq_min"], params["freq_max"]
+    sat_min = params["sat_min"]
+    pressao_min, pressao_max = params["pressao_min"], params["pressao_max"]
     with st.form("form_param_alerta"):
         st.subheader("Limites de alerta para sinais vitais")
         col1, col2 = st.columns(2)
@@ -1666,7 +2097,29 @@ elif opcao == "Parâmetros de Alerta":
             temp_max_novo = st.number_input("Temperatura máxima (°C)", value=temp_max, min_value=25.0, max_value=45.0, step=0.1)
             freq_max_novo = st.number_input("Frequência máxima (bpm)", value=freq_max, min_value=20, max_value=220)
             pressao_max_novo = st.text_input("Pressão máxima (Ex: 140/90)", value=pressao_max)
-        salvar_btn = st.form_submit_button("Salvar parâmetros")
+        dias_simulados = st.number_input("Período da simulação (dias)", value=365, min_value=1, max_value=3650)
+        col_salvar, col_simular = st.columns(2)
+        salvar_btn = col_salvar.form_submit_button("Salvar parâmetros")
+        simular_btn = col_simular.form_submit_button("Simular impacto no histórico")
+        candidatos = {
+            "temp_min": temp_min_novo, "temp_max": temp_max_novo, "freq_min": freq_min_novo, "freq_max": freq_max_novo,
+            "sat_min": sat_min_novo, "pressao_min": pressao_min_novo, "pressao_max": pressao_max_novo,
+        }
+        if simular_btn:
+            erros = perfis_alerta.validar_limites(candidatos)
+            if erros:
+                st.error("Limites inválidos: " + "; ".join(erros))
+            else:
+                fim_simulacao = date.today() + timedelta(days=1)
+                inicio_simulacao = fim_simulacao - timedelta(days=int(dias_simulados))
+                conn = conectar_db()
+                try:
+                    with st.spinner("Reavaliando o histórico de sinais vitais..."):
+                        resultado = simulador_alertas.simular(conn, PARAMETROS_CONEXAO, candidatos, inicio_simulacao, fim_simulacao)
+                        nomes_profs = simulador_alertas.nomes_profissionais(conn.cursor(), resultado.por_profissional)
+                finally:
+                    conn.close()
+                st.session_state["simulacao_alertas"] = (candidatos, inicio_simulacao, fim_simulacao, resultado, nomes_profs)
         if salvar_btn:
             conn = conectar_db()
             cursor = conn.cursor()
@@ -1675,8 +2128,107 @@ elif opcao == "Parâmetros de Alerta":
             conn.commit()
             conn.close()
             st.success("Parâmetros de alerta salvos com sucesso!")
-            st.experimental_rerun()
-    st.info("Em breve: integração dos limites de alerta em todo o sistema.")
+            st.rerun()
+    # Resultado da última simulação ("e se?") e gravação retroativa dos alertas
+    if "simulacao_alertas" in st.session_state:
+        candidatos_sim, inicio_sim, fim_sim, resultado_sim, nomes_profs = st.session_state["simulacao_alertas"]
+        st.subheader("Simulação sobre o histórico")
+        total_atual = sum(a for a, _ in resultado_sim.por_vital.values())
+        total_candidato = sum(c for _, c in resultado_sim.por_vital.values())
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Leituras reavaliadas", resultado_sim.leituras)
+        col2.metric("Alertas com os limites atuais", total_atual)
+        col3.metric("Alertas com os limites simulados", total_candidato, delta=total_candidato - total_atual, delta_color="inverse")
+        st.caption(f"Período: {inicio_sim:%d/%m/%Y} a {fim_sim - timedelta(days=1):%d/%m/%Y}. Perfis e ajustes por paciente continuam valendo.")
+        por_dia = simulador_alertas.tabela_resultado(resultado_sim.por_dia, "Dia").sort_values("Dia")
+        if not por_dia.empty:
+            st.line_chart(por_dia.set_index("Dia")[["Atuais", "Candidatos"]])
+        col1, col2 = st.columns(2)
+        col1.dataframe(simulador_alertas.tabela_resultado(resultado_sim.por_vital, "Sinal vital"), hide_index=True)
+        por_prof = simulador_alertas.tabela_resultado(
+            {nomes_profs.get(k, f"ID {k}"): v for k, v in resultado_sim.por_profissional.items()}, "Profissional"
+        )
+        col2.dataframe(por_prof.sort_values("Diferença", key=abs, ascending=False), hide_index=True)
+        todos_sim = st.checkbox("Gravar também os alertas que os limites atuais já geram (leituras anteriores à avaliação automática)")
+        if st.button("Gravar alertas retroativos"):
+            conn = conectar_db()
+            try:
+                with st.spinner("Gravando alertas retroativos..."):
+                    resultado_aplicado = simulador_alertas.simular(
+                        conn, PARAMETROS_CONEXAO, candidatos_sim, inicio_sim, fim_sim, aplicar=True, apenas_novos=not todos_sim
+                    )
+            finally:
+                conn.close()
+            registrar_auditoria(st.session_state.usuario[0], "Alertas retroativos gravados",
+                                f"{resultado_aplicado.alertas_gravados} alertas de {inicio_sim} a {fim_sim}")
+            st.success(f"{resultado_aplicado.alertas_gravados} alertas retroativos gravados (status \"{simulador_alertas.STATUS_RETROATIVO}\").")
+    # Perfis de limites (globais → perfil do profissional → perfil do paciente → ajustes do paciente)
+    st.subheader("Perfis de limites")
+    st.caption("Campos vazios herdam o valor da camada anterior: globais → perfil do profissional → perfil do paciente → ajustes do paciente.")
+    conn = conectar_db()
+    cursor = conn.cursor()
+    perfis = perfis_alerta.listar_perfis(cursor)
+    conn.close()
+    nomes_perfis = {id_: nome for id_, nome, _ in perfis}
+    limites_perfis = {id_: limites for id_, _, limites in perfis}
+    if perfis:
+        st.dataframe(pd.DataFrame([{"ID": id_, "Perfil": nome, **limites} for id_, nome, limites in perfis]))
+    with st.expander("Criar ou editar perfil"):
+        perfil_editado = st.selectbox(
+            "Perfil", [None] + list(nomes_perfis), key="perfil_editado",
+            format_func=lambda v: "Novo perfil" if v is None else nomes_perfis[v]
+        )
+        with st.form("form_perfil_alerta"):
+            nome_perfil = st.text_input("Nome do perfil (ex.: DPOC, Pediátrico, Cardíaco)", value=nomes_perfis.get(perfil_editado, ""), key=f"perfil_{perfil_editado}_nome")
+            limites_perfil = campos_limites(limites_perfis.get(perfil_editado, dict.fromkeys(perfis_alerta.CAMPOS)), f"perfil_{perfil_editado}")
+            if st.form_submit_button("Salvar perfil"):
+                conn = conectar_db()
+                try:
+                    perfil_id = perfis_alerta.salvar_perfil(conn.cursor(), nome_perfil, limites_perfil, perfil_editado)
+                    conn.commit()
+                except ValueError as e:
+                    conn.rollback()
+                    st.error(f"Perfil inválido: {e}")
+                else:
+                    registrar_auditoria(st.session_state.usuario[0], "Perfil de alerta salvo", f"Perfil {perfil_id}: {nome_perfil}")
+                    st.rerun()
+                finally:
+                    conn.close()
+    with st.expander("Atribuir perfis"):
+        formato_perfil = lambda v: "Nenhum (herda)" if v is None else nomes_perfis[v]
+        for tipo, entidade, rotulo in (("paciente", "pacientes", "Paciente"), ("profissional", "profissionais", "Profissional")):
+            alvo = seletor_busca(rotulo, entidade, f"perfil_atribuir_{tipo}", opcao_vazia=None)
+            perfil_atribuido = st.selectbox(f"Perfil do {tipo}", [None] + list(nomes_perfis), key=f"perfil_atribuido_{tipo}", format_func=formato_perfil)
+            if st.button(f"Atribuir ao {tipo}", key=f"perfil_atribuir_{tipo}_btn", disabled=alvo is None):
+                conn = conectar_db()
+                perfis_alerta.atribuir_perfil(conn.cursor(), tipo, alvo, perfil_atribuido)
+                conn.commit()
+                conn.close()
+                registrar_auditoria(st.session_state.usuario[0], "Perfil de alerta atribuído", f"{rotulo} {alvo}: perfil {perfil_atribuido}")
+                st.toast(f"Perfil atribuído ao {tipo}.")
+    with st.expander("Ajustes individuais do paciente"):
+        paciente_ajuste = seletor_busca("Paciente", "pacientes", "ajuste_paciente", opcao_vazia=None)
+        if paciente_ajuste is not None:
+            conn = conectar_db()
+            _, ajustes = perfis_alerta.ler_ajustes_paciente(conn.cursor(), paciente_ajuste)
+            conn.close()
+            efetivos = indice_limites([paciente_ajuste]).limites(paciente_ajuste)
+            st.caption("Limites em vigor: " + ", ".join(f"{campo} {efetivos[campo]}" for campo in perfis_alerta.CAMPOS))
+            with st.form("form_ajustes_paciente"):
+                limites_ajuste = campos_limites(ajustes, f"ajuste_{paciente_ajuste}")
+                if st.form_submit_button("Salvar ajustes"):
+                    conn = conectar_db()
+                    try:
+                        perfis_alerta.salvar_ajustes_paciente(conn.cursor(), paciente_ajuste, limites_ajuste)
+                        conn.commit()
+                    except ValueError as e:
+                        conn.rollback()
+                        st.error(f"Ajustes inválidos: {e}")
+                    else:
+                        registrar_auditoria(st.session_state.usuario[0], "Ajustes de alerta do paciente", f"Paciente {paciente_ajuste}")
+                        st.rerun()
+                    finally:
+                        conn.close()
 
 elif opcao == "Ajuda":
     st.header("ℹ️ Ajuda e Sobre o Sistema")
@@ -1737,16 +2289,7 @@ elif opcao == "Meu Perfil" and usuario_tipo == "Paciente":
 if usuario_tipo == "Administrador":
     opcoes_menu = ["Dashboard", "Usuários", "Pacientes", "Sinais Vitais", "Relatórios", "Mensagens", "Auditoria", "Parâmetros de Alerta", "Ajuda"]
 
-# Descriptografar ao exibir dados médicos
-if usuario_tipo in ["Administrador", "Profissional", "Profissional de Saúde"] and opcao == "Pacientes":
-    conn = conectar_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, id_usuario, dados_medicos FROM pacientes")
-    pacientes = cursor.fetchall()
-    conn.close()
-    for pid, uid, dados_med in pacientes:
-        dados = descriptografar_dados(dados_med)
-        st.write(f"Paciente ID: {pid} | Dados: {dados}")
+encerrar_rerun()
 
 def criar_campo_primeiro_acesso():
     """
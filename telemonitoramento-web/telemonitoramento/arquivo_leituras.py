@@ -0,0 +1,288 @@
+"""
+Arquivo binário colunar de sinais vitais, um arquivo por paciente, lido por mmap.
+
+Para análises de anos de dados fora do banco, sem reler CSV. Formato (little-endian):
+
+- cabeçalho (CABECALHO): "TMSV", versão, número de colunas, paciente_id, quantidade de
+  leituras e primeiro/último instante (microssegundos desde 1970-01-01);
+- índice (ENTRADA_INDICE por coluna): nome, codificação, deslocamento e tamanho em bytes;
+- colunas, cada uma começando em múltiplo de 8 bytes:
+    instantes      int64 em microssegundos (largura fixa: busca binária e visão direta);
+    temperaturas   float32 (NaN quando não medida);
+    ids, sistolicas, diastolicas, frequencias, saturacoes
+                   delta + zigzag (amostras.codificar), AUSENTE (-1) quando não medidos.
+
+ArquivoLeituras mapeia o arquivo em memória: instantes e temperaturas são visões NumPy
+sobre o mapa, sem cópia; as colunas em delta são decodificadas uma vez, na primeira
+leitura. arquivar_leituras gera os arquivos a partir do banco por cursor no servidor, em
+lotes, com memória limitada ao histórico de um paciente.
+"""
+
+import os
+import re
+import mmap
+import glob
+import struct
+
+import numpy as np
+
+from alertas import PRESSAO_PATTERN
+from amostras import codificar, decodificar
+
+MAGICO = b"TMSV"
+VERSAO = 1
+EXTENSAO = ".tmsv"
+# magico, versao, colunas, paciente_id, quantidade, primeiro instante, último instante
+CABECALHO = struct.Struct("<4sHHqQqq")
+# nome, codificação, deslocamento, tamanho
+ENTRADA_INDICE = struct.Struct("<12sB3xQQ")
+INT64, FLOAT32, DELTA = 0, 1, 2
+COLUNAS = (("ids", DELTA), ("instantes", INT64), ("temperaturas", FLOAT32), ("sistolicas", DELTA),
+           ("diastolicas", DELTA), ("frequencias", DELTA), ("saturacoes", DELTA))
+AUSENTE = -1
+TAMANHO_LOTE = 50000
+
+SQL_LEITURAS = """
+    SELECT paciente_id, id, data_registro, temperatura, pressao, frequencia_cardiaca, saturacao
+    FROM sinais_vitais {filtro} ORDER BY paciente_id, data_registro, id
+"""
+
+
+def diretorio_arquivo():
+    return os.getenv("ARQUIVO_LEITURAS_DIR") or os.path.join(os.getcwd(), "arquivo_leituras")
+
+
+def caminho_paciente(diretorio, paciente_id):
+    return os.path.join(diretorio, f"paciente_{paciente_id}{EXTENSAO}")
+
+
+def listar_arquivos(diretorio=None):
+    """
+    Arquivos de um diretório.
+
+    Returns:
+        dict: paciente_id -> caminho, em ordem de paciente.
+    """
+    diretorio = diretorio or diretorio_arquivo()
+    arquivos = {}
+    for caminho in glob.glob(os.path.join(diretorio, f"paciente_*{EXTENSAO}")):
+        encontrado = re.match(rf"^paciente_(\d+){re.escape(EXTENSAO)}$", os.path.basename(caminho))
+        if encontrado:
+            arquivos[int(encontrado.group(1))] = caminho
+    return dict(sorted(arquivos.items()))
+
+
+def colunas_de_linhas(linhas):
+    """
+    Converte leituras em colunas do arquivo.
+
+    Args:
+        linhas (list): Tuplas (id, data_registro, temperatura, pressao, frequencia, saturacao) em ordem de data.
+    Returns:
+        dict: Nome da coluna (COLUNAS) -> numpy.ndarray.
+    """
+    ids, datas, temperaturas, pressoes, frequencias, saturacoes = zip(*linhas) if linhas else ((),) * 6
+    sistolicas, diastolicas = [], []
+    for pressao in pressoes:
+        if pressao and re.match(PRESSAO_PATTERN, pressao):
+            sistolica, diastolica = pressao.split("/")
+            sistolicas.append(int(sistolica))
+            diastolicas.append(int(diastolica))
+        else:
+            sistolicas.append(AUSENTE)
+            diastolicas.append(AUSENTE)
+
+    def inteiros(valores):
+        return np.array([AUSENTE if valor is None else valor for valor in valores], dtype=np.int64)
+
+    return {
+        "ids": np.array(ids, dtype=np.int64),
+        "instantes": np.array(datas, dtype="datetime64[us]").astype(np.int64),
+        "temperaturas": np.array(temperaturas, dtype=np.float32),
+        "sistolicas": np.array(sistolicas, dtype=np.int64),
+        "diastolicas": np.array(diastolicas, dtype=np.int64),
+        "frequencias": inteiros(frequencias),
+        "saturacoes": inteiros(saturacoes),
+    }
+
+
+def escrever_arquivo(caminho, paciente_id, linhas):
+    """
+    Grava o arquivo de um paciente (nome temporário, substituindo o definitivo ao final).
+
+    Args:
+        caminho (str): Destino.
+        paciente_id (int): ID do paciente.
+        linhas (list): Ver colunas_de_linhas.
+    Returns:
+        int: Tamanho do arquivo em bytes.
+    """
+    colunas = colunas_de_linhas(linhas)
+    dados = []
+    for nome, codificacao in COLUNAS:
+        if codificacao == INT64:
+            dados.append(colunas[nome].astype("<i8").tobytes())
+        elif codificacao == FLOAT32:
+            dados.append(colunas[nome].astype("<f4").tobytes())
+        else:
+            dados.append(codificar(colunas[nome]))
+    deslocamento = CABECALHO.size + ENTRADA_INDICE.size * len(COLUNAS)
+    indice, corpo = [], bytearray()
+    for (nome, codificacao), bloco in zip(COLUNAS, dados):
+        corpo += bytes(-(deslocamento + len(corpo)) % 8)
+        indice.append(ENTRADA_INDICE.pack(nome.encode("ascii"), codificacao, deslocamento + len(corpo), len(bloco)))
+        corpo += bloco
+    instantes = colunas["instantes"]
+    cabecalho = CABECALHO.pack(MAGICO, VERSAO, len(COLUNAS), paciente_id, len(instantes),
+                               int(instantes[0]) if len(instantes) else 0, int(instantes[-1]) if len(instantes) else 0)
+    temporario = caminho + ".tmp"
+    with open(temporario, "wb") as f:
+        f.write(cabecalho)
+        f.write(b"".join(indice))
+        f.write(corpo)
+    os.replace(temporario, caminho)
+    return len(cabecalho) + len(indice) * ENTRADA_INDICE.size + len(corpo)
+
+
+class ArquivoLeituras:
+    """
+    Arquivo de um paciente mapeado em memória.
+
+    As visões devolvidas apontam para o mapa: ele só é desfeito quando nenhuma visão resta
+    (fechar() com visões vivas apenas solta a referência do objeto).
+
+    Args:
+        caminho (str): Arquivo gerado por escrever_arquivo.
+    Raises:
+        ValueError: Se o arquivo não for um arquivo de leituras ou tiver versão desconhecida.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        with open(caminho, "rb") as f:
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mapa) < CABECALHO.size:
+            raise ValueError(f"{caminho}: arquivo truncado")
+        magico, versao, colunas, self.paciente_id, self.quantidade, primeiro, ultimo = CABECALHO.unpack_from(self._mapa, 0)
+        if magico != MAGICO or versao != VERSAO:
+            raise ValueError(f"{caminho}: não é um arquivo de leituras versão {VERSAO}")
+        self.primeiro = np.datetime64(primeiro, "us")
+        self.ultimo = np.datetime64(ultimo, "us")
+        self.indice = {}
+        for i in range(colunas):
+            nome, codificacao, deslocamento, tamanho = ENTRADA_INDICE.unpack_from(self._mapa, CABECALHO.size + i * ENTRADA_INDICE.size)
+            self.indice[nome.rstrip(b"\0").decode("ascii")] = (codificacao, deslocamento, tamanho)
+        self._decodificadas = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+    def fechar(self):
+        self._decodificadas = {}
+        try:
+            self._mapa.close()
+        except BufferError:
+            pass
+
+    def coluna(self, nome):
+        """
+        Uma coluna inteira: visão sobre o mapa (int64/float32) ou array decodificado (delta).
+
+        Returns:
+            numpy.ndarray: Somente leitura nas colunas de largura fixa.
+        """
+        codificacao, deslocamento, tamanho = self.indice[nome]
+        if codificacao == INT64:
+            return np.frombuffer(self._mapa, dtype="<i8", count=tamanho // 8, offset=deslocamento)
+        if codificacao == FLOAT32:
+            return np.frombuffer(self._mapa, dtype="<f4", count=tamanho // 4, offset=deslocamento)
+        if nome not in self._decodificadas:
+            self._decodificadas[nome] = decodificar(memoryview(self._mapa)[deslocamento:deslocamento + tamanho])
+        return self._decodificadas[nome]
+
+    @property
+    def instantes(self):
+        return self.coluna("instantes").view("datetime64[us]")
+
+    def intervalo(self, inicio=None, fim=None):
+        """
+        Posições das leituras em [inicio, fim), por busca binária nos instantes.
+
+        Returns:
+            slice: Fatia aplicável a qualquer coluna.
+        """
+        instantes = self.instantes
+        i = 0 if inicio is None else int(np.searchsorted(instantes, np.datetime64(inicio, "us")))
+        j = len(instantes) if fim is None else int(np.searchsorted(instantes, np.datetime64(fim, "us")))
+        return slice(i, j)
+
+    def ler(self, inicio=None, fim=None, colunas=None):
+        """
+        Colunas das leituras em [inicio, fim).
+
+        Args:
+            inicio, fim (datetime, opcional): Intervalo (None = sem limite).
+            colunas (iterable, opcional): Nomes de COLUNAS. Default: todas.
+        Returns:
+            dict: Nome -> numpy.ndarray (instantes em datetime64[us]; fatias sem cópia).
+        """
+        fatia = self.intervalo(inicio, fim)
+        resultado = {}
+        for nome in colunas or [nome for nome, _ in COLUNAS]:
+            valores = self.instantes if nome == "instantes" else self.coluna(nome)
+            resultado[nome] = valores[fatia]
+        return resultado
+
+
+def arquivar_leituras(conn, diretorio=None, pacientes=None, progresso=None):
+    """
+    Gera os arquivos dos pacientes a partir de sinais_vitais (substituindo os existentes).
+
+    As leituras são lidas por cursor no servidor, em lotes de TAMANHO_LOTE, na ordem
+    (paciente, data); cada paciente é gravado assim que a leitura do seguinte começa.
+
+    Args:
+        conn: Conexão psycopg2.
+        diretorio (str, opcional): Destino. Default: ARQUIVO_LEITURAS_DIR.
+        pacientes (list, opcional): Restringe a estes pacientes.
+        progresso (callable, opcional): Chamado com (pacientes, leituras) após cada arquivo.
+    Returns:
+        tuple: (pacientes arquivados, leituras arquivadas, bytes gravados).
+    """
+    diretorio = diretorio or diretorio_arquivo()
+    os.makedirs(diretorio, exist_ok=True)
+    filtro, params = ("WHERE paciente_id = ANY(%s)", (list(pacientes),)) if pacientes else ("", ())
+    cursor_servidor = conn.cursor(name="arquivar_leituras")
+    cursor_servidor.itersize = TAMANHO_LOTE
+    cursor_servidor.execute(SQL_LEITURAS.format(filtro=filtro), params)
+    arquivados = leituras = total_bytes = 0
+    atual, linhas = None, []
+
+    def gravar():
+        nonlocal arquivados, leituras, total_bytes
+        total_bytes += escrever_arquivo(caminho_paciente(diretorio, atual), atual, linhas)
+        arquivados += 1
+        leituras += len(linhas)
+        if progresso:
+            progresso(arquivados, leituras)
+
+    try:
+        while True:
+            lote = cursor_servidor.fetchmany(TAMANHO_LOTE)
+            if not lote:
+                break
+            for paciente_id, *leitura in lote:
+                if paciente_id != atual:
+                    if atual is not None:
+                        gravar()
+                    atual, linhas = paciente_id, []
+                linhas.append(leitura)
+        if atual is not None:
+            gravar()
+    finally:
+        cursor_servidor.close()
+    conn.rollback()
+    return arquivados, leituras, total_bytes
@@ -0,0 +1,478 @@
+"""
+Log de auditoria particionado por mês, com catálogo de ações e arquivamento de partições frias.
+
+- A tabela auditoria é particionada por intervalo de data_hora (uma partição por mês,
+  auditoria_AAAA_MM, além de auditoria_padrao para datas sem partição).
+- auditoria_acoes_dia guarda a contagem por dia e ação, mantida por trigger de comando
+  (uma atualização por INSERT/COPY, não por linha). Os filtros da tela "Auditoria" leem
+  esse catálogo em vez de varrer a tabela.
+- Partições mais antigas que AUDITORIA_MESES_QUENTES são exportadas para arquivos Parquet
+  (zstd) ou CSV.gz em ARQUIVO_AUDITORIA_DIR, registradas em auditoria_arquivos e removidas
+  do banco. consultar_arquivos() pesquisa esses arquivos sem tocar no banco.
+"""
+
+import os
+import re
+import csv
+import glob
+import gzip
+from datetime import date, timedelta
+
+import pandas as pd
+
+COLUNAS = ["id", "usuario_id", "acao", "detalhes", "data_hora"]
+PADRAO_PARTICAO = re.compile(r"^auditoria_(\d{4})_(\d{2})$")
+PADRAO_ARQUIVO = re.compile(r"^auditoria_(\d{4})_(\d{2})(?:-\d+)?\.(parquet|csv\.gz)$")
+TAMANHO_LOTE_ARQUIVO = 50000
+
+INDICES_AUDITORIA = [
+    "CREATE INDEX IF NOT EXISTS idx_auditoria_usuario_data ON auditoria (usuario_id, data_hora DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_auditoria_acao_data ON auditoria (acao, data_hora DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_auditoria_data ON auditoria (data_hora DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_auditoria_busca ON auditoria USING GIN (busca)",
+]
+
+# Vetor de busca textual: detalhes com peso maior que o nome da ação
+SQL_COLUNA_BUSCA = """
+    ALTER TABLE auditoria ADD COLUMN IF NOT EXISTS busca tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('portuguese', coalesce(detalhes, '')), 'A') ||
+        setweight(to_tsvector('portuguese', acao), 'B')
+    ) STORED
+"""
+
+SQL_LISTAR_ACOES = "SELECT acao, SUM(total) FROM auditoria_acoes_dia GROUP BY acao ORDER BY acao"
+
+
+def diretorio_arquivo():
+    return os.getenv("ARQUIVO_AUDITORIA_DIR") or os.path.join(os.getcwd(), "arquivo_auditoria")
+
+
+def meses_quentes():
+    return int(os.getenv("AUDITORIA_MESES_QUENTES", "6"))
+
+
+def inicio_do_mes(dia):
+    return date(dia.year, dia.month, 1)
+
+
+def proximo_mes(dia):
+    return date(dia.year + dia.month // 12, dia.month % 12 + 1, 1)
+
+
+def nome_particao(mes):
+    return f"auditoria_{mes:%Y_%m}"
+
+
+def meses_entre(inicio, fim):
+    """
+    Lista o primeiro dia de cada mês entre duas datas (inclusive).
+
+    Args:
+        inicio (date): Data inicial.
+        fim (date): Data final.
+    Returns:
+        list: Datas do primeiro dia de cada mês.
+    """
+    meses = []
+    mes = inicio_do_mes(inicio)
+    while mes <= fim:
+        meses.append(mes)
+        mes = proximo_mes(mes)
+    return meses
+
+
+def criar_estrutura(cursor):
+    """
+    Cria a tabela particionada, a partição padrão, o catálogo de ações e o trigger que o mantém.
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+    """
+    cursor.execute("CREATE SEQUENCE IF NOT EXISTS auditoria_id_seq")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS auditoria (
+            id INTEGER NOT NULL DEFAULT nextval('auditoria_id_seq'),
+            usuario_id INTEGER NOT NULL REFERENCES usuarios(id),
+            acao VARCHAR(100) NOT NULL,
+            detalhes TEXT,
+            data_hora TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id, data_hora)
+        ) PARTITION BY RANGE (data_hora)
+    """)
+    cursor.execute("ALTER SEQUENCE auditoria_id_seq OWNED BY auditoria.id")
+    cursor.execute("CREATE TABLE IF NOT EXISTS auditoria_padrao PARTITION OF auditoria DEFAULT")
+    cursor.execute(SQL_COLUNA_BUSCA)
+    for indice in INDICES_AUDITORIA:
+        cursor.execute(indice)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS auditoria_acoes_dia (
+            dia DATE NOT NULL,
+            acao VARCHAR(100) NOT NULL,
+            total BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (dia, acao)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS auditoria_arquivos (
+            caminho TEXT PRIMARY KEY,
+            particao VARCHAR(40) NOT NULL,
+            inicio DATE NOT NULL,
+            fim DATE NOT NULL,
+            formato VARCHAR(10) NOT NULL,
+            linhas BIGINT NOT NULL,
+            arquivado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE OR REPLACE FUNCTION auditoria_atualizar_catalogo() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO auditoria_acoes_dia (dia, acao, total)
+            SELECT data_hora::date, acao, COUNT(*) FROM novas GROUP BY 1, 2
+            ON CONFLICT (dia, acao) DO UPDATE SET total = auditoria_acoes_dia.total + EXCLUDED.total;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    cursor.execute("DROP TRIGGER IF EXISTS trg_auditoria_catalogo ON auditoria")
+    cursor.execute("""
+        CREATE TRIGGER trg_auditoria_catalogo AFTER INSERT ON auditoria
+        REFERENCING NEW TABLE AS novas FOR EACH STATEMENT
+        EXECUTE FUNCTION auditoria_atualizar_catalogo()
+    """)
+
+
+def tabela_particionada(cursor):
+    """Indica se a tabela auditoria já é particionada (False para a tabela simples antiga)."""
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('auditoria')")
+    row = cursor.fetchone()
+    return bool(row) and row[0] == "p"
+
+
+def criar_particao(cursor, mes):
+    """
+    Cria a partição de um mês, movendo para ela as linhas do período que estejam na partição padrão.
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+        mes (date): Primeiro dia do mês.
+    Returns:
+        bool: True se a partição foi criada agora.
+    """
+    nome = nome_particao(mes)
+    cursor.execute("SELECT to_regclass(%s)", (nome,))
+    if cursor.fetchone()[0]:
+        return False
+    fim = proximo_mes(mes)
+    limites = f"FOR VALUES FROM ('{mes:%Y-%m-%d}') TO ('{fim:%Y-%m-%d}')"
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM auditoria_padrao WHERE data_hora >= %s AND data_hora < %s)", (mes, fim))
+    if cursor.fetchone()[0]:
+        # Linhas que caíram na partição padrão precisam sair dela antes do ATTACH
+        cursor.execute(f"CREATE TABLE {nome} (LIKE auditoria INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)")
+        cursor.execute(
+            f"WITH movidas AS (DELETE FROM auditoria_padrao WHERE data_hora >= %s AND data_hora < %s RETURNING {', '.join(COLUNAS)}) "
+            f"INSERT INTO {nome} ({', '.join(COLUNAS)}) SELECT {', '.join(COLUNAS)} FROM movidas",
+            (mes, fim),
+        )
+        cursor.execute(f"ALTER TABLE auditoria ATTACH PARTITION {nome} {limites}")
+    else:
+        cursor.execute(f"CREATE TABLE {nome} PARTITION OF auditoria {limites}")
+    return True
+
+
+def garantir_particoes(cursor, inicio=None, meses_a_frente=3):
+    """
+    Garante partições do mês de `inicio` até `meses_a_frente` meses após o mês atual.
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+        inicio (date, opcional): Mês inicial. Default: mês atual.
+        meses_a_frente (int, opcional): Meses futuros já criados. Default: 3.
+    Returns:
+        list: Nomes das partições criadas.
+    """
+    hoje = date.today()
+    fim = inicio_do_mes(hoje)
+    for _ in range(meses_a_frente):
+        fim = proximo_mes(fim)
+    criadas = []
+    for mes in meses_entre(inicio or hoje, fim):
+        if criar_particao(cursor, mes):
+            criadas.append(nome_particao(mes))
+    return criadas
+
+
+def reconstruir_catalogo(cursor):
+    """Recalcula auditoria_acoes_dia a partir das linhas ainda no banco (mantém os dias já arquivados)."""
+    cursor.execute("SELECT MIN(data_hora)::date FROM auditoria")
+    inicio = cursor.fetchone()[0]
+    if inicio is None:
+        return
+    cursor.execute("DELETE FROM auditoria_acoes_dia WHERE dia >= %s", (inicio,))
+    cursor.execute("""
+        INSERT INTO auditoria_acoes_dia (dia, acao, total)
+        SELECT data_hora::date, acao, COUNT(*) FROM auditoria GROUP BY 1, 2
+    """)
+
+
+def migrar_tabela_simples(cursor):
+    """
+    Converte a tabela auditoria antiga (não particionada) para a estrutura particionada.
+
+    Executa em uma única transação (o chamador faz o commit): renomeia a tabela antiga,
+    cria a nova, copia as linhas para as partições mensais e remove a antiga.
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+    Returns:
+        int or None: Linhas migradas (None se a tabela já era particionada).
+    """
+    if tabela_particionada(cursor):
+        return None
+    cursor.execute("ALTER TABLE auditoria RENAME TO auditoria_legado")
+    cursor.execute("ALTER TABLE auditoria_legado RENAME CONSTRAINT auditoria_pkey TO auditoria_legado_pkey")
+    for indice in INDICES_AUDITORIA:
+        cursor.execute(f"DROP INDEX IF EXISTS {indice.split()[5]}")
+    criar_estrutura(cursor)
+    cursor.execute("SELECT MIN(data_hora)::date FROM auditoria_legado")
+    inicio = cursor.fetchone()[0]
+    if inicio:
+        garantir_particoes(cursor, inicio)
+    cursor.execute(f"""
+        INSERT INTO auditoria ({', '.join(COLUNAS)})
+        SELECT id, usuario_id, acao, detalhes, COALESCE(data_hora, CURRENT_TIMESTAMP) FROM auditoria_legado
+    """)
+    migradas = cursor.rowcount
+    cursor.execute("SELECT setval('auditoria_id_seq', GREATEST((SELECT MAX(id) FROM auditoria), 1))")
+    cursor.execute("DROP TABLE auditoria_legado")
+    reconstruir_catalogo(cursor)
+    return migradas
+
+
+def listar_particoes(cursor):
+    """
+    Lista as partições mensais existentes.
+
+    Returns:
+        list: Tuplas (nome, primeiro dia do mês), em ordem cronológica.
+    """
+    cursor.execute("""
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'auditoria'::regclass
+    """)
+    particoes = []
+    for (nome,) in cursor.fetchall():
+        encontrado = PADRAO_PARTICAO.match(nome)
+        if encontrado:
+            particoes.append((nome, date(int(encontrado.group(1)), int(encontrado.group(2)), 1)))
+    return sorted(particoes, key=lambda p: p[1])
+
+
+def particoes_frias(particoes, hoje=None, quentes=None):
+    """
+    Seleciona as partições que já podem ser arquivadas.
+
+    Args:
+        particoes (list): Tuplas (nome, mês) de listar_particoes.
+        hoje (date, opcional): Data de referência. Default: hoje.
+        quentes (int, opcional): Meses mantidos no banco, incluindo o atual. Default: AUDITORIA_MESES_QUENTES.
+    Returns:
+        list: Tuplas (nome, mês) anteriores ao primeiro mês quente.
+    """
+    quentes = meses_quentes() if quentes is None else quentes
+    limite = inicio_do_mes(hoje or date.today())
+    for _ in range(max(quentes - 1, 0)):
+        limite = inicio_do_mes(limite - timedelta(days=1))
+    return [(nome, mes) for nome, mes in particoes if mes < limite]
+
+
+def _escrever_parquet(cursor_servidor, caminho):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    esquema = pa.schema([
+        ("id", pa.int64()), ("usuario_id", pa.int64()), ("acao", pa.string()),
+        ("detalhes", pa.string()), ("data_hora", pa.timestamp("us")),
+    ])
+    linhas = 0
+    with pq.ParquetWriter(caminho, esquema, compression="zstd") as escritor:
+        while True:
+            lote = cursor_servidor.fetchmany(TAMANHO_LOTE_ARQUIVO)
+            if not lote:
+                break
+            colunas = list(zip(*lote))
+            escritor.write_table(pa.Table.from_arrays([pa.array(c, type=esquema.field(i).type) for i, c in enumerate(colunas)], schema=esquema))
+            linhas += len(lote)
+    return linhas
+
+
+def _escrever_csv(cursor_servidor, caminho):
+    linhas = 0
+    with gzip.open(caminho, "wt", encoding="utf-8", newline="") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(COLUNAS)
+        while True:
+            lote = cursor_servidor.fetchmany(TAMANHO_LOTE_ARQUIVO)
+            if not lote:
+                break
+            escritor.writerows((i, u, a, d, h.isoformat()) for i, u, a, d, h in lote)
+            linhas += len(lote)
+    return linhas
+
+
+def arquivar_particao(conn, nome, mes, diretorio=None, formato="parquet"):
+    """
+    Exporta uma partição para arquivo compactado, registra o arquivo e remove a partição do banco.
+
+    As linhas são lidas por cursor no servidor, em lotes, sem carregar a partição inteira em memória.
+    O arquivo é gravado com nome temporário e só substitui o definitivo depois de completo; a
+    partição só é removida se o número de linhas gravadas conferir. Faz commit ao final.
+
+    Args:
+        conn: Conexão psycopg2.
+        nome (str): Nome da partição (auditoria_AAAA_MM).
+        mes (date): Primeiro dia do mês da partição.
+        diretorio (str, opcional): Destino dos arquivos. Default: ARQUIVO_AUDITORIA_DIR.
+        formato (str, opcional): "parquet" ou "csv". Default: "parquet".
+    Returns:
+        tuple: (caminho do arquivo, linhas arquivadas).
+    """
+    diretorio = diretorio or diretorio_arquivo()
+    os.makedirs(diretorio, exist_ok=True)
+    extensao = "parquet" if formato == "parquet" else "csv.gz"
+    caminho = os.path.join(diretorio, f"{nome}.{extensao}")
+    sufixo = 1
+    while os.path.exists(caminho):
+        # Linhas do mês que chegaram depois de um arquivamento anterior vão para um arquivo adicional
+        sufixo += 1
+        caminho = os.path.join(diretorio, f"{nome}-{sufixo}.{extensao}")
+    temporario = caminho + ".tmp"
+
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM {nome}")
+    esperadas = cursor.fetchone()[0]
+    cursor_servidor = conn.cursor(name=f"arquivar_{nome}")
+    cursor_servidor.itersize = TAMANHO_LOTE_ARQUIVO
+    cursor_servidor.execute(f"SELECT {', '.join(COLUNAS)} FROM {nome} ORDER BY data_hora, id")
+    try:
+        linhas = _escrever_parquet(cursor_servidor, temporario) if formato == "parquet" else _escrever_csv(cursor_servidor, temporario)
+    finally:
+        cursor_servidor.close()
+    if linhas != esperadas:
+        os.remove(temporario)
+        raise Exception(f"Arquivamento de {nome} interrompido: {linhas} linhas gravadas, {esperadas} esperadas.")
+    os.replace(temporario, caminho)
+
+    cursor.execute("""
+        INSERT INTO auditoria_arquivos (caminho, particao, inicio, fim, formato, linhas)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, (caminho, nome, mes, proximo_mes(mes), formato, linhas))
+    cursor.execute(f"ALTER TABLE auditoria DETACH PARTITION {nome}")
+    cursor.execute(f"DROP TABLE {nome}")
+    conn.commit()
+    return caminho, linhas
+
+
+def listar_acoes(cursor):
+    """
+    Lista as ações distintas já registradas, a partir do catálogo.
+
+    Returns:
+        list: Tuplas (acao, total de registros).
+    """
+    cursor.execute(SQL_LISTAR_ACOES)
+    return cursor.fetchall()
+
+
+def contagens_por_dia(cursor, acao=None, data_inicio=None, data_fim=None):
+    """
+    Contagem diária de registros de auditoria, a partir do catálogo.
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+        acao (str, opcional): Filtra por ação.
+        data_inicio (date, opcional): Dia inicial.
+        data_fim (date, opcional): Dia final.
+    Returns:
+        list: Tuplas (dia, total) em ordem cronológica.
+    """
+    query = "SELECT dia, SUM(total) FROM auditoria_acoes_dia"
+    filtros = []
+    params = []
+    if acao:
+        filtros.append("acao = %s")
+        params.append(acao)
+    if data_inicio:
+        filtros.append("dia >= %s")
+        params.append(data_inicio)
+    if data_fim:
+        filtros.append("dia <= %s")
+        params.append(data_fim)
+    if filtros:
+        query += " WHERE " + " AND ".join(filtros)
+    query += " GROUP BY dia ORDER BY dia"
+    cursor.execute(query, tuple(params))
+    return cursor.fetchall()
+
+
+def listar_arquivos(cursor):
+    """Lista os meses arquivados: tuplas (particao, inicio, fim, caminho, formato, linhas)."""
+    cursor.execute("SELECT particao, inicio, fim, caminho, formato, linhas FROM auditoria_arquivos ORDER BY inicio DESC")
+    return cursor.fetchall()
+
+
+def _ler_arquivo(caminho, usuario_id, acao, inicio, fim):
+    if caminho.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        filtros = [("data_hora", ">=", pd.Timestamp(inicio)), ("data_hora", "<", pd.Timestamp(fim))]
+        if usuario_id:
+            filtros.append(("usuario_id", "=", int(usuario_id)))
+        if acao:
+            filtros.append(("acao", "=", acao))
+        return pq.read_table(caminho, filters=filtros).to_pandas()
+    df = pd.read_csv(caminho, compression="gzip", parse_dates=["data_hora"])
+    df = df[(df["data_hora"] >= pd.Timestamp(inicio)) & (df["data_hora"] < pd.Timestamp(fim))]
+    if usuario_id:
+        df = df[df["usuario_id"] == int(usuario_id)]
+    if acao:
+        df = df[df["acao"] == acao]
+    return df
+
+
+def consultar_arquivos(diretorio=None, usuario_id=None, acao=None, data_inicio=None, data_fim=None, texto=None, limite=100):
+    """
+    Pesquisa os registros de auditoria arquivados, sem acessar o banco.
+
+    Só abre os arquivos dos meses que se sobrepõem ao período pedido; nos arquivos Parquet os
+    filtros de usuário, ação e data são aplicados na leitura (row groups descartados).
+
+    Args:
+        diretorio (str, opcional): Pasta dos arquivos. Default: ARQUIVO_AUDITORIA_DIR.
+        usuario_id (int, opcional): Filtra pelo usuário.
+        acao (str, opcional): Filtra pela ação.
+        data_inicio (date, opcional): Data inicial.
+        data_fim (date, opcional): Data final (inclusive).
+        texto (str, opcional): Trecho procurado nos detalhes (sem diferenciar maiúsculas).
+        limite (int, opcional): Número máximo de linhas. Default: 100.
+    Returns:
+        pd.DataFrame: Colunas id, usuario_id, acao, detalhes, data_hora, das mais recentes às mais antigas.
+    """
+    diretorio = diretorio or diretorio_arquivo()
+    inicio = data_inicio or date.min
+    fim = (data_fim + timedelta(days=1)) if data_fim else date.max
+    partes = []
+    for caminho in sorted(glob.glob(os.path.join(diretorio, "auditoria_*")), reverse=True):
+        encontrado = PADRAO_ARQUIVO.match(os.path.basename(caminho))
+        if not encontrado:
+            continue
+        mes = date(int(encontrado.group(1)), int(encontrado.group(2)), 1)
+        if proximo_mes(mes) <= inicio or mes >= fim:
+            continue
+        df = _ler_arquivo(caminho, usuario_id, acao, max(inicio, mes), min(fim, proximo_mes(mes)))
+        if texto:
+            df = df[df["detalhes"].fillna("").str.contains(texto, case=False, regex=False)]
+        if not df.empty:
+            partes.append(df[COLUNAS])
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS)
+    resultado = pd.concat(partes, ignore_index=True)
+    return resultado.sort_values(["data_hora", "id"], ascending=False).head(limite).reset_index(drop=True)
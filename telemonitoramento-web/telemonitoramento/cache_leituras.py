@@ -0,0 +1,271 @@
+"""
+Cache em memória das leituras recentes de cada paciente.
+
+Cada paciente acompanhado tem um buffer circular com as TAMANHO_BUFFER leituras mais
+recentes, guardadas em arrays tipados (instantes em int64, temperatura em float32, pressão
+sistólica/diastólica, frequência e saturação em int16) em vez de tuplas ou DataFrames: o
+custo por paciente é fixo e pequeno, e o cache inteiro respeita um limite de memória,
+descartando os pacientes usados há mais tempo (LRU).
+
+O cache é único por processo (obter_cache) e assina a thread ouvinte de notificacoes:
+uma leitura gravada por outro processo (ou por COPY/carga em lote) descarta o buffer do
+paciente, que é recarregado na próxima consulta. Leituras gravadas por este processo
+(cadastrar_sinais_vitais) entram direto no buffer e o seu evento é ignorado. Com o
+paciente em cache, o histórico recente não consulta o banco.
+"""
+
+import re
+import sys
+import logging
+import threading
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from alertas import PRESSAO_PATTERN
+from consultas import SQL_ULTIMOS_SINAIS_PACIENTES
+
+logger = logging.getLogger("telemonitoramento.cache_leituras")
+
+# Leituras por paciente (as mesmas 10 de SQL_ULTIMOS_SINAIS_PACIENTE)
+TAMANHO_BUFFER = 10
+# Limite padrão de memória do cache inteiro
+LIMITE_MEMORIA = 16 * 1024 * 1024
+# Valor inteiro ausente (frequência, saturação ou pressão fora do formato 120/80)
+AUSENTE = -1
+_EPOCA = datetime(1970, 1, 1)
+_MICROSSEGUNDO = timedelta(microseconds=1)
+
+
+class BufferLeituras:
+    """
+    Buffer circular, de capacidade fixa, com as leituras mais recentes de um paciente.
+
+    Leituras são acrescentadas da mais antiga para a mais nova; ao encher, a mais antiga
+    é sobrescrita. Pressões fora do formato 120/80 são guardadas como ausentes.
+    """
+
+    __slots__ = ("ids", "instantes", "temperaturas", "sistolicas", "diastolicas",
+                 "frequencias", "saturacoes", "posicao", "contagem")
+
+    def __init__(self, capacidade=TAMANHO_BUFFER):
+        self.ids = array("q", [0]) * capacidade
+        self.instantes = array("q", [0]) * capacidade
+        self.temperaturas = array("f", [0.0]) * capacidade
+        self.sistolicas = array("h", [AUSENTE]) * capacidade
+        self.diastolicas = array("h", [AUSENTE]) * capacidade
+        self.frequencias = array("h", [AUSENTE]) * capacidade
+        self.saturacoes = array("h", [AUSENTE]) * capacidade
+        self.posicao = 0
+        self.contagem = 0
+
+    @property
+    def capacidade(self):
+        return len(self.ids)
+
+    def bytes(self):
+        """Memória ocupada pelo buffer e seus arrays."""
+        return sys.getsizeof(self) + sum(sys.getsizeof(getattr(self, nome)) for nome in self.__slots__[:7])
+
+    def contem(self, sinal_id):
+        """Indica se a leitura já está no buffer."""
+        return sinal_id in self.ids[:self.contagem]
+
+    def adicionar(self, sinal_id, data_registro, temperatura, pressao, frequencia, saturacao):
+        """
+        Acrescenta uma leitura (mais nova que as do buffer), sobrescrevendo a mais antiga se cheio.
+
+        Args:
+            sinal_id (int): ID da leitura em sinais_vitais.
+            data_registro (datetime): Data da leitura.
+            temperatura (float): Temperatura (guardada em float32).
+            pressao (str): Pressão no formato 120/80.
+            frequencia (int): Frequência cardíaca.
+            saturacao (int): Saturação de oxigênio.
+        """
+        i = self.posicao
+        sistolica, diastolica = AUSENTE, AUSENTE
+        if pressao and re.match(PRESSAO_PATTERN, pressao):
+            sistolica, diastolica = (int(valor) for valor in pressao.split("/"))
+        self.ids[i] = sinal_id
+        self.instantes[i] = (data_registro - _EPOCA) // _MICROSSEGUNDO
+        self.temperaturas[i] = float("nan") if temperatura is None else temperatura
+        self.sistolicas[i] = sistolica
+        self.diastolicas[i] = diastolica
+        self.frequencias[i] = AUSENTE if frequencia is None else frequencia
+        self.saturacoes[i] = AUSENTE if saturacao is None else saturacao
+        self.posicao = (i + 1) % self.capacidade
+        self.contagem = min(self.contagem + 1, self.capacidade)
+
+    def linhas(self):
+        """
+        Leituras da mais recente para a mais antiga.
+
+        Returns:
+            list: Tuplas (data_registro, temperatura, pressao, frequencia_cardiaca, saturacao),
+            no formato de SQL_ULTIMOS_SINAIS_PACIENTE (temperatura arredondada a 2 casas).
+        """
+        linhas = []
+        for k in range(1, self.contagem + 1):
+            i = (self.posicao - k) % self.capacidade
+            temperatura = self.temperaturas[i]
+            sistolica, diastolica = self.sistolicas[i], self.diastolicas[i]
+            linhas.append((
+                _EPOCA + self.instantes[i] * _MICROSSEGUNDO,
+                None if temperatura != temperatura else round(temperatura, 2),
+                None if sistolica == AUSENTE else f"{sistolica}/{diastolica}",
+                None if self.frequencias[i] == AUSENTE else self.frequencias[i],
+                None if self.saturacoes[i] == AUSENTE else self.saturacoes[i],
+            ))
+        return linhas
+
+
+class CacheLeituras:
+    """
+    Buffers de leituras recentes por paciente, com descarte LRU e limite de memória.
+
+    Funciona também como assinatura da thread ouvinte (notificacoes.Ouvinte): eventos de
+    sinais_vitais descartam o buffer do paciente; eventos em massa e reconexões esvaziam o
+    cache. Todas as operações são protegidas por lock (as sessões do Streamlit são threads).
+
+    Args:
+        capacidade (int, opcional): Leituras por paciente. Default: TAMANHO_BUFFER.
+        limite_memoria (int, opcional): Bytes máximos do cache. Default: LIMITE_MEMORIA.
+    """
+
+    def __init__(self, capacidade=TAMANHO_BUFFER, limite_memoria=LIMITE_MEMORIA):
+        self.capacidade = capacidade
+        self.max_pacientes = max(1, limite_memoria // BufferLeituras(capacidade).bytes())
+        self._buffers = OrderedDict()
+        self._lock = threading.Lock()
+        # Incrementada quando o cache é esvaziado: cargas iniciadas antes não são guardadas
+        self._versao = 0
+        # Pacientes sendo carregados -> [cargas em andamento, leitura nova durante a carga]
+        self._cargas = {}
+        self.acertos = 0
+        self.faltas = 0
+
+    def __len__(self):
+        return len(self._buffers)
+
+    # Interface de assinatura (chamada pela thread ouvinte)
+    def interessa(self, evento):
+        return evento.get("tabela") == "sinais_vitais"
+
+    def notificar(self, evento):
+        with self._lock:
+            if evento.get("em_massa"):
+                self._buffers.clear()
+                self._versao += 1
+                return
+            paciente_id = evento.get("paciente_id")
+            if paciente_id in self._cargas:
+                self._cargas[paciente_id][1] = True
+            buffer = self._buffers.get(paciente_id)
+            if buffer is not None and not buffer.contem(evento["id"]):
+                del self._buffers[paciente_id]
+
+    def recarregar_tudo(self):
+        with self._lock:
+            self._buffers.clear()
+            self._versao += 1
+
+    def registrar(self, paciente_id, sinal_id, data_registro, temperatura, pressao, frequencia, saturacao):
+        """
+        Acrescenta uma leitura gravada por este processo (chamar depois do commit).
+
+        Pacientes fora do cache são ignorados: a próxima consulta os carrega do banco.
+        """
+        with self._lock:
+            if paciente_id in self._cargas:
+                self._cargas[paciente_id][1] = True
+            buffer = self._buffers.get(paciente_id)
+            if buffer is not None and not buffer.contem(sinal_id):
+                buffer.adicionar(sinal_id, data_registro, temperatura, pressao, frequencia, saturacao)
+                self._buffers.move_to_end(paciente_id)
+
+    def leituras(self, paciente_id, conectar):
+        """Leituras recentes de um paciente (ver leituras_de)."""
+        return self.leituras_de([paciente_id], conectar)[paciente_id]
+
+    def leituras_de(self, pacientes, conectar):
+        """
+        Leituras recentes de vários pacientes; os que não estão em cache vêm de uma única consulta.
+
+        Args:
+            pacientes (iterable): IDs dos pacientes.
+            conectar (callable): Abre uma conexão psycopg2 (só chamada se faltar algum paciente).
+        Returns:
+            dict: paciente_id -> lista de BufferLeituras.linhas (vazia sem leituras).
+        """
+        resultado, faltantes = {}, []
+        with self._lock:
+            for paciente_id in dict.fromkeys(pacientes):
+                buffer = self._buffers.get(paciente_id)
+                if buffer is None:
+                    faltantes.append(paciente_id)
+                else:
+                    self._buffers.move_to_end(paciente_id)
+                    resultado[paciente_id] = buffer.linhas()
+            self.acertos += len(resultado)
+            self.faltas += len(faltantes)
+            versao = self._versao
+            for paciente_id in faltantes:
+                self._cargas.setdefault(paciente_id, [0, False])[0] += 1
+        if not faltantes:
+            return resultado
+        carregados = {paciente_id: BufferLeituras(self.capacidade) for paciente_id in faltantes}
+        concluida = False
+        try:
+            conn = conectar()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(SQL_ULTIMOS_SINAIS_PACIENTES, (faltantes, self.capacidade))
+                # Da mais recente para a mais antiga: acrescentadas de trás para frente
+                for paciente_id, *leitura in reversed(cursor.fetchall()):
+                    carregados[paciente_id].adicionar(*leitura)
+                conn.rollback()
+            finally:
+                conn.close()
+            concluida = True
+        finally:
+            with self._lock:
+                for paciente_id, buffer in carregados.items():
+                    carga = self._cargas[paciente_id]
+                    # Leitura nova durante a carga (talvez fora dela) ou cache esvaziado: não guarda
+                    if concluida and not carga[1] and versao == self._versao:
+                        self._buffers[paciente_id] = buffer
+                        self._buffers.move_to_end(paciente_id)
+                    carga[0] -= 1
+                    if not carga[0]:
+                        del self._cargas[paciente_id]
+                while len(self._buffers) > self.max_pacientes:
+                    self._buffers.popitem(last=False)
+        for paciente_id, buffer in carregados.items():
+            resultado[paciente_id] = buffer.linhas()
+        return resultado
+
+
+_cache = None
+_lock_cache = threading.Lock()
+
+
+def obter_cache(ouvinte=None, limite_memoria=LIMITE_MEMORIA):
+    """
+    Retorna o cache de leituras do processo, criando-o na primeira chamada.
+
+    Args:
+        ouvinte (notificacoes.Ouvinte, opcional): Thread ouvinte em que o cache é assinado
+            (sem ela, leituras gravadas por outros processos não são percebidas).
+        limite_memoria (int, opcional): Bytes máximos (só na criação). Default: LIMITE_MEMORIA.
+    Returns:
+        CacheLeituras: Cache compartilhado pelas sessões do processo.
+    """
+    global _cache
+    with _lock_cache:
+        if _cache is None:
+            _cache = CacheLeituras(limite_memoria=limite_memoria)
+            logger.info("Cache de leituras criado: até %d pacientes", _cache.max_pacientes)
+        if ouvinte is not None:
+            ouvinte.assinar(_cache)
+        return _cache
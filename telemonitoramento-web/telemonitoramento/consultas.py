@@ -0,0 +1,401 @@
+"""
+Consultas SQL dos caminhos mais usados da aplicação (login, dashboard, listagens e relatórios).
+
+As telas do app.py e as ferramentas de benchmark usam as mesmas funções, de forma que
+qualquer medição reflete exatamente o SQL executado em produção.
+"""
+
+# Autenticação
+SQL_AUTENTICAR = "SELECT * FROM usuarios WHERE email=%s AND senha=%s"
+
+SQL_REGISTRAR_AUDITORIA = "INSERT INTO auditoria (usuario_id, acao, detalhes, data_hora) VALUES (%s, %s, %s, NOW())"
+
+# Dashboard do administrador: nome do indicador -> consulta
+SQL_DASHBOARD_CONTAGENS = {
+    "total_pacientes": "SELECT COUNT(*) FROM pacientes",
+    "total_profissionais": "SELECT COUNT(*) FROM profissionais",
+    "total_alertas_30d": "SELECT COUNT(*) FROM alertas WHERE data_hora >= NOW() - INTERVAL '30 days'",
+    "total_usuarios_ativos": "SELECT COUNT(*) FROM usuarios WHERE status = TRUE",
+    "alertas_pendentes": "SELECT COUNT(*) FROM alertas WHERE status = 'pendente' AND data_hora >= NOW() - INTERVAL '7 days'",
+}
+
+SQL_DASHBOARD_ALERTAS_POR_DIA = """
+    SELECT DATE(data_hora), COUNT(*) FROM alertas
+    WHERE data_hora >= NOW() - INTERVAL '30 days'
+    GROUP BY DATE(data_hora)
+    ORDER BY DATE(data_hora)
+"""
+
+SQL_DASHBOARD_PACIENTES_POR_PROFISSIONAL = """
+    SELECT u.nome, COUNT(p.id) FROM profissionais pr
+    JOIN usuarios u ON pr.id_usuario = u.id
+    LEFT JOIN pacientes p ON pr.id = p.id_profissional_responsavel
+    GROUP BY u.nome
+    ORDER BY COUNT(p.id) DESC
+"""
+
+SQL_DASHBOARD_STATUS_ALERTAS = "SELECT status, COUNT(*) FROM alertas GROUP BY status"
+
+# Pacientes
+SQL_LISTAR_PACIENTES = "SELECT p.id, u.nome, p.dados_medicos FROM pacientes p JOIN usuarios u ON p.id_usuario = u.id"
+
+SQL_ULTIMOS_SINAIS_PACIENTE = "SELECT data_registro, temperatura, pressao, frequencia_cardiaca, saturacao FROM sinais_vitais WHERE paciente_id = %s ORDER BY data_registro DESC LIMIT 10"
+
+# Últimas leituras de vários pacientes de uma vez (carga do cache de leituras recentes)
+SQL_ULTIMOS_SINAIS_PACIENTES = """
+    SELECT p.id, s.id, s.data_registro, s.temperatura, s.pressao, s.frequencia_cardiaca, s.saturacao
+    FROM unnest(%s::int[]) AS p(id)
+    CROSS JOIN LATERAL (
+        SELECT id, data_registro, temperatura, pressao, frequencia_cardiaca, saturacao FROM sinais_vitais
+        WHERE paciente_id = p.id ORDER BY data_registro DESC, id DESC LIMIT %s
+    ) s
+"""
+
+SQL_INSERIR_SINAIS_VITAIS = "INSERT INTO sinais_vitais (paciente_id, temperatura, pressao, frequencia_cardiaca, saturacao) VALUES (%s, %s, %s, %s, %s) RETURNING id, data_registro"
+
+SQL_INSERIR_ALERTA = "INSERT INTO alertas (paciente_id, tipo_alerta, descricao) VALUES (%s, %s, %s)"
+
+SQL_NOTIFICACAO_SINAIS = """
+    SELECT u.nome, up.email FROM pacientes p
+    JOIN usuarios u ON p.id_usuario = u.id
+    JOIN usuarios up ON p.id_profissional_responsavel = up.id
+    WHERE p.id = %s
+"""
+
+# Fila de prioridades de um profissional (escore_risco.py): índice idx_fila_prioridade_profissional
+SQL_FILA_PRIORIDADE = """
+    SELECT f.paciente_id, u.nome, f.escore, f.ultima_leitura,
+        s.temperatura, s.pressao, s.frequencia_cardiaca, s.saturacao
+    FROM fila_prioridade f
+    JOIN pacientes p ON p.id = f.paciente_id
+    JOIN usuarios u ON u.id = p.id_usuario
+    LEFT JOIN sinais_vitais s ON s.id = f.sinal_id
+    WHERE f.profissional_id = %s
+    ORDER BY f.escore DESC NULLS LAST, f.ultima_leitura ASC NULLS FIRST, f.paciente_id
+    LIMIT %s OFFSET %s
+"""
+
+# Visão geral dos pacientes de um profissional (ultimos_sinais.py): mesma ordem da fila de prioridades
+SQL_VISAO_GERAL = """
+    SELECT f.paciente_id, u.nome, f.escore, us.data_registro,
+        us.temperatura, us.pressao, us.frequencia_cardiaca, us.saturacao,
+        us.temperaturas, us.frequencias, us.saturacoes, us.sistolicas, us.diastolicas,
+        us.alerta_tipo, us.alerta_descricao, us.alerta_status, us.alerta_em
+    FROM fila_prioridade f
+    JOIN pacientes p ON p.id = f.paciente_id
+    JOIN usuarios u ON u.id = p.id_usuario
+    LEFT JOIN ultimos_sinais us ON us.paciente_id = f.paciente_id
+    WHERE f.profissional_id = %s
+    ORDER BY f.escore DESC NULLS LAST, f.ultima_leitura ASC NULLS FIRST, f.paciente_id
+    LIMIT %s
+"""
+
+SQL_PARAMETROS_ALERTA = "SELECT temp_min, temp_max, freq_min, freq_max, sat_min, pressao_min, pressao_max FROM parametros_alerta ORDER BY id DESC LIMIT 1"
+
+# Busca textual (colunas tsvector "busca" com índice GIN, dicionário português).
+# websearch_to_tsquery aceita a sintaxe de buscadores: "frase exata", -excluir, OR.
+TSQUERY_BUSCA = "websearch_to_tsquery('portuguese', %s)"
+
+COLUNAS_RELATORIO_SINAIS = ["ID", "Paciente", "Profissional", "Temperatura", "Pressão", "Frequência", "Saturação", "Data Registro"]
+
+
+def montar_consulta_sinais_vitais(paciente_id=None, profissional_id=None, data_inicio=None, data_fim=None, limite=100, apos=None):
+    """
+    Monta a consulta filtrada de sinais vitais usada nas telas "Sinais Vitais" e "Relatórios".
+
+    Args:
+        paciente_id (int, opcional): Filtra por paciente.
+        profissional_id (int, opcional): Filtra pelo profissional responsável.
+        data_inicio (date, opcional): Data inicial do período.
+        data_fim (date, opcional): Data final do período.
+        limite (int, opcional): Número máximo de linhas. Default: 100.
+        apos (tuple, opcional): (data_registro, id) da leitura mais recente já carregada;
+            retorna apenas as leituras posteriores (carga incremental).
+    Returns:
+        tuple: (query, params) prontos para cursor.execute.
+    """
+    query = "SELECT s.id, u.nome, pr.nome, s.temperatura, s.pressao, s.frequencia_cardiaca, s.saturacao, s.data_registro FROM sinais_vitais s JOIN pacientes p ON s.paciente_id = p.id JOIN usuarios u ON p.id_usuario = u.id JOIN usuarios pr ON p.id_profissional_responsavel = pr.id"
+    filtros = []
+    params = []
+    if paciente_id:
+        filtros.append("s.paciente_id = %s")
+        params.append(paciente_id)
+    if profissional_id:
+        filtros.append("p.id_profissional_responsavel = %s")
+        params.append(profissional_id)
+    if data_inicio:
+        filtros.append("s.data_registro >= %s")
+        params.append(str(data_inicio))
+    if data_fim:
+        filtros.append("s.data_registro <= %s")
+        params.append(str(data_fim))
+    if apos:
+        filtros.append("(s.data_registro, s.id) > (%s, %s)")
+        params.extend(apos)
+    if filtros:
+        query += " WHERE " + " AND ".join(filtros)
+    query += " ORDER BY s.data_registro DESC, s.id DESC LIMIT %s"
+    params.append(limite)
+    return query, tuple(params)
+
+
+def _ordenar_e_paginar(query, filtros, params, ordem, coluna_busca, termo, limite, deslocamento):
+    if filtros:
+        query += " WHERE " + " AND ".join(filtros)
+    if termo:
+        # Com busca textual, os resultados mais relevantes vêm primeiro
+        query += f" ORDER BY ts_rank_cd({coluna_busca}, {TSQUERY_BUSCA}) DESC, {ordem} DESC"
+        params.append(termo)
+    else:
+        query += f" ORDER BY {ordem} DESC"
+    query += " LIMIT %s"
+    params.append(limite)
+    if deslocamento:
+        query += " OFFSET %s"
+        params.append(deslocamento)
+    return query, tuple(params)
+
+
+def montar_consulta_mensagens(remetente_id=None, destinatario_id=None, termo=None, limite=50, deslocamento=0):
+    """
+    Monta a consulta filtrada da tela "Mensagens".
+
+    Args:
+        remetente_id (int, opcional): Filtra por remetente.
+        destinatario_id (int, opcional): Filtra por destinatário.
+        termo (str, opcional): Busca textual no texto da mensagem (ordena por relevância).
+        limite (int, opcional): Número máximo de linhas. Default: 50.
+        deslocamento (int, opcional): Linhas a pular (paginação). Default: 0.
+    Returns:
+        tuple: (query, params) prontos para cursor.execute.
+    """
+    query = "SELECT m.id, u1.nome, u2.nome, m.texto, m.data_envio FROM mensagens m JOIN usuarios u1 ON m.id_remetente = u1.id JOIN usuarios u2 ON m.id_destinatario = u2.id"
+    filtros = []
+    params = []
+    if remetente_id:
+        filtros.append("m.id_remetente = %s")
+        params.append(remetente_id)
+    if destinatario_id:
+        filtros.append("m.id_destinatario = %s")
+        params.append(destinatario_id)
+    if termo:
+        filtros.append(f"m.busca @@ {TSQUERY_BUSCA}")
+        params.append(termo)
+    return _ordenar_e_paginar(query, filtros, params, "m.data_envio", "m.busca", termo, limite, deslocamento)
+
+
+def montar_consulta_auditoria(usuario_id=None, acao=None, data_inicio=None, data_fim=None, termo=None, limite=100, deslocamento=0):
+    """
+    Monta a consulta filtrada da tela "Auditoria".
+
+    Args:
+        usuario_id (int, opcional): Filtra pelo usuário que executou a ação.
+        acao (str, opcional): Filtra pelo tipo de ação.
+        data_inicio (date, opcional): Data inicial do período.
+        data_fim (date, opcional): Data final do período.
+        termo (str, opcional): Busca textual na ação e nos detalhes (ordena por relevância).
+        limite (int, opcional): Número máximo de linhas. Default: 100.
+        deslocamento (int, opcional): Linhas a pular (paginação). Default: 0.
+    Returns:
+        tuple: (query, params) prontos para cursor.execute.
+    """
+    query = "SELECT a.id, u.nome, a.acao, a.detalhes, a.data_hora FROM auditoria a JOIN usuarios u ON a.usuario_id = u.id"
+    filtros = []
+    params = []
+    if usuario_id:
+        filtros.append("a.usuario_id = %s")
+        params.append(usuario_id)
+    if acao:
+        filtros.append("a.acao = %s")
+        params.append(acao)
+    if data_inicio:
+        filtros.append("a.data_hora >= %s")
+        params.append(str(data_inicio))
+    if data_fim:
+        filtros.append("a.data_hora <= %s")
+        params.append(str(data_fim))
+    if termo:
+        filtros.append(f"a.busca @@ {TSQUERY_BUSCA}")
+        params.append(termo)
+    return _ordenar_e_paginar(query, filtros, params, "a.data_hora", "a.busca", termo, limite, deslocamento)
+
+
+def montar_consulta_pacientes(diagnostico_indice=None, profissional_id=None, faixas=None, limite=200, deslocamento=0):
+    """
+    Monta a busca de pacientes pelos índices cegos (veja indice_cego.py).
+
+    Args:
+        diagnostico_indice (str, opcional): Índice cego do diagnóstico.
+        profissional_id (int, opcional): ID de usuário do profissional responsável.
+        faixas (list, opcional): Inícios das faixas etárias aceitas.
+        limite (int, opcional): Número máximo de linhas. Default: 200.
+        deslocamento (int, opcional): Linhas a pular (paginação). Default: 0.
+    Returns:
+        tuple: (query, params) prontos para cursor.execute.
+    Raises:
+        ValueError: Se nenhum filtro for informado (a busca nunca varre a tabela inteira).
+    """
+    query = (
+        "SELECT p.id, u.nome, up.nome, p.dados_medicos FROM pacientes p "
+        "JOIN usuarios u ON p.id_usuario = u.id LEFT JOIN usuarios up ON p.id_profissional_responsavel = up.id"
+    )
+    filtros = []
+    params = []
+    if diagnostico_indice:
+        filtros.append("p.diagnostico_indice = %s")
+        params.append(diagnostico_indice)
+    if profissional_id:
+        filtros.append("p.id_profissional_responsavel = %s")
+        params.append(profissional_id)
+    if faixas:
+        filtros.append("p.faixa_etaria = ANY(%s)")
+        params.append(list(faixas))
+    if not filtros:
+        raise ValueError("Informe ao menos um filtro (diagnóstico, profissional ou faixa etária).")
+    query += " WHERE " + " AND ".join(filtros) + " ORDER BY u.nome, p.id LIMIT %s"
+    params.append(limite)
+    if deslocamento:
+        query += " OFFSET %s"
+        params.append(deslocamento)
+    return query, tuple(params)
+
+
+def montar_consulta_usuarios(termo=None, tipo=None, limite=50, deslocamento=0):
+    """
+    Monta a consulta paginada da tela "Usuários".
+
+    Args:
+        termo (str, opcional): Trecho procurado no nome ou no e-mail (sem diferenciar maiúsculas).
+        tipo (str, opcional): Filtra pelo tipo de usuário.
+        limite (int, opcional): Número máximo de linhas. Default: 50.
+        deslocamento (int, opcional): Linhas a pular (paginação). Default: 0.
+    Returns:
+        tuple: (query, params) prontos para cursor.execute.
+    """
+    query = "SELECT u.id, u.nome, u.email, u.tipo, u.status FROM usuarios u"
+    filtros = []
+    params = []
+    if termo:
+        padrao = "%" + termo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        filtros.append("(u.nome ILIKE %s OR u.email ILIKE %s)")
+        params.extend([padrao, padrao])
+    if tipo:
+        filtros.append("u.tipo = %s")
+        params.append(tipo)
+    if filtros:
+        query += " WHERE " + " AND ".join(filtros)
+    query += " ORDER BY u.nome, u.id LIMIT %s"
+    params.append(limite)
+    if deslocamento:
+        query += " OFFSET %s"
+        params.append(deslocamento)
+    return query, tuple(params)
+
+
+# Seletores com busca: entidade -> (consulta, filtro fixo). O id retornado é o usado pelos filtros da tela
+CONSULTAS_SELETOR = {
+    "usuarios": ("SELECT u.id, u.nome, u.email FROM usuarios u", None),
+    "profissionais": ("SELECT u.id, u.nome, u.email FROM usuarios u", "u.tipo IN ('Profissional', 'Profissional de Saúde')"),
+    # Responsável por novos pacientes (importação): só profissionais ativos
+    "profissionais_ativos": ("SELECT u.id, u.nome, u.email FROM usuarios u", "u.tipo IN ('Profissional', 'Profissional de Saúde') AND u.status IS NOT FALSE"),
+    "pacientes": ("SELECT p.id, u.nome, u.email FROM pacientes p JOIN usuarios u ON p.id_usuario = u.id", None),
+}
+# Abaixo disso o índice de trigramas não ajuda: termos curtos buscam só pelo início do nome
+TAMANHO_MINIMO_TRIGRAMA = 3
+
+
+def montar_consulta_seletor(entidade, termo, limite=10):
+    """
+    Monta a busca de um seletor: as `limite` melhores correspondências do termo digitado.
+
+    Termos com 3 ou mais caracteres procuram o trecho no nome ou no e-mail (índices de
+    trigramas) e ordenam primeiro quem começa com o termo, depois pela similaridade.
+    Termos menores procuram apenas nomes que começam com o termo (índice de prefixo).
+
+    Args:
+        entidade (str): Chave de CONSULTAS_SELETOR ("usuarios", "profissionais", "profissionais_ativos" ou "pacientes").
+        termo (str): Texto digitado (não vazio).
+        limite (int, opcional): Número máximo de linhas. Default: 10.
+    Returns:
+        tuple: (query, params) prontos para cursor.execute.
+    Raises:
+        ValueError: Se o termo estiver vazio.
+    """
+    query, filtro_fixo = CONSULTAS_SELETOR[entidade]
+    termo = (termo or "").strip()
+    if not termo:
+        raise ValueError("O seletor só consulta o banco com um termo digitado.")
+    escapado = termo.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    filtros = [filtro_fixo] if filtro_fixo else []
+    if len(termo) >= TAMANHO_MINIMO_TRIGRAMA:
+        filtros.append("(u.nome ILIKE %s OR u.email ILIKE %s)")
+        ordem = "(lower(u.nome) LIKE %s) DESC, similarity(u.nome, %s) DESC, u.nome, u.id"
+        params = ["%" + escapado + "%", "%" + escapado + "%", escapado + "%", termo]
+    else:
+        filtros.append("lower(u.nome) LIKE %s")
+        ordem = "u.nome, u.id"
+        params = [escapado + "%"]
+    query += " WHERE " + " AND ".join(filtros) + f" ORDER BY {ordem} LIMIT %s"
+    params.append(limite)
+    return query, tuple(params)
+
+
+# Painel ao vivo: tabela -> (consulta, filtro pelo dono, coluna de ordenação, coluna de id)
+CONSULTAS_AO_VIVO = {
+    "alertas": (
+        "SELECT a.id, u.nome, a.tipo_alerta, a.descricao, a.status, a.data_hora FROM alertas a JOIN pacientes p ON a.paciente_id = p.id JOIN usuarios u ON p.id_usuario = u.id",
+        "p.id_profissional_responsavel = %s", "a.data_hora", "a.id",
+    ),
+    "sinais_vitais": (
+        "SELECT s.id, u.nome, s.temperatura, s.pressao, s.frequencia_cardiaca, s.saturacao, s.data_registro FROM sinais_vitais s JOIN pacientes p ON s.paciente_id = p.id JOIN usuarios u ON p.id_usuario = u.id",
+        "p.id_profissional_responsavel = %s", "s.data_registro", "s.id",
+    ),
+    "mensagens": (
+        "SELECT m.id, u.nome, m.texto, m.data_envio FROM mensagens m JOIN usuarios u ON m.id_remetente = u.id",
+        "m.id_destinatario = %s", "m.data_envio", "m.id",
+    ),
+}
+
+
+def montar_consulta_ao_vivo(tabela, dono_id=None, ids=None, limite=10):
+    """
+    Monta a consulta de um quadro do painel ao vivo: carga inicial ou apenas as linhas alteradas.
+
+    Args:
+        tabela (str): "alertas", "sinais_vitais" ou "mensagens".
+        dono_id (int, opcional): Profissional responsável (alertas/sinais) ou destinatário (mensagens).
+        ids (iterable, opcional): Busca somente estes ids (linhas notificadas).
+        limite (int, opcional): Número máximo de linhas. Default: 10.
+    Returns:
+        tuple: (query, params) prontos para cursor.execute.
+    """
+    query, filtro_dono, ordem, coluna_id = CONSULTAS_AO_VIVO[tabela]
+    filtros = []
+    params = []
+    if dono_id:
+        filtros.append(filtro_dono)
+        params.append(dono_id)
+    if ids is not None:
+        filtros.append(f"{coluna_id} = ANY(%s)")
+        params.append(list(ids))
+    if filtros:
+        query += " WHERE " + " AND ".join(filtros)
+    query += f" ORDER BY {ordem} DESC LIMIT %s"
+    params.append(limite)
+    return query, tuple(params)
+
+
+def buscar_contagens_dashboard(cursor):
+    """
+    Executa as contagens exibidas nos cards do dashboard.
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+    Returns:
+        dict: Nome do indicador -> valor.
+    """
+    contagens = {}
+    for nome, sql in SQL_DASHBOARD_CONTAGENS.items():
+        cursor.execute(sql)
+        contagens[nome] = cursor.fetchone()[0]
+    return contagens
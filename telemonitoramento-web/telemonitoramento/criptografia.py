@@ -0,0 +1,298 @@
+"""
+Chaves de criptografia dos dados médicos e rotação sem parada.
+
+FERNET_KEY é a chave atual, usada em todas as novas gravações. FERNET_KEYS_ANTIGAS
+(separadas por vírgula) continuam aceitas na leitura: com MultiFernet, dados gravados
+com qualquer chave configurada são descriptografados normalmente.
+
+Para rotacionar: gere uma nova chave, mova a atual para FERNET_KEYS_ANTIGAS, configure a
+nova em FERNET_KEY, reinicie o app e execute a recriptografia (scripts/rotacionar_chaves.py).
+Ela percorre pacientes.dados_medicos em lotes ordenados por id, confirma cada lote junto
+com o ponto de retomada e respeita um limite de linhas por segundo. Cada lote toca apenas
+as próprias linhas, sem bloquear a tabela. Quando terminar, a chave antiga pode ser removida.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from collections import namedtuple
+
+import psycopg2
+from cryptography.fernet import Fernet, MultiFernet, InvalidToken
+from psycopg2.extras import execute_values
+
+logger = logging.getLogger("telemonitoramento.criptografia")
+
+TAMANHO_LOTE = 500
+# Espera máxima por locks de linhas em uso pelo app; o lote é repetido depois
+LOCK_TIMEOUT_MS = 2000
+TENTATIVAS_LOTE = 5
+
+SQL_LOTE_PACIENTES = """
+    SELECT id, dados_medicos FROM pacientes
+    WHERE id > %s AND dados_medicos IS NOT NULL
+    ORDER BY id LIMIT %s
+"""
+SQL_RESTANTES = "SELECT COUNT(*) FROM pacientes WHERE id > %s AND dados_medicos IS NOT NULL"
+# Só grava se o valor não mudou desde a leitura: uma gravação do app no meio do lote prevalece
+SQL_ATUALIZAR_LOTE = """
+    UPDATE pacientes p SET dados_medicos = v.novo
+    FROM (VALUES %s) AS v(id, antigo, novo)
+    WHERE p.id = v.id AND p.dados_medicos = v.antigo
+"""
+
+Progresso = namedtuple("Progresso", "ultimo_id processados recriptografados falhas restantes linhas_por_segundo")
+
+
+def chaves_configuradas():
+    """
+    Lê as chaves do ambiente, da atual para a mais antiga.
+
+    Returns:
+        list: Chaves (str), começando por FERNET_KEY.
+    Raises:
+        RuntimeError: Se FERNET_KEY não estiver configurada.
+    """
+    atual = (os.getenv("FERNET_KEY") or "").strip()
+    if not atual:
+        raise RuntimeError(
+            "FERNET_KEY não configurada. Sem ela os dados médicos gravados não podem ser lidos; "
+            "configure a chave usada até aqui (ou gere uma com scripts/rotacionar_chaves.py gerar)."
+        )
+    antigas = [c.strip() for c in os.getenv("FERNET_KEYS_ANTIGAS", "").split(",") if c.strip()]
+    return [atual] + [c for c in antigas if c != atual]
+
+
+def criar_fernet(chaves):
+    """
+    Cria o MultiFernet das chaves informadas (a primeira cifra; todas decifram).
+
+    Args:
+        chaves (list): Chaves, da atual para a mais antiga.
+    Returns:
+        MultiFernet: Objeto de criptografia.
+    """
+    return MultiFernet([Fernet(c.encode() if isinstance(c, str) else c) for c in chaves])
+
+
+def digital_chave(chave):
+    """Identificador curto e não reversível de uma chave (para logs e ponto de retomada)."""
+    return hashlib.sha256(chave.encode()).hexdigest()[:16]
+
+
+def criptografar_json(fernet, dados):
+    """Criptografa um dicionário como JSON (None se vazio)."""
+    if not dados:
+        return None
+    return fernet.encrypt(json.dumps(dados).encode()).decode()
+
+
+def descriptografar_json(fernet, dados_cript):
+    """Descriptografa um JSON criptografado (None se vazio)."""
+    if not dados_cript:
+        return None
+    return json.loads(fernet.decrypt(dados_cript.encode()).decode())
+
+
+def criar_estrutura(cursor):
+    """
+    Cria a tabela com o ponto de retomada das recriptografias.
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS rotacao_chaves (
+            chave_digital VARCHAR(16) PRIMARY KEY,
+            ultimo_id INTEGER NOT NULL DEFAULT 0,
+            processados BIGINT NOT NULL DEFAULT 0,
+            recriptografados BIGINT NOT NULL DEFAULT 0,
+            falhas BIGINT NOT NULL DEFAULT 0,
+            iniciado_em TIMESTAMP NOT NULL DEFAULT NOW(),
+            atualizado_em TIMESTAMP NOT NULL DEFAULT NOW(),
+            concluido_em TIMESTAMP
+        )
+    """)
+
+
+def ler_retomada(cursor, chave_digital):
+    """
+    Retorna o ponto de retomada da recriptografia para a chave atual.
+
+    Returns:
+        tuple or None: (ultimo_id, processados, recriptografados, falhas, concluido_em).
+    """
+    cursor.execute(
+        "SELECT ultimo_id, processados, recriptografados, falhas, concluido_em FROM rotacao_chaves WHERE chave_digital = %s",
+        (chave_digital,),
+    )
+    return cursor.fetchone()
+
+
+def recriptografar_linhas(fernet, chave_atual, linhas):
+    """
+    Recriptografa com a chave atual os valores que ainda usam uma chave antiga.
+
+    Args:
+        fernet (MultiFernet): Todas as chaves configuradas.
+        chave_atual (Fernet): A chave atual isolada.
+        linhas (list): (id, dados_medicos) lidos do banco.
+    Returns:
+        tuple: (lista de (id, antigo, novo) a gravar, lista de ids que nenhuma chave decifra).
+    """
+    alteracoes, falhas = [], []
+    for id_, token in linhas:
+        try:
+            chave_atual.decrypt(token.encode())
+            continue
+        except InvalidToken:
+            pass
+        try:
+            alteracoes.append((id_, token, fernet.rotate(token.encode()).decode()))
+        except InvalidToken:
+            falhas.append(id_)
+    return alteracoes, falhas
+
+
+class Limitador:
+    """
+    Limita o ritmo a `taxa` itens por segundo, em média desde o início.
+
+    Args:
+        taxa (float): Itens por segundo (None ou 0 = sem limite).
+        relogio, dormir: Funções de tempo (substituíveis em testes).
+    """
+
+    def __init__(self, taxa, relogio=time.monotonic, dormir=time.sleep):
+        self.taxa = taxa
+        self.relogio = relogio
+        self.dormir = dormir
+        self.inicio = relogio()
+        self.total = 0
+
+    def registrar(self, quantidade):
+        """Contabiliza itens processados e dorme o necessário para manter a taxa."""
+        self.total += quantidade
+        if self.taxa:
+            atraso = self.inicio + self.total / self.taxa - self.relogio()
+            if atraso > 0:
+                self.dormir(atraso)
+
+    def taxa_observada(self):
+        decorrido = self.relogio() - self.inicio
+        return self.total / decorrido if decorrido > 0 else 0.0
+
+
+def recriptografar(conn, chaves, tamanho_lote=TAMANHO_LOTE, linhas_por_segundo=None, reiniciar=False,
+                   progresso=None, limitador=None):
+    """
+    Recriptografa pacientes.dados_medicos com a chave atual, em lotes retomáveis.
+
+    Cada lote (ordenado por id, a partir do último id confirmado) é gravado e confirmado na
+    mesma transação que o ponto de retomada: interromper o job a qualquer momento não perde
+    trabalho nem repete lotes. Valores já cifrados com a chave atual não são regravados.
+
+    Args:
+        conn: Conexão psycopg2 dedicada ao job.
+        chaves (list): Chaves configuradas, da atual para a mais antiga.
+        tamanho_lote (int, opcional): Linhas por lote. Default: 500.
+        linhas_por_segundo (float, opcional): Limite de linhas lidas por segundo.
+        reiniciar (bool, opcional): Ignora o ponto de retomada e recomeça do primeiro paciente.
+        progresso (callable, opcional): Chamado após cada lote com um Progresso.
+        limitador (Limitador, opcional): Substitui o limitador criado a partir de linhas_por_segundo.
+    Returns:
+        Progresso: Situação ao final.
+    """
+    fernet = criar_fernet(chaves)
+    chave_atual = Fernet(chaves[0].encode())
+    digital = digital_chave(chaves[0])
+    limitador = limitador or Limitador(linhas_por_segundo)
+    cursor = conn.cursor()
+    criar_estrutura(cursor)
+    if reiniciar:
+        cursor.execute("DELETE FROM rotacao_chaves WHERE chave_digital = %s", (digital,))
+    cursor.execute("INSERT INTO rotacao_chaves (chave_digital) VALUES (%s) ON CONFLICT DO NOTHING", (digital,))
+    ultimo_id, processados, recriptografados, falhas, _ = ler_retomada(cursor, digital)
+    cursor.execute(SQL_RESTANTES, (ultimo_id,))
+    restantes = cursor.fetchone()[0]
+    cursor.execute(f"SET lock_timeout = {int(LOCK_TIMEOUT_MS)}")
+    conn.commit()
+    logger.info("Recriptografia com a chave %s a partir do id %s (%s linhas restantes)", digital, ultimo_id, restantes)
+
+    while True:
+        for tentativa in range(1, TENTATIVAS_LOTE + 1):
+            try:
+                cursor.execute(SQL_LOTE_PACIENTES, (ultimo_id, tamanho_lote))
+                linhas = cursor.fetchall()
+                if not linhas:
+                    break
+                alteracoes, ids_falhos = recriptografar_linhas(fernet, chave_atual, linhas)
+                gravadas = 0
+                if alteracoes:
+                    execute_values(cursor, SQL_ATUALIZAR_LOTE, alteracoes, page_size=len(alteracoes))
+                    gravadas = cursor.rowcount
+                for id_ in ids_falhos:
+                    logger.error("dados_medicos do paciente %s não pode ser decifrado com nenhuma chave configurada", id_)
+                novo_ultimo = linhas[-1][0]
+                cursor.execute("""
+                    UPDATE rotacao_chaves SET ultimo_id = %s, processados = processados + %s,
+                        recriptografados = recriptografados + %s, falhas = falhas + %s, atualizado_em = NOW()
+                    WHERE chave_digital = %s
+                """, (novo_ultimo, len(linhas), gravadas, len(ids_falhos), digital))
+                conn.commit()
+                break
+            except psycopg2.errors.LockNotAvailable:
+                conn.rollback()
+                logger.warning("Lote após o id %s em uso pelo app; nova tentativa (%d/%d)", ultimo_id, tentativa, TENTATIVAS_LOTE)
+                time.sleep(tentativa)
+        else:
+            raise RuntimeError(f"Lote após o id {ultimo_id} continuou bloqueado após {TENTATIVAS_LOTE} tentativas")
+        if not linhas:
+            break
+        ultimo_id = novo_ultimo
+        processados += len(linhas)
+        recriptografados += gravadas
+        falhas += len(ids_falhos)
+        restantes = max(restantes - len(linhas), 0)
+        limitador.registrar(len(linhas))
+        if progresso:
+            progresso(Progresso(ultimo_id, processados, recriptografados, falhas, restantes, limitador.taxa_observada()))
+
+    cursor.execute("UPDATE rotacao_chaves SET concluido_em = NOW() WHERE chave_digital = %s", (digital,))
+    conn.commit()
+    return Progresso(ultimo_id, processados, recriptografados, falhas, 0, limitador.taxa_observada())
+
+
+def contar_por_chave(conn, chaves, tamanho_lote=5000):
+    """
+    Conta quantos dados_medicos estão cifrados com cada chave configurada.
+
+    Útil para confirmar, antes de remover uma chave antiga, que nada depende mais dela.
+
+    Args:
+        conn: Conexão psycopg2.
+        chaves (list): Chaves configuradas, da atual para a mais antiga.
+        tamanho_lote (int, opcional): Linhas lidas por vez (cursor nomeado).
+    Returns:
+        dict: Digital da chave (ou "nenhuma") -> quantidade.
+    """
+    fernets = [(digital_chave(c), Fernet(c.encode())) for c in chaves]
+    contagem = {digital: 0 for digital, _ in fernets}
+    contagem["nenhuma"] = 0
+    with conn.cursor(name="contar_por_chave") as cursor:
+        cursor.itersize = tamanho_lote
+        cursor.execute("SELECT dados_medicos FROM pacientes WHERE dados_medicos IS NOT NULL")
+        for (token,) in cursor:
+            for digital, f in fernets:
+                try:
+                    f.decrypt(token.encode())
+                except InvalidToken:
+                    continue
+                contagem[digital] += 1
+                break
+            else:
+                contagem["nenhuma"] += 1
+    conn.rollback()
+    return contagem
@@ -0,0 +1,222 @@
+"""
+Escore de alerta precoce (inspirado no NEWS2) e fila de prioridades dos profissionais.
+
+Cada leitura recebe pontos por temperatura, frequência cardíaca, saturação e pressão
+sistólica, conforme as faixas do NEWS2 (sem frequência respiratória, nível de consciência
+e oxigênio suplementar, que o sistema não registra). O escore é uma coluna gerada de
+sinais_vitais: o próprio PostgreSQL o calcula na gravação, para qualquer origem (app,
+COPY, cargas sintéticas), a partir das mesmas FAIXAS usadas aqui em Python.
+
+A tabela fila_prioridade guarda, por paciente, o profissional responsável, a última leitura
+e o seu escore. Triggers a mantêm a cada leitura inserida e a cada troca de profissional,
+e o índice (profissional, escore, última leitura) serve a fila de cada profissional com
+uma única consulta: mais graves primeiro e, no empate, quem está há mais tempo sem leitura.
+"""
+
+import re
+
+from alertas import PRESSAO_PATTERN
+from consultas import SQL_FILA_PRIORIDADE
+
+# (limite superior inclusivo, pontos); a última faixa vale acima do penúltimo limite
+FAIXAS = {
+    "temperatura": ((35.0, 3), (36.0, 1), (38.0, 0), (39.0, 1), (None, 2)),
+    "frequencia": ((40, 3), (50, 1), (90, 0), (110, 1), (130, 2), (None, 3)),
+    "saturacao": ((91, 3), (93, 2), (95, 1), (None, 0)),
+    "sistolica": ((90, 3), (100, 2), (110, 1), (219, 0), (None, 3)),
+}
+# Expressão SQL de cada sinal, na ordem de FAIXAS
+COLUNAS_SQL = {
+    "temperatura": "temperatura",
+    "frequencia": "frequencia_cardiaca",
+    "saturacao": "saturacao",
+    "sistolica": r"CASE WHEN pressao ~ '^\d{2,3}/\d{2,3}$' THEN split_part(pressao, '/', 1)::int END",
+}
+NIVEIS = ("Baixo", "Baixo-médio", "Médio", "Alto")
+# Níveis que pedem avaliação urgente (notificação crítica por e-mail)
+NIVEIS_CRITICOS = ("Médio", "Alto")
+
+
+def pontuar(sinal, valor):
+    """
+    Pontos de um sinal vital segundo FAIXAS.
+
+    Args:
+        sinal (str): Chave de FAIXAS.
+        valor (float): Valor medido (None não pontua).
+    Returns:
+        int: Pontos (0 a 3).
+    """
+    if valor is None:
+        return 0
+    for limite, pontos in FAIXAS[sinal]:
+        if limite is None or valor <= limite:
+            return pontos
+
+
+def calcular_escore(temperatura, pressao, frequencia, saturacao):
+    """
+    Calcula o escore de uma leitura.
+
+    Args:
+        temperatura (float): Temperatura corporal.
+        pressao (str): Pressão arterial no formato 120/80 (fora do formato não pontua).
+        frequencia (int): Frequência cardíaca.
+        saturacao (int): Saturação de oxigênio.
+    Returns:
+        tuple: (escore total, dict com os pontos de cada sinal).
+    """
+    sistolica = int(pressao.split("/")[0]) if pressao and re.match(PRESSAO_PATTERN, pressao) else None
+    valores = {"temperatura": temperatura, "frequencia": frequencia, "saturacao": saturacao, "sistolica": sistolica}
+    pontos = {sinal: pontuar(sinal, valor) for sinal, valor in valores.items()}
+    return sum(pontos.values()), pontos
+
+
+def classificar(escore, pontos):
+    """
+    Nível de risco do NEWS2: alto a partir de 7, médio de 5 a 6, baixo-médio quando um único
+    sinal soma 3 pontos, baixo nos demais casos.
+
+    Args:
+        escore (int): Escore total.
+        pontos (dict): Pontos de cada sinal (calcular_escore).
+    Returns:
+        str: Um dos NIVEIS.
+    """
+    if escore >= 7:
+        return "Alto"
+    if escore >= 5:
+        return "Médio"
+    if max(pontos.values(), default=0) >= 3:
+        return "Baixo-médio"
+    return "Baixo"
+
+
+def expressao_sql():
+    """
+    Expressão SQL do escore a partir das colunas de sinais_vitais (gerada de FAIXAS).
+
+    Returns:
+        str: Soma dos CASE de cada sinal.
+    """
+    casos = []
+    for sinal, faixas in FAIXAS.items():
+        coluna = COLUNAS_SQL[sinal]
+        if not coluna.isidentifier():
+            coluna = f"({coluna})"
+        ramos = " ".join(f"WHEN {coluna} <= {limite} THEN {pontos}" for limite, pontos in faixas[:-1])
+        casos.append(f"(CASE WHEN {coluna} IS NULL THEN 0 {ramos} ELSE {faixas[-1][1]} END)")
+    return " + ".join(casos)
+
+
+def criar_estrutura(cursor):
+    """
+    Cria a coluna gerada do escore, a fila de prioridades, seus triggers e índice, e preenche
+    a fila com a última leitura de cada paciente.
+
+    Adicionar a coluna gerada reescreve sinais_vitais uma única vez (bloqueando a tabela
+    durante a reescrita); as execuções seguintes não alteram nada.
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+    """
+    cursor.execute(f"""
+        ALTER TABLE sinais_vitais ADD COLUMN IF NOT EXISTS escore SMALLINT
+        GENERATED ALWAYS AS ({expressao_sql()}) STORED
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS fila_prioridade (
+            paciente_id INTEGER PRIMARY KEY REFERENCES pacientes(id) ON DELETE CASCADE,
+            profissional_id INTEGER NOT NULL,
+            sinal_id INTEGER,
+            escore SMALLINT,
+            ultima_leitura TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_fila_prioridade_profissional
+        ON fila_prioridade (profissional_id, escore DESC NULLS LAST, ultima_leitura ASC NULLS FIRST, paciente_id)
+    """)
+    # Leituras novas: só a mais recente de cada paciente, e só se for mais nova que a da fila
+    cursor.execute("""
+        CREATE OR REPLACE FUNCTION atualizar_fila_leituras() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO fila_prioridade (paciente_id, profissional_id, sinal_id, escore, ultima_leitura)
+            SELECT DISTINCT ON (n.paciente_id) n.paciente_id, p.id_profissional_responsavel, n.id, n.escore, n.data_registro
+            FROM novas n JOIN pacientes p ON p.id = n.paciente_id
+            ORDER BY n.paciente_id, n.data_registro DESC, n.id DESC
+            ON CONFLICT (paciente_id) DO UPDATE
+            SET sinal_id = EXCLUDED.sinal_id, escore = EXCLUDED.escore, ultima_leitura = EXCLUDED.ultima_leitura
+            WHERE fila_prioridade.ultima_leitura IS NULL OR EXCLUDED.ultima_leitura >= fila_prioridade.ultima_leitura;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    cursor.execute("""
+        CREATE OR REPLACE FUNCTION atualizar_fila_pacientes() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO fila_prioridade (paciente_id, profissional_id)
+                SELECT id, id_profissional_responsavel FROM novas
+                ON CONFLICT (paciente_id) DO NOTHING;
+            ELSE
+                UPDATE fila_prioridade SET profissional_id = NEW.id_profissional_responsavel
+                WHERE paciente_id = NEW.id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    cursor.execute("DROP TRIGGER IF EXISTS trg_fila_prioridade_leituras ON sinais_vitais")
+    cursor.execute("""
+        CREATE TRIGGER trg_fila_prioridade_leituras AFTER INSERT ON sinais_vitais
+        REFERENCING NEW TABLE AS novas FOR EACH STATEMENT
+        EXECUTE FUNCTION atualizar_fila_leituras()
+    """)
+    cursor.execute("DROP TRIGGER IF EXISTS trg_fila_prioridade_pacientes ON pacientes")
+    cursor.execute("""
+        CREATE TRIGGER trg_fila_prioridade_pacientes AFTER INSERT ON pacientes
+        REFERENCING NEW TABLE AS novas FOR EACH STATEMENT
+        EXECUTE FUNCTION atualizar_fila_pacientes()
+    """)
+    # Triggers com lista de colunas não aceitam tabela de transição: a troca de profissional é por linha
+    cursor.execute("DROP TRIGGER IF EXISTS trg_fila_prioridade_profissional ON pacientes")
+    cursor.execute("""
+        CREATE TRIGGER trg_fila_prioridade_profissional AFTER UPDATE OF id_profissional_responsavel ON pacientes
+        FOR EACH ROW WHEN (OLD.id_profissional_responsavel IS DISTINCT FROM NEW.id_profissional_responsavel)
+        EXECUTE FUNCTION atualizar_fila_pacientes()
+    """)
+    # Pacientes que ainda não estão na fila (primeira execução ou cadastrados antes dos triggers)
+    cursor.execute("""
+        INSERT INTO fila_prioridade (paciente_id, profissional_id, sinal_id, escore, ultima_leitura)
+        SELECT p.id, p.id_profissional_responsavel, s.id, s.escore, s.data_registro
+        FROM pacientes p
+        LEFT JOIN LATERAL (
+            SELECT id, escore, data_registro FROM sinais_vitais
+            WHERE paciente_id = p.id ORDER BY data_registro DESC, id DESC LIMIT 1
+        ) s ON TRUE
+        WHERE NOT EXISTS (SELECT 1 FROM fila_prioridade f WHERE f.paciente_id = p.id)
+    """)
+
+
+def listar_fila(cursor, profissional_id, limite, deslocamento=0):
+    """
+    Página da fila de prioridades de um profissional (mais graves e mais antigos primeiro).
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+        profissional_id (int): ID do usuário profissional responsável.
+        limite (int): Número máximo de linhas.
+        deslocamento (int, opcional): Linhas a pular. Default: 0.
+    Returns:
+        list: Tuplas (paciente_id, nome, escore, ultima_leitura, temperatura, pressao,
+        frequencia_cardiaca, saturacao, nivel); sem leitura, escore e nivel são None.
+    """
+    cursor.execute(SQL_FILA_PRIORIDADE, (profissional_id, limite, deslocamento))
+    fila = []
+    for paciente_id, nome, escore, ultima, temperatura, pressao, frequencia, saturacao in cursor.fetchall():
+        nivel = None
+        if escore is not None and ultima is not None:
+            nivel = classificar(escore, calcular_escore(temperatura, pressao, frequencia, saturacao)[1])
+        fila.append((paciente_id, nome, escore, ultima, temperatura, pressao, frequencia, saturacao, nivel))
+    return fila
@@ -0,0 +1,348 @@
+"""
+Exportação colunar (Parquet) de sinais_vitais, alertas, auditoria e pacientes para análise.
+
+Cada tabela é lida por cursor no servidor, em lotes de TAMANHO_LOTE, convertida em record
+batches do Arrow e gravada em Parquet (zstd) particionado por mês no estilo Hive
+(<destino>/<tabela>/ano=AAAA/mes=MM/parte-<último id já exportado>-<n>.parquet), legível
+por pyarrow.dataset, pandas e DuckDB. A memória fica limitada a um lote: as linhas vêm ordenadas por data e
+só um arquivo fica aberto por vez. pacientes, sem data, vira um único arquivo por
+exportação (retrato completo).
+
+As exportações são incrementais: o estado (_exportacao.json no destino) guarda, por
+tabela, o id até o qual já se exportou e os filtros usados; a próxima execução exporta só
+os ids acima dele. Como os ids saem da sequência antes do commit, uma transação com id
+menor pode confirmar depois de outra com id maior; por isso cada execução só exporta até
+o último id da sequência depois de esperar as transações que ainda escrevem na tabela
+(limite_estavel). Garantia: toda linha confirmada é exportada exatamente uma vez, por uma
+única execução — a primeira que começa depois do seu commit. Os arquivos são gravados com nome temporário e renomeados, e o estado atualizado,
+só ao final, então uma exportação interrompida não deixa partes duplicadas. Alertas têm o
+status do momento da exportação (mudanças de status posteriores não são reexportadas).
+
+dados_medicos (pacientes) é omitido por padrão; com um fernet, é descriptografado nas
+colunas idade e diagnostico (dados que não decifram ficam nulos e são contados).
+"""
+
+import os
+import json
+import glob
+import time
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from cryptography.fernet import InvalidToken
+
+from criptografia import descriptografar_json
+
+TAMANHO_LOTE = 50000
+ARQUIVO_ESTADO = "_exportacao.json"
+ESPERA_ESCRITORES_S = 60
+INTERVALO_ESPERA_S = 0.5
+
+SQL_ULTIMO_ID_SEQUENCIA = "SELECT pg_sequence_last_value(pg_get_serial_sequence(%s, 'id')::regclass)"
+# Transações que escrevem na tabela: o INSERT toma o RowExclusiveLock antes de tirar o id da sequência
+SQL_ESCRITORES = """
+    SELECT DISTINCT virtualtransaction FROM pg_locks
+    WHERE locktype = 'relation' AND relation = %s::regclass AND mode = 'RowExclusiveLock'
+      AND pid <> pg_backend_pid()
+"""
+
+TABELAS = {
+    "sinais_vitais": {
+        "sql": """
+            SELECT s.id, s.paciente_id, p.id_profissional_responsavel AS profissional_id, s.data_registro,
+                   s.temperatura, s.pressao, s.frequencia_cardiaca, s.saturacao, s.escore
+            FROM sinais_vitais s JOIN pacientes p ON p.id = s.paciente_id
+        """,
+        "esquema": pa.schema([
+            ("id", pa.int64()), ("paciente_id", pa.int64()), ("profissional_id", pa.int64()),
+            ("data_registro", pa.timestamp("us")), ("temperatura", pa.float64()), ("pressao", pa.string()),
+            ("frequencia_cardiaca", pa.int32()), ("saturacao", pa.int32()), ("escore", pa.int16()),
+        ]),
+        "id": "s.id", "data": "s.data_registro", "paciente": "s.paciente_id", "profissional": "p.id_profissional_responsavel",
+    },
+    "alertas": {
+        "sql": """
+            SELECT a.id, a.paciente_id, p.id_profissional_responsavel AS profissional_id, a.tipo_alerta,
+                   a.descricao, a.status, a.data_hora
+            FROM alertas a JOIN pacientes p ON p.id = a.paciente_id
+        """,
+        "esquema": pa.schema([
+            ("id", pa.int64()), ("paciente_id", pa.int64()), ("profissional_id", pa.int64()), ("tipo_alerta", pa.string()),
+            ("descricao", pa.string()), ("status", pa.string()), ("data_hora", pa.timestamp("us")),
+        ]),
+        "id": "a.id", "data": "a.data_hora", "paciente": "a.paciente_id", "profissional": "p.id_profissional_responsavel",
+    },
+    "auditoria": {
+        "sql": "SELECT a.id, a.usuario_id, a.acao, a.detalhes, a.data_hora FROM auditoria a",
+        "esquema": pa.schema([
+            ("id", pa.int64()), ("usuario_id", pa.int64()), ("acao", pa.string()),
+            ("detalhes", pa.string()), ("data_hora", pa.timestamp("us")),
+        ]),
+        # Filtro por profissional: as ações do próprio usuário profissional
+        "id": "a.id", "data": "a.data_hora", "paciente": None, "profissional": "a.usuario_id",
+    },
+    "pacientes": {
+        "sql": """
+            SELECT p.id, p.id_usuario, u.nome, p.id_profissional_responsavel AS profissional_id,
+                   pr.nome AS profissional, p.faixa_etaria, p.dados_medicos
+            FROM pacientes p JOIN usuarios u ON u.id = p.id_usuario
+            LEFT JOIN usuarios pr ON pr.id = p.id_profissional_responsavel
+        """,
+        "esquema": pa.schema([
+            ("id", pa.int64()), ("id_usuario", pa.int64()), ("nome", pa.string()),
+            ("profissional_id", pa.int64()), ("profissional", pa.string()), ("faixa_etaria", pa.int16()),
+        ]),
+        "id": "p.id", "data": None, "paciente": "p.id", "profissional": "p.id_profissional_responsavel",
+    },
+}
+COLUNAS_DADOS_MEDICOS = [("idade", pa.int32()), ("diagnostico", pa.string())]
+
+
+def diretorio_exportacao():
+    return os.getenv("EXPORTACAO_DIR") or os.path.join(os.getcwd(), "exportacao")
+
+
+def ler_estado(destino):
+    """Estado das exportações anteriores no destino (vazio na primeira)."""
+    caminho = os.path.join(destino, ARQUIVO_ESTADO)
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def gravar_estado(destino, estado):
+    caminho = os.path.join(destino, ARQUIVO_ESTADO)
+    with open(caminho + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(estado, f, indent=2, ensure_ascii=False)
+    os.replace(caminho + ".tmp", caminho)
+
+
+def montar_consulta(tabela, data_inicio=None, data_fim=None, profissional_id=None, paciente_id=None, desde_id=None,
+                    ate_id=None):
+    """
+    SELECT de uma tabela com os filtros informados, em ordem de data (e id).
+
+    Filtros que a tabela não tem (paciente em auditoria, datas em pacientes) são ignorados.
+
+    Returns:
+        tuple: (sql, parâmetros).
+    """
+    spec = TABELAS[tabela]
+    condicoes, params = [], []
+    filtros = (
+        (spec["data"], ">=", data_inicio), (spec["data"], "<", data_fim),
+        (spec["profissional"], "=", profissional_id), (spec["paciente"], "=", paciente_id),
+        (spec["id"], ">", desde_id), (spec["id"], "<=", ate_id),
+    )
+    for coluna, operador, valor in filtros:
+        if coluna and valor is not None:
+            condicoes.append(f"{coluna} {operador} %s")
+            params.append(valor)
+    sql = spec["sql"].rstrip()
+    if condicoes:
+        sql += "\n            WHERE " + " AND ".join(condicoes)
+    ordem = f"{spec['data']}, {spec['id']}" if spec["data"] else spec["id"]
+    return f"{sql}\n            ORDER BY {ordem}", params
+
+
+def limite_estavel(conn, tabela, espera_maxima=ESPERA_ESCRITORES_S, dormir=time.sleep):
+    """
+    Último id da sequência da tabela, depois de esperar as transações que escreviam nela.
+
+    Toda transação que tirou um id até esse valor já terminou quando a função retorna, então
+    uma consulta feita em seguida vê todas as linhas confirmadas até ele, e nenhuma linha com
+    id menor aparece depois.
+
+    Returns:
+        int: O limite (0 se a sequência nunca foi usada).
+    Raises:
+        RuntimeError: Alguma transação continua escrevendo depois de espera_maxima segundos.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SQL_ULTIMO_ID_SEQUENCIA, (tabela,))
+        limite = cursor.fetchone()[0] or 0
+        cursor.execute(SQL_ESCRITORES, (tabela,))
+        escritores = {linha[0] for linha in cursor.fetchall()}
+        prazo = time.monotonic() + espera_maxima
+        while escritores:
+            if time.monotonic() > prazo:
+                raise RuntimeError(f"Transações ainda escrevendo em {tabela} após {espera_maxima} s; tente novamente.")
+            dormir(INTERVALO_ESPERA_S)
+            cursor.execute(SQL_ESCRITORES, (tabela,))
+            escritores &= {linha[0] for linha in cursor.fetchall()}
+    finally:
+        cursor.close()
+        conn.rollback()
+    return limite
+
+
+def lote_para_arrow(tabela, linhas, fernet=None):
+    """
+    Converte um lote de linhas em RecordBatch; em pacientes, troca dados_medicos pelas colunas
+    descriptografadas (com fernet) ou o omite.
+
+    Returns:
+        tuple: (pyarrow.RecordBatch, dados médicos que não decifraram).
+    """
+    esquema = TABELAS[tabela]["esquema"]
+    colunas = [list(coluna) for coluna in zip(*linhas)]
+    falhas = 0
+    if tabela == "pacientes":
+        cifrados = colunas.pop()
+        if fernet is not None:
+            idades, diagnosticos = [], []
+            for cifrado in cifrados:
+                try:
+                    dados = descriptografar_json(fernet, cifrado) or {}
+                except (InvalidToken, ValueError):
+                    dados = {}
+                    falhas += 1
+                idade = dados.get("idade")
+                idades.append(int(idade) if str(idade).isdigit() else None)
+                diagnosticos.append(dados.get("diagnostico"))
+            colunas += [idades, diagnosticos]
+            esquema = esquema_exportado(tabela, True)
+    arrays = [pa.array(coluna, type=campo.type) for coluna, campo in zip(colunas, esquema)]
+    return pa.RecordBatch.from_arrays(arrays, schema=esquema), falhas
+
+
+def esquema_exportado(tabela, descriptografar=False):
+    """Esquema dos arquivos de uma tabela (pacientes com ou sem os dados médicos)."""
+    esquema = TABELAS[tabela]["esquema"]
+    if tabela == "pacientes" and descriptografar:
+        for nome, tipo in COLUNAS_DADOS_MEDICOS:
+            esquema = esquema.append(pa.field(nome, tipo))
+    return esquema
+
+
+def trechos_por_particao(tabela, lote):
+    """
+    Divide um lote (em ordem de data) em trechos contíguos do mesmo mês.
+
+    Returns:
+        list: (subdiretório estilo Hive, linhas); pacientes, sem data, é um trecho só.
+    """
+    coluna_data = TABELAS[tabela]["data"]
+    if coluna_data is None:
+        return [("", lote)]
+    indice = TABELAS[tabela]["esquema"].get_field_index(coluna_data.split(".")[1])
+    trechos = []
+    for linha in lote:
+        instante = linha[indice]
+        chave = os.path.join(f"ano={instante.year:04d}", f"mes={instante.month:02d}")
+        if trechos and trechos[-1][0] == chave:
+            trechos[-1][1].append(linha)
+        else:
+            trechos.append((chave, [linha]))
+    return trechos
+
+
+class _Escritor:
+    """Um ParquetWriter aberto por vez; troca de arquivo quando a partição muda."""
+
+    def __init__(self, raiz, esquema, rotulo):
+        self.raiz, self.esquema, self.rotulo = raiz, esquema, rotulo
+        self.particao = None
+        self.escritor = None
+        self.temporarios = []
+
+    def escrever(self, particao, lote):
+        if particao != self.particao:
+            self.fechar()
+            diretorio = os.path.join(self.raiz, particao)
+            os.makedirs(diretorio, exist_ok=True)
+            caminho = os.path.join(diretorio, f"parte-{self.rotulo}-{len(self.temporarios):04d}.parquet.tmp")
+            self.escritor = pq.ParquetWriter(caminho, self.esquema, compression="zstd")
+            self.temporarios.append(caminho)
+            self.particao = particao
+        self.escritor.write_batch(lote)
+
+    def fechar(self):
+        if self.escritor is not None:
+            self.escritor.close()
+            self.escritor = None
+
+    def descartar(self):
+        self.fechar()
+        for caminho in self.temporarios:
+            if os.path.exists(caminho):
+                os.remove(caminho)
+
+
+def exportar_tabela(conn, tabela, destino=None, data_inicio=None, data_fim=None, profissional_id=None,
+                    paciente_id=None, completa=False, fernet=None, progresso=None):
+    """
+    Exporta uma tabela para Parquet particionado.
+
+    Args:
+        conn: Conexão psycopg2.
+        tabela (str): Chave de TABELAS.
+        destino (str, opcional): Diretório raiz. Default: EXPORTACAO_DIR.
+        data_inicio, data_fim (date, opcional): Intervalo [inicio, fim) da coluna de data.
+        profissional_id, paciente_id (int, opcional): Filtros.
+        completa (bool, opcional): Reexporta tudo, substituindo as partes anteriores. Default: False
+            (incremental; pacientes é sempre completa).
+        fernet (MultiFernet, opcional): Descriptografa dados_medicos (sem ele, é omitido).
+        progresso (callable, opcional): Chamado com o total de linhas após cada lote.
+    Returns:
+        dict: linhas, arquivos, ultimo_id e falhas (dados médicos que não decifraram).
+    Raises:
+        ValueError: Exportação incremental com filtros diferentes dos da anterior.
+        RuntimeError: Escritas na tabela que não terminam (ver limite_estavel).
+    """
+    destino = destino or diretorio_exportacao()
+    raiz = os.path.join(destino, tabela)
+    os.makedirs(raiz, exist_ok=True)
+    estado = ler_estado(destino)
+    filtros = {"data_inicio": str(data_inicio) if data_inicio else None, "data_fim": str(data_fim) if data_fim else None,
+               "profissional_id": profissional_id, "paciente_id": paciente_id, "dados_medicos": fernet is not None}
+    completa = completa or tabela == "pacientes" or tabela not in estado
+    desde_id = None
+    if not completa:
+        if estado[tabela]["filtros"] != filtros:
+            raise ValueError(f"Filtros de {tabela} diferentes dos da exportação anterior; use uma exportação completa.")
+        desde_id = estado[tabela]["ultimo_id"]
+    anteriores = glob.glob(os.path.join(raiz, "**", "*.parquet"), recursive=True) if completa else []
+
+    # pacientes é sempre um retrato completo e não precisa de limite
+    ultimo_id = limite_estavel(conn, tabela) if tabela != "pacientes" else None
+    sql, params = montar_consulta(tabela, data_inicio, data_fim, profissional_id, paciente_id, desde_id, ultimo_id)
+    escritor = _Escritor(raiz, esquema_exportado(tabela, fernet is not None), desde_id or 0)
+    linhas = falhas = 0
+    cursor_servidor = conn.cursor(name=f"exportar_{tabela}")
+    cursor_servidor.itersize = TAMANHO_LOTE
+    try:
+        cursor_servidor.execute(sql, params)
+        while True:
+            lote = cursor_servidor.fetchmany(TAMANHO_LOTE)
+            if not lote:
+                break
+            for chave, linhas_trecho in trechos_por_particao(tabela, lote):
+                registro, falhas_trecho = lote_para_arrow(tabela, linhas_trecho, fernet)
+                escritor.escrever(chave, registro)
+                falhas += falhas_trecho
+            if tabela == "pacientes":
+                ultimo_id = max(ultimo_id or 0, max(linha[0] for linha in lote))
+            linhas += len(lote)
+            if progresso:
+                progresso(linhas)
+        escritor.fechar()
+    except BaseException:
+        escritor.descartar()
+        raise
+    finally:
+        cursor_servidor.close()
+        conn.rollback()
+
+    novos = [caminho[:-len(".tmp")] for caminho in escritor.temporarios]
+    for temporario, caminho in zip(escritor.temporarios, novos):
+        os.replace(temporario, caminho)
+    for caminho in set(anteriores) - set(novos):
+        os.remove(caminho)
+    estado[tabela] = {"ultimo_id": ultimo_id, "filtros": filtros, "exportado_em": datetime.now().isoformat(timespec="seconds"),
+                      "linhas": linhas, "total": linhas + (0 if completa else estado[tabela].get("total", 0))}
+    gravar_estado(destino, estado)
+    return {"linhas": linhas, "arquivos": len(escritor.temporarios), "ultimo_id": ultimo_id, "falhas": falhas}
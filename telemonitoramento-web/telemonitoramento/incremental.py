@@ -0,0 +1,75 @@
+"""
+Carga incremental ("desde a última visita") das listagens de sinais vitais.
+
+Cada sessão guarda, por página, uma JanelaIncremental com os filtros aplicados, as linhas
+já carregadas (no máximo `limite`) e a marca d'água (data_registro, id) da leitura mais
+recente. Enquanto os filtros não mudam, cada rerun busca apenas as leituras posteriores à
+marca e as acrescenta ao início da janela; mudar um filtro descarta a janela.
+"""
+
+
+class JanelaIncremental:
+    """
+    Janela limitada de linhas ordenadas da mais recente para a mais antiga.
+
+    Args:
+        filtros (tuple): Filtros que geraram a janela.
+        limite (int): Número máximo de linhas mantidas.
+        indice_data (int): Índice da coluna de data nas linhas (o id é sempre a coluna 0).
+    """
+
+    def __init__(self, filtros, limite, indice_data):
+        self.filtros = filtros
+        self.limite = limite
+        self.indice_data = indice_data
+        self.linhas = []
+        self.marca = None
+        self.novas_desde = None
+
+    def chave(self, linha):
+        return (linha[self.indice_data], linha[0])
+
+    def acrescentar(self, novas):
+        """
+        Acrescenta linhas mais recentes que a marca d'água e atualiza a marca.
+
+        Args:
+            novas (list): Linhas buscadas com a marca atual, em qualquer ordem.
+        Returns:
+            int: Quantidade de linhas acrescentadas.
+        """
+        ids = {linha[0] for linha in self.linhas}
+        novas = sorted((linha for linha in novas if linha[0] not in ids), key=self.chave, reverse=True)
+        if novas:
+            self.linhas = (novas + self.linhas)[:self.limite]
+            self.marca = self.chave(self.linhas[0])
+        return len(novas)
+
+    def marcar_visita(self):
+        """Registra o início de uma nova visita: a partir daqui, só o que chegar depois é destacado."""
+        self.novas_desde = self.marca
+
+    def nova(self, linha):
+        """Indica se a linha chegou depois do início da visita atual."""
+        return self.novas_desde is not None and self.chave(linha) > self.novas_desde
+
+
+def obter_janela(estado, chave, filtros, limite, indice_data):
+    """
+    Retorna a janela guardada em `estado` para os filtros dados, criando uma nova se mudaram.
+
+    Args:
+        estado (dict): Armazenamento da sessão (st.session_state).
+        chave (str): Chave da janela no armazenamento.
+        filtros (tuple): Filtros aplicados.
+        limite (int): Número máximo de linhas.
+        indice_data (int): Índice da coluna de data.
+    Returns:
+        tuple: (JanelaIncremental, bool indicando se a janela é nova).
+    """
+    janela = estado.get(chave)
+    if janela is None or janela.filtros != filtros:
+        janela = JanelaIncremental(filtros, limite, indice_data)
+        estado[chave] = janela
+        return janela, True
+    return janela, False
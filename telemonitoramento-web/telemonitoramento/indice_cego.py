@@ -0,0 +1,219 @@
+"""
+Índices cegos dos dados médicos criptografados.
+
+pacientes.dados_medicos é cifrado e não pode ser filtrado pelo banco. Na gravação, cada
+paciente recebe também:
+
+- diagnostico_indice: HMAC-SHA256 (chave CHAVE_INDICE_CEGO) do diagnóstico normalizado
+  (minúsculas, sem acentos, espaços simples), truncado em 128 bits. O banco compara
+  igualdade sem conhecer o diagnóstico.
+- faixa_etaria: início da faixa de 10 anos da idade (0, 10, ..., 120).
+
+Assim "pacientes com diagnóstico X do profissional Y" é uma busca indexada, e apenas as
+linhas encontradas são descriptografadas (o que também descarta colisões do HMAC truncado).
+A busca é por diagnóstico exato, não por trecho. Linhas gravadas antes dos índices são
+preenchidas em lotes por preencher_indices (scripts/preencher_indices.py).
+"""
+
+import os
+import hmac
+import hashlib
+import logging
+import unicodedata
+from collections import namedtuple
+
+from psycopg2.extras import execute_values
+
+from consultas import montar_consulta_pacientes
+from criptografia import descriptografar_json
+
+logger = logging.getLogger("telemonitoramento.indice_cego")
+
+TAMANHO_FAIXA = 10
+IDADE_MAXIMA = 120
+TAMANHO_LOTE = 1000
+FAIXAS = list(range(0, IDADE_MAXIMA + 1, TAMANHO_FAIXA))
+
+COLUNAS_INDICE = [
+    "ALTER TABLE pacientes ADD COLUMN IF NOT EXISTS diagnostico_indice VARCHAR(32)",
+    "ALTER TABLE pacientes ADD COLUMN IF NOT EXISTS faixa_etaria SMALLINT",
+]
+INDICES = [
+    "CREATE INDEX IF NOT EXISTS idx_pacientes_diagnostico_profissional ON pacientes (diagnostico_indice, id_profissional_responsavel)",
+    "CREATE INDEX IF NOT EXISTS idx_pacientes_faixa_profissional ON pacientes (faixa_etaria, id_profissional_responsavel)",
+]
+
+SQL_LOTE_PREENCHER = """
+    SELECT id, dados_medicos FROM pacientes
+    WHERE id > %s AND dados_medicos IS NOT NULL {pendentes}
+    ORDER BY id LIMIT %s
+"""
+SQL_ATUALIZAR_INDICES = """
+    UPDATE pacientes p SET diagnostico_indice = v.diagnostico_indice, faixa_etaria = v.faixa_etaria
+    FROM (VALUES %s) AS v(id, dados_medicos, diagnostico_indice, faixa_etaria)
+    WHERE p.id = v.id AND p.dados_medicos = v.dados_medicos
+"""
+# Casts explícitos: um lote só com NULL numa coluna seria tipado como texto
+TEMPLATE_ATUALIZAR_INDICES = "(%s, %s, %s::varchar, %s::smallint)"
+
+PacienteEncontrado = namedtuple("PacienteEncontrado", "id nome profissional idade diagnostico")
+
+
+def carregar_chave():
+    """
+    Lê a chave HMAC dos índices cegos (CHAVE_INDICE_CEGO).
+
+    Deve ser diferente da chave Fernet e nunca rotacionada sem recalcular os índices.
+
+    Returns:
+        bytes or None: Chave, ou None se não configurada (busca por diagnóstico indisponível).
+    """
+    chave = (os.getenv("CHAVE_INDICE_CEGO") or "").strip()
+    return chave.encode() if chave else None
+
+
+def normalizar_termo(texto):
+    """Normaliza um termo para o índice: minúsculas, sem acentos e com espaços simples."""
+    texto = unicodedata.normalize("NFKD", str(texto))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(texto.lower().split())
+
+
+def indice_diagnostico(chave, diagnostico):
+    """
+    Calcula o índice cego de um diagnóstico.
+
+    Args:
+        chave (bytes): Chave HMAC.
+        diagnostico (str): Diagnóstico em texto.
+    Returns:
+        str or None: 32 caracteres hexadecimais (None sem chave ou sem diagnóstico).
+    """
+    if not chave or not diagnostico or not normalizar_termo(diagnostico):
+        return None
+    mensagem = b"diagnostico\x00" + normalizar_termo(diagnostico).encode()
+    return hmac.new(chave, mensagem, hashlib.sha256).hexdigest()[:32]
+
+
+def faixa_etaria(idade):
+    """Início da faixa de 10 anos da idade (None se a idade for inválida)."""
+    try:
+        idade = int(idade)
+    except (TypeError, ValueError):
+        return None
+    if idade < 0:
+        return None
+    return min(idade, IDADE_MAXIMA) // TAMANHO_FAIXA * TAMANHO_FAIXA
+
+
+def rotulo_faixa(faixa):
+    """Texto de exibição de uma faixa etária (ex.: 40 -> "40-49")."""
+    return f"{faixa}+" if faixa >= IDADE_MAXIMA else f"{faixa}-{faixa + TAMANHO_FAIXA - 1}"
+
+
+def colunas_indice(chave, dados):
+    """
+    Calcula as colunas de índice de um paciente a partir dos dados médicos em claro.
+
+    Args:
+        chave (bytes): Chave HMAC (None deixa o índice de diagnóstico vazio).
+        dados (dict): Dados médicos ({"idade": ..., "diagnostico": ...}).
+    Returns:
+        tuple: (diagnostico_indice, faixa_etaria).
+    """
+    if not dados:
+        return None, None
+    return indice_diagnostico(chave, dados.get("diagnostico")), faixa_etaria(dados.get("idade"))
+
+
+def criar_estrutura(cursor):
+    """
+    Cria as colunas e os índices de busca em pacientes.
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+    """
+    for sql in COLUNAS_INDICE + INDICES:
+        cursor.execute(sql)
+
+
+def buscar_pacientes(cursor, fernet, chave, diagnostico=None, profissional_id=None, faixas=None, limite=200, deslocamento=0):
+    """
+    Busca pacientes pelos índices e descriptografa apenas os encontrados.
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+        fernet: Objeto Fernet/MultiFernet com as chaves configuradas.
+        chave (bytes): Chave HMAC dos índices.
+        diagnostico (str, opcional): Diagnóstico exato (sem diferenciar maiúsculas/acentos).
+        profissional_id (int, opcional): ID de usuário do profissional responsável.
+        faixas (list, opcional): Inícios das faixas etárias aceitas.
+        limite (int, opcional): Número máximo de linhas. Default: 200.
+        deslocamento (int, opcional): Linhas a pular (paginação). Default: 0.
+    Returns:
+        list: PacienteEncontrado ordenados por nome.
+    Raises:
+        ValueError: Sem nenhum filtro, ou com diagnóstico e sem chave configurada.
+    """
+    indice = None
+    if diagnostico:
+        if not chave:
+            raise ValueError("CHAVE_INDICE_CEGO não configurada; a busca por diagnóstico está indisponível.")
+        indice = indice_diagnostico(chave, diagnostico)
+    cursor.execute(*montar_consulta_pacientes(indice, profissional_id, faixas, limite, deslocamento))
+    encontrados = []
+    alvo = normalizar_termo(diagnostico) if diagnostico else None
+    for id_, nome, profissional, dados_cript in cursor.fetchall():
+        dados = descriptografar_json(fernet, dados_cript) or {}
+        # O HMAC truncado admite colisões raríssimas: confirma com o valor decifrado
+        if alvo is not None and normalizar_termo(dados.get("diagnostico", "")) != alvo:
+            continue
+        encontrados.append(PacienteEncontrado(id_, nome, profissional, dados.get("idade"), dados.get("diagnostico")))
+    return encontrados
+
+
+def preencher_indices(conn, fernet, chave, tamanho_lote=TAMANHO_LOTE, recalcular=False, progresso=None):
+    """
+    Preenche os índices das linhas existentes, em lotes ordenados por id.
+
+    Cada lote é confirmado separadamente; sem `recalcular`, só linhas com índice vazio são
+    lidas, então uma nova execução continua de onde a anterior parou.
+
+    Args:
+        conn: Conexão psycopg2 dedicada ao job.
+        fernet: Objeto Fernet/MultiFernet com as chaves configuradas.
+        chave (bytes): Chave HMAC dos índices (None preenche só a faixa etária).
+        tamanho_lote (int, opcional): Linhas por lote. Default: 1000.
+        recalcular (bool, opcional): Recalcula todas as linhas (ex.: após trocar a chave HMAC).
+        progresso (callable, opcional): Chamado após cada lote com (linhas lidas, linhas atualizadas).
+    Returns:
+        tuple: (linhas lidas, linhas atualizadas, ids que não puderam ser decifrados).
+    """
+    pendentes = "" if recalcular else "AND (faixa_etaria IS NULL OR diagnostico_indice IS NULL)"
+    sql = SQL_LOTE_PREENCHER.format(pendentes=pendentes)
+    cursor = conn.cursor()
+    ultimo_id, lidas, atualizadas, falhas = 0, 0, 0, []
+    while True:
+        cursor.execute(sql, (ultimo_id, tamanho_lote))
+        linhas = cursor.fetchall()
+        if not linhas:
+            break
+        valores = []
+        for id_, dados_cript in linhas:
+            try:
+                dados = descriptografar_json(fernet, dados_cript)
+            except Exception:
+                logger.error("dados_medicos do paciente %s não pode ser decifrado", id_)
+                falhas.append(id_)
+                continue
+            valores.append((id_, dados_cript, *colunas_indice(chave, dados)))
+        if valores:
+            # Só atualiza se dados_medicos não mudou desde a leitura (gravações do app prevalecem)
+            execute_values(cursor, SQL_ATUALIZAR_INDICES, valores, template=TEMPLATE_ATUALIZAR_INDICES, page_size=len(valores))
+            atualizadas += cursor.rowcount
+        conn.commit()
+        ultimo_id = linhas[-1][0]
+        lidas += len(linhas)
+        if progresso:
+            progresso(lidas, atualizadas)
+    return lidas, atualizadas, falhas
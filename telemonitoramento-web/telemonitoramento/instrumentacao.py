@@ -0,0 +1,447 @@
+"""
+Instrumentação das consultas ao banco de dados.
+
+Conexões criadas por conectar() usam cursores que medem cada instrução SQL (impressão
+digital da consulta, duração, linhas retornadas) e acumulam os dados no escopo corrente,
+que representa um rerun do Streamlit ("pagina:Dashboard") ou um job em segundo plano
+("job:..."). Consultas acima de LIMITE_CONSULTA_LENTA_MS vão para o log de consultas
+lentas, e os contadores/histogramas podem ser lidos em formato texto do Prometheus pelo
+endpoint HTTP local iniciado com iniciar_servidor_metricas() (/metrics; o resumo por
+página, em JSON, fica em /resumo).
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import psycopg2
+import psycopg2.extensions
+
+logger = logging.getLogger("telemonitoramento.instrumentacao")
+logger_lentas = logging.getLogger("telemonitoramento.consultas_lentas")
+
+LIMITE_CONSULTA_LENTA_MS = float(os.getenv("LIMITE_CONSULTA_LENTA_MS", "200"))
+
+BUCKETS_SEGUNDOS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 250, 500, 1000)
+
+SEM_ESCOPO = "sem_escopo"
+
+_RE_COMENTARIOS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_RE_TEXTO = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMERO = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_PARAMETRO = re.compile(r"%\(\w+\)s|%s")
+_RE_LISTA = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_RE_ESPACOS = re.compile(r"\s+")
+
+
+def impressao_digital(sql):
+    """
+    Normaliza uma instrução SQL removendo literais e parâmetros, para agrupar consultas de mesmo formato.
+
+    Args:
+        sql (str or bytes): Instrução SQL.
+    Returns:
+        str: Consulta normalizada (ex: "SELECT * FROM usuarios WHERE id = ?").
+    """
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    sql = str(sql)
+    sql = _RE_COMENTARIOS.sub(" ", sql)
+    sql = _RE_TEXTO.sub("?", sql)
+    sql = _RE_PARAMETRO.sub("?", sql)
+    sql = _RE_NUMERO.sub("?", sql)
+    sql = _RE_LISTA.sub("(?)", sql)
+    return _RE_ESPACOS.sub(" ", sql).strip()
+
+
+def id_consulta(digital):
+    """Identificador curto e estável de uma impressão digital (usado como rótulo nas métricas)."""
+    return hashlib.sha1(digital.encode()).hexdigest()[:10]
+
+
+def _escapar_rotulo(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatar_rotulos(rotulos):
+    if not rotulos:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar_rotulo(v)}"' for k, v in rotulos) + "}"
+
+
+class Contador:
+    """Contador monotônico com rótulos, no formato do Prometheus."""
+
+    def __init__(self, nome, ajuda, rotulos=()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self.valores = {}
+
+    def incrementar(self, valor=1, **rotulos):
+        chave = tuple(rotulos.get(r, "") for r in self.rotulos)
+        self.valores[chave] = self.valores.get(chave, 0) + valor
+
+    def exportar(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} counter"]
+        for chave, valor in sorted(self.valores.items()):
+            linhas.append(f"{self.nome}{_formatar_rotulos(zip(self.rotulos, chave))} {valor}")
+        return linhas
+
+
+class Histograma:
+    """Histograma cumulativo com rótulos, no formato do Prometheus."""
+
+    def __init__(self, nome, ajuda, buckets, rotulos=()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.buckets = tuple(buckets)
+        self.rotulos = tuple(rotulos)
+        self.series = {}
+
+    def observar(self, valor, **rotulos):
+        chave = tuple(rotulos.get(r, "") for r in self.rotulos)
+        serie = self.series.get(chave)
+        if serie is None:
+            serie = self.series[chave] = {"buckets": [0] * len(self.buckets), "soma": 0.0, "total": 0}
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                serie["buckets"][i] += 1
+        serie["soma"] += valor
+        serie["total"] += 1
+
+    def exportar(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} histogram"]
+        for chave, serie in sorted(self.series.items()):
+            base = list(zip(self.rotulos, chave))
+            for limite, contagem in zip(self.buckets, serie["buckets"]):
+                linhas.append(f"{self.nome}_bucket{_formatar_rotulos(base + [('le', limite)])} {contagem}")
+            linhas.append(f"{self.nome}_bucket{_formatar_rotulos(base + [('le', '+Inf')])} {serie['total']}")
+            linhas.append(f"{self.nome}_sum{_formatar_rotulos(base)} {serie['soma']}")
+            linhas.append(f"{self.nome}_count{_formatar_rotulos(base)} {serie['total']}")
+        return linhas
+
+
+class Metricas:
+    """Registro global das métricas do processo, protegido por lock (cada sessão Streamlit roda em uma thread)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.consultas = Contador("telemonitoramento_consultas_total", "Instruções SQL executadas.", ("escopo", "consulta"))
+        self.linhas = Contador("telemonitoramento_linhas_total", "Linhas retornadas ou afetadas.", ("escopo",))
+        self.lentas = Contador("telemonitoramento_consultas_lentas_total", "Instruções SQL acima do limite de consulta lenta.", ("escopo",))
+        self.erros = Contador("telemonitoramento_consultas_erros_total", "Instruções SQL que terminaram em erro.", ("escopo",))
+        self.duracao_consulta = Histograma("telemonitoramento_consulta_duracao_segundos", "Duração das instruções SQL.", BUCKETS_SEGUNDOS, ("escopo",))
+        self.espera_conexao = Histograma("telemonitoramento_espera_conexao_segundos", "Tempo para obter uma conexão com o banco.", BUCKETS_SEGUNDOS, ("escopo",))
+        self.duracao_escopo = Histograma("telemonitoramento_escopo_duracao_segundos", "Duração de reruns e jobs.", BUCKETS_SEGUNDOS, ("escopo",))
+        self.tempo_db_escopo = Histograma("telemonitoramento_escopo_tempo_db_segundos", "Tempo total de banco por rerun ou job.", BUCKETS_SEGUNDOS, ("escopo",))
+        self.consultas_escopo = Histograma("telemonitoramento_escopo_consultas", "Número de instruções SQL por rerun ou job.", BUCKETS_CONSULTAS, ("escopo",))
+        self.digitais = {}
+        self.paginas = {}
+
+    def registrar_consulta(self, escopo, digital, duracao, linhas, erro=False):
+        consulta = id_consulta(digital)
+        with self.lock:
+            self.digitais.setdefault(consulta, digital)
+            self.consultas.incrementar(escopo=escopo, consulta=consulta)
+            self.duracao_consulta.observar(duracao, escopo=escopo)
+            if linhas > 0:
+                self.linhas.incrementar(linhas, escopo=escopo)
+            if erro:
+                self.erros.incrementar(escopo=escopo)
+            if duracao * 1000 >= LIMITE_CONSULTA_LENTA_MS:
+                self.lentas.incrementar(escopo=escopo)
+
+    def registrar_conexao(self, escopo, duracao):
+        with self.lock:
+            self.espera_conexao.observar(duracao, escopo=escopo)
+
+    def registrar_escopo(self, escopo):
+        with self.lock:
+            self.duracao_escopo.observar(escopo.duracao, escopo=escopo.nome)
+            self.tempo_db_escopo.observar(escopo.tempo_db, escopo=escopo.nome)
+            self.consultas_escopo.observar(escopo.consultas, escopo=escopo.nome)
+            resumo = self.paginas.setdefault(escopo.nome, {"execucoes": 0, "consultas": 0, "tempo_db": 0.0, "duracao": 0.0, "espera_conexao": 0.0, "linhas": 0})
+            resumo["execucoes"] += 1
+            resumo["consultas"] += escopo.consultas
+            resumo["tempo_db"] += escopo.tempo_db
+            resumo["duracao"] += escopo.duracao
+            resumo["espera_conexao"] += escopo.espera_conexao
+            resumo["linhas"] += escopo.linhas
+
+    def resumo_paginas(self):
+        """
+        Resumo agregado por página/job.
+
+        Returns:
+            dict: Nome do escopo -> médias por execução (consultas, tempo de banco, duração, espera de conexão).
+        """
+        with self.lock:
+            resumo = {}
+            for nome, r in self.paginas.items():
+                n = r["execucoes"]
+                resumo[nome] = {
+                    "execucoes": n,
+                    "consultas_media": round(r["consultas"] / n, 2),
+                    "tempo_db_medio_ms": round(r["tempo_db"] / n * 1000, 3),
+                    "duracao_media_ms": round(r["duracao"] / n * 1000, 3),
+                    "espera_conexao_media_ms": round(r["espera_conexao"] / n * 1000, 3),
+                    "linhas_media": round(r["linhas"] / n, 2),
+                }
+            return resumo
+
+    def exportar_prometheus(self):
+        """Métricas no formato de exposição em texto do Prometheus."""
+        with self.lock:
+            linhas = []
+            for metrica in (self.consultas, self.linhas, self.lentas, self.erros, self.duracao_consulta,
+                            self.espera_conexao, self.duracao_escopo, self.tempo_db_escopo, self.consultas_escopo):
+                linhas.extend(metrica.exportar())
+            linhas.append("# HELP telemonitoramento_consulta_info Texto normalizado de cada consulta.")
+            linhas.append("# TYPE telemonitoramento_consulta_info gauge")
+            for consulta, digital in sorted(self.digitais.items()):
+                linhas.append(f"telemonitoramento_consulta_info{_formatar_rotulos([('consulta', consulta), ('sql', digital[:300])])} 1")
+            return "\n".join(linhas) + "\n"
+
+
+metricas = Metricas()
+
+
+class Escopo:
+    """Acumula as consultas de um rerun do Streamlit ou de um job em segundo plano."""
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.inicio = time.perf_counter()
+        self.ultimo_evento = self.inicio
+        self.fim = None
+        self.consultas = 0
+        self.linhas = 0
+        self.tempo_db = 0.0
+        self.espera_conexao = 0.0
+        self.por_consulta = {}
+
+    @property
+    def duracao(self):
+        return (self.fim or time.perf_counter()) - self.inicio
+
+    def registrar(self, digital, duracao, linhas):
+        self.consultas += 1
+        self.linhas += linhas
+        self.tempo_db += duracao
+        self.ultimo_evento = time.perf_counter()
+        item = self.por_consulta.setdefault(digital, [0, 0.0])
+        item[0] += 1
+        item[1] += duracao
+
+    def mais_custosas(self, n=5):
+        """Retorna as n consultas com maior tempo acumulado: lista de (digital, execuções, segundos)."""
+        itens = sorted(self.por_consulta.items(), key=lambda kv: kv[1][1], reverse=True)
+        return [(digital, qtd, tempo) for digital, (qtd, tempo) in itens[:n]]
+
+
+_local = threading.local()
+
+
+def escopo_atual():
+    """Retorna o escopo ativo na thread corrente (ou None)."""
+    return getattr(_local, "escopo", None)
+
+
+def iniciar_escopo(nome):
+    """
+    Inicia um escopo de medição na thread corrente.
+
+    Se um escopo anterior ainda estiver aberto (por exemplo, um rerun interrompido por
+    st.stop()), ele é encerrado no instante do seu último evento registrado.
+
+    Args:
+        nome (str): Nome do escopo, ex: "pagina:Dashboard" ou "job:rotacao_chave".
+    Returns:
+        Escopo: O escopo criado.
+    """
+    anterior = escopo_atual()
+    if anterior is not None and anterior.fim is None:
+        anterior.fim = anterior.ultimo_evento
+        _finalizar(anterior)
+    _local.escopo = Escopo(nome)
+    return _local.escopo
+
+
+def renomear_escopo(nome):
+    """Renomeia o escopo corrente (útil quando a página só é conhecida depois do login)."""
+    atual = escopo_atual()
+    if atual is not None:
+        atual.nome = nome
+
+
+def encerrar_escopo():
+    """
+    Encerra o escopo corrente e registra seu resumo nas métricas.
+
+    Returns:
+        Escopo or None: O escopo encerrado.
+    """
+    atual = escopo_atual()
+    _local.escopo = None
+    if atual is None or atual.fim is not None:
+        return atual
+    atual.fim = time.perf_counter()
+    _finalizar(atual)
+    return atual
+
+
+def _finalizar(escopo):
+    metricas.registrar_escopo(escopo)
+    logger.debug(
+        "Escopo %s: %d consultas, %.1f ms de banco, %.1f ms total, %.1f ms esperando conexão",
+        escopo.nome, escopo.consultas, escopo.tempo_db * 1000, escopo.duracao * 1000, escopo.espera_conexao * 1000,
+    )
+
+
+@contextmanager
+def escopo(nome):
+    """
+    Context manager para medir um job ou trecho de código.
+
+    Exemplo:
+        with escopo("job:lembretes"):
+            executar_job()
+    """
+    anterior = escopo_atual()
+    _local.escopo = None
+    novo = iniciar_escopo(nome)
+    try:
+        yield novo
+    finally:
+        encerrar_escopo()
+        _local.escopo = anterior
+
+
+def _nome_escopo():
+    atual = escopo_atual()
+    return atual.nome if atual is not None else SEM_ESCOPO
+
+
+def _registrar(sql, duracao, linhas, erro=False):
+    linhas = max(linhas, 0)
+    digital = impressao_digital(sql)
+    atual = escopo_atual()
+    nome = atual.nome if atual is not None else SEM_ESCOPO
+    if atual is not None:
+        atual.registrar(digital, duracao, linhas)
+    metricas.registrar_consulta(nome, digital, duracao, linhas, erro)
+    if duracao * 1000 >= LIMITE_CONSULTA_LENTA_MS:
+        logger_lentas.warning("Consulta lenta (%.1f ms, %d linhas) em %s: %s", duracao * 1000, linhas, nome, digital)
+
+
+class CursorInstrumentado(psycopg2.extensions.cursor):
+    """Cursor que mede cada instrução executada."""
+
+    def _medir(self, sql, funcao, *args):
+        inicio = time.perf_counter()
+        try:
+            resultado = funcao(*args)
+        except Exception:
+            _registrar(sql, time.perf_counter() - inicio, 0, erro=True)
+            raise
+        _registrar(sql, time.perf_counter() - inicio, self.rowcount)
+        return resultado
+
+    def execute(self, query, vars=None):
+        return self._medir(query, super().execute, query, vars)
+
+    def executemany(self, query, vars_list):
+        return self._medir(query, super().executemany, query, vars_list)
+
+    def callproc(self, procname, parameters=None):
+        return self._medir(f"CALL {procname}", super().callproc, procname, parameters)
+
+    def copy_expert(self, sql, file, size=8192):
+        return self._medir(sql, super().copy_expert, sql, file, size)
+
+
+class ConexaoInstrumentada(psycopg2.extensions.connection):
+    """Conexão cujos cursores padrão são instrumentados."""
+
+    def cursor(self, *args, **kwargs):
+        kwargs.setdefault("cursor_factory", CursorInstrumentado)
+        return super().cursor(*args, **kwargs)
+
+
+def conectar(**parametros):
+    """
+    Abre uma conexão instrumentada, registrando o tempo de espera pela conexão.
+
+    Args:
+        **parametros: Argumentos repassados a psycopg2.connect.
+    Returns:
+        ConexaoInstrumentada: Conexão ativa.
+    """
+    inicio = time.perf_counter()
+    conn = psycopg2.connect(connection_factory=ConexaoInstrumentada, **parametros)
+    duracao = time.perf_counter() - inicio
+    atual = escopo_atual()
+    if atual is not None:
+        atual.espera_conexao += duracao
+    metricas.registrar_conexao(_nome_escopo(), duracao)
+    return conn
+
+
+class _HandlerMetricas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        caminho = self.path.split("?")[0]
+        if caminho in ("/metrics", "/"):
+            corpo = metricas.exportar_prometheus().encode("utf-8")
+            tipo = "text/plain; version=0.0.4; charset=utf-8"
+        elif caminho == "/resumo":
+            corpo = json.dumps(metricas.resumo_paginas(), ensure_ascii=False, indent=2).encode("utf-8")
+            tipo = "application/json; charset=utf-8"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        logger.debug("Métricas HTTP: " + formato, *args)
+
+
+_servidor = None
+_servidor_lock = threading.Lock()
+
+
+def iniciar_servidor_metricas(porta=None, host="127.0.0.1"):
+    """
+    Inicia (uma única vez por processo) o endpoint HTTP local de métricas do Prometheus.
+
+    Args:
+        porta (int, opcional): Porta TCP. Se omitida, usa METRICAS_PORTA; sem ela, nada é iniciado.
+        host (str, opcional): Interface de escuta. Default: 127.0.0.1.
+    Returns:
+        ThreadingHTTPServer or None: O servidor em execução.
+    """
+    global _servidor
+    porta = porta or os.getenv("METRICAS_PORTA")
+    if not porta:
+        return None
+    with _servidor_lock:
+        if _servidor is None:
+            try:
+                _servidor = ThreadingHTTPServer((host, int(porta)), _HandlerMetricas)
+            except OSError:
+                logger.exception("Não foi possível iniciar o servidor de métricas na porta %s", porta)
+                return None
+            threading.Thread(target=_servidor.serve_forever, name="servidor-metricas", daemon=True).start()
+            logger.info("Métricas Prometheus disponíveis em http://%s:%s/metrics", host, porta)
+    return _servidor
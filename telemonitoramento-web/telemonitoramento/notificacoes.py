@@ -0,0 +1,277 @@
+"""
+Atualizações ao vivo via LISTEN/NOTIFY do PostgreSQL.
+
+Triggers em sinais_vitais, alertas e mensagens publicam no canal "telemonitoramento" um
+evento JSON por linha alterada, com o id e as chaves de roteamento (paciente_id ou
+id_destinatario). Comandos que alteram muitas linhas de uma vez (COPY, cargas em lote)
+publicam um único evento "em_massa" para a tabela.
+
+Cada processo mantém uma única thread ouvinte (obter_ouvinte), com conexão própria, que
+entrega os eventos às assinaturas das sessões interessadas. As sessões consomem apenas os
+ids pendentes e buscam somente essas linhas; sem eventos, nenhuma consulta é feita.
+"""
+
+import json
+import select
+import logging
+import threading
+import weakref
+
+import psycopg2
+
+logger = logging.getLogger("telemonitoramento.notificacoes")
+
+CANAL = "telemonitoramento"
+TABELAS_NOTIFICADAS = ("sinais_vitais", "alertas", "mensagens")
+# Acima deste número de linhas por comando, publica um único evento "em_massa"; acima deste
+# número de ids pendentes numa assinatura, a tabela é marcada para recarga completa
+LIMITE_EVENTOS_POR_COMANDO = 100
+
+
+def criar_gatilhos(cursor):
+    """
+    Cria a função e os triggers que publicam as alterações no canal de notificações.
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+    """
+    cursor.execute(f"""
+        CREATE OR REPLACE FUNCTION notificar_alteracoes() RETURNS trigger AS $$
+        DECLARE
+            total INTEGER;
+            evento JSONB;
+        BEGIN
+            SELECT COUNT(*) INTO total FROM novas;
+            IF total > {LIMITE_EVENTOS_POR_COMANDO} THEN
+                PERFORM pg_notify('{CANAL}', jsonb_build_object('tabela', TG_TABLE_NAME, 'em_massa', true)::text);
+                RETURN NULL;
+            END IF;
+            FOR evento IN
+                SELECT jsonb_strip_nulls(jsonb_build_object(
+                    'tabela', TG_TABLE_NAME, 'id', d->'id',
+                    'paciente_id', d->'paciente_id', 'id_destinatario', d->'id_destinatario'
+                ))
+                FROM (SELECT to_jsonb(n) AS d FROM novas n) linhas
+            LOOP
+                PERFORM pg_notify('{CANAL}', evento::text);
+            END LOOP;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    # Triggers com tabela de transição aceitam um único evento; por isso um trigger por operação
+    for tabela in TABELAS_NOTIFICADAS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_notificar_{tabela}_insercao ON {tabela}")
+        cursor.execute(f"""
+            CREATE TRIGGER trg_notificar_{tabela}_insercao AFTER INSERT ON {tabela}
+            REFERENCING NEW TABLE AS novas FOR EACH STATEMENT
+            EXECUTE FUNCTION notificar_alteracoes()
+        """)
+    cursor.execute("DROP TRIGGER IF EXISTS trg_notificar_alertas_atualizacao ON alertas")
+    cursor.execute("""
+        CREATE TRIGGER trg_notificar_alertas_atualizacao AFTER UPDATE ON alertas
+        REFERENCING NEW TABLE AS novas FOR EACH STATEMENT
+        EXECUTE FUNCTION notificar_alteracoes()
+    """)
+
+
+class Assinatura:
+    """
+    Interesse de uma sessão em eventos de algumas tabelas.
+
+    Args:
+        tabelas (iterable): Tabelas acompanhadas.
+        pacientes (iterable, opcional): Pacientes acompanhados em sinais_vitais/alertas (None = todos).
+        usuario_id (int, opcional): Destinatário acompanhado em mensagens.
+    """
+
+    def __init__(self, tabelas, pacientes=None, usuario_id=None):
+        self.tabelas = set(tabelas)
+        self.pacientes = set(pacientes) if pacientes is not None else None
+        self.usuario_id = usuario_id
+        self._lock = threading.Lock()
+        self._pendentes = {tabela: set() for tabela in self.tabelas}
+        # Na primeira leitura cada tabela é carregada por completo
+        self._recarregar = set(self.tabelas)
+
+    def interessa(self, evento):
+        tabela = evento.get("tabela")
+        if tabela not in self.tabelas:
+            return False
+        if evento.get("em_massa"):
+            return True
+        if tabela == "mensagens":
+            return self.usuario_id is None or evento.get("id_destinatario") == self.usuario_id
+        return self.pacientes is None or evento.get("paciente_id") in self.pacientes
+
+    def notificar(self, evento):
+        tabela = evento["tabela"]
+        with self._lock:
+            if tabela in self._recarregar:
+                return
+            pendentes = self._pendentes[tabela]
+            # Sessão fora do painel ao vivo: em vez de acumular ids sem fim, recarrega a tabela
+            if evento.get("em_massa") or len(pendentes) >= LIMITE_EVENTOS_POR_COMANDO:
+                pendentes.clear()
+                self._recarregar.add(tabela)
+            else:
+                pendentes.add(evento["id"])
+
+    def acompanhar(self, pacientes):
+        """
+        Troca os pacientes acompanhados (ex.: pacientes atribuídos ao profissional depois do login).
+
+        Pacientes novos marcam sinais_vitais e alertas para recarga, já que os eventos
+        anteriores deles não foram guardados.
+        """
+        pacientes = set(pacientes)
+        with self._lock:
+            if self.pacientes is None or pacientes == self.pacientes:
+                return
+            if pacientes - self.pacientes:
+                self._recarregar |= self.tabelas - {"mensagens"}
+            self.pacientes = pacientes
+
+    def recarregar_tudo(self):
+        """Marca todas as tabelas para recarga completa (ex.: eventos perdidos numa reconexão)."""
+        with self._lock:
+            self._recarregar = set(self.tabelas)
+
+    def consumir(self, tabela):
+        """
+        Retira os eventos pendentes de uma tabela.
+
+        Returns:
+            set or None: Ids alterados desde a última leitura (vazio se nada mudou),
+            ou None quando a tabela precisa ser recarregada por completo.
+        """
+        with self._lock:
+            if tabela in self._recarregar:
+                self._recarregar.discard(tabela)
+                self._pendentes[tabela] = set()
+                return None
+            ids = self._pendentes[tabela]
+            self._pendentes[tabela] = set()
+            return ids
+
+
+def decodificar_evento(payload):
+    """Converte o payload de uma notificação em dict (None se inválido)."""
+    try:
+        evento = json.loads(payload)
+    except ValueError:
+        logger.warning("Notificação inválida ignorada: %r", payload[:200])
+        return None
+    if not isinstance(evento, dict) or "tabela" not in evento or not ("id" in evento or evento.get("em_massa")):
+        return None
+    return evento
+
+
+class Ouvinte(threading.Thread):
+    """
+    Thread que escuta o canal de notificações e distribui os eventos às assinaturas.
+
+    As assinaturas são mantidas por referência fraca: quando a sessão do Streamlit é
+    descartada, a assinatura some sem precisar ser cancelada.
+    """
+
+    def __init__(self, parametros, canal=CANAL, timeout=5):
+        super().__init__(name="ouvinte-notificacoes", daemon=True)
+        self.parametros = parametros
+        self.canal = canal
+        self.timeout = timeout
+        self._assinaturas = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self.conectado = threading.Event()
+
+    def assinar(self, assinatura):
+        with self._lock:
+            self._assinaturas.add(assinatura)
+        return assinatura
+
+    def distribuir(self, evento):
+        with self._lock:
+            assinaturas = list(self._assinaturas)
+        for assinatura in assinaturas:
+            if assinatura.interessa(evento):
+                assinatura.notificar(evento)
+
+    def _recarregar_assinaturas(self):
+        with self._lock:
+            assinaturas = list(self._assinaturas)
+        for assinatura in assinaturas:
+            assinatura.recarregar_tudo()
+
+    def run(self):
+        espera = 1
+        while not self._parar.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(**self.parametros)
+                conn.autocommit = True
+                conn.cursor().execute(f"LISTEN {self.canal}")
+                self.conectado.set()
+                # Eventos publicados enquanto estávamos desconectados foram perdidos
+                self._recarregar_assinaturas()
+                espera = 1
+                while not self._parar.is_set():
+                    if select.select([conn], [], [], self.timeout) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        evento = decodificar_evento(conn.notifies.pop(0).payload)
+                        if evento is not None:
+                            self.distribuir(evento)
+            except Exception:
+                logger.exception("Ouvinte de notificações desconectado; nova tentativa em %d s", espera)
+                self.conectado.clear()
+                self._parar.wait(espera)
+                espera = min(espera * 2, 60)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def parar(self):
+        self._parar.set()
+
+
+_ouvinte = None
+_lock_ouvinte = threading.Lock()
+
+
+def obter_ouvinte(**parametros):
+    """
+    Retorna a thread ouvinte do processo, iniciando-a na primeira chamada.
+
+    Args:
+        **parametros: Parâmetros de conexão do psycopg2 (host, database, user, password, port).
+    Returns:
+        Ouvinte: A thread ouvinte compartilhada pelas sessões do processo.
+    """
+    global _ouvinte
+    with _lock_ouvinte:
+        if _ouvinte is None or not _ouvinte.is_alive():
+            _ouvinte = Ouvinte(parametros)
+            _ouvinte.start()
+        return _ouvinte
+
+
+def mesclar_linhas(atuais, novas, indice_ordem, limite):
+    """
+    Mescla linhas buscadas por id na lista já exibida, sem recarregar a lista inteira.
+
+    Linhas com o mesmo id (primeira coluna) são substituídas; o resultado é ordenado pela
+    coluna indicada, da mais recente para a mais antiga, e limitado a `limite` linhas.
+
+    Args:
+        atuais (list): Linhas exibidas.
+        novas (list): Linhas alteradas.
+        indice_ordem (int): Índice da coluna de data usada na ordenação.
+        limite (int): Número máximo de linhas.
+    Returns:
+        list: Linhas mescladas.
+    """
+    por_id = {linha[0]: linha for linha in atuais}
+    por_id.update((linha[0], linha) for linha in novas)
+    return sorted(por_id.values(), key=lambda linha: (linha[indice_ordem], linha[0]), reverse=True)[:limite]
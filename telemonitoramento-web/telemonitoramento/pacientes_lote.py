@@ -0,0 +1,308 @@
+"""
+Cadastro de pacientes em lote a partir de CSV.
+
+O arquivo é lido em fluxo e dividido em lotes. Cada linha é validada e associada a um
+profissional responsável (por e-mail, ID de usuário ou registro profissional). Os dados
+médicos são criptografados em um pool de processos: enquanto um lote é gravado, o
+seguinte já está sendo criptografado. Cada lote é gravado em uma única transação, com
+um INSERT de várias linhas em usuarios e outro em pacientes. O resultado é um relatório
+por linha: importada, duplicada, inválida ou com falha.
+"""
+
+import os
+import csv
+import json
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from cryptography.fernet import Fernet
+from psycopg2.extras import execute_values
+
+from consultas import SQL_REGISTRAR_AUDITORIA
+from indice_cego import colunas_indice
+from usuarios import EMAIL_PATTERN, SQL_IMPORTAR_USUARIOS
+from utils import hash_senha
+
+COLUNAS_OBRIGATORIAS = ("nome", "idade", "diagnostico")
+# Senha inicial dos pacientes cadastrados (a mesma do formulário); trocada no primeiro acesso
+SENHA_INICIAL = "Senha@123"
+TAMANHO_LOTE = 1000
+
+IMPORTADO = "importado"
+DUPLICADO = "duplicado"
+INVALIDO = "inválido"
+FALHA = "falha"
+
+SQL_PROFISSIONAIS = """
+    SELECT u.id, u.email, pr.registro_profissional
+    FROM usuarios u LEFT JOIN profissionais pr ON pr.id_usuario = u.id
+    WHERE u.tipo IN ('Profissional', 'Profissional de Saúde') AND u.status IS NOT FALSE
+"""
+SQL_INSERIR_PACIENTES = "INSERT INTO pacientes (id_usuario, id_profissional_responsavel, dados_medicos, diagnostico_indice, faixa_etaria) VALUES %s"
+
+ResultadoLinha = namedtuple("ResultadoLinha", "linha email situacao detalhe")
+PacienteValidado = namedtuple("PacienteValidado", "linha nome email senha profissional_id dados")
+
+
+def email_padrao_paciente(nome):
+    """E-mail gerado para pacientes cadastrados sem e-mail (mesmo formato do formulário)."""
+    return f"{nome.lower().replace(' ', '.')}@paciente.com"
+
+
+def carregar_profissionais(cursor):
+    """
+    Carrega o mapa de identificação dos profissionais ativos.
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+    Returns:
+        dict: E-mail (minúsculo), ID de usuário e registro profissional -> ID de usuário do profissional.
+    """
+    cursor.execute(SQL_PROFISSIONAIS)
+    mapa = {}
+    for usuario_id, email, registro in cursor.fetchall():
+        mapa[str(usuario_id)] = usuario_id
+        mapa[email.lower()] = usuario_id
+        if registro:
+            mapa[registro.strip().lower()] = usuario_id
+    return mapa
+
+
+def ler_csv_pacientes(arquivo):
+    """
+    Lê um CSV de pacientes em fluxo.
+
+    Colunas: nome, idade, diagnostico e, opcionalmente, email, senha e profissional.
+    O separador (vírgula ou ponto e vírgula) é detectado pelo cabeçalho.
+
+    Args:
+        arquivo: Arquivo texto aberto.
+    Yields:
+        tuple: (número da linha no arquivo, dict coluna -> valor).
+    Raises:
+        ValueError: Se faltar alguma coluna obrigatória no cabeçalho.
+    """
+    cabecalho = arquivo.readline().lstrip("\ufeff")
+    separador = ";" if cabecalho.count(";") > cabecalho.count(",") else ","
+    colunas = [c.strip().lower() for c in next(csv.reader([cabecalho], delimiter=separador), [])]
+    faltando = [c for c in COLUNAS_OBRIGATORIAS if c not in colunas]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes no CSV: {', '.join(faltando)}")
+    # A linha 1 é o cabeçalho
+    for numero, valores in enumerate(csv.reader(arquivo, delimiter=separador), start=2):
+        if any(v.strip() for v in valores):
+            yield numero, {c: v.strip() for c, v in zip(colunas, valores)}
+
+
+def validar_paciente(numero, registro, profissionais, profissional_padrao=None, senha_padrao=SENHA_INICIAL):
+    """
+    Valida uma linha do CSV e resolve o profissional responsável.
+
+    Args:
+        numero (int): Número da linha no arquivo.
+        registro (dict): Valores da linha.
+        profissionais (dict): Mapa de carregar_profissionais.
+        profissional_padrao (int, opcional): Profissional usado quando a linha não informa um.
+        senha_padrao (str, opcional): Senha inicial quando a linha não informa uma.
+    Returns:
+        PacienteValidado: Linha pronta para criptografia e gravação.
+    Raises:
+        ValueError: Com o motivo da rejeição.
+    """
+    nome = registro.get("nome", "")
+    diagnostico = registro.get("diagnostico", "")
+    if not nome or not diagnostico:
+        raise ValueError("nome e diagnóstico são obrigatórios")
+    try:
+        idade = int(registro.get("idade", ""))
+    except ValueError:
+        raise ValueError(f"idade inválida: {registro.get('idade')!r}")
+    if not 0 <= idade <= 120:
+        raise ValueError(f"idade fora do intervalo 0-120: {idade}")
+    email = (registro.get("email") or email_padrao_paciente(nome)).lower()
+    if not EMAIL_PATTERN.match(email):
+        raise ValueError(f"e-mail inválido: {email}")
+    referencia = registro.get("profissional", "").lower()
+    if referencia:
+        if referencia not in profissionais:
+            raise ValueError(f"profissional não encontrado ou inativo: {registro['profissional']}")
+        profissional_id = profissionais[referencia]
+    elif profissional_padrao is not None:
+        profissional_id = profissional_padrao
+    else:
+        raise ValueError("profissional responsável não informado")
+    senha = registro.get("senha") or senha_padrao
+    return PacienteValidado(numero, nome, email, senha, profissional_id, {"idade": idade, "diagnostico": diagnostico})
+
+
+_fernet = None
+
+
+def _iniciar_criptografia(chave):
+    global _fernet
+    _fernet = Fernet(chave.encode())
+
+
+def _criptografar(dados):
+    return _fernet.encrypt(json.dumps(dados).encode()).decode()
+
+
+def criar_pool(chave, trabalhadores):
+    """
+    Cria o pool de processos que criptografa os dados médicos.
+
+    Usa "spawn": o Streamlit roda várias threads e fork com threads ativas não é seguro.
+
+    Args:
+        chave (str): Chave Fernet.
+        trabalhadores (int): Número de processos.
+    Returns:
+        ProcessPoolExecutor: Pool com a chave já carregada em cada processo.
+    """
+    return ProcessPoolExecutor(
+        max_workers=trabalhadores, mp_context=multiprocessing.get_context("spawn"),
+        initializer=_iniciar_criptografia, initargs=(chave,),
+    )
+
+
+def inserir_lote(cursor, lote, cifrados, autor_id, chave_indice=None):
+    """
+    Grava um lote de pacientes com um INSERT de várias linhas em usuarios e outro em pacientes.
+
+    E-mails já cadastrados são ignorados pelo ON CONFLICT e relatados como duplicados.
+
+    Args:
+        cursor: Cursor psycopg2 aberto (o commit fica a cargo de quem chama).
+        lote (list): PacienteValidado do lote.
+        cifrados (list): Dados médicos criptografados, na ordem do lote.
+        autor_id (int): Usuário que executou a importação (auditoria).
+        chave_indice (bytes, opcional): Chave HMAC dos índices cegos (indice_cego.py).
+    Returns:
+        list: ResultadoLinha de cada linha do lote.
+    """
+    hashes = {}
+    valores = []
+    for paciente in lote:
+        if paciente.senha not in hashes:
+            hashes[paciente.senha] = hash_senha(paciente.senha)
+        valores.append((paciente.nome, paciente.email, hashes[paciente.senha], "Paciente", True))
+    criados = {email: id_ for id_, email in execute_values(cursor, SQL_IMPORTAR_USUARIOS, valores, page_size=len(valores), fetch=True)}
+    pacientes, resultados = [], []
+    for paciente, cifrado in zip(lote, cifrados):
+        if paciente.email in criados:
+            pacientes.append((criados[paciente.email], paciente.profissional_id, cifrado, *colunas_indice(chave_indice, paciente.dados)))
+            resultados.append(ResultadoLinha(paciente.linha, paciente.email, IMPORTADO, f"usuário {criados[paciente.email]}"))
+        else:
+            resultados.append(ResultadoLinha(paciente.linha, paciente.email, DUPLICADO, "e-mail já cadastrado"))
+    if pacientes:
+        execute_values(cursor, SQL_INSERIR_PACIENTES, pacientes, page_size=len(pacientes))
+        primeira, ultima = lote[0].linha, lote[-1].linha
+        cursor.execute(SQL_REGISTRAR_AUDITORIA, (autor_id, "Importação de pacientes em lote", f"{len(pacientes)} pacientes importados (linhas {primeira}-{ultima})"))
+    return resultados
+
+
+def _gravar(conn, lote, cifrados, autor_id, chave_indice):
+    # Uma transação por lote: uma falha só afeta as linhas do próprio lote
+    try:
+        cifrados = list(cifrados) if cifrados is not None else [_criptografar(p.dados) for p in lote]
+        resultados = inserir_lote(conn.cursor(), lote, cifrados, autor_id, chave_indice)
+        conn.commit()
+        return resultados
+    except Exception as e:
+        conn.rollback()
+        motivo = str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__
+        return [ResultadoLinha(p.linha, p.email, FALHA, motivo) for p in lote]
+
+
+def importar_pacientes(conn, arquivo, chave, autor_id, profissional_padrao=None, senha_padrao=SENHA_INICIAL,
+                       tamanho_lote=TAMANHO_LOTE, trabalhadores=None, progresso=None, chave_indice=None):
+    """
+    Importa um CSV de pacientes, em lotes, e retorna o relatório por linha.
+
+    Args:
+        conn: Conexão psycopg2 (cada lote é confirmado com commit).
+        arquivo: Arquivo texto aberto com o CSV.
+        chave (str): Chave Fernet dos dados médicos.
+        autor_id (int): Usuário que executou a importação (auditoria).
+        profissional_padrao (int, opcional): Profissional das linhas que não informam um.
+        senha_padrao (str, opcional): Senha inicial das linhas que não informam uma.
+        tamanho_lote (int, opcional): Linhas por transação. Default: 1000.
+        trabalhadores (int, opcional): Processos de criptografia (padrão: número de CPUs;
+            1 criptografa no próprio processo).
+        progresso (callable, opcional): Chamado após cada lote com a lista de resultados até ali.
+        chave_indice (bytes, opcional): Chave HMAC dos índices cegos de diagnóstico.
+    Returns:
+        list: ResultadoLinha de todas as linhas, na ordem do arquivo.
+    Raises:
+        ValueError: Se o cabeçalho do CSV não tiver as colunas obrigatórias.
+    """
+    trabalhadores = trabalhadores or os.cpu_count() or 1
+    _iniciar_criptografia(chave)
+    profissionais = carregar_profissionais(conn.cursor())
+    conn.commit()
+    resultados, vistos, lote = [], set(), []
+    pool = None
+    pendente = None
+
+    def enviar(lote):
+        # O pool só é criado quando aparece um lote completo: arquivos pequenos não pagam a partida dos processos.
+        # O lote é enviado ao pool antes de gravar o anterior, sobrepondo criptografia e escrita.
+        nonlocal pool, pendente
+        if pool is None and trabalhadores > 1 and len(lote) == tamanho_lote:
+            pool = criar_pool(chave, trabalhadores)
+        cifrados = None
+        if pool is not None:
+            cifrados = pool.map(_criptografar, [p.dados for p in lote], chunksize=max(1, len(lote) // (trabalhadores * 4)))
+        if pendente is not None:
+            resultados.extend(_gravar(conn, *pendente, autor_id, chave_indice))
+            if progresso:
+                progresso(resultados)
+        pendente = (lote, cifrados)
+
+    try:
+        for numero, registro in ler_csv_pacientes(arquivo):
+            try:
+                paciente = validar_paciente(numero, registro, profissionais, profissional_padrao, senha_padrao)
+            except ValueError as e:
+                resultados.append(ResultadoLinha(numero, registro.get("email", ""), INVALIDO, str(e)))
+                continue
+            if paciente.email in vistos:
+                resultados.append(ResultadoLinha(numero, paciente.email, DUPLICADO, "e-mail repetido no arquivo"))
+                continue
+            vistos.add(paciente.email)
+            lote.append(paciente)
+            if len(lote) == tamanho_lote:
+                enviar(lote)
+                lote = []
+        if lote:
+            enviar(lote)
+        if pendente is not None:
+            resultados.extend(_gravar(conn, *pendente, autor_id, chave_indice))
+            if progresso:
+                progresso(resultados)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    return sorted(resultados)
+
+
+def resumir_resultados(resultados):
+    """Conta as linhas do relatório por situação."""
+    resumo = {IMPORTADO: 0, DUPLICADO: 0, INVALIDO: 0, FALHA: 0}
+    for resultado in resultados:
+        resumo[resultado.situacao] += 1
+    return resumo
+
+
+def escrever_relatorio(resultados, destino):
+    """
+    Grava o relatório por linha em CSV.
+
+    Args:
+        resultados (list): ResultadoLinha da importação.
+        destino: Arquivo texto aberto.
+    """
+    escritor = csv.writer(destino)
+    escritor.writerow(ResultadoLinha._fields)
+    escritor.writerows(resultados)
@@ -0,0 +1,274 @@
+"""
+Perfilamento sob demanda de reruns do Streamlit e de jobs em segundo plano.
+
+Desligado por padrão. Liga-se para todo o processo com a variável PERFILAMENTO
+("cprofile", "amostragem" ou "ambos"; "1" equivale a "ambos") ou, para uma única sessão,
+pela opção "Perfilar esta sessão" do menu lateral do administrador.
+
+Cada rerun/job perfilado gera, em PERFIS_DIR (padrão: ./perfis):
+    <prefixo>.prof    estatísticas do cProfile (pstats, snakeviz)
+    <prefixo>.folded  pilhas amostradas no formato "collapsed" (flamegraph.pl, speedscope)
+    <prefixo>.json    página, tempos de relógio/CPU/banco e funções mais custosas
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import pstats
+import logging
+import cProfile
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+import instrumentacao
+
+logger = logging.getLogger("telemonitoramento.perfilamento")
+
+MODOS = ("cprofile", "amostragem", "ambos")
+INTERVALO_AMOSTRAGEM_MS = float(os.getenv("PERFIL_INTERVALO_MS", "5"))
+
+# Funções cujo custo acumulado é destacado no resumo: (nome da função, trecho do caminho do arquivo)
+FUNCOES_DESTAQUE = {
+    "descriptografar_dados": ("descriptografar_dados", ""),
+    "criptografar_dados": ("criptografar_dados", ""),
+    "pandas.DataFrame": ("__init__", os.path.join("pandas", "core", "frame.py")),
+    "matplotlib (render)": ("print_figure", "matplotlib"),
+    "plotly (figura)": ("__init__", os.path.join("plotly", "basedatatypes.py")),
+}
+
+
+def modo_configurado():
+    """
+    Retorna o modo de perfilamento definido pela variável PERFILAMENTO.
+
+    Returns:
+        str or None: "cprofile", "amostragem", "ambos" ou None (desligado).
+    """
+    valor = (os.getenv("PERFILAMENTO") or "").strip().lower()
+    if valor in ("", "0", "false", "nao", "não"):
+        return None
+    if valor in ("1", "true", "sim"):
+        return "ambos"
+    if valor not in MODOS:
+        logger.warning("PERFILAMENTO=%s inválido; usando 'ambos'", valor)
+        return "ambos"
+    return valor
+
+
+def diretorio_perfis():
+    return os.getenv("PERFIS_DIR") or os.path.join(os.getcwd(), "perfis")
+
+
+def _descrever_codigo(codigo):
+    return f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})"
+
+
+class Amostrador(threading.Thread):
+    """Amostra periodicamente a pilha de uma thread e conta as pilhas no formato "collapsed"."""
+
+    def __init__(self, thread_id, intervalo_ms=INTERVALO_AMOSTRAGEM_MS):
+        super().__init__(name=f"amostrador-{thread_id}", daemon=True)
+        self.thread_id = thread_id
+        self.intervalo = intervalo_ms / 1000
+        self.pilhas = Counter()
+        self.amostras = 0
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            pilha = []
+            while frame is not None:
+                pilha.append(_descrever_codigo(frame.f_code))
+                frame = frame.f_back
+            self.pilhas[";".join(reversed(pilha))] += 1
+            self.amostras += 1
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+    def exportar_folded(self):
+        return "".join(f"{pilha} {qtd}\n" for pilha, qtd in self.pilhas.most_common())
+
+
+def resumir_estatisticas(estatisticas, n=15):
+    """
+    Extrai as funções mais custosas e o custo das funções em destaque.
+
+    Args:
+        estatisticas (pstats.Stats): Estatísticas do cProfile.
+        n (int, opcional): Quantidade de funções no ranking. Default: 15.
+    Returns:
+        tuple: (lista de funções mais custosas, dict destaque -> segundos acumulados).
+    """
+    itens = []
+    destaques = {nome: 0.0 for nome in FUNCOES_DESTAQUE}
+    for (arquivo, linha, funcao), (cc, nc, tt, ct, _) in estatisticas.stats.items():
+        itens.append({"funcao": f"{funcao} ({os.path.basename(arquivo)}:{linha})", "chamadas": nc, "proprio_s": round(tt, 6), "acumulado_s": round(ct, 6)})
+        for nome, (nome_funcao, trecho) in FUNCOES_DESTAQUE.items():
+            if funcao == nome_funcao and trecho in arquivo:
+                destaques[nome] += ct
+    itens.sort(key=lambda item: item["acumulado_s"], reverse=True)
+    return itens[:n], {nome: round(valor, 6) for nome, valor in destaques.items()}
+
+
+class Perfil:
+    """Perfil de um rerun ou job, restrito à thread que o iniciou."""
+
+    def __init__(self, nome, modo):
+        self.nome = nome
+        self.modo = modo
+        self.encerrado = False
+        self.profiler = None
+        self.amostrador = None
+        if modo in ("cprofile", "ambos"):
+            self.profiler = cProfile.Profile()
+            try:
+                self.profiler.enable()
+            except ValueError:
+                logger.warning("Outro profiler já está ativo; perfil '%s' seguirá apenas com amostragem", nome)
+                self.profiler = None
+        if modo in ("amostragem", "ambos") or self.profiler is None:
+            self.amostrador = Amostrador(threading.get_ident())
+            self.amostrador.start()
+        self.inicio_relogio = time.perf_counter()
+        self.inicio_cpu = time.thread_time()
+        self.iniciado_em = datetime.now()
+
+    def encerrar(self):
+        """
+        Para a coleta e grava os arquivos do perfil.
+
+        Returns:
+            str or None: Caminho do arquivo JSON de resumo (None se não foi possível gravar).
+        """
+        if self.encerrado:
+            return None
+        self.encerrado = True
+        duracao = time.perf_counter() - self.inicio_relogio
+        cpu = time.thread_time() - self.inicio_cpu
+        if self.profiler is not None:
+            self.profiler.disable()
+        if self.amostrador is not None:
+            self.amostrador.parar()
+
+        medicao = instrumentacao.escopo_atual()
+        slug = re.sub(r"[^\w-]+", "_", self.nome).strip("_") or "perfil"
+        prefixo = os.path.join(diretorio_perfis(), f"{self.iniciado_em:%Y%m%d-%H%M%S}-{slug}-{uuid.uuid4().hex[:6]}")
+        resumo = {
+            "nome": self.nome,
+            "modo": self.modo,
+            "iniciado_em": self.iniciado_em.isoformat(timespec="seconds"),
+            "duracao_ms": round(duracao * 1000, 3),
+            "cpu_ms": round(cpu * 1000, 3),
+            "consultas": medicao.consultas if medicao else None,
+            "tempo_db_ms": round(medicao.tempo_db * 1000, 3) if medicao else None,
+            "arquivos": {},
+        }
+        try:
+            os.makedirs(diretorio_perfis(), exist_ok=True)
+            if self.profiler is not None:
+                estatisticas = pstats.Stats(self.profiler)
+                estatisticas.dump_stats(prefixo + ".prof")
+                resumo["arquivos"]["cprofile"] = prefixo + ".prof"
+                resumo["mais_custosas"], resumo["destaques_s"] = resumir_estatisticas(estatisticas)
+            if self.amostrador is not None:
+                with open(prefixo + ".folded", "w", encoding="utf-8") as f:
+                    f.write(self.amostrador.exportar_folded())
+                resumo["arquivos"]["folded"] = prefixo + ".folded"
+                resumo["amostras"] = self.amostrador.amostras
+            with open(prefixo + ".json", "w", encoding="utf-8") as f:
+                json.dump(resumo, f, ensure_ascii=False, indent=2)
+        except Exception:
+            logger.exception("Erro ao gravar o perfil '%s'", self.nome)
+            return None
+        logger.info("Perfil '%s' gravado em %s.json (%.1f ms, %.1f ms de CPU)", self.nome, prefixo, duracao * 1000, cpu * 1000)
+        return prefixo + ".json"
+
+
+_local = threading.local()
+
+
+def perfil_atual():
+    """Retorna o perfil ativo na thread corrente (ou None)."""
+    return getattr(_local, "perfil", None)
+
+
+def iniciar_perfil(nome, sessao=False):
+    """
+    Inicia o perfilamento do rerun corrente, se ativado por variável de ambiente ou pela sessão.
+
+    Um perfil anterior ainda aberto na mesma thread (rerun interrompido) é encerrado antes.
+
+    Args:
+        nome (str): Nome do rerun ou job, ex: "pagina:Pacientes".
+        sessao (bool, opcional): True se o administrador ativou o perfilamento para a sessão.
+    Returns:
+        Perfil or None: O perfil iniciado, ou None se o perfilamento estiver desligado.
+    """
+    encerrar_perfil()
+    modo = modo_configurado() or ("ambos" if sessao else None)
+    if not modo:
+        return None
+    _local.perfil = Perfil(nome, modo)
+    return _local.perfil
+
+
+def renomear_perfil(nome):
+    """Renomeia o perfil corrente (a página só é conhecida depois do login e do menu)."""
+    atual = perfil_atual()
+    if atual is not None:
+        atual.nome = nome
+
+
+def encerrar_perfil():
+    """
+    Encerra o perfil corrente e grava seus arquivos.
+
+    Returns:
+        str or None: Caminho do resumo JSON gravado.
+    """
+    atual = perfil_atual()
+    _local.perfil = None
+    if atual is None:
+        return None
+    return atual.encerrar()
+
+
+@contextmanager
+def perfil(nome):
+    """
+    Context manager que perfila um job em segundo plano quando PERFILAMENTO estiver ativo.
+
+    Exemplo:
+        with perfil("job:lembretes"):
+            executar_job()
+    """
+    anterior = perfil_atual()
+    _local.perfil = None
+    novo = iniciar_perfil(nome)
+    try:
+        yield novo
+    finally:
+        encerrar_perfil()
+        _local.perfil = anterior
+
+
+def perfilar_job(nome):
+    """Decorador equivalente a perfil(nome) para funções de job."""
+    def decorador(funcao):
+        @wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with perfil(nome):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorador
@@ -0,0 +1,443 @@
+"""
+Perfis de limites de alerta por paciente, com herança e índice compilado em memória.
+
+Os limites de um paciente são resolvidos em camadas, da mais geral para a mais específica:
+
+1. parâmetros globais (última linha de parametros_alerta);
+2. perfil do profissional responsável (profissionais.perfil_alerta_id);
+3. perfil do paciente (pacientes.perfil_alerta_id);
+4. ajustes individuais do paciente (limites_paciente).
+
+Em perfis e ajustes, colunas NULL herdam o valor da camada anterior. IndiceLimites guarda,
+por paciente, apenas as referências às camadas e compila cada combinação distinta uma única
+vez: avaliar uma leitura não consulta o banco. Triggers publicam no canal de notificações
+cada perfil, atribuição ou ajuste alterado; o índice recarrega só o que mudou na próxima
+sincronização (sincronizar), e combinações afetadas são recompiladas sob demanda.
+"""
+
+import re
+import logging
+import threading
+
+from alertas import PARAMETROS_PADRAO, parametros_de_linha
+from consultas import SQL_PARAMETROS_ALERTA
+from notificacoes import CANAL
+
+logger = logging.getLogger("telemonitoramento.perfis_alerta")
+
+CAMPOS = ("temp_min", "temp_max", "freq_min", "freq_max", "sat_min", "pressao_min", "pressao_max")
+PRESSAO_LIMITE_PATTERN = r'^\d{2,3}/\d{2,3}$'
+# Tabela dos eventos publicados no canal de notificações
+TABELA_EVENTOS = "limites_alerta"
+
+COLUNAS_LIMITES = """
+    temp_min FLOAT, temp_max FLOAT,
+    freq_min INTEGER, freq_max INTEGER,
+    sat_min INTEGER,
+    pressao_min VARCHAR(10), pressao_max VARCHAR(10)
+"""
+COLUNAS_PERFIL = [
+    "ALTER TABLE pacientes ADD COLUMN IF NOT EXISTS perfil_alerta_id INTEGER REFERENCES perfis_alerta(id) ON DELETE SET NULL",
+    "ALTER TABLE profissionais ADD COLUMN IF NOT EXISTS perfil_alerta_id INTEGER REFERENCES perfis_alerta(id) ON DELETE SET NULL",
+]
+INDICES = [
+    "CREATE INDEX IF NOT EXISTS idx_pacientes_perfil_alerta ON pacientes (perfil_alerta_id) WHERE perfil_alerta_id IS NOT NULL",
+]
+# Tabela -> (coluna publicada como id, operações, condição WHEN)
+GATILHOS = {
+    "parametros_alerta": ("id", "INSERT OR UPDATE OR DELETE", None),
+    "perfis_alerta": ("id", "INSERT OR UPDATE OR DELETE", None),
+    "limites_paciente": ("paciente_id", "INSERT OR UPDATE OR DELETE", None),
+    "pacientes": ("id", "UPDATE", "OLD.perfil_alerta_id IS DISTINCT FROM NEW.perfil_alerta_id"
+                  " OR OLD.id_profissional_responsavel IS DISTINCT FROM NEW.id_profissional_responsavel"),
+    "profissionais": ("id_usuario", "UPDATE", "OLD.perfil_alerta_id IS DISTINCT FROM NEW.perfil_alerta_id"),
+}
+
+_SELECT_CAMPOS = ", ".join(CAMPOS)
+SQL_PERFIS = f"SELECT id, nome, {_SELECT_CAMPOS} FROM perfis_alerta"
+SQL_PERFIS_PROFISSIONAIS = "SELECT id_usuario, perfil_alerta_id FROM profissionais WHERE perfil_alerta_id IS NOT NULL"
+SQL_PACIENTES = f"""
+    SELECT p.id, p.id_profissional_responsavel, p.perfil_alerta_id, {", ".join("l." + c for c in CAMPOS)}
+    FROM pacientes p LEFT JOIN limites_paciente l ON l.paciente_id = p.id
+"""
+
+
+def criar_estrutura(cursor):
+    """
+    Cria as tabelas de perfis e ajustes, as colunas de atribuição e os triggers de notificação.
+
+    Deve rodar depois da criação de pacientes, profissionais e parametros_alerta.
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+    """
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS perfis_alerta (
+            id SERIAL PRIMARY KEY,
+            nome VARCHAR(100) NOT NULL UNIQUE,
+            {COLUNAS_LIMITES},
+            atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS limites_paciente (
+            paciente_id INTEGER PRIMARY KEY REFERENCES pacientes(id) ON DELETE CASCADE,
+            {COLUNAS_LIMITES},
+            atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    for sql in COLUNAS_PERFIL + INDICES:
+        cursor.execute(sql)
+    cursor.execute(f"""
+        CREATE OR REPLACE FUNCTION notificar_limites_alerta() RETURNS trigger AS $$
+        DECLARE
+            linha JSONB;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                linha := to_jsonb(OLD);
+            ELSE
+                linha := to_jsonb(NEW);
+            END IF;
+            PERFORM pg_notify('{CANAL}', jsonb_build_object(
+                'tabela', '{TABELA_EVENTOS}', 'origem', TG_TABLE_NAME, 'id', linha->TG_ARGV[0]
+            )::text);
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for tabela, (coluna, operacoes, condicao) in GATILHOS.items():
+        quando = f"WHEN ({condicao})" if condicao else ""
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_limites_{tabela} ON {tabela}")
+        cursor.execute(f"""
+            CREATE TRIGGER trg_limites_{tabela} AFTER {operacoes} ON {tabela}
+            FOR EACH ROW {quando} EXECUTE FUNCTION notificar_limites_alerta('{coluna}')
+        """)
+
+
+def validar_limites(limites):
+    """
+    Valida os limites de um perfil ou ajuste (campos vazios são herdados).
+
+    Args:
+        limites (dict): Campo -> valor (None ou ausente = herdado).
+    Returns:
+        list: Mensagens de erro (vazia se válido).
+    """
+    erros = []
+    for minimo, maximo in (("temp_min", "temp_max"), ("freq_min", "freq_max")):
+        if limites.get(minimo) is not None and limites.get(maximo) is not None and limites[minimo] >= limites[maximo]:
+            erros.append(f"{minimo} deve ser menor que {maximo}")
+    for campo in ("pressao_min", "pressao_max"):
+        valor = limites.get(campo)
+        if valor is not None and not re.match(PRESSAO_LIMITE_PATTERN, valor):
+            erros.append(f"{campo} deve estar no formato 120/80")
+    return erros
+
+
+def compilar_limites(globais, *camadas):
+    """
+    Aplica as camadas de limites sobre os globais, na ordem informada.
+
+    Args:
+        globais (dict): Limites globais completos.
+        *camadas: Dicionários ou tuplas na ordem de CAMPOS (None = camada ausente; valores None são herdados).
+    Returns:
+        dict: Limites completos, no formato de alertas.avaliar_alertas.
+    """
+    limites = dict(globais)
+    for camada in camadas:
+        if camada is None:
+            continue
+        valores = camada.items() if isinstance(camada, dict) else zip(CAMPOS, camada)
+        limites.update((campo, valor) for campo, valor in valores if valor is not None)
+    return limites
+
+
+def _ajustes(valores):
+    """Tupla de ajustes na ordem de CAMPOS (None quando nenhum campo foi definido)."""
+    valores = tuple(valores)
+    return valores if any(v is not None for v in valores) else None
+
+
+class IndiceLimites:
+    """
+    Limites de alerta compilados por paciente, atualizados incrementalmente.
+
+    Funciona também como assinatura da thread ouvinte (notificacoes.Ouvinte): os eventos de
+    alteração ficam pendentes e são aplicados em sincronizar(), que só consulta o banco
+    quando há algo a atualizar. Leituras (limites) não usam lock nem banco.
+    """
+
+    def __init__(self):
+        self.globais = dict(PARAMETROS_PADRAO)
+        self.perfis = {}                # perfil_id -> (nome, tupla de limites)
+        self.perfil_profissional = {}   # id de usuário do profissional -> perfil_id
+        self.pacientes = {}             # paciente_id -> (profissional, perfil_id, ajustes)
+        self.compilados = {}            # (perfil do profissional, perfil do paciente, ajustes) -> limites
+        self._lock = threading.Lock()
+        self._pendentes = set()
+        self._recarregar = True
+
+    # Interface de assinatura (chamada pela thread ouvinte)
+    def interessa(self, evento):
+        return evento.get("tabela") == TABELA_EVENTOS
+
+    def notificar(self, evento):
+        with self._lock:
+            if evento.get("em_massa"):
+                self._recarregar = True
+            else:
+                self._pendentes.add((evento.get("origem"), evento["id"]))
+
+    def recarregar_tudo(self):
+        with self._lock:
+            self._recarregar = True
+
+    def limites(self, paciente_id=None):
+        """
+        Limites efetivos de um paciente (os globais se ele for desconhecido ou None).
+
+        Returns:
+            dict: Limites no formato de alertas.avaliar_alertas (não alterar).
+        """
+        profissional, perfil, ajustes = self.pacientes.get(paciente_id, (None, None, None))
+        chave = (self.perfil_profissional.get(profissional), perfil, ajustes)
+        limites = self.compilados.get(chave)
+        if limites is None:
+            perfil_prof, perfil_pac, _ = chave
+            limites = compilar_limites(
+                self.globais, self._camada_perfil(perfil_prof), self._camada_perfil(perfil_pac), ajustes
+            )
+            self.compilados[chave] = limites
+        return limites
+
+    def _camada_perfil(self, perfil_id):
+        perfil = self.perfis.get(perfil_id)
+        return perfil[1] if perfil else None
+
+    def carregar(self, cursor):
+        """Carrega todas as camadas do banco, substituindo o conteúdo do índice."""
+        cursor.execute(SQL_PARAMETROS_ALERTA)
+        globais = parametros_de_linha(cursor.fetchone())
+        cursor.execute(SQL_PERFIS)
+        perfis = {id_: (nome, tuple(valores)) for id_, nome, *valores in cursor.fetchall()}
+        cursor.execute(SQL_PERFIS_PROFISSIONAIS)
+        perfil_profissional = dict(cursor.fetchall())
+        cursor.execute(SQL_PACIENTES)
+        pacientes = {id_: (prof, perfil, _ajustes(valores)) for id_, prof, perfil, *valores in cursor.fetchall()}
+        self.globais, self.perfis = globais, perfis
+        self.perfil_profissional, self.pacientes = perfil_profissional, pacientes
+        self.compilados = {}
+        logger.info("Índice de limites carregado: %d pacientes, %d perfis", len(pacientes), len(perfis))
+
+    def aplicar(self, cursor, eventos):
+        """
+        Recarrega apenas as linhas indicadas pelos eventos.
+
+        Args:
+            cursor: Cursor psycopg2 aberto.
+            eventos (iterable): Pares (tabela de origem, id).
+        """
+        por_origem = {}
+        for origem, id_ in eventos:
+            por_origem.setdefault(origem, set()).add(id_)
+        if "parametros_alerta" in por_origem:
+            cursor.execute(SQL_PARAMETROS_ALERTA)
+            self.globais = parametros_de_linha(cursor.fetchone())
+            self.compilados = {}
+        if "perfis_alerta" in por_origem:
+            ids = list(por_origem["perfis_alerta"])
+            cursor.execute(SQL_PERFIS + " WHERE id = ANY(%s)", (ids,))
+            encontrados = {id_: (nome, tuple(valores)) for id_, nome, *valores in cursor.fetchall()}
+            for id_ in ids:
+                if id_ in encontrados:
+                    self.perfis[id_] = encontrados[id_]
+                else:
+                    self.perfis.pop(id_, None)
+            alterados = set(ids)
+            self.compilados = {
+                chave: limites for chave, limites in self.compilados.items()
+                if chave[0] not in alterados and chave[1] not in alterados
+            }
+        if "profissionais" in por_origem:
+            ids = list(por_origem["profissionais"])
+            cursor.execute("SELECT id_usuario, perfil_alerta_id FROM profissionais WHERE id_usuario = ANY(%s)", (ids,))
+            encontrados = dict(cursor.fetchall())
+            for id_ in ids:
+                if encontrados.get(id_) is not None:
+                    self.perfil_profissional[id_] = encontrados[id_]
+                else:
+                    self.perfil_profissional.pop(id_, None)
+        pacientes = por_origem.get("pacientes", set()) | por_origem.get("limites_paciente", set())
+        if pacientes:
+            self.carregar_pacientes(cursor, pacientes)
+
+    def carregar_pacientes(self, cursor, ids):
+        """Recarrega as camadas de alguns pacientes (ids inexistentes passam a usar os globais)."""
+        ids = list(ids)
+        cursor.execute(SQL_PACIENTES + " WHERE p.id = ANY(%s)", (ids,))
+        for id_, prof, perfil, *valores in cursor.fetchall():
+            self.pacientes[id_] = (prof, perfil, _ajustes(valores))
+        for id_ in ids:
+            self.pacientes.setdefault(id_, (None, None, None))
+
+    def sincronizar(self, conectar, pacientes=()):
+        """
+        Aplica as alterações pendentes e carrega pacientes ainda desconhecidos.
+
+        Sem eventos pendentes e com todos os pacientes conhecidos, não abre conexão.
+
+        Args:
+            conectar (callable): Abre uma conexão psycopg2.
+            pacientes (iterable, opcional): Pacientes que serão avaliados em seguida.
+        """
+        with self._lock:
+            recarregar, self._recarregar = self._recarregar, False
+            eventos, self._pendentes = self._pendentes, set()
+        faltantes = [p for p in pacientes if p is not None and p not in self.pacientes]
+        if not (recarregar or eventos or faltantes):
+            return
+        conn = conectar()
+        try:
+            cursor = conn.cursor()
+            if recarregar:
+                self.carregar(cursor)
+            else:
+                self.aplicar(cursor, eventos)
+            faltantes = [p for p in faltantes if p not in self.pacientes]
+            if faltantes:
+                self.carregar_pacientes(cursor, faltantes)
+            conn.rollback()
+        except Exception:
+            # Sem saber o que foi aplicado, a próxima sincronização recarrega tudo
+            self.recarregar_tudo()
+            raise
+        finally:
+            conn.close()
+
+
+_indice = None
+_lock_indice = threading.Lock()
+
+
+def obter_indice(ouvinte=None):
+    """
+    Retorna o índice de limites do processo, criando-o na primeira chamada.
+
+    Args:
+        ouvinte (notificacoes.Ouvinte, opcional): Thread ouvinte em que o índice é assinado
+            (sem ela, o índice só é atualizado por recarregar_tudo).
+    Returns:
+        IndiceLimites: Índice compartilhado pelas sessões do processo.
+    """
+    global _indice
+    with _lock_indice:
+        if _indice is None:
+            _indice = IndiceLimites()
+        if ouvinte is not None:
+            ouvinte.assinar(_indice)
+        return _indice
+
+
+def listar_perfis(cursor):
+    """
+    Lista os perfis cadastrados.
+
+    Returns:
+        list: (id, nome, dicionário de limites definidos) ordenados por nome.
+    """
+    cursor.execute(SQL_PERFIS + " ORDER BY nome")
+    return [(id_, nome, dict(zip(CAMPOS, valores))) for id_, nome, *valores in cursor.fetchall()]
+
+
+def salvar_perfil(cursor, nome, limites, perfil_id=None):
+    """
+    Cria ou atualiza um perfil de limites.
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+        nome (str): Nome do perfil (ex.: "DPOC", "Pediátrico").
+        limites (dict): Campo -> valor (None = herdado).
+        perfil_id (int, opcional): Perfil a atualizar (None cria um novo).
+    Returns:
+        int: ID do perfil.
+    Raises:
+        ValueError: Se o nome estiver vazio ou os limites forem inválidos.
+    """
+    nome = (nome or "").strip()
+    erros = validar_limites(limites)
+    if not nome:
+        erros.insert(0, "informe o nome do perfil")
+    if erros:
+        raise ValueError("; ".join(erros))
+    valores = [limites.get(c) for c in CAMPOS]
+    if perfil_id is None:
+        cursor.execute(
+            f"INSERT INTO perfis_alerta (nome, {_SELECT_CAMPOS}) VALUES (%s, {', '.join(['%s'] * len(CAMPOS))}) RETURNING id",
+            [nome] + valores,
+        )
+        return cursor.fetchone()[0]
+    atribuicoes = ", ".join(f"{c} = %s" for c in CAMPOS)
+    cursor.execute(
+        f"UPDATE perfis_alerta SET nome = %s, {atribuicoes}, atualizado_em = NOW() WHERE id = %s",
+        [nome] + valores + [perfil_id],
+    )
+    return perfil_id
+
+
+def atribuir_perfil(cursor, tipo, id_, perfil_id):
+    """
+    Atribui (ou remove, com perfil_id None) o perfil de um paciente ou profissional.
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+        tipo (str): "paciente" (id de pacientes) ou "profissional" (id de usuário).
+        id_ (int): Paciente ou profissional.
+        perfil_id (int or None): Perfil atribuído.
+    """
+    if tipo == "paciente":
+        cursor.execute("UPDATE pacientes SET perfil_alerta_id = %s WHERE id = %s", (perfil_id, id_))
+    elif tipo == "profissional":
+        cursor.execute("UPDATE profissionais SET perfil_alerta_id = %s WHERE id_usuario = %s", (perfil_id, id_))
+    else:
+        raise ValueError(f"Tipo de atribuição desconhecido: {tipo}")
+
+
+def salvar_ajustes_paciente(cursor, paciente_id, limites):
+    """
+    Grava os ajustes individuais de um paciente (todos vazios removem os ajustes).
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+        paciente_id (int): Paciente.
+        limites (dict): Campo -> valor (None = herdado do perfil).
+    Raises:
+        ValueError: Se os limites forem inválidos.
+    """
+    erros = validar_limites(limites)
+    if erros:
+        raise ValueError("; ".join(erros))
+    valores = [limites.get(c) for c in CAMPOS]
+    if all(v is None for v in valores):
+        cursor.execute("DELETE FROM limites_paciente WHERE paciente_id = %s", (paciente_id,))
+        return
+    atribuicoes = ", ".join(f"{c} = EXCLUDED.{c}" for c in CAMPOS)
+    cursor.execute(f"""
+        INSERT INTO limites_paciente (paciente_id, {_SELECT_CAMPOS}) VALUES (%s, {', '.join(['%s'] * len(CAMPOS))})
+        ON CONFLICT (paciente_id) DO UPDATE SET {atribuicoes}, atualizado_em = NOW()
+    """, [paciente_id] + valores)
+
+
+def ler_ajustes_paciente(cursor, paciente_id):
+    """
+    Retorna o perfil atribuído e os ajustes individuais de um paciente.
+
+    Returns:
+        tuple: (perfil_id or None, dicionário de ajustes com None nos campos herdados).
+    """
+    cursor.execute(SQL_PACIENTES + " WHERE p.id = %s", (paciente_id,))
+    linha = cursor.fetchone()
+    if not linha:
+        return None, dict.fromkeys(CAMPOS)
+    _, _, perfil, *valores = linha
+    return perfil, dict(zip(CAMPOS, valores))
@@ -0,0 +1,119 @@
+"""
+Seletores de pacientes e usuários com busca no servidor.
+
+As telas não carregam mais a lista completa de usuários num selectbox: o usuário digita
+parte do nome ou do e-mail e o banco devolve as melhores correspondências
+(consultas.montar_consulta_seletor). Com 3 ou mais caracteres a busca usa índices de
+trigramas (pg_trgm) em usuarios.nome e usuarios.email; termos menores usam um índice de
+prefixo do nome. As buscas recentes ficam num cache por sessão, então redigitar um termo
+ou voltar a uma tela não consulta o banco de novo.
+"""
+
+import time
+from collections import OrderedDict
+
+from consultas import montar_consulta_seletor
+
+LIMITE_OPCOES = 10
+TAMANHO_CACHE = 64
+VALIDADE_CACHE_SEGUNDOS = 60
+
+SQL_EXTENSAO = "CREATE EXTENSION IF NOT EXISTS pg_trgm"
+INDICES = [
+    "CREATE INDEX IF NOT EXISTS idx_usuarios_nome_trgm ON usuarios USING GIN (nome gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_usuarios_email_trgm ON usuarios USING GIN (email gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_usuarios_nome_prefixo ON usuarios (lower(nome) text_pattern_ops)",
+]
+
+
+def criar_estrutura(cursor):
+    """
+    Cria a extensão pg_trgm e os índices de busca dos seletores.
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+    """
+    cursor.execute(SQL_EXTENSAO)
+    for sql in INDICES:
+        cursor.execute(sql)
+
+
+def normalizar_termo(termo):
+    """Chave de cache de um termo: sem espaços nas pontas e sem diferenciar maiúsculas."""
+    return " ".join((termo or "").split()).lower()
+
+
+def rotulo_opcao(id_, nome, email):
+    """Texto exibido no seletor; o e-mail diferencia homônimos."""
+    return f"{nome} · {email} (ID {id_})"
+
+
+class CacheBusca:
+    """
+    Cache LRU das buscas recentes de uma sessão.
+
+    Args:
+        tamanho (int): Número máximo de buscas guardadas.
+        validade (float): Segundos até uma busca ser refeita (novos cadastros aparecem).
+        relogio: Função de tempo (substituível em testes).
+    """
+
+    def __init__(self, tamanho=TAMANHO_CACHE, validade=VALIDADE_CACHE_SEGUNDOS, relogio=time.monotonic):
+        self.tamanho = tamanho
+        self.validade = validade
+        self.relogio = relogio
+        self.itens = OrderedDict()
+
+    def obter(self, chave):
+        """Retorna as opções guardadas para a chave (None se ausentes ou vencidas)."""
+        item = self.itens.get(chave)
+        if item is None:
+            return None
+        momento, opcoes = item
+        if self.relogio() - momento > self.validade:
+            del self.itens[chave]
+            return None
+        self.itens.move_to_end(chave)
+        return opcoes
+
+    def guardar(self, chave, opcoes):
+        """Guarda as opções de uma busca, descartando a menos usada se o cache estiver cheio."""
+        self.itens[chave] = (self.relogio(), opcoes)
+        self.itens.move_to_end(chave)
+        while len(self.itens) > self.tamanho:
+            self.itens.popitem(last=False)
+
+    def limpar(self):
+        self.itens.clear()
+
+
+def buscar_opcoes(conectar, entidade, termo, cache=None, limite=LIMITE_OPCOES):
+    """
+    Busca as opções de um seletor, consultando o banco apenas se a busca não estiver no cache.
+
+    Args:
+        conectar (callable): Abre uma conexão psycopg2 (só chamada em caso de falta no cache).
+        entidade (str): Chave de CONSULTAS_SELETOR ("usuarios", "profissionais", "profissionais_ativos" ou "pacientes").
+        termo (str): Texto digitado (vazio não consulta o banco).
+        cache (CacheBusca, opcional): Cache da sessão.
+        limite (int, opcional): Número máximo de opções. Default: 10.
+    Returns:
+        list: (id, rótulo) na ordem de relevância.
+    """
+    termo = normalizar_termo(termo)
+    if not termo:
+        return []
+    chave = (entidade, termo, limite)
+    opcoes = cache.obter(chave) if cache is not None else None
+    if opcoes is not None:
+        return opcoes
+    conn = conectar()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(*montar_consulta_seletor(entidade, termo, limite))
+        opcoes = [(id_, rotulo_opcao(id_, nome, email)) for id_, nome, email in cursor.fetchall()]
+    finally:
+        conn.close()
+    if cache is not None:
+        cache.guardar(chave, opcoes)
+    return opcoes
@@ -0,0 +1,317 @@
+"""
+Simulação de limites de alerta sobre o histórico de sinais vitais ("e se?").
+
+Reavalia as leituras de um período com limites globais candidatos e compara com os limites
+em vigor, sem alterar nada: quantos alertas cada um geraria por dia, por sinal vital e por
+profissional. Perfis e ajustes por paciente (perfis_alerta) continuam valendo; o candidato
+substitui apenas a camada global.
+
+Os pacientes são divididos em partições avaliadas num pool de processos. Cada partição lê
+as próprias leituras com COPY ... TO STDOUT e avalia todas de uma vez com NumPy (limites do
+paciente replicados por leitura). No modo "aplicar", os alertas resultantes são gravados
+em alertas via COPY, com status "retroativo", substituindo os de uma aplicação anterior no
+mesmo período.
+"""
+
+import io
+import os
+import csv
+import logging
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import psycopg2
+
+from alertas import TIPO_ALERTA_LIMITES
+from perfis_alerta import CAMPOS, IndiceLimites, compilar_limites
+
+logger = logging.getLogger("telemonitoramento.simulador_alertas")
+
+STATUS_RETROATIVO = "retroativo"
+VITAIS = ("temperatura", "pressao_alta", "pressao_baixa", "pressao_invalida", "frequencia", "saturacao")
+# Colunas da matriz de limites (pressões separadas em sistólica/diastólica)
+COLUNAS_LIMITES = ("temp_min", "temp_max", "freq_min", "freq_max", "sat_min", "sist_min", "diast_min", "sist_max", "diast_max")
+# Faixa aceita por alertas.validar_pressao; fora dela a pressão gera alerta de valor inválido
+SIST_FAIXA = (90, 180)
+DIAST_FAIXA = (60, 110)
+PARTICOES_POR_TRABALHADOR = 4
+COLUNAS_LEITURAS = ["paciente_id", "data_registro", "temperatura", "pressao", "frequencia", "saturacao", "sist", "diast"]
+SQL_LEITURAS = r"""
+    SELECT paciente_id, data_registro, temperatura, pressao, frequencia_cardiaca, saturacao,
+        CASE WHEN pressao ~ '^\d{2,3}/\d{2,3}$' THEN split_part(pressao, '/', 1)::int END,
+        CASE WHEN pressao ~ '^\d{2,3}/\d{2,3}$' THEN split_part(pressao, '/', 2)::int END
+    FROM sinais_vitais
+    WHERE paciente_id = ANY(%s) AND data_registro >= %s AND data_registro < %s
+"""
+COLUNAS_ALERTA = ["paciente_id", "tipo_alerta", "descricao", "status", "data_hora"]
+
+Resultado = namedtuple("Resultado", "leituras por_dia por_vital por_profissional alertas_gravados")
+
+
+def matriz_limites(limites):
+    """
+    Converte uma lista de dicionários de limites na matriz usada pela avaliação vetorizada.
+
+    Returns:
+        numpy.ndarray: Uma linha por paciente, colunas em COLUNAS_LIMITES.
+    """
+    linhas = []
+    for lim in limites:
+        sist_min, diast_min = map(int, lim["pressao_min"].split("/"))
+        sist_max, diast_max = map(int, lim["pressao_max"].split("/"))
+        linhas.append((lim["temp_min"], lim["temp_max"], lim["freq_min"], lim["freq_max"], lim["sat_min"],
+                       sist_min, diast_min, sist_max, diast_max))
+    return np.array(linhas, dtype=np.float64).reshape(-1, len(COLUNAS_LIMITES))
+
+
+def avaliar_vetorizado(leituras, limites):
+    """
+    Avalia todas as leituras de uma vez, com as mesmas regras de alertas.avaliar_alertas.
+
+    Args:
+        leituras (pandas.DataFrame): Colunas temperatura, frequencia, saturacao, sist e diast
+            (sist/diast NaN quando a pressão está fora do formato).
+        limites (numpy.ndarray): Limites de cada leitura (uma linha por leitura, COLUNAS_LIMITES).
+    Returns:
+        dict: Sinal vital (VITAIS) -> array booleano indicando as leituras com alerta.
+    """
+    col = {nome: limites[:, i] for i, nome in enumerate(COLUNAS_LIMITES)}
+    temperatura = leituras["temperatura"].to_numpy(dtype=np.float64)
+    frequencia = leituras["frequencia"].to_numpy(dtype=np.float64)
+    saturacao = leituras["saturacao"].to_numpy(dtype=np.float64)
+    sist = leituras["sist"].to_numpy(dtype=np.float64)
+    diast = leituras["diast"].to_numpy(dtype=np.float64)
+    # Comparações com NaN são falsas: formato inválido não passa por "valida" (pressão nula não é medida)
+    valida = (sist >= SIST_FAIXA[0]) & (sist <= SIST_FAIXA[1]) & (diast >= DIAST_FAIXA[0]) & (diast <= DIAST_FAIXA[1])
+    return {
+        "temperatura": (temperatura < col["temp_min"]) | (temperatura > col["temp_max"]),
+        "pressao_alta": valida & ((sist > col["sist_max"]) | (diast > col["diast_max"])),
+        "pressao_baixa": valida & ((sist < col["sist_min"]) | (diast < col["diast_min"])),
+        "pressao_invalida": ~valida & leituras["pressao"].notna().to_numpy(),
+        "frequencia": (frequencia < col["freq_min"]) | (frequencia > col["freq_max"]),
+        "saturacao": saturacao < col["sat_min"],
+    }
+
+
+def descrever_alerta(vital, leitura, limites):
+    """Texto do alerta de um sinal vital, idêntico ao gerado por alertas.avaliar_alertas."""
+    if vital == "temperatura":
+        return f"Temperatura fora do padrão: {leitura['temperatura']}°C (Limite: {limites['temp_min']}–{limites['temp_max']}°C)"
+    if vital == "pressao_alta":
+        return f"Pressão Alta: {leitura['pressao']} mmHg (Limite: {limites['pressao_max']} mmHg)"
+    if vital == "pressao_baixa":
+        return f"Pressão Baixa: {leitura['pressao']} mmHg (Limite: {limites['pressao_min']} mmHg)"
+    if vital == "pressao_invalida":
+        motivo = "Formato inválido. Use: 120/80" if pd.isna(leitura["sist"]) else "Valores fora do intervalo normal"
+        return f"Pressão arterial: {motivo}"
+    if vital == "frequencia":
+        return f"Frequência cardíaca fora do padrão: {leitura['frequencia']} bpm (Limite: {limites['freq_min']}–{limites['freq_max']} bpm)"
+    return f"Saturação baixa: {leitura['saturacao']}% (Mínimo: {limites['sat_min']}%)"
+
+
+def ler_leituras(cursor, pacientes, inicio, fim):
+    """
+    Lê as leituras de alguns pacientes no período via COPY ... TO STDOUT.
+
+    Temperatura e pressão nulas (leituras derivadas de oxímetros) viram NaN: não medidas,
+    sem alerta.
+
+    Returns:
+        pandas.DataFrame: Colunas COLUNAS_LEITURAS.
+    """
+    consulta = cursor.mogrify(SQL_LEITURAS, ([int(p) for p in pacientes], inicio, fim)).decode()
+    buffer = io.StringIO()
+    cursor.copy_expert(f"COPY ({consulta}) TO STDOUT WITH (FORMAT csv)", buffer)
+    buffer.seek(0)
+    return pd.read_csv(
+        buffer, header=None, names=COLUNAS_LEITURAS, keep_default_na=False,
+        na_values={"temperatura": [""], "pressao": [""], "sist": [""], "diast": [""]},
+        dtype={"paciente_id": np.int64, "data_registro": str, "pressao": str, "frequencia": np.int64, "saturacao": np.int64},
+    )
+
+
+def avaliar_particao(leituras, pacientes, atuais, candidatos, profissionais, limites_candidatos=None, apenas_novos=True):
+    """
+    Avalia as leituras de uma partição com os limites atuais e os candidatos.
+
+    Args:
+        leituras (pandas.DataFrame): Leituras da partição (ler_leituras).
+        pacientes (numpy.ndarray): Ids dos pacientes, em ordem crescente.
+        atuais, candidatos (numpy.ndarray): Matrizes de limites alinhadas a `pacientes`.
+        profissionais (numpy.ndarray): Profissional responsável de cada paciente (0 = nenhum).
+        limites_candidatos (list, opcional): Dicionários de limites candidatos alinhados a
+            `pacientes`; quando informado, gera as linhas de alerta do modo "aplicar".
+        apenas_novos (bool, opcional): Gera apenas os alertas que os limites atuais não geram.
+    Returns:
+        tuple: (contagens, linhas de alerta). Contagens: dict com "leituras" e, para "dia",
+        "vital" e "profissional", um dict chave -> [alertas atuais, alertas candidatos].
+    """
+    contagens = {"leituras": len(leituras), "dia": {}, "vital": {}, "profissional": {}}
+    if leituras.empty:
+        return contagens, []
+    posicao = np.searchsorted(pacientes, leituras["paciente_id"].to_numpy())
+    resultados = (avaliar_vetorizado(leituras, atuais[posicao]), avaliar_vetorizado(leituras, candidatos[posicao]))
+    dias, rotulos_dias = pd.factorize(leituras["data_registro"].str.slice(0, 10), sort=True)
+    profs, rotulos_profs = pd.factorize(profissionais[posicao], sort=True)
+    for lado, alertas in enumerate(resultados):
+        por_leitura = np.zeros(len(leituras), dtype=np.int64)
+        for vital in VITAIS:
+            total = int(alertas[vital].sum())
+            contagens["vital"].setdefault(vital, [0, 0])[lado] += total
+            por_leitura += alertas[vital]
+        for chave, codigos, rotulos in (("dia", dias, rotulos_dias), ("profissional", profs, rotulos_profs)):
+            somas = np.bincount(codigos, weights=por_leitura, minlength=len(rotulos))
+            for rotulo, soma in zip(rotulos.tolist(), somas.tolist()):
+                contagens[chave].setdefault(rotulo, [0, 0])[lado] += int(soma)
+    linhas = []
+    if limites_candidatos is not None:
+        atuais_res, candidatos_res = resultados
+        colunas = {c: leituras[c].tolist() for c in COLUNAS_LEITURAS}
+        for vital in VITAIS:
+            gerar = candidatos_res[vital] & ~atuais_res[vital] if apenas_novos else candidatos_res[vital]
+            for i in np.flatnonzero(gerar).tolist():
+                leitura = {c: valores[i] for c, valores in colunas.items()}
+                descricao = descrever_alerta(vital, leitura, limites_candidatos[posicao[i]])
+                linhas.append((leitura["paciente_id"], TIPO_ALERTA_LIMITES, descricao, STATUS_RETROATIVO, leitura["data_registro"]))
+    return contagens, linhas
+
+
+def simular_particao(parametros, pacientes, atuais, candidatos, profissionais, inicio, fim,
+                     limites_candidatos=None, apenas_novos=True):
+    """
+    Lê e avalia uma partição em uma conexão própria (executada nos processos do pool).
+
+    Returns:
+        tuple: Ver avaliar_particao.
+    """
+    conn = psycopg2.connect(**parametros)
+    try:
+        leituras = ler_leituras(conn.cursor(), pacientes, inicio, fim)
+    finally:
+        conn.close()
+    return avaliar_particao(leituras, pacientes, atuais, candidatos, profissionais, limites_candidatos, apenas_novos)
+
+
+def mesclar_contagens(total, parcial):
+    """Soma as contagens de uma partição às acumuladas."""
+    total["leituras"] += parcial["leituras"]
+    for chave in ("dia", "vital", "profissional"):
+        for rotulo, (atual, candidato) in parcial[chave].items():
+            soma = total[chave].setdefault(rotulo, [0, 0])
+            soma[0] += atual
+            soma[1] += candidato
+    return total
+
+
+def gravar_alertas(cursor, linhas, inicio, fim):
+    """
+    Grava os alertas retroativos via COPY, substituindo os de uma aplicação anterior no período.
+
+    Args:
+        cursor: Cursor psycopg2 aberto (o commit fica a cargo de quem chama).
+        linhas (list): Tuplas na ordem de COLUNAS_ALERTA.
+        inicio, fim: Período simulado (fim exclusivo).
+    Returns:
+        int: Alertas gravados.
+    """
+    cursor.execute(
+        "DELETE FROM alertas WHERE status = %s AND tipo_alerta = %s AND data_hora >= %s AND data_hora < %s",
+        (STATUS_RETROATIVO, TIPO_ALERTA_LIMITES, inicio, fim),
+    )
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(linhas)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY alertas ({', '.join(COLUNAS_ALERTA)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    return len(linhas)
+
+
+def simular(conn, parametros, candidatos, inicio, fim, trabalhadores=None, aplicar=False, apenas_novos=True, progresso=None):
+    """
+    Simula limites globais candidatos sobre as leituras de um período.
+
+    Args:
+        conn: Conexão psycopg2 (carrega os limites por paciente e, no modo aplicar, grava os alertas).
+        parametros (dict): Parâmetros de conexão usados pelos processos do pool.
+        candidatos (dict): Limites globais candidatos (campos ausentes mantêm os atuais).
+        inicio, fim: Período (fim exclusivo).
+        trabalhadores (int, opcional): Processos (padrão: número de CPUs; 1 avalia no próprio processo).
+        aplicar (bool, opcional): Grava os alertas resultantes. Default: False.
+        apenas_novos (bool, opcional): No modo aplicar, grava só os alertas que os limites
+            atuais não geram (leituras já avaliadas na gravação não são duplicadas).
+        progresso (callable, opcional): Chamado com (partições concluídas, total).
+    Returns:
+        Resultado: Contagens [atuais, candidatos] por dia, sinal vital e profissional.
+    """
+    cursor = conn.cursor()
+    indice = IndiceLimites()
+    indice.carregar(cursor)
+    pacientes = np.array(sorted(indice.pacientes), dtype=np.int64)
+    lim_atuais = [indice.limites(int(p)) for p in pacientes]
+    indice.globais = compilar_limites(indice.globais, {c: candidatos.get(c) for c in CAMPOS})
+    indice.compilados = {}
+    lim_candidatos = [indice.limites(int(p)) for p in pacientes]
+    profissionais = np.array([indice.pacientes[int(p)][0] or 0 for p in pacientes], dtype=np.int64)
+    atuais, cands = matriz_limites(lim_atuais), matriz_limites(lim_candidatos)
+
+    trabalhadores = trabalhadores or os.cpu_count() or 1
+    partes = np.array_split(np.arange(len(pacientes)), max(1, min(len(pacientes), trabalhadores * PARTICOES_POR_TRABALHADOR)))
+    tarefas = [
+        (parametros, pacientes[p], atuais[p], cands[p], profissionais[p], inicio, fim,
+         [lim_candidatos[i] for i in p] if aplicar else None, apenas_novos)
+        for p in partes if len(p)
+    ]
+    total = {"leituras": 0, "dia": {}, "vital": {}, "profissional": {}}
+    linhas = []
+
+    def acumular(resultado, concluidas):
+        contagens, novas = resultado
+        mesclar_contagens(total, contagens)
+        linhas.extend(novas)
+        if progresso:
+            progresso(concluidas, len(tarefas))
+
+    if trabalhadores > 1 and len(tarefas) > 1:
+        # "spawn": o Streamlit roda várias threads e fork com threads ativas não é seguro
+        with ProcessPoolExecutor(max_workers=trabalhadores, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futuros = [pool.submit(simular_particao, *tarefa) for tarefa in tarefas]
+            for n, futuro in enumerate(futuros, 1):
+                acumular(futuro.result(), n)
+    else:
+        for n, tarefa in enumerate(tarefas, 1):
+            acumular(simular_particao(*tarefa), n)
+
+    gravados = 0
+    if aplicar:
+        gravados = gravar_alertas(cursor, linhas, inicio, fim)
+        conn.commit()
+        logger.info("%d alertas retroativos gravados entre %s e %s", gravados, inicio, fim)
+    else:
+        conn.rollback()
+    return Resultado(total["leituras"], total["dia"], total["vital"], total["profissional"], gravados)
+
+
+def nomes_profissionais(cursor, ids):
+    """Nomes dos profissionais (id de usuário -> nome)."""
+    cursor.execute("SELECT id, nome FROM usuarios WHERE id = ANY(%s)", ([int(i) for i in ids],))
+    return dict(cursor.fetchall())
+
+
+def tabela_resultado(contagens, rotulo):
+    """
+    Converte as contagens de uma dimensão em DataFrame para exibição.
+
+    Args:
+        contagens (dict): Chave -> [alertas atuais, alertas candidatos].
+        rotulo (str): Nome da coluna da chave.
+    Returns:
+        pandas.DataFrame: Colunas rotulo, Atuais, Candidatos e Diferença.
+    """
+    df = pd.DataFrame(
+        [(chave, atual, candidato) for chave, (atual, candidato) in contagens.items()],
+        columns=[rotulo, "Atuais", "Candidatos"],
+    )
+    df["Diferença"] = df["Candidatos"] - df["Atuais"]
+    return df
@@ -0,0 +1,317 @@
+"""
+Detecção de tendências e desvios da linha de base de cada paciente.
+
+Os limites fixos (alertas.avaliar_alertas) não percebem uma febre que sobe devagar ou uma
+saturação em queda constante enquanto nenhum limite é cruzado. Aqui cada paciente tem um
+estado compacto por sinal vital:
+
+- média e variância exponenciais (EWMA, fator ALFA): a linha de base do próprio paciente;
+- janela circular com as últimas TAMANHO_JANELA leituras, cuja mediana é o valor "recente"
+  (robusto a uma leitura isolada fora da curva).
+
+A cada leitura o estado é atualizado em O(1). Quando a mediana recente se afasta da linha de
+base em LIMIAR_DESVIOS desvios (no sentido clinicamente relevante), é gerado um alerta do tipo
+"Tendência"; um novo alerta do mesmo sinal só sai depois que o desvio cair abaixo da metade
+do limiar. O estado é gravado em tendencias_estado (bytea de tamanho fixo), na mesma
+transação da leitura, e pode ser inicializado em lote a partir do histórico (inicializar_estados).
+"""
+
+import io
+import re
+import logging
+
+import numpy as np
+import pandas as pd
+import psycopg2
+from psycopg2.extras import execute_values
+
+from alertas import PRESSAO_PATTERN
+
+logger = logging.getLogger("telemonitoramento.tendencias")
+
+VITAIS = ("temperatura", "frequencia", "saturacao", "sistolica", "diastolica")
+NOMES_VITAIS = ("Temperatura", "Frequência cardíaca", "Saturação", "Pressão sistólica", "Pressão diastólica")
+UNIDADES = ("°C", "bpm", "%", "mmHg", "mmHg")
+# Sentido que gera alerta: 0 = alta ou queda, -1 = apenas queda
+SENTIDOS = np.array([0, 0, -1, 0, 0])
+# Piso do desvio-padrão: evita alertas por variações mínimas de pacientes muito estáveis
+DESVIO_MINIMO = np.array([0.2, 4.0, 1.0, 6.0, 4.0])
+ALFA = 0.05
+TAMANHO_JANELA = 7
+AQUECIMENTO = 12
+LIMIAR_DESVIOS = 2.5
+LIMITE_RESIDUO = 1.0
+PACIENTES_POR_LOTE = 500
+
+DTYPE_ESTADO = np.dtype([
+    ("contagem", "<i4", (len(VITAIS),)),
+    ("media", "<f8", (len(VITAIS),)),
+    ("variancia", "<f8", (len(VITAIS),)),
+    ("janela", "<f4", (TAMANHO_JANELA, len(VITAIS))),
+    ("posicao", "<i4", (len(VITAIS),)),
+    ("em_alerta", "u1", (len(VITAIS),)),
+])
+
+# Garante a linha (estado vazio) antes do FOR UPDATE, para que a primeira leitura do paciente também trave
+SQL_CRIAR_ESTADO = "INSERT INTO tendencias_estado (paciente_id, estado) VALUES (%s, %s) ON CONFLICT (paciente_id) DO NOTHING"
+SQL_LER_ESTADO = "SELECT estado FROM tendencias_estado WHERE paciente_id = %s FOR UPDATE"
+SQL_GRAVAR_ESTADOS = """
+    INSERT INTO tendencias_estado (paciente_id, estado, ultimo_sinal_id, atualizado_em) VALUES %s
+    ON CONFLICT (paciente_id) DO UPDATE
+    SET estado = EXCLUDED.estado, ultimo_sinal_id = EXCLUDED.ultimo_sinal_id, atualizado_em = EXCLUDED.atualizado_em
+"""
+SQL_GRAVAR_ESTADO = SQL_GRAVAR_ESTADOS.replace("VALUES %s", "VALUES (%s, %s, %s, NOW())")
+SQL_HISTORICO = r"""
+    SELECT paciente_id, id, temperatura, frequencia_cardiaca, saturacao,
+        CASE WHEN pressao ~ '^\d{2,3}/\d{2,3}$' THEN split_part(pressao, '/', 1)::int END,
+        CASE WHEN pressao ~ '^\d{2,3}/\d{2,3}$' THEN split_part(pressao, '/', 2)::int END
+    FROM sinais_vitais WHERE paciente_id = ANY(%s)
+    ORDER BY paciente_id, data_registro, id
+"""
+
+
+def criar_estrutura(cursor):
+    """
+    Cria a tabela com o estado de tendência de cada paciente.
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tendencias_estado (
+            paciente_id INTEGER PRIMARY KEY REFERENCES pacientes(id) ON DELETE CASCADE,
+            estado BYTEA NOT NULL,
+            ultimo_sinal_id INTEGER,
+            atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def novo_estado():
+    """Estado vazio (janela preenchida com NaN)."""
+    estado = np.zeros((), dtype=DTYPE_ESTADO)
+    estado["janela"] = np.nan
+    return estado
+
+
+def serializar(estado):
+    return estado.tobytes()
+
+
+def desserializar(dados):
+    return np.frombuffer(bytes(dados), dtype=DTYPE_ESTADO).reshape(()).copy()
+
+
+def valores_leitura(temperatura, pressao, frequencia, saturacao):
+    """
+    Vetor de valores de uma leitura na ordem de VITAIS (pressão fora do formato vira NaN).
+
+    Returns:
+        numpy.ndarray: float64 com um valor por sinal vital.
+    """
+    sist = diast = np.nan
+    if pressao and re.match(PRESSAO_PATTERN, pressao):
+        sist, diast = map(float, pressao.split("/"))
+    return np.array([temperatura, frequencia, saturacao, sist, diast], dtype=np.float64)
+
+
+def mediana_janela(janela):
+    """
+    Mediana das janelas circulares ignorando posições ainda vazias (NaN).
+
+    Args:
+        janela (numpy.ndarray): (..., TAMANHO_JANELA, V).
+    Returns:
+        numpy.ndarray: (..., V); NaN onde a janela está vazia.
+    """
+    ordenada = np.sort(janela, axis=-2)  # NaN vai para o fim
+    preenchidas = np.count_nonzero(~np.isnan(janela), axis=-2)
+    baixo = np.take_along_axis(ordenada, np.maximum(preenchidas - 1, 0)[..., None, :] // 2, axis=-2)[..., 0, :]
+    alto = np.take_along_axis(ordenada, (preenchidas // 2)[..., None, :], axis=-2)[..., 0, :]
+    return np.where(preenchidas > 0, (baixo.astype(np.float64) + alto) / 2, np.nan)
+
+
+def atualizar_estados(estados, valores):
+    """
+    Incorpora uma leitura a cada estado e verifica desvios da linha de base.
+
+    A mediana recente (com a nova leitura) é comparada com a linha de base anterior a ela;
+    depois a média e a variância exponenciais são atualizadas com o resíduo limitado a
+    LIMITE_RESIDUO desvios, para que a própria tendência não infle a variância e a esconda.
+    Opera sobre vários pacientes de uma vez (uma leitura de cada); atualizar_estado é o caso
+    de um paciente.
+
+    Args:
+        estados (numpy.ndarray): Estados (DTYPE_ESTADO), shape (P,), alterados no lugar.
+        valores (numpy.ndarray): (P, V) com os valores da leitura; NaN é ignorado.
+    Returns:
+        tuple: (novos, mediana, media, desvios), arrays (P, V); novos marca os sinais que
+        passaram a desviar nesta leitura e media é a linha de base anterior à leitura.
+    """
+    ok = ~np.isnan(valores)
+    linhas, colunas = np.nonzero(ok)
+    posicao = estados["posicao"]
+    janela = estados["janela"]
+    janela[linhas, posicao[linhas, colunas], colunas] = valores[linhas, colunas]
+    posicao[ok] = (posicao[ok] + 1) % TAMANHO_JANELA
+
+    contagem, media, variancia = estados["contagem"], estados["media"], estados["variancia"]
+    anterior = media.copy()
+    mediana = mediana_janela(janela)
+    desvio = np.maximum(np.sqrt(variancia), DESVIO_MINIMO)
+    desvios = (mediana - media) / desvio
+    relevante = np.where(SENTIDOS < 0, -desvios, np.abs(desvios))
+    avaliado = ok & (contagem >= AQUECIMENTO)
+    em_alerta = estados["em_alerta"]
+    novos = avaliado & (relevante >= LIMIAR_DESVIOS) & (em_alerta == 0)
+    em_alerta[novos] = 1
+    em_alerta[avaliado & (relevante < LIMIAR_DESVIOS / 2)] = 0
+
+    # Média e variância exponenciais (a primeira leitura inicializa a média)
+    primeira = ok & (contagem == 0)
+    seguintes = ok & ~primeira
+    residuo = np.clip(np.nan_to_num(valores - media), -LIMITE_RESIDUO * desvio, LIMITE_RESIDUO * desvio)
+    media[primeira] = valores[primeira]
+    media[seguintes] += ALFA * residuo[seguintes]
+    variancia[seguintes] = (1 - ALFA) * (variancia[seguintes] + ALFA * residuo[seguintes] ** 2)
+    contagem[ok] += 1
+    return novos, mediana, anterior, desvios
+
+
+def atualizar_estado(estado, valores):
+    """
+    Incorpora uma leitura ao estado de um paciente (ver atualizar_estados).
+
+    Args:
+        estado (numpy.ndarray): Estado do paciente (DTYPE_ESTADO, shape ()), alterado no lugar.
+        valores (numpy.ndarray): Valores da leitura (valores_leitura); NaN é ignorado.
+    Returns:
+        list: (índice do sinal vital, mediana recente, média da linha de base, desvios) dos
+        sinais que passaram a desviar nesta leitura.
+    """
+    estados = estado.reshape(1)
+    novos, mediana, media, desvios = atualizar_estados(estados, np.asarray(valores, dtype=np.float64).reshape(1, -1))
+    return [(int(i), float(mediana[0, i]), float(media[0, i]), float(desvios[0, i])) for i in np.flatnonzero(novos[0])]
+
+
+def descrever_desvio(vital, mediana, media, desvios):
+    """Texto do alerta de tendência de um sinal vital."""
+    sentido = "alta" if desvios > 0 else "queda"
+    casas = 1 if VITAIS[vital] == "temperatura" else 0
+    return (
+        f"Tendência de {sentido}: {NOMES_VITAIS[vital]} recente {mediana:.{casas}f} {UNIDADES[vital]} "
+        f"(linha de base {media:.{casas}f} {UNIDADES[vital]}, {desvios:+.1f} desvios)"
+    )
+
+
+def registrar_leitura(cursor, paciente_id, sinal_id, temperatura, pressao, frequencia, saturacao):
+    """
+    Atualiza o estado do paciente com uma nova leitura, na transação de quem chama.
+
+    O estado é lido com FOR UPDATE: gravações simultâneas do mesmo paciente são serializadas.
+    Sem estado gravado, a linha é criada vazia antes da leitura (a segunda transação espera a
+    primeira no INSERT e depois lê o estado dela) e a linha de base começa nesta leitura (use
+    inicializar_estados para aproveitar o histórico).
+
+    Args:
+        cursor: Cursor psycopg2 aberto (o commit fica a cargo de quem chama).
+        paciente_id (int): Paciente.
+        sinal_id (int): ID da leitura em sinais_vitais.
+        temperatura, pressao, frequencia, saturacao: Valores da leitura.
+    Returns:
+        list: Descrições dos alertas de tendência gerados.
+    """
+    cursor.execute(SQL_CRIAR_ESTADO, (paciente_id, psycopg2.Binary(serializar(novo_estado()))))
+    cursor.execute(SQL_LER_ESTADO, (paciente_id,))
+    estado = desserializar(cursor.fetchone()[0])
+    desvios = atualizar_estado(estado, valores_leitura(temperatura, pressao, frequencia, saturacao))
+    cursor.execute(SQL_GRAVAR_ESTADO, (paciente_id, psycopg2.Binary(serializar(estado)), sinal_id))
+    return [descrever_desvio(*d) for d in desvios]
+
+
+def estados_em_lote(historico):
+    """
+    Calcula o estado final de cada paciente a partir do histórico.
+
+    Os pacientes são agrupados por tamanho de histórico (faixas de potência de 2) e cada grupo
+    vira uma matriz (paciente, leitura, sinal) reproduzida leitura a leitura com
+    atualizar_estados, vetorizado entre os pacientes do grupo: o resultado é idêntico ao de ter
+    processado cada leitura ao vivo (inclusive a marcação de desvio em curso). Como no grupo
+    nenhum histórico tem menos da metade do maior, as matrizes somam no máximo o dobro das
+    leituras, mesmo que um paciente do lote tenha muito mais histórico que os outros.
+
+    Args:
+        historico (pandas.DataFrame): Colunas paciente_id e VITAIS, em ordem cronológica por paciente.
+    Returns:
+        tuple: (ids dos pacientes em ordem crescente, array de estados DTYPE_ESTADO alinhado aos ids).
+    """
+    ids, linha = np.unique(historico["paciente_id"].to_numpy(), return_inverse=True)
+    estados = np.zeros(len(ids), dtype=DTYPE_ESTADO)
+    estados["janela"] = np.nan
+    if not len(ids):
+        return ids, estados
+    ordem = historico.groupby("paciente_id", sort=False).cumcount().to_numpy()
+    valores = historico[list(VITAIS)].to_numpy(dtype=np.float64)
+    contagens = np.bincount(linha)
+    faixas = np.ceil(np.log2(contagens)).astype(np.int64)
+    for faixa in np.unique(faixas):
+        grupo = np.flatnonzero(faixas == faixa)
+        selecao = np.isin(linha, grupo)
+        matriz = np.full((len(grupo), contagens[grupo].max(), len(VITAIS)), np.nan)
+        matriz[np.searchsorted(grupo, linha[selecao]), ordem[selecao]] = valores[selecao]
+        estados_grupo = estados[grupo]
+        for k in range(matriz.shape[1]):
+            atualizar_estados(estados_grupo, matriz[:, k])
+        estados[grupo] = estados_grupo
+    return ids, estados
+
+
+def ler_historico(cursor, pacientes):
+    """
+    Lê o histórico de alguns pacientes via COPY ... TO STDOUT.
+
+    Returns:
+        pandas.DataFrame: Colunas paciente_id, id e VITAIS, em ordem cronológica por paciente.
+    """
+    consulta = cursor.mogrify(SQL_HISTORICO, ([int(p) for p in pacientes],)).decode()
+    buffer = io.StringIO()
+    cursor.copy_expert(f"COPY ({consulta}) TO STDOUT WITH (FORMAT csv)", buffer)
+    buffer.seek(0)
+    return pd.read_csv(buffer, header=None, names=["paciente_id", "id", *VITAIS], dtype={"paciente_id": np.int64, "id": np.int64})
+
+
+def inicializar_estados(conn, pacientes_por_lote=PACIENTES_POR_LOTE, progresso=None):
+    """
+    Inicializa (ou recalcula) o estado de todos os pacientes a partir de sinais_vitais.
+
+    Os pacientes são processados em lotes (as matrizes de estados_em_lote são proporcionais
+    às leituras do lote); cada lote é lido com COPY, calculado de forma vetorizada, gravado numa única
+    instrução e confirmado separadamente.
+
+    Args:
+        conn: Conexão psycopg2 dedicada ao job.
+        pacientes_por_lote (int, opcional): Pacientes por lote. Default: 500.
+        progresso (callable, opcional): Chamado após cada lote com (pacientes, leituras).
+    Returns:
+        tuple: (pacientes inicializados, leituras processadas).
+    """
+    cursor = conn.cursor()
+    criar_estrutura(cursor)
+    cursor.execute("SELECT id FROM pacientes ORDER BY id")
+    todos = [id_ for (id_,) in cursor.fetchall()]
+    conn.commit()
+    total_pacientes = total_leituras = 0
+    for inicio in range(0, len(todos), pacientes_por_lote):
+        historico = ler_historico(cursor, todos[inicio:inicio + pacientes_por_lote])
+        ids, estados = estados_em_lote(historico)
+        if len(ids):
+            ultimos = historico.groupby("paciente_id")["id"].max().reindex(ids).to_numpy()
+            linhas = [(int(p), psycopg2.Binary(e.tobytes()), int(u)) for p, e, u in zip(ids, estados, ultimos)]
+            execute_values(cursor, SQL_GRAVAR_ESTADOS, linhas, template="(%s, %s, %s, NOW())", page_size=len(linhas))
+        conn.commit()
+        total_pacientes += len(ids)
+        total_leituras += len(historico)
+        if progresso:
+            progresso(total_pacientes, total_leituras)
+    logger.info("Estados de tendência inicializados: %d pacientes, %d leituras", total_pacientes, total_leituras)
+    return total_pacientes, total_leituras
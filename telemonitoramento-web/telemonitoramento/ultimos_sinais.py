@@ -0,0 +1,216 @@
+"""
+Últimos valores de cada paciente, para a visão geral dos pacientes de um profissional.
+
+A tabela ultimos_sinais guarda, por paciente, a última leitura, o último alerta e, para
+cada sinal vital, um array com as TAMANHO_SERIE leituras mais recentes (as minilinhas da
+tela). Triggers de comando em sinais_vitais e alertas a atualizam a cada INSERT/COPY (uma
+atualização por paciente do comando, não por linha), então a tela "Visão Geral" monta a
+grade de todos os pacientes com uma única consulta, sem buscar o histórico de cada um.
+"""
+
+from datetime import datetime, timedelta
+
+from consultas import SQL_VISAO_GERAL
+from escore_risco import calcular_escore, classificar
+
+TAMANHO_SERIE = 24
+# Leitura mais antiga que isso marca o paciente como sem registro recente
+HORAS_SEM_LEITURA = 24
+# Limite de linhas da visão geral (cada profissional acompanha algumas centenas de pacientes)
+LIMITE_VISAO_GERAL = 1000
+
+_PRESSAO_VALIDA = r"pressao ~ '^\d{2,3}/\d{2,3}$'"
+# Array da tabela -> expressão sobre as colunas de sinais_vitais
+SERIES = {
+    "temperaturas": "temperatura::real",
+    "frequencias": "frequencia_cardiaca",
+    "saturacoes": "saturacao",
+    "sistolicas": f"CASE WHEN {_PRESSAO_VALIDA} THEN split_part(pressao, '/', 1)::int END",
+    "diastolicas": f"CASE WHEN {_PRESSAO_VALIDA} THEN split_part(pressao, '/', 2)::int END",
+}
+TIPOS_SERIES = {"temperaturas": "REAL[]", "frequencias": "INTEGER[]", "saturacoes": "INTEGER[]",
+                "sistolicas": "INTEGER[]", "diastolicas": "INTEGER[]"}
+ULTIMA_LEITURA = ("sinal_id", "data_registro", "temperatura", "pressao", "frequencia_cardiaca", "saturacao")
+ULTIMO_ALERTA = ("alerta_id", "alerta_tipo", "alerta_descricao", "alerta_status", "alerta_em")
+ICONES_NIVEL = {"Alto": "🔴", "Médio": "🟠", "Baixo-médio": "🟡", "Baixo": "🟢"}
+
+
+def _ultimos(serie, tamanho):
+    """Fatia SQL com os `tamanho` últimos elementos de um array."""
+    return f"({serie})[greatest(1, cardinality({serie}) - {tamanho - 1}):]"
+
+
+def sql_atualizar_leituras(origem):
+    """
+    Upsert da última leitura e das séries de cada paciente presente em `origem`.
+
+    As séries recebem as novas leituras no fim (em ordem de data) e são cortadas em
+    TAMANHO_SERIE; a última leitura só é trocada por uma mais recente.
+
+    Args:
+        origem (str): Relação com as colunas de sinais_vitais (tabela de transição ou subconsulta).
+    Returns:
+        str: Instrução INSERT ... ON CONFLICT.
+    """
+    agregados = ", ".join(f"array_agg({expr} ORDER BY data_registro, id) AS {serie}" for serie, expr in SERIES.items())
+    novas_series = ", ".join(_ultimos(f"a.{serie}", TAMANHO_SERIE) for serie in SERIES)
+    mais_nova = "u.data_registro IS NULL OR EXCLUDED.data_registro >= u.data_registro"
+    atualizacoes = [f"{coluna} = CASE WHEN {mais_nova} THEN EXCLUDED.{coluna} ELSE u.{coluna} END" for coluna in ULTIMA_LEITURA]
+    for serie in SERIES:
+        combinada = f"COALESCE(u.{serie}, '{{}}') || EXCLUDED.{serie}"
+        atualizacoes.append(f"{serie} = {_ultimos(combinada, TAMANHO_SERIE)}")
+    return f"""
+        INSERT INTO ultimos_sinais AS u (paciente_id, {', '.join(ULTIMA_LEITURA)}, {', '.join(SERIES)})
+        SELECT r.paciente_id, r.id, r.data_registro, r.temperatura, r.pressao, r.frequencia_cardiaca, r.saturacao, {novas_series}
+        FROM (SELECT DISTINCT ON (paciente_id) * FROM {origem} o ORDER BY paciente_id, data_registro DESC, id DESC) r
+        JOIN (SELECT paciente_id, {agregados} FROM {origem} o GROUP BY paciente_id) a USING (paciente_id)
+        ON CONFLICT (paciente_id) DO UPDATE SET {', '.join(atualizacoes)}
+    """
+
+
+def sql_atualizar_alertas(origem):
+    """
+    Upsert do último alerta de cada paciente presente em `origem` (só troca por um mais recente).
+
+    Args:
+        origem (str): Relação com as colunas de alertas.
+    Returns:
+        str: Instrução INSERT ... ON CONFLICT.
+    """
+    return f"""
+        INSERT INTO ultimos_sinais AS u (paciente_id, {', '.join(ULTIMO_ALERTA)})
+        SELECT DISTINCT ON (paciente_id) paciente_id, id, tipo_alerta, descricao, status, data_hora
+        FROM {origem} o ORDER BY paciente_id, data_hora DESC, id DESC
+        ON CONFLICT (paciente_id) DO UPDATE SET {', '.join(f'{c} = EXCLUDED.{c}' for c in ULTIMO_ALERTA)}
+        WHERE u.alerta_em IS NULL OR EXCLUDED.alerta_em >= u.alerta_em
+    """
+
+
+def criar_estrutura(cursor):
+    """
+    Cria ultimos_sinais e seus triggers; na primeira execução, preenche a partir do histórico.
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+    """
+    series = ", ".join(f"{serie} {TIPOS_SERIES[serie]}" for serie in SERIES)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS ultimos_sinais (
+            paciente_id INTEGER PRIMARY KEY REFERENCES pacientes(id) ON DELETE CASCADE,
+            sinal_id INTEGER,
+            data_registro TIMESTAMP,
+            temperatura FLOAT,
+            pressao VARCHAR(10),
+            frequencia_cardiaca INTEGER,
+            saturacao INTEGER,
+            {series},
+            alerta_id INTEGER,
+            alerta_tipo VARCHAR(50),
+            alerta_descricao TEXT,
+            alerta_status VARCHAR(20),
+            alerta_em TIMESTAMP
+        )
+    """)
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM ultimos_sinais)")
+    vazia = not cursor.fetchone()[0]
+    cursor.execute(f"""
+        CREATE OR REPLACE FUNCTION ultimos_sinais_leituras() RETURNS trigger AS $$
+        BEGIN
+            {sql_atualizar_leituras("novas")};
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    cursor.execute(f"""
+        CREATE OR REPLACE FUNCTION ultimos_sinais_alertas() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {sql_atualizar_alertas("novas")};
+            ELSE
+                UPDATE ultimos_sinais u SET alerta_status = n.status
+                FROM novas n WHERE u.paciente_id = n.paciente_id AND u.alerta_id = n.id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    gatilhos = (
+        ("trg_ultimos_sinais_leituras", "INSERT", "sinais_vitais", "ultimos_sinais_leituras"),
+        ("trg_ultimos_sinais_alertas", "INSERT", "alertas", "ultimos_sinais_alertas"),
+        ("trg_ultimos_sinais_alertas_status", "UPDATE", "alertas", "ultimos_sinais_alertas"),
+    )
+    for nome, operacao, tabela, funcao in gatilhos:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {nome} ON {tabela}")
+        cursor.execute(f"""
+            CREATE TRIGGER {nome} AFTER {operacao} ON {tabela}
+            REFERENCING NEW TABLE AS novas FOR EACH STATEMENT
+            EXECUTE FUNCTION {funcao}()
+        """)
+    if vazia:
+        # Só as últimas TAMANHO_SERIE leituras de cada paciente, pelo índice (paciente_id, data_registro)
+        recentes = f"""(
+            SELECT s.* FROM pacientes p CROSS JOIN LATERAL (
+                SELECT * FROM sinais_vitais WHERE paciente_id = p.id
+                ORDER BY data_registro DESC, id DESC LIMIT {TAMANHO_SERIE}
+            ) s
+        )"""
+        cursor.execute(sql_atualizar_leituras(recentes))
+        cursor.execute(sql_atualizar_alertas("alertas"))
+
+
+def situacao(escore, nivel, data_registro, alerta_status, agora):
+    """
+    Selos de situação de um paciente na visão geral.
+
+    Args:
+        escore (int): Escore da última leitura (None sem leitura).
+        nivel (str): Nível de risco da última leitura.
+        data_registro (datetime): Data da última leitura.
+        alerta_status (str): Status do último alerta.
+        agora (datetime): Referência para leituras atrasadas.
+    Returns:
+        str: Selos, por exemplo "🔴 Alto · 🚨 alerta pendente".
+    """
+    if escore is None or data_registro is None:
+        return "⚪ Sem leitura"
+    selos = [f"{ICONES_NIVEL[nivel]} {nivel}"]
+    if alerta_status == "pendente":
+        selos.append("🚨 alerta pendente")
+    if agora - data_registro > timedelta(hours=HORAS_SEM_LEITURA):
+        selos.append(f"💤 sem leitura há {(agora - data_registro).days or 1} dia(s)")
+    return " · ".join(selos)
+
+
+def listar_visao_geral(cursor, profissional_id, limite=LIMITE_VISAO_GERAL, agora=None):
+    """
+    Últimos valores e séries recentes de todos os pacientes de um profissional (uma consulta).
+
+    Args:
+        cursor: Cursor psycopg2 aberto.
+        profissional_id (int): ID do usuário profissional responsável.
+        limite (int, opcional): Número máximo de pacientes. Default: 1000.
+        agora (datetime, opcional): Referência para leituras atrasadas. Default: agora.
+    Returns:
+        list: Um dict por paciente, na ordem da fila de prioridades (mais graves primeiro), com
+        paciente_id, nome, escore, nivel, situacao, data_registro, temperatura, pressao,
+        frequencia, saturacao, as séries de SERIES (listas, sem valores ausentes) e o último alerta.
+    """
+    agora = agora or datetime.now()
+    cursor.execute(SQL_VISAO_GERAL, (profissional_id, limite))
+    linhas = []
+    for (paciente_id, nome, escore, data_registro, temperatura, pressao, frequencia, saturacao,
+         *series, alerta_tipo, alerta_descricao, alerta_status, alerta_em) in cursor.fetchall():
+        nivel = None
+        if escore is not None and data_registro is not None:
+            nivel = classificar(escore, calcular_escore(temperatura, pressao, frequencia, saturacao)[1])
+        linha = {
+            "paciente_id": paciente_id, "nome": nome, "escore": escore, "nivel": nivel,
+            "situacao": situacao(escore if nivel else None, nivel, data_registro, alerta_status, agora),
+            "data_registro": data_registro, "temperatura": temperatura, "pressao": pressao,
+            "frequencia": frequencia, "saturacao": saturacao,
+            "alerta": f"{alerta_tipo}: {alerta_descricao}" if alerta_tipo else None,
+            "alerta_status": alerta_status, "alerta_em": alerta_em,
+        }
+        linha.update({serie: [v for v in (valores or []) if v is not None] for serie, valores in zip(SERIES, series)})
+        linhas.append(linha)
+    return linhas
@@ -0,0 +1,152 @@
+"""
+Administração de usuários em lote.
+
+A tela "Usuários" lista as contas em páginas e aplica ativação/inativação a vários
+usuários de uma vez, com um único UPDATE e um único registro de auditoria. Cadastros em
+massa chegam por CSV, são validados linha a linha e inseridos com execute_values; os
+profissionais ganham a linha em profissionais na mesma transação. Pacientes não entram por
+aqui: precisam de profissional responsável e dados médicos (tela "Importar Pacientes").
+"""
+
+import csv
+import io
+import re
+
+from psycopg2.extras import execute_values
+
+from consultas import SQL_REGISTRAR_AUDITORIA
+from utils import hash_senha
+
+TIPOS_USUARIO = ("Administrador", "Profissional", "Profissional de Saúde", "Paciente")
+TIPOS_PROFISSIONAL = ("Profissional", "Profissional de Saúde")
+TIPOS_IMPORTACAO = ("Administrador", *TIPOS_PROFISSIONAL)
+COLUNAS_CSV = ("nome", "email", "senha", "tipo")
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+VALORES_VERDADEIROS = {"1", "true", "sim", "s", "ativo", "yes"}
+VALORES_FALSOS = {"0", "false", "nao", "não", "n", "inativo", "no"}
+# Linhas por comando INSERT gerado pelo execute_values
+TAMANHO_PAGINA_IMPORTACAO = 500
+
+SQL_ALTERAR_STATUS_LOTE = "UPDATE usuarios SET status = %s WHERE id = ANY(%s) AND status IS DISTINCT FROM %s RETURNING id"
+SQL_IMPORTAR_USUARIOS = "INSERT INTO usuarios (nome, email, senha, tipo, status) VALUES %s ON CONFLICT (email) DO NOTHING RETURNING id, email"
+SQL_IMPORTAR_PROFISSIONAIS = "INSERT INTO profissionais (id_usuario) VALUES %s"
+
+
+def alterar_status_em_lote(cursor, ids, ativo, autor_id):
+    """
+    Ativa ou inativa vários usuários com um único UPDATE e registra uma única entrada de auditoria.
+
+    Usuários que já estão no status pedido não são alterados nem aparecem na auditoria.
+
+    Args:
+        cursor: Cursor psycopg2 aberto (o commit fica a cargo de quem chama).
+        ids (iterable): IDs dos usuários.
+        ativo (bool): Novo status.
+        autor_id (int): Administrador que executou a ação.
+    Returns:
+        list: IDs efetivamente alterados, em ordem crescente.
+    """
+    ids = sorted({int(i) for i in ids})
+    if not ids:
+        return []
+    cursor.execute(SQL_ALTERAR_STATUS_LOTE, (ativo, ids, ativo))
+    alterados = sorted(linha[0] for linha in cursor.fetchall())
+    if alterados:
+        acao = "Ativação de usuários em lote" if ativo else "Inativação de usuários em lote"
+        cursor.execute(SQL_REGISTRAR_AUDITORIA, (autor_id, acao, f"{len(alterados)} usuários: {', '.join(map(str, alterados))}"))
+    return alterados
+
+
+def _ler_status(valor):
+    valor = (valor or "").strip().lower()
+    if not valor or valor in VALORES_VERDADEIROS:
+        return True
+    if valor in VALORES_FALSOS:
+        return False
+    raise ValueError(f"status inválido: {valor!r}")
+
+
+def ler_csv_usuarios(arquivo):
+    """
+    Lê e valida um CSV de usuários com as colunas nome, email, senha, tipo e (opcional) status.
+
+    O separador (vírgula ou ponto e vírgula) é detectado automaticamente. E-mails são
+    normalizados em minúsculas; repetições dentro do arquivo são rejeitadas, assim como
+    linhas do tipo Paciente (importadas na tela "Importar Pacientes").
+
+    Args:
+        arquivo (str | bytes | file): Conteúdo do CSV ou arquivo aberto.
+    Returns:
+        tuple: (linhas válidas como tuplas (nome, email, senha, tipo, status),
+        lista de (número da linha, motivo) das linhas rejeitadas).
+    Raises:
+        ValueError: Se faltar alguma coluna obrigatória no cabeçalho.
+    """
+    if hasattr(arquivo, "read"):
+        arquivo = arquivo.read()
+    if isinstance(arquivo, bytes):
+        arquivo = arquivo.decode("utf-8-sig")
+    try:
+        dialeto = csv.Sniffer().sniff(arquivo[:4096], delimiters=",;")
+    except csv.Error:
+        dialeto = csv.excel
+    leitor = csv.DictReader(io.StringIO(arquivo), dialect=dialeto)
+    cabecalho = {(c or "").strip().lower() for c in leitor.fieldnames or []}
+    faltando = [c for c in COLUNAS_CSV if c not in cabecalho]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes no CSV: {', '.join(faltando)}")
+
+    validas, erros, vistos = [], [], set()
+    # A linha 1 é o cabeçalho
+    for numero, registro in enumerate(leitor, start=2):
+        registro = {(k or "").strip().lower(): (v or "").strip() for k, v in registro.items()}
+        nome, email, senha, tipo = (registro[c] for c in COLUNAS_CSV)
+        email = email.lower()
+        if not nome or not email or not senha:
+            erros.append((numero, "nome, e-mail e senha são obrigatórios"))
+        elif not EMAIL_PATTERN.match(email):
+            erros.append((numero, f"e-mail inválido: {email}"))
+        elif tipo == "Paciente":
+            erros.append((numero, "pacientes precisam de profissional responsável: use a tela Importar Pacientes"))
+        elif tipo not in TIPOS_IMPORTACAO:
+            erros.append((numero, f"tipo inválido: {tipo!r} (use {', '.join(TIPOS_IMPORTACAO)})"))
+        elif email in vistos:
+            erros.append((numero, f"e-mail repetido no arquivo: {email}"))
+        else:
+            try:
+                status = _ler_status(registro.get("status"))
+            except ValueError as e:
+                erros.append((numero, str(e)))
+                continue
+            vistos.add(email)
+            validas.append((nome, email, senha, tipo, status))
+    return validas, erros
+
+
+def importar_usuarios(cursor, linhas, autor_id, tamanho_pagina=TAMANHO_PAGINA_IMPORTACAO):
+    """
+    Insere usuários em lote com execute_values, ignorando e-mails já cadastrados.
+
+    Todos os usuários importados começam com primeiro_acesso ativo e precisam trocar a senha.
+    Os profissionais criados ganham a linha em profissionais (especialidade e registro a
+    completar) no mesmo cursor, então entram na mesma transação que os usuários.
+
+    Args:
+        cursor: Cursor psycopg2 aberto (o commit fica a cargo de quem chama).
+        linhas (list): Tuplas (nome, email, senha, tipo, status) vindas de ler_csv_usuarios.
+        autor_id (int): Administrador que executou a importação.
+        tamanho_pagina (int, opcional): Linhas por comando INSERT.
+    Returns:
+        tuple: (dict email -> id dos usuários criados, lista de e-mails já existentes).
+    """
+    if not linhas:
+        return {}, []
+    valores = [(nome, email, hash_senha(senha), tipo, status) for nome, email, senha, tipo, status in linhas]
+    inseridos = dict((email, id_) for id_, email in execute_values(cursor, SQL_IMPORTAR_USUARIOS, valores, page_size=tamanho_pagina, fetch=True))
+    existentes = [linha[1] for linha in linhas if linha[1] not in inseridos]
+    profissionais = [(inseridos[email],) for _, email, _, tipo, _ in linhas if tipo in TIPOS_PROFISSIONAL and email in inseridos]
+    if profissionais:
+        execute_values(cursor, SQL_IMPORTAR_PROFISSIONAIS, profissionais, page_size=tamanho_pagina)
+    if inseridos:
+        cursor.execute(SQL_REGISTRAR_AUDITORIA, (autor_id, "Importação de usuários em lote", f"{len(inseridos)} usuários importados, {len(existentes)} já existentes"))
+    return inseridos, existentes
@@ -0,0 +1,85 @@
+import sys
+import os
+from datetime import date, timedelta
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import numpy as np
+
+import adesao
+
+HOJE = date(2024, 5, 15)  # quarta-feira
+
+class BancoFalso:
+    """Fila de lembretes em memória: responde a SQL_DISPENSAR, SQL_PENDENTES e às marcações."""
+
+    def __init__(self, pendentes, aderentes=()):
+        self.pendentes = dict(pendentes)
+        self.aderentes = set(aderentes)
+        self.status = {}
+        self.commits = 0
+        self.rowcount = 0
+
+    def cursor(self):
+        return self
+
+    def commit(self):
+        self.commits += 1
+
+    def execute(self, sql, params=None):
+        if sql == adesao.SQL_DISPENSAR:
+            dispensados = self.aderentes & set(self.pendentes)
+            for paciente in dispensados:
+                self.status[paciente] = adesao.STATUS_DISPENSADO
+                del self.pendentes[paciente]
+            self.rowcount = len(dispensados)
+        elif sql == adesao.SQL_PENDENTES:
+            limite = params[1]
+            self.linhas = [(p, nome, email) for p, (nome, email) in sorted(self.pendentes.items())][:limite]
+
+    def fetchall(self):
+        return self.linhas
+
+def marcar_falso(cursor, sql, marcas, template=None):
+    assert sql == adesao.SQL_MARCAR
+    for paciente, dia, status, erro in marcas:
+        cursor.status[paciente] = status
+        del cursor.pendentes[paciente]
+
+def test_sequencia_e_mapa():
+    dias = [HOJE - timedelta(days=d) for d in (1, 2, 3, 5)]
+    assert adesao.sequencia_atual(dias, HOJE) == 3
+    assert adesao.sequencia_atual(dias + [HOJE], HOJE) == 4
+    assert adesao.sequencia_atual([], HOJE) == 0
+    mapa, semanas = adesao.mapa_adesao(dias, HOJE, semanas=2)
+    assert mapa.shape == (7, 2) and semanas == [date(2024, 5, 6), date(2024, 5, 13)]
+    # Segunda a domingo da semana atual: seg e ter registrados, qua (hoje) não, qui em diante no futuro
+    assert mapa[:3, 1].tolist() == [1.0, 1.0, 0.0] and np.isnan(mapa[3:, 1]).all()
+    assert mapa[:, 0].tolist() == [0, 0, 0, 0, 1.0, 0, 1.0]
+
+def test_enviar_lembretes_em_lotes(monkeypatch):
+    monkeypatch.setattr(adesao, "execute_values", marcar_falso)
+    pendentes = {p: (f"Paciente {p}", f"p{p}@ex.com") for p in range(1, 8)}
+    banco = BancoFalso(pendentes, aderentes={4})
+    lotes = []
+
+    def enviar(mensagens):
+        lotes.append([destinatario for destinatario, _, _ in mensagens])
+        assert all(assunto == adesao.ASSUNTO_LEMBRETE and "15/05/2024" in corpo for _, assunto, corpo in mensagens)
+        return ["550 caixa cheia" if destinatario == "p2@ex.com" else None for destinatario, _, _ in mensagens]
+
+    assert adesao.enviar_lembretes(banco, HOJE, enviar, tamanho_lote=4) == (5, 1, 1)
+    assert lotes == [["p1@ex.com", "p2@ex.com", "p3@ex.com", "p5@ex.com"], ["p6@ex.com", "p7@ex.com"]]
+    assert banco.status[2] == adesao.STATUS_FALHA and banco.status[4] == adesao.STATUS_DISPENSADO
+    assert banco.commits == 3
+
+def test_falha_do_servidor_marca_o_lote(monkeypatch):
+    monkeypatch.setattr(adesao, "execute_values", marcar_falso)
+    banco = BancoFalso({1: ("A", "a@ex.com"), 2: ("B", "b@ex.com")})
+
+    def enviar(mensagens):
+        raise OSError("conexão recusada")
+
+    assert adesao.enviar_lembretes(banco, HOJE, enviar) == (0, 2, 0)
+    assert set(banco.status.values()) == {adesao.STATUS_FALHA}
@@ -0,0 +1,131 @@
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import numpy as np
+
+import amostras
+import tendencias
+from alertas import PARAMETROS_PADRAO, TIPO_ALERTA_LIMITES, avaliar_alertas
+
+INICIO = datetime(2024, 5, 1, 10, 0)
+
+class CursorFalso:
+    """Responde a cada SQL de amostras.py com os dados do teste."""
+
+    def __init__(self, blocos=(), janelas_reservadas=()):
+        self.blocos = list(blocos)
+        self.janelas_reservadas = set(janelas_reservadas)
+        self.executados = []
+        self.proximo_id = 100
+        self.estados = {}
+        self.resposta = None
+
+    def execute(self, sql, params=None):
+        self.executados.append((sql, params))
+        if sql in (amostras.SQL_AMOSTRAS_BLOCOS, amostras.SQL_BLOCOS_EXISTENTES):
+            self.resposta = [(b["minuto"], b["instantes"], b["frequencias"], b["saturacoes"]) for b in self.blocos]
+        elif sql == amostras.SQL_RESERVAR_JANELA:
+            self.resposta = None if params in self.janelas_reservadas else (params[0],)
+            self.janelas_reservadas.add(params)
+        elif sql == amostras.SQL_INSERIR_LEITURA_DERIVADA:
+            self.proximo_id += 1
+            self.resposta = (self.proximo_id,)
+        elif sql == tendencias.SQL_CRIAR_ESTADO:
+            self.estados.setdefault(params[0], params[1].adapted)
+        elif sql == tendencias.SQL_LER_ESTADO:
+            self.resposta = (self.estados[params[0]],)
+        else:
+            self.resposta = None
+
+    def fetchall(self):
+        return self.resposta
+
+    def fetchone(self):
+        return self.resposta
+
+    def sqls(self, sql):
+        return [params for executado, params in self.executados if executado == sql]
+
+def serie(segundos, frequencia=75, saturacao=97, inicio=INICIO, semente=1):
+    rng = np.random.default_rng(semente)
+    instantes = np.datetime64(inicio, "ms") + (np.arange(segundos) * 1000 + rng.integers(0, 40, segundos)).astype("timedelta64[ms]")
+    return instantes, frequencia + rng.integers(-3, 4, segundos), saturacao + rng.integers(-1, 2, segundos)
+
+def test_codificacao_delta_zigzag():
+    for valores, largura in (([75, 76, 74, 74, 80], 1), ([0, 1000, 2003, 2999], 2), ([-5, 70000, -70000], 4)):
+        blob = amostras.codificar(valores)
+        assert blob[0] == largura and len(blob) == 1 + largura * len(valores)
+        assert amostras.decodificar(memoryview(blob)).tolist() == valores
+    assert amostras.decodificar(amostras.codificar([])).tolist() == []
+
+def test_empacotar_por_minuto_descarta_artefatos_e_repeticoes():
+    instantes, frequencias, saturacoes = serie(150)
+    # Sensor solto (0 bpm) e amostra repetida: vale a última
+    frequencias[10] = 0
+    instantes = np.append(instantes, instantes[20])
+    frequencias, saturacoes = np.append(frequencias, 99), np.append(saturacoes, 95)
+    normalizadas = amostras.normalizar(instantes, frequencias, saturacoes)
+    blocos = amostras.empacotar(*normalizadas)
+    assert [b["minuto"] for b in blocos] == [INICIO, INICIO + timedelta(minutes=1), INICIO + timedelta(minutes=2)]
+    assert [b["quantidade"] for b in blocos] == [59, 60, 30]
+    # Um minuto a 1 Hz: instantes em 2 bytes, pulso e saturação em 1 byte por amostra
+    assert len(blocos[1]["instantes"]) + len(blocos[1]["frequencias"]) + len(blocos[1]["saturacoes"]) == 3 + 60 * 4
+    desempacotado = [amostras.desempacotar(b["minuto"], b["instantes"], b["frequencias"], b["saturacoes"]) for b in blocos]
+    for original, juntado in zip(normalizadas, (np.concatenate(c) for c in zip(*desempacotado))):
+        assert np.array_equal(original, juntado)
+    assert (99, 95) in zip(normalizadas[1].tolist(), normalizadas[2].tolist())
+
+def test_gravar_mescla_com_bloco_existente():
+    existentes = amostras.empacotar(*amostras.normalizar(*serie(30)))
+    cursor = CursorFalso(existentes)
+    instantes, frequencias, saturacoes = serie(40, frequencia=90, inicio=INICIO + timedelta(seconds=30), semente=2)
+    assert amostras.gravar_amostras(cursor, 7, instantes, frequencias, saturacoes) == 2
+    (paciente, minutos), = cursor.sqls(amostras.SQL_BLOCOS_EXISTENTES)
+    assert paciente == 7 and minutos == [INICIO, INICIO + timedelta(minutes=1)]
+    (params,) = cursor.sqls(amostras.SQL_GRAVAR_BLOCOS)
+    assert params[0] == 7 and params[2] == [60, 10]
+    # Primeiros 30 s do bloco existente, seguintes do lote novo
+    frequencias_minuto = amostras.decodificar(params[4][0].adapted)
+    assert frequencias_minuto[:30].max() <= 78 and frequencias_minuto[30:].min() >= 87
+
+def test_reducao_pelos_resumos_igual_a_das_amostras():
+    instantes, frequencias, saturacoes = amostras.normalizar(*serie(20 * 60))
+    blocos = amostras.empacotar(instantes, frequencias, saturacoes)
+    passo = timedelta(minutes=5)
+    esperado = amostras.reduzir(instantes, frequencias, saturacoes, passo)
+
+    class CursorResumos(CursorFalso):
+        def execute(self, sql, params=None):
+            assert sql == amostras.SQL_AMOSTRAS_RESUMOS
+            self.resposta = [(b["minuto"], b["quantidade"], *(b[c] for c in amostras.RESUMOS)) for b in blocos]
+
+    reduzido = amostras.reduzir_intervalo(CursorResumos(), 1, INICIO, INICIO + timedelta(minutes=20), passo)
+    assert len(reduzido) == 4 and reduzido["amostras"].tolist() == [300] * 4
+    assert reduzido["inicio"].tolist() == [INICIO + i * passo for i in range(4)]
+    for coluna in amostras.RESUMOS:
+        assert np.allclose(reduzido[coluna].to_numpy(dtype=float), esperado[coluna].to_numpy(dtype=float))
+
+def test_leituras_derivadas_alimentam_alertas():
+    # 15 min com saturação baixa, depois 15 min com poucas amostras (sem leitura derivada)
+    blocos = amostras.empacotar(*amostras.normalizar(*serie(15 * 60, saturacao=87)))
+    blocos += amostras.empacotar(*amostras.normalizar(*serie(30, inicio=INICIO + timedelta(minutes=15))))
+    cursor = CursorFalso(blocos)
+    fim = INICIO + timedelta(minutes=31)
+    assert amostras.registrar_pontuais(cursor, 3, INICIO, fim, PARAMETROS_PADRAO) == (1, 1)
+    (leitura,) = cursor.sqls(amostras.SQL_INSERIR_LEITURA_DERIVADA)
+    assert leitura == (3, 75, 87, INICIO + amostras.INTERVALO_PONTUAL)
+    (alerta,) = cursor.sqls(amostras.SQL_INSERIR_ALERTA)
+    assert alerta[:2] == (3, TIPO_ALERTA_LIMITES) and alerta[2].startswith("Saturação baixa: 87%")
+    # Janela já derivada não se repete
+    assert amostras.registrar_pontuais(cursor, 3, INICIO, fim, PARAMETROS_PADRAO) == (0, 0)
+    assert amostras.janelas_completas(INICIO + timedelta(minutes=1), fim) == [INICIO + timedelta(minutes=15)]
+
+def test_sinais_nao_medidos_nao_geram_alerta():
+    sinais = {"temperatura": None, "pressao": None, "frequencia": 130, "saturacao": 97}
+    assert avaliar_alertas(sinais, PARAMETROS_PADRAO) == [
+        f"Frequência cardíaca fora do padrão: 130 bpm (Limite: {PARAMETROS_PADRAO['freq_min']}–{PARAMETROS_PADRAO['freq_max']} bpm)"
+    ]
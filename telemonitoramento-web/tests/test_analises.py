@@ -0,0 +1,98 @@
+import sys
+import os
+from datetime import date, datetime, timedelta
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import pytest
+
+import analises
+import exportacao
+
+# Segunda-feira
+INICIO = datetime(2024, 1, 29, 8, 0)
+PACIENTES = [(1, 10, "Ana", 7, "Dra. Vera", 50, None),
+             (2, 11, "Rui", 7, "Dra. Vera", 80, None),
+             (3, 12, "Lia", 8, "Dr. Caio", 80, None)]
+
+class ConexaoFalsa:
+    """Cursor no servidor que devolve as linhas em lotes."""
+
+    def __init__(self, linhas):
+        self.linhas = linhas
+
+    def cursor(self, name=None):
+        return self
+
+    def execute(self, sql, params=None):
+        pass
+
+    def fetchone(self):
+        return (max((linha[0] for linha in self.linhas), default=None),)
+
+    def fetchall(self):
+        return []
+
+    def fetchmany(self, tamanho):
+        lote, self.linhas = self.linhas[:tamanho], self.linhas[tamanho:]
+        return lote
+
+    def close(self):
+        pass
+
+    def rollback(self):
+        pass
+
+@pytest.fixture
+def origem(tmp_path):
+    # Duas leituras por dia e paciente durante duas semanas; Rui com SpO2 baixa na segunda semana
+    sinais, id_ = [], 0
+    for dia in range(14):
+        for hora in (0, 12):
+            for paciente_id, _, _, profissional_id, *_ in PACIENTES:
+                id_ += 1
+                saturacao = 88 if paciente_id == 2 and dia >= 7 else 96
+                sinais.append((id_, paciente_id, profissional_id, INICIO + timedelta(days=dia, hours=hora),
+                               36.6, "120/80", 80, None if paciente_id == 3 and hora else saturacao, 1))
+    alertas = [(1, 2, 7, "Limite", "Saturação baixa", "pendente", INICIO + timedelta(days=8)),
+               (2, 2, 7, "Limite", "Saturação baixa", "resolvido", INICIO + timedelta(days=9)),
+               (3, 3, 8, "Tendência", "FC subindo", "pendente", datetime(2024, 2, 5))]
+    destino = str(tmp_path)
+    exportacao.exportar_tabela(ConexaoFalsa(sinais), "sinais_vitais", destino)
+    exportacao.exportar_tabela(ConexaoFalsa(alertas), "alertas", destino)
+    exportacao.exportar_tabela(ConexaoFalsa(list(PACIENTES)), "pacientes", destino)
+    return destino
+
+def test_saturacao_semanal_por_profissional(origem):
+    df = analises.executar("saturacao_semanal", origem)
+    assert df["profissional"].tolist() == ["Dr. Caio", "Dr. Caio", "Dra. Vera", "Dra. Vera"]
+    assert df["semana"].dt.date.tolist() == [date(2024, 1, 29), date(2024, 2, 5)] * 2
+    vera = df[df["profissional"] == "Dra. Vera"]
+    assert vera["saturacao_media"].tolist() == [96.0, 92.0] and vera["saturacao_minima"].tolist() == [96, 88]
+    assert vera["leituras"].tolist() == [28, 28] and vera["pacientes"].tolist() == [2, 2]
+    # Leituras sem SpO2 não contam
+    assert df[df["profissional"] == "Dr. Caio"]["leituras"].tolist() == [7, 7]
+
+def test_filtros_de_periodo_e_profissional(origem):
+    df = analises.executar("saturacao_semanal", origem, data_inicio=date(2024, 2, 5), data_fim=date(2024, 2, 5), profissional_id=7)
+    assert df[["profissional", "leituras"]].values.tolist() == [["Dra. Vera", 4]]
+    df = analises.executar("dessaturacao_mensal", origem, profissional_id=7)
+    # Janeiro (29 a 31) sem SpO2 baixa; em fevereiro, Rui abaixo de 90% nos 7 últimos dias
+    assert df["leituras"].tolist() == [12, 44] and df["leituras_baixas"].tolist() == [0, 14]
+    assert df["percentual_baixas"].tolist() == [0.0, 31.8]
+
+def test_alertas_e_faixas_etarias(origem):
+    df = analises.executar("alertas_mensais", origem)
+    assert df[["tipo_alerta", "alertas", "pendentes", "pacientes"]].values.tolist() == [["Limite", 2, 1, 1], ["Tendência", 1, 1, 1]]
+    df = analises.executar("pacientes_mais_alertas", origem)
+    assert df[["paciente", "profissional", "alertas"]].values.tolist() == [["Rui", "Dra. Vera", 2], ["Lia", "Dr. Caio", 1]]
+    df = analises.executar("sinais_por_faixa_etaria", origem)
+    assert df["faixa_etaria"].tolist() == [50, 80] and df["faixa"].tolist() == ["50-59", "80-89"]
+    assert df["pacientes"].tolist() == [1, 2]
+    assert df["leituras"].tolist() == [28, 56] and df["temperatura_media"].tolist() == [36.6, 36.6]
+    assert analises.profissionais(origem) == [(8, "Dr. Caio"), (7, "Dra. Vera")]
+
+def test_tabela_nao_exportada(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        analises.executar("alertas_mensais", str(tmp_path))
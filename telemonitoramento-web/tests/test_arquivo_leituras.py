@@ -0,0 +1,98 @@
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import numpy as np
+import pytest
+
+import arquivo_leituras
+
+INICIO = datetime(2022, 1, 1, 8, 0)
+
+def leituras(n, primeiro_id=1):
+    rng = np.random.default_rng(5)
+    linhas = []
+    for i in range(n):
+        pressao = "abc" if i == 3 else f"{120 + int(rng.integers(-10, 11))}/{80 + int(rng.integers(-5, 6))}"
+        temperatura = None if i == 5 else round(36.5 + float(rng.normal(0, 0.3)), 1)
+        linhas.append((primeiro_id + 3 * i, INICIO + timedelta(hours=8 * i), temperatura, pressao,
+                       75 + int(rng.integers(-8, 9)), 97 + int(rng.integers(-2, 2))))
+    return linhas
+
+class ConexaoFalsa:
+    """Cursor no servidor que devolve as linhas em lotes."""
+
+    def __init__(self, linhas):
+        self.linhas = linhas
+        self.consultas = []
+        self.lotes = 0
+
+    def cursor(self, name=None):
+        return self
+
+    def execute(self, sql, params=None):
+        self.consultas.append((sql, params))
+
+    def fetchmany(self, tamanho):
+        lote, self.linhas = self.linhas[:tamanho], self.linhas[tamanho:]
+        self.lotes += 1
+        return lote
+
+    def close(self):
+        pass
+
+    def rollback(self):
+        pass
+
+def test_arquivo_ida_e_volta_com_visoes_sem_copia(tmp_path):
+    linhas = leituras(1000)
+    caminho = str(tmp_path / "paciente_7.tmsv")
+    tamanho = arquivo_leituras.escrever_arquivo(caminho, 7, linhas)
+    assert tamanho == os.path.getsize(caminho)
+    # Instantes (8 bytes) e temperatura (4) fixos; ids, pressão, FC e SpO2 em 1 byte cada
+    assert tamanho < 1000 * (8 + 4 + 5) + 512
+    with arquivo_leituras.ArquivoLeituras(caminho) as arquivo:
+        assert (arquivo.paciente_id, arquivo.quantidade) == (7, 1000)
+        assert arquivo.primeiro == np.datetime64(INICIO, "us")
+        colunas = arquivo.ler()
+        assert colunas["ids"].tolist() == [l[0] for l in linhas]
+        assert colunas["instantes"].astype(datetime).tolist() == [l[1] for l in linhas]
+        assert np.isnan(colunas["temperaturas"][5]) and colunas["temperaturas"][0] == np.float32(linhas[0][2])
+        assert colunas["sistolicas"][3] == colunas["diastolicas"][3] == arquivo_leituras.AUSENTE
+        assert f"{colunas['sistolicas'][0]}/{colunas['diastolicas'][0]}" == linhas[0][3]
+        assert colunas["frequencias"].tolist() == [l[4] for l in linhas]
+        # Colunas de largura fixa são visões sobre o mapa, somente leitura
+        for nome in ("instantes", "temperaturas"):
+            assert not colunas[nome].flags.owndata and not colunas[nome].flags.writeable
+        del colunas
+
+def test_intervalo_por_busca_binaria(tmp_path):
+    caminho = str(tmp_path / "paciente_1.tmsv")
+    arquivo_leituras.escrever_arquivo(caminho, 1, leituras(30))
+    arquivo = arquivo_leituras.ArquivoLeituras(caminho)
+    fatia = arquivo.ler(INICIO + timedelta(days=2), INICIO + timedelta(days=4), ["instantes", "saturacoes"])
+    assert len(fatia["instantes"]) == len(fatia["saturacoes"]) == 6
+    assert fatia["instantes"][0] == np.datetime64(INICIO + timedelta(days=2), "us")
+    assert arquivo.intervalo(fim=INICIO) == slice(0, 0)
+    del fatia
+    arquivo.fechar()
+
+def test_arquivo_invalido(tmp_path):
+    caminho = tmp_path / "paciente_2.tmsv"
+    caminho.write_bytes(b"CSV!" + bytes(60))
+    with pytest.raises(ValueError):
+        arquivo_leituras.ArquivoLeituras(str(caminho))
+
+def test_gerar_do_banco_em_lotes(tmp_path, monkeypatch):
+    monkeypatch.setattr(arquivo_leituras, "TAMANHO_LOTE", 7)
+    linhas = [(3, *l) for l in leituras(10)] + [(9, *l) for l in leituras(4, primeiro_id=500)]
+    conn = ConexaoFalsa(linhas)
+    assert arquivo_leituras.arquivar_leituras(conn, str(tmp_path), pacientes=[3, 9])[:2] == (2, 14)
+    assert conn.consultas[0][1] == ([3, 9],) and conn.lotes == 3
+    arquivos = arquivo_leituras.listar_arquivos(str(tmp_path))
+    assert list(arquivos) == [3, 9]
+    with arquivo_leituras.ArquivoLeituras(arquivos[9]) as arquivo:
+        assert arquivo.quantidade == 4 and arquivo.coluna("ids").tolist() == [500, 503, 506, 509]
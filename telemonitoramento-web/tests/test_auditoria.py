@@ -0,0 +1,47 @@
+import sys
+import os
+from datetime import date, datetime
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+from auditoria import meses_entre, particoes_frias, consultar_arquivos, _escrever_parquet, _escrever_csv
+
+class CursorFalso:
+    def __init__(self, linhas):
+        self.linhas = list(linhas)
+
+    def fetchmany(self, n):
+        lote, self.linhas = self.linhas[:n], self.linhas[n:]
+        return lote
+
+LINHAS_JANEIRO = [
+    (1, 10, "Login", "Email: a@b", datetime(2024, 1, 5, 8, 0)),
+    (2, 11, "Envio de mensagem", "Consulta remarcada", datetime(2024, 1, 20, 9, 30)),
+]
+LINHAS_FEVEREIRO = [
+    (3, 10, "Login", "Email: a@b", datetime(2024, 2, 2, 7, 0)),
+]
+
+def test_meses_entre():
+    assert meses_entre(date(2023, 11, 15), date(2024, 2, 1)) == [date(2023, 11, 1), date(2023, 12, 1), date(2024, 1, 1), date(2024, 2, 1)]
+
+def test_particoes_frias():
+    particoes = [(f"auditoria_2024_{m:02d}", date(2024, m, 1)) for m in range(1, 7)]
+    frias = particoes_frias(particoes, hoje=date(2024, 6, 10), quentes=3)
+    assert [nome for nome, _ in frias] == ["auditoria_2024_01", "auditoria_2024_02", "auditoria_2024_03"]
+
+def test_consultar_arquivos_parquet_e_csv(tmp_path):
+    assert _escrever_parquet(CursorFalso(LINHAS_JANEIRO), str(tmp_path / "auditoria_2024_01.parquet")) == 2
+    assert _escrever_csv(CursorFalso(LINHAS_FEVEREIRO), str(tmp_path / "auditoria_2024_02.csv.gz")) == 1
+
+    df = consultar_arquivos(str(tmp_path), acao="Login")
+    assert list(df["id"]) == [3, 1]
+
+    df = consultar_arquivos(str(tmp_path), data_inicio=date(2024, 1, 10), data_fim=date(2024, 1, 31))
+    assert list(df["id"]) == [2]
+
+    df = consultar_arquivos(str(tmp_path), texto="remarcada")
+    assert list(df["acao"]) == ["Envio de mensagem"]
+
+    assert consultar_arquivos(str(tmp_path), usuario_id=99).empty
@@ -0,0 +1,52 @@
+import random
+import sys
+import os
+from datetime import datetime
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+from consultas import montar_consulta_sinais_vitais, montar_consulta_mensagens, montar_consulta_auditoria
+from scripts.benchmark import percentil, resumir_amostras
+from scripts.gerar_dados_sinteticos import gerar_usuarios, gerar_sinais_vitais
+
+def test_percentil():
+    valores = list(range(1, 101))
+    assert percentil(valores, 50) == 50.5
+    assert percentil(valores, 100) == 100
+    assert percentil([7], 99) == 7
+    assert percentil([], 50) is None
+
+def test_resumir_amostras():
+    resumo = resumir_amostras([10.0, 20.0, 30.0], [2, 2, 5])
+    assert resumo["iteracoes"] == 3
+    assert resumo["p50_ms"] == 20.0
+    assert resumo["consultas_por_iteracao"] == 3.0
+
+def test_geracao_reprodutivel():
+    linhas1 = list(gerar_sinais_vitais(random.Random(1), [1, 2], 3, 2, datetime(2024, 1, 10), 100))
+    linhas2 = list(gerar_sinais_vitais(random.Random(1), [1, 2], 3, 2, datetime(2024, 1, 10), 100))
+    assert linhas1 == linhas2
+    assert len(linhas1) == 2 * 3 * 2
+    assert [l[0] for l in linhas1] == list(range(100, 112))
+
+def test_gerar_usuarios_tipos():
+    usuarios = list(gerar_usuarios(random.Random(1), 2, 3, 10, "hash"))
+    assert [u[4] for u in usuarios] == ["Profissional"] * 2 + ["Paciente"] * 3
+    assert len({u[2] for u in usuarios}) == 5
+
+def test_consulta_sinais_filtros():
+    query, params = montar_consulta_sinais_vitais(paciente_id=3, data_inicio="2024-01-01")
+    assert "s.paciente_id = %s AND s.data_registro >= %s" in query
+    assert params == (3, "2024-01-01", 100)
+    query, params = montar_consulta_sinais_vitais()
+    assert "WHERE" not in query
+
+def test_consulta_busca_textual_paginada():
+    query, params = montar_consulta_mensagens(remetente_id=5, termo="febre alta", limite=20, deslocamento=40)
+    assert "m.busca @@ websearch_to_tsquery('portuguese', %s)" in query
+    assert query.endswith("ORDER BY ts_rank_cd(m.busca, websearch_to_tsquery('portuguese', %s)) DESC, m.data_envio DESC LIMIT %s OFFSET %s")
+    assert params == (5, "febre alta", "febre alta", 20, 40)
+    query, params = montar_consulta_auditoria(acao="Login")
+    assert "ts_rank_cd" not in query and "OFFSET" not in query
+    assert params == ("Login", 100)
@@ -0,0 +1,102 @@
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import cache_leituras
+
+INICIO = datetime(2024, 5, 1, 8, 0)
+
+class BancoFalso:
+    """Guarda leituras (paciente_id, id, data, temperatura, pressao, frequencia, saturacao) e conta conexões."""
+
+    def __init__(self, leituras=()):
+        self.leituras = list(leituras)
+        self.conexoes = 0
+        self.antes_de_responder = None
+
+    def conectar(self):
+        self.conexoes += 1
+        return self
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params):
+        pacientes, limite = params
+        self.resposta = []
+        for paciente_id in pacientes:
+            do_paciente = sorted((l for l in self.leituras if l[0] == paciente_id), key=lambda l: (l[2], l[1]), reverse=True)
+            self.resposta.extend(do_paciente[:limite])
+
+    def fetchall(self):
+        if self.antes_de_responder:
+            self.antes_de_responder()
+        return self.resposta
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+def leitura(paciente_id, sinal_id, horas, temperatura=36.5, pressao="120/80"):
+    return (paciente_id, sinal_id, INICIO + timedelta(hours=horas), temperatura, pressao, 80, 97)
+
+def test_buffer_circular_guarda_as_mais_recentes():
+    buffer = cache_leituras.BufferLeituras(3)
+    for i in range(5):
+        buffer.adicionar(i, INICIO + timedelta(hours=i), 36.1 + i / 10, "120/80" if i != 4 else "sem formato", 70 + i, None)
+    linhas = buffer.linhas()
+    assert [linha[0] for linha in linhas] == [INICIO + timedelta(hours=h) for h in (4, 3, 2)]
+    assert linhas[0] == (INICIO + timedelta(hours=4), 36.5, None, 74, None)
+    assert linhas[1][1:4] == (36.4, "120/80", 73)
+    assert buffer.contem(2) and not buffer.contem(1)
+
+def test_leituras_em_cache_nao_consultam_o_banco():
+    banco = BancoFalso([leitura(1, i, i) for i in range(15)] + [leitura(2, 100, 0)])
+    cache = cache_leituras.CacheLeituras()
+    recentes = cache.leituras_de([1, 2, 3], banco.conectar)
+    assert banco.conexoes == 1
+    assert len(recentes[1]) == cache_leituras.TAMANHO_BUFFER and recentes[1][0][0] == INICIO + timedelta(hours=14)
+    assert len(recentes[2]) == 1 and recentes[3] == []
+    assert cache.leituras(1, banco.conectar) == recentes[1] and cache.leituras(3, banco.conectar) == []
+    assert banco.conexoes == 1 and cache.acertos == 2
+
+def test_gravacao_local_e_notificacoes_de_outros_processos():
+    banco = BancoFalso([leitura(1, 1, 0), leitura(2, 2, 0)])
+    cache = cache_leituras.CacheLeituras()
+    cache.leituras_de([1, 2], banco.conectar)
+    # Gravada por este processo: entra no buffer e o evento dela é ignorado
+    cache.registrar(1, 3, INICIO + timedelta(hours=1), 38.0, "130/85", 90, 95)
+    cache.notificar({"tabela": "sinais_vitais", "id": 3, "paciente_id": 1})
+    assert cache.leituras(1, banco.conectar)[0] == (INICIO + timedelta(hours=1), 38.0, "130/85", 90, 95)
+    assert banco.conexoes == 1
+    # Gravada por outro processo: descarta o buffer, recarregado na próxima consulta
+    banco.leituras.append(leitura(2, 4, 2, temperatura=39.0))
+    cache.notificar({"tabela": "sinais_vitais", "id": 4, "paciente_id": 2})
+    assert cache.leituras(2, banco.conectar)[0][1] == 39.0 and banco.conexoes == 2
+    cache.notificar({"tabela": "sinais_vitais", "em_massa": True})
+    assert len(cache) == 0
+
+def test_carga_concorrente_com_leitura_nova_nao_e_guardada():
+    banco = BancoFalso([leitura(1, 1, 0)])
+    cache = cache_leituras.CacheLeituras()
+    banco.antes_de_responder = lambda: cache.notificar({"tabela": "sinais_vitais", "id": 2, "paciente_id": 1})
+    assert len(cache.leituras(1, banco.conectar)) == 1
+    assert len(cache) == 0
+    banco.antes_de_responder = None
+    cache.leituras(1, banco.conectar)
+    assert len(cache) == 1
+
+def test_limite_de_memoria_descarta_os_menos_usados():
+    custo = cache_leituras.BufferLeituras().bytes()
+    banco = BancoFalso([leitura(p, p, 0) for p in range(1, 6)])
+    cache = cache_leituras.CacheLeituras(limite_memoria=3 * custo)
+    assert cache.max_pacientes == 3
+    cache.leituras_de([1, 2, 3], banco.conectar)
+    cache.leituras(1, banco.conectar)
+    cache.leituras_de([4], banco.conectar)
+    assert set(cache._buffers) == {1, 3, 4}
@@ -0,0 +1,60 @@
+import sys
+import os
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import pytest
+from cryptography.fernet import Fernet
+
+import criptografia
+
+ANTIGA = Fernet.generate_key().decode()
+NOVA = Fernet.generate_key().decode()
+
+def test_chaves_configuradas(monkeypatch):
+    monkeypatch.delenv("FERNET_KEY", raising=False)
+    with pytest.raises(RuntimeError, match="FERNET_KEY"):
+        criptografia.chaves_configuradas()
+    monkeypatch.setenv("FERNET_KEY", NOVA)
+    monkeypatch.setenv("FERNET_KEYS_ANTIGAS", f" {ANTIGA}, ,{NOVA}")
+    assert criptografia.chaves_configuradas() == [NOVA, ANTIGA]
+
+def test_multifernet_decifra_antigas_e_cifra_com_a_atual():
+    dados = {"idade": 40, "diagnostico": "Hipertensão"}
+    token_antigo = criptografia.criptografar_json(criptografia.criar_fernet([ANTIGA]), dados)
+    fernet = criptografia.criar_fernet([NOVA, ANTIGA])
+    assert criptografia.descriptografar_json(fernet, token_antigo) == dados
+    token_novo = criptografia.criptografar_json(fernet, dados)
+    assert criptografia.descriptografar_json(criptografia.criar_fernet([NOVA]), token_novo) == dados
+    assert criptografia.criptografar_json(fernet, None) is None
+
+def test_recriptografar_linhas():
+    fernet = criptografia.criar_fernet([NOVA, ANTIGA])
+    antigo = Fernet(ANTIGA.encode()).encrypt(b'{"idade": 1}').decode()
+    atual = Fernet(NOVA.encode()).encrypt(b'{"idade": 2}').decode()
+    perdido = Fernet(Fernet.generate_key()).encrypt(b'{"idade": 3}').decode()
+    alteracoes, falhas = criptografia.recriptografar_linhas(fernet, Fernet(NOVA.encode()), [(1, antigo), (2, atual), (3, perdido)])
+    assert falhas == [3]
+    [(id_, velho, novo)] = alteracoes
+    assert (id_, velho) == (1, antigo)
+    assert Fernet(NOVA.encode()).decrypt(novo.encode()) == b'{"idade": 1}'
+
+def test_limitador_mantem_a_taxa():
+    agora = [0.0]
+    esperas = []
+
+    def dormir(segundos):
+        esperas.append(segundos)
+        agora[0] += segundos
+
+    limitador = criptografia.Limitador(100, relogio=lambda: agora[0], dormir=dormir)
+    limitador.registrar(50)
+    assert esperas == [0.5]
+    agora[0] += 2.0  # lote lento: nenhuma espera adicional
+    limitador.registrar(50)
+    assert esperas == [0.5]
+    assert limitador.taxa_observada() == pytest.approx(100 / 2.5)
+    sem_limite = criptografia.Limitador(None, relogio=lambda: agora[0], dormir=dormir)
+    sem_limite.registrar(10_000)
+    assert esperas == [0.5]
@@ -0,0 +1,51 @@
+import sys
+import os
+from datetime import datetime
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import escore_risco
+
+class CursorFalso:
+    def __init__(self, linhas):
+        self.linhas = linhas
+        self.executados = []
+
+    def execute(self, sql, params=None):
+        self.executados.append((sql, params))
+
+    def fetchall(self):
+        return self.linhas
+
+def test_pontuacao_nas_bordas_das_faixas():
+    assert [escore_risco.pontuar("temperatura", t) for t in (35.0, 35.1, 36.0, 36.1, 38.0, 38.1, 39.0, 39.1)] == [3, 1, 1, 0, 0, 1, 1, 2]
+    assert [escore_risco.pontuar("frequencia", f) for f in (40, 41, 50, 51, 90, 91, 110, 111, 130, 131)] == [3, 1, 1, 0, 0, 1, 1, 2, 2, 3]
+    assert [escore_risco.pontuar("saturacao", s) for s in (91, 92, 93, 94, 95, 96)] == [3, 2, 2, 1, 1, 0]
+    assert [escore_risco.pontuar("sistolica", p) for p in (90, 91, 100, 101, 110, 111, 219, 220)] == [3, 2, 2, 1, 1, 0, 0, 3]
+    assert escore_risco.pontuar("sistolica", None) == 0
+
+def test_escore_e_nivel():
+    assert escore_risco.calcular_escore(36.8, "120/80", 75, 98) == (0, {"temperatura": 0, "frequencia": 0, "saturacao": 0, "sistolica": 0})
+    escore, pontos = escore_risco.calcular_escore(38.5, "95/60", 115, 93)
+    assert escore == 1 + 2 + 2 + 2 and escore_risco.classificar(escore, pontos) == "Alto"
+    assert escore_risco.classificar(*escore_risco.calcular_escore(37.0, "120/80", 95, 94)) == "Baixo"
+    assert escore_risco.classificar(*escore_risco.calcular_escore(37.0, "12/8", 75, 90)) == "Baixo-médio"
+    assert escore_risco.classificar(*escore_risco.calcular_escore(38.2, "105/70", 112, 94)) == "Médio"
+
+def test_expressao_sql_segue_as_faixas():
+    expressao = escore_risco.expressao_sql()
+    assert expressao.count(" END) + (CASE WHEN ") == len(escore_risco.FAIXAS) - 1
+    assert "WHEN temperatura <= 35.0 THEN 3" in expressao and "ELSE 2 END" in expressao
+    assert "WHEN frequencia_cardiaca <= 130 THEN 2" in expressao
+    assert "split_part(pressao, '/', 1)::int END) <= 219 THEN 0" in expressao
+
+def test_listar_fila_classifica_e_mantem_a_ordem():
+    agora = datetime(2024, 5, 1, 8, 0)
+    cursor = CursorFalso([
+        (7, "Ana", 8, agora, 39.5, "88/50", 125, 90),
+        (3, "Bia", None, None, None, None, None, None),
+    ])
+    fila = escore_risco.listar_fila(cursor, 42, 51, 50)
+    assert cursor.executados == [(escore_risco.SQL_FILA_PRIORIDADE, (42, 51, 50))]
+    assert [(p, nivel) for p, *_, nivel in fila] == [(7, "Alto"), (3, None)]
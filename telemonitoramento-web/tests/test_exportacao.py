@@ -0,0 +1,130 @@
+import sys
+import os
+import json
+from datetime import datetime, timedelta
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import pyarrow.dataset as ds
+import pytest
+from cryptography.fernet import Fernet
+
+import exportacao
+from criptografia import criar_fernet, criptografar_json
+
+INICIO = datetime(2024, 1, 30, 12, 0)
+
+def sinais(n, primeiro_id=1):
+    return [(primeiro_id + i, 1 + i % 2, 7, INICIO + timedelta(days=i), 36.5, "120/80" if i % 3 else None, 80, 97, i % 4)
+            for i in range(n)]
+
+class ConexaoFalsa:
+    """Cursor no servidor que devolve as linhas em lotes; a sequência está no maior id das linhas."""
+
+    def __init__(self, linhas, ultimo_id=None, escritores=()):
+        self.linhas = linhas
+        self.ultimo_id = ultimo_id if ultimo_id is not None else max((linha[0] for linha in linhas), default=None)
+        self.escritores = list(escritores)
+        self.consultas = []
+
+    def cursor(self, name=None):
+        return self
+
+    def execute(self, sql, params=None):
+        self.consultas.append((sql, params))
+
+    def fetchone(self):
+        return (self.ultimo_id,)
+
+    def fetchall(self):
+        return [(escritor,) for escritor in self.escritores.pop(0)] if self.escritores else []
+
+    def fetchmany(self, tamanho):
+        lote, self.linhas = self.linhas[:tamanho], self.linhas[tamanho:]
+        return lote
+
+    def close(self):
+        pass
+
+    def rollback(self):
+        pass
+
+def test_montar_consulta_com_filtros():
+    sql, params = exportacao.montar_consulta("auditoria", data_inicio="2024-01-01", profissional_id=3, paciente_id=9, desde_id=50)
+    assert "a.data_hora >= %s" in sql and "a.usuario_id = %s" in sql and "a.id > %s" in sql
+    assert sql.rstrip().endswith("ORDER BY a.data_hora, a.id") and params == ["2024-01-01", 3, 50]
+    sql, params = exportacao.montar_consulta("pacientes", data_inicio="2024-01-01")
+    assert "WHERE" not in sql and params == []
+
+def test_exportacao_particionada_e_incremental(tmp_path, monkeypatch):
+    monkeypatch.setattr(exportacao, "TAMANHO_LOTE", 4)
+    destino = str(tmp_path)
+    resultado = exportacao.exportar_tabela(ConexaoFalsa(sinais(10)), "sinais_vitais", destino)
+    # 30/01 a 08/02: partições de janeiro e fevereiro, um arquivo aberto por vez
+    assert (resultado["linhas"], resultado["arquivos"], resultado["ultimo_id"]) == (10, 2, 10)
+    assert sorted(os.listdir(tmp_path / "sinais_vitais" / "ano=2024")) == ["mes=01", "mes=02"]
+
+    conn = ConexaoFalsa(sinais(3, primeiro_id=11))
+    assert exportacao.exportar_tabela(conn, "sinais_vitais", destino)["linhas"] == 3
+    assert conn.consultas[-1][1] == [10, 13]
+    tabela = ds.dataset(str(tmp_path / "sinais_vitais"), format="parquet", partitioning="hive").to_table()
+    assert sorted(tabela["id"].to_pylist()) == list(range(1, 14))
+    assert tabela.schema.field("data_registro").type.unit == "us"
+    estado = json.loads((tmp_path / exportacao.ARQUIVO_ESTADO).read_text(encoding="utf-8"))
+    assert estado["sinais_vitais"]["total"] == 13
+
+    with pytest.raises(ValueError):
+        exportacao.exportar_tabela(ConexaoFalsa([]), "sinais_vitais", destino, paciente_id=1)
+    # Completa: substitui as partes anteriores
+    exportacao.exportar_tabela(ConexaoFalsa(sinais(2)), "sinais_vitais", destino, paciente_id=1, completa=True)
+    assert ds.dataset(str(tmp_path / "sinais_vitais"), format="parquet").count_rows() == 2
+
+def test_espera_escritores_e_nao_perde_commit_tardio(tmp_path, monkeypatch):
+    destino = str(tmp_path)
+    exportacao.exportar_tabela(ConexaoFalsa(sinais(3)), "sinais_vitais", destino)
+    # A sequência já está em 6, mas o id 4 só confirma depois: espera a transação e exporta até 6
+    conn = ConexaoFalsa(sinais(3, primeiro_id=4), ultimo_id=6, escritores=[["3/15", "4/2"], ["3/15"], []])
+    monkeypatch.setattr(exportacao, "INTERVALO_ESPERA_S", 0)
+    resultado = exportacao.exportar_tabela(conn, "sinais_vitais", destino)
+    assert conn.consultas[-1][1] == [3, 6] and resultado["ultimo_id"] == 6
+    assert len([sql for sql, _ in conn.consultas if "pg_locks" in sql]) == 3
+    # A próxima execução parte do limite, sem reler nem duplicar o que já foi exportado
+    conn = ConexaoFalsa(sinais(2, primeiro_id=7))
+    assert exportacao.exportar_tabela(conn, "sinais_vitais", destino)["ultimo_id"] == 8
+    assert conn.consultas[-1][1] == [6, 8]
+    ids = ds.dataset(destino + "/sinais_vitais", format="parquet", partitioning="hive").to_table()["id"].to_pylist()
+    assert sorted(ids) == list(range(1, 9))
+
+    with pytest.raises(RuntimeError):
+        exportacao.limite_estavel(ConexaoFalsa([], ultimo_id=9, escritores=[["5/1"]] * 3), "sinais_vitais",
+                                  espera_maxima=-1)
+
+def test_falha_nao_deixa_partes(tmp_path):
+    class ConexaoQuebrada(ConexaoFalsa):
+        def fetchmany(self, tamanho):
+            if not self.linhas:
+                raise RuntimeError("conexão perdida")
+            return super().fetchmany(tamanho)
+
+    with pytest.raises(RuntimeError):
+        exportacao.exportar_tabela(ConexaoQuebrada(sinais(5)), "sinais_vitais", str(tmp_path))
+    arquivos = [nome for _, _, nomes in os.walk(tmp_path) for nome in nomes]
+    assert arquivos == []
+
+def test_pacientes_dados_medicos_omitidos_ou_descriptografados(tmp_path):
+    fernet = criar_fernet([Fernet.generate_key()])
+    outro = criar_fernet([Fernet.generate_key()])
+    linhas = [(1, 10, "Ana", 7, "Dra. Vera", 50, criptografar_json(fernet, {"idade": "54", "diagnostico": "DPOC"})),
+              (2, 11, "Rui", 7, "Dra. Vera", 80, criptografar_json(outro, {"idade": "80"})),
+              (3, 12, "Lia", 8, "Dr. Caio", None, None)]
+    exportacao.exportar_tabela(ConexaoFalsa(list(linhas)), "pacientes", str(tmp_path))
+    tabela = ds.dataset(str(tmp_path / "pacientes"), format="parquet").to_table()
+    assert "dados_medicos" not in tabela.column_names and "idade" not in tabela.column_names
+
+    resultado = exportacao.exportar_tabela(ConexaoFalsa(list(linhas)), "pacientes", str(tmp_path), fernet=fernet)
+    assert resultado["falhas"] == 1
+    tabela = ds.dataset(str(tmp_path / "pacientes"), format="parquet").to_table().sort_by("id")
+    assert tabela["idade"].to_pylist() == [54, None, None]
+    assert tabela["diagnostico"].to_pylist() == ["DPOC", None, None]
+    assert tabela["faixa_etaria"].to_pylist() == [50, 80, None] and tabela.schema.field("faixa_etaria").type == "int16"
@@ -0,0 +1,36 @@
+import sys
+import os
+from datetime import datetime
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+from incremental import obter_janela
+from consultas import montar_consulta_sinais_vitais
+
+def leitura(id_, hora):
+    return (id_, "Paciente", datetime(2024, 1, 1, hora))
+
+def test_janela_incremental():
+    estado = {}
+    janela, nova = obter_janela(estado, "rel", (1, None), 3, 2)
+    assert nova
+    janela.acrescentar([leitura(2, 9), leitura(1, 8)])
+    janela.marcar_visita()
+    assert janela.marca == (datetime(2024, 1, 1, 9), 2)
+    assert not any(janela.nova(l) for l in janela.linhas)
+
+    janela, nova = obter_janela(estado, "rel", (1, None), 3, 2)
+    assert not nova
+    assert janela.acrescentar([leitura(4, 11), leitura(3, 10), leitura(2, 9)]) == 2
+    assert [l[0] for l in janela.linhas] == [4, 3, 2]
+    assert [janela.nova(l) for l in janela.linhas] == [True, True, False]
+
+    janela, nova = obter_janela(estado, "rel", (5, None), 3, 2)
+    assert nova and janela.linhas == [] and janela.marca is None
+
+def test_consulta_sinais_apos_marca():
+    marca = (datetime(2024, 1, 1, 9), 2)
+    query, params = montar_consulta_sinais_vitais(paciente_id=1, apos=marca)
+    assert "(s.data_registro, s.id) > (%s, %s)" in query
+    assert params == (1, marca[0], 2, 100)
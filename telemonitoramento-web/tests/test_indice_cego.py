@@ -0,0 +1,61 @@
+import sys
+import os
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import pytest
+from cryptography.fernet import Fernet
+
+import indice_cego
+from criptografia import criar_fernet, criptografar_json
+from consultas import montar_consulta_pacientes
+
+CHAVE = b"chave-de-teste-do-indice"
+
+class CursorFalso:
+    def __init__(self, linhas):
+        self.linhas = linhas
+        self.executado = None
+
+    def execute(self, sql, params=None):
+        self.executado = (sql, params)
+
+    def fetchall(self):
+        return self.linhas
+
+def test_indice_diagnostico_normalizado():
+    indice = indice_cego.indice_diagnostico(CHAVE, "Insuficiência  Cardíaca")
+    assert indice == indice_cego.indice_diagnostico(CHAVE, "insuficiencia cardiaca ")
+    assert len(indice) == 32
+    assert indice != indice_cego.indice_diagnostico(b"outra-chave", "insuficiencia cardiaca")
+    assert indice_cego.indice_diagnostico(None, "Asma") is None
+    assert indice_cego.indice_diagnostico(CHAVE, "  ") is None
+
+def test_faixa_etaria():
+    assert [indice_cego.faixa_etaria(i) for i in (0, 9, 10, 47, 120, 130)] == [0, 0, 10, 40, 120, 120]
+    assert indice_cego.faixa_etaria("x") is None and indice_cego.faixa_etaria(-1) is None
+    assert indice_cego.rotulo_faixa(40) == "40-49" and indice_cego.rotulo_faixa(120) == "120+"
+    assert indice_cego.colunas_indice(CHAVE, {"idade": 47, "diagnostico": "Asma"}) == (indice_cego.indice_diagnostico(CHAVE, "asma"), 40)
+    assert indice_cego.colunas_indice(CHAVE, None) == (None, None)
+
+def test_montar_consulta_pacientes():
+    query, params = montar_consulta_pacientes("ab" * 16, 7, [40, 50])
+    assert "p.diagnostico_indice = %s" in query and "p.faixa_etaria = ANY(%s)" in query
+    assert params == ("ab" * 16, 7, [40, 50], 200)
+    query, params = montar_consulta_pacientes(profissional_id=7, limite=51, deslocamento=50)
+    assert query.endswith("LIMIT %s OFFSET %s") and params == (7, 51, 50)
+    with pytest.raises(ValueError):
+        montar_consulta_pacientes()
+
+def test_buscar_pacientes_descarta_colisoes():
+    fernet = criar_fernet([Fernet.generate_key().decode()])
+    cursor = CursorFalso([
+        (1, "Ana", "Dr. Silva", criptografar_json(fernet, {"idade": 40, "diagnostico": "Asma"})),
+        (2, "Bia", "Dr. Silva", criptografar_json(fernet, {"idade": 41, "diagnostico": "DPOC"})),
+    ])
+    encontrados = indice_cego.buscar_pacientes(cursor, fernet, CHAVE, "ASMA", 7)
+    assert encontrados == [indice_cego.PacienteEncontrado(1, "Ana", "Dr. Silva", 40, "Asma")]
+    assert cursor.executado[1][:2] == (indice_cego.indice_diagnostico(CHAVE, "asma"), 7)
+    with pytest.raises(ValueError, match="CHAVE_INDICE_CEGO"):
+        indice_cego.buscar_pacientes(cursor, fernet, None, "Asma")
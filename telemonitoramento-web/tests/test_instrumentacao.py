@@ -0,0 +1,34 @@
+import sys
+import os
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import instrumentacao
+from instrumentacao import impressao_digital, Histograma, escopo, escopo_atual
+
+def test_impressao_digital():
+    a = impressao_digital("SELECT * FROM usuarios WHERE email = 'a@b.com' AND id = 10")
+    b = impressao_digital("SELECT *   FROM usuarios\n WHERE email = %s AND id = %s")
+    assert a == b == "SELECT * FROM usuarios WHERE email = ? AND id = ?"
+    assert impressao_digital("SELECT 1 WHERE id IN (1, 2, 3) -- comentário") == "SELECT ? WHERE id IN (?)"
+
+def test_histograma_prometheus():
+    h = Histograma("teste_segundos", "Teste.", (0.1, 1.0), ("escopo",))
+    h.observar(0.05, escopo="pagina:Dashboard")
+    h.observar(0.5, escopo="pagina:Dashboard")
+    linhas = h.exportar()
+    assert 'teste_segundos_bucket{escopo="pagina:Dashboard",le="0.1"} 1' in linhas
+    assert 'teste_segundos_bucket{escopo="pagina:Dashboard",le="+Inf"} 2' in linhas
+    assert 'teste_segundos_count{escopo="pagina:Dashboard"} 2' in linhas
+
+def test_escopo_registra_consultas():
+    with escopo("job:teste") as medicao:
+        instrumentacao._registrar("SELECT 1", 0.002, 1)
+        instrumentacao._registrar("SELECT 2", 0.003, 1)
+    assert escopo_atual() is None
+    assert medicao.consultas == 2
+    assert medicao.mais_custosas(1)[0][1] == 2
+    resumo = instrumentacao.metricas.resumo_paginas()["job:teste"]
+    assert resumo["consultas_media"] == 2
+    assert "telemonitoramento_consultas_total" in instrumentacao.metricas.exportar_prometheus()
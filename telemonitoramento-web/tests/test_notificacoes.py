@@ -0,0 +1,85 @@
+import sys
+import os
+from datetime import datetime
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+from notificacoes import Assinatura, Ouvinte, decodificar_evento, mesclar_linhas, LIMITE_EVENTOS_POR_COMANDO
+from consultas import montar_consulta_ao_vivo
+
+def test_assinatura_roteamento_e_consumo():
+    ouvinte = Ouvinte({})
+    profissional = ouvinte.assinar(Assinatura(["alertas", "mensagens"], pacientes=[1, 2], usuario_id=7))
+    admin = ouvinte.assinar(Assinatura(["alertas"]))
+    # Primeira leitura sempre é uma carga completa
+    assert profissional.consumir("alertas") is None
+    assert admin.consumir("alertas") is None
+
+    ouvinte.distribuir({"tabela": "alertas", "id": 10, "paciente_id": 1})
+    ouvinte.distribuir({"tabela": "alertas", "id": 11, "paciente_id": 3})
+    ouvinte.distribuir({"tabela": "mensagens", "id": 20, "id_destinatario": 7})
+    ouvinte.distribuir({"tabela": "mensagens", "id": 21, "id_destinatario": 8})
+    ouvinte.distribuir({"tabela": "sinais_vitais", "id": 30, "paciente_id": 1})
+
+    assert profissional.consumir("alertas") == {10}
+    assert profissional.consumir("alertas") == set()
+    assert admin.consumir("alertas") == {10, 11}
+    profissional.consumir("mensagens")
+    ouvinte.distribuir({"tabela": "mensagens", "id": 22, "id_destinatario": 7})
+    assert profissional.consumir("mensagens") == {22}
+
+    ouvinte.distribuir({"tabela": "alertas", "em_massa": True})
+    assert profissional.consumir("alertas") is None
+
+def test_acompanhar_pacientes_atribuidos_depois():
+    ouvinte = Ouvinte({})
+    assinatura = ouvinte.assinar(Assinatura(["alertas", "mensagens"], pacientes=[1], usuario_id=7))
+    assinatura.consumir("alertas")
+    assinatura.consumir("mensagens")
+    ouvinte.distribuir({"tabela": "alertas", "id": 10, "paciente_id": 2})
+    assert assinatura.consumir("alertas") == set()
+    # Paciente 2 atribuído: recarga dos alertas (os eventos anteriores dele se perderam) e eventos novos
+    assinatura.acompanhar([1, 2])
+    assert assinatura.consumir("alertas") is None and assinatura.consumir("mensagens") == set()
+    ouvinte.distribuir({"tabela": "alertas", "id": 11, "paciente_id": 2})
+    assert assinatura.consumir("alertas") == {11}
+    # Só remoções: sem recarga
+    assinatura.acompanhar([2])
+    assert assinatura.consumir("alertas") == set()
+
+def test_pendentes_limitados():
+    assinatura = Assinatura(["sinais_vitais"])
+    assinatura.consumir("sinais_vitais")
+    for id_ in range(LIMITE_EVENTOS_POR_COMANDO):
+        assinatura.notificar({"tabela": "sinais_vitais", "id": id_, "paciente_id": 1})
+    assert len(assinatura._pendentes["sinais_vitais"]) == LIMITE_EVENTOS_POR_COMANDO
+    for id_ in range(LIMITE_EVENTOS_POR_COMANDO, 3 * LIMITE_EVENTOS_POR_COMANDO):
+        assinatura.notificar({"tabela": "sinais_vitais", "id": id_, "paciente_id": 1})
+    assert not assinatura._pendentes["sinais_vitais"]
+    assert assinatura.consumir("sinais_vitais") is None
+    assert assinatura.consumir("sinais_vitais") == set()
+
+def test_assinatura_descartada_com_a_sessao():
+    ouvinte = Ouvinte({})
+    ouvinte.assinar(Assinatura(["alertas"]))
+    assert len(ouvinte._assinaturas) == 0
+
+def test_decodificar_evento():
+    assert decodificar_evento('{"tabela": "alertas", "id": 3, "paciente_id": 1}')["id"] == 3
+    assert decodificar_evento('{"tabela": "alertas", "em_massa": true}')["em_massa"]
+    assert decodificar_evento("não é json") is None
+    assert decodificar_evento('{"id": 3}') is None
+
+def test_mesclar_linhas():
+    atuais = [(2, "b", datetime(2024, 1, 2)), (1, "a", datetime(2024, 1, 1))]
+    novas = [(3, "c", datetime(2024, 1, 3)), (1, "a2", datetime(2024, 1, 1))]
+    assert mesclar_linhas(atuais, novas, 2, 2) == [(3, "c", datetime(2024, 1, 3)), (2, "b", datetime(2024, 1, 2))]
+    assert mesclar_linhas(atuais, novas, 2, 5)[-1] == (1, "a2", datetime(2024, 1, 1))
+
+def test_consulta_ao_vivo_por_ids():
+    query, params = montar_consulta_ao_vivo("alertas", 5, ids={9}, limite=1)
+    assert "p.id_profissional_responsavel = %s AND a.id = ANY(%s)" in query
+    assert params == (5, [9], 1)
+    query, params = montar_consulta_ao_vivo("mensagens", 7)
+    assert "m.id_destinatario = %s" in query and params == (7, 10)
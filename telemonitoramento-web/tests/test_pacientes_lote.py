@@ -0,0 +1,84 @@
+import sys
+import os
+import io
+import json
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import pytest
+from cryptography.fernet import Fernet
+
+import pacientes_lote
+from pacientes_lote import ResultadoLinha, IMPORTADO, DUPLICADO, INVALIDO, FALHA
+
+CHAVE = Fernet.generate_key().decode()
+
+CSV = (
+    "nome;idade;diagnostico;email;profissional\n"
+    "Ana Souza;40;Hipertensão;;prof@clinica.com\n"
+    "Bruno;200;Diabetes;bruno@x.com;prof@clinica.com\n"
+    "Carla;30;Asma;carla@x.com;desconhecido\n"
+    "Davi;50;DPOC;davi@x.com;\n"
+    "\n"
+    "Eva;60;ICC;EVA@x.com;CRM-1\n"
+    "Eva Dup;61;ICC;eva@x.com;7\n"
+    "Fabio;70;ICC;fabio@x.com;7\n"
+)
+
+class CursorFalso:
+    def execute(self, sql, params=None):
+        pass
+
+    def fetchall(self):
+        return [(7, "prof@clinica.com", "CRM-1")]
+
+class ConexaoFalsa:
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return CursorFalso()
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+def test_validar_paciente():
+    profissionais = {"7": 7, "prof@clinica.com": 7}
+    paciente = pacientes_lote.validar_paciente(2, {"nome": "Ana Souza", "idade": "40", "diagnostico": "HAS"}, profissionais, 7)
+    assert paciente.email == "ana.souza@paciente.com" and paciente.senha == pacientes_lote.SENHA_INICIAL
+    assert paciente.dados == {"idade": 40, "diagnostico": "HAS"}
+    with pytest.raises(ValueError, match="profissional responsável"):
+        pacientes_lote.validar_paciente(2, {"nome": "Ana", "idade": "40", "diagnostico": "HAS"}, profissionais)
+    with pytest.raises(ValueError, match="idade"):
+        pacientes_lote.validar_paciente(2, {"nome": "Ana", "idade": "x", "diagnostico": "HAS"}, profissionais, 7)
+
+def test_cabecalho_incompleto():
+    with pytest.raises(ValueError, match="diagnostico"):
+        list(pacientes_lote.ler_csv_pacientes(io.StringIO("nome,idade\nAna,40\n")))
+
+@pytest.mark.parametrize("trabalhadores", [1, 2])
+def test_importar_pacientes(monkeypatch, trabalhadores):
+    lotes = []
+
+    def inserir_lote(cursor, lote, cifrados, autor_id, chave_indice):
+        lotes.append([(p.email, json.loads(Fernet(CHAVE.encode()).decrypt(c.encode()))) for p, c in zip(lote, cifrados)])
+        if any(p.email == "fabio@x.com" for p in lote):
+            raise Exception("violação de chave\nDETALHE")
+        return [ResultadoLinha(p.linha, p.email, DUPLICADO if p.email == "eva@x.com" else IMPORTADO, "") for p in lote]
+
+    monkeypatch.setattr(pacientes_lote, "inserir_lote", inserir_lote)
+    conn = ConexaoFalsa()
+    resultados = pacientes_lote.importar_pacientes(conn, io.StringIO(CSV), CHAVE, 1, tamanho_lote=1, trabalhadores=trabalhadores)
+
+    assert [(r.linha, r.situacao) for r in resultados] == [
+        (2, IMPORTADO), (3, INVALIDO), (4, INVALIDO), (5, INVALIDO), (7, DUPLICADO), (8, DUPLICADO), (9, FALHA),
+    ]
+    assert resultados[-1].detalhe == "violação de chave"
+    assert lotes[0] == [("ana.souza@paciente.com", {"idade": 40, "diagnostico": "Hipertensão"})]
+    assert conn.rollbacks == 1
+    assert pacientes_lote.resumir_resultados(resultados) == {IMPORTADO: 1, DUPLICADO: 2, INVALIDO: 3, FALHA: 1}
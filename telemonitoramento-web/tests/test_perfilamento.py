@@ -0,0 +1,33 @@
+import json
+import sys
+import os
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import perfilamento
+
+def descriptografar_dados():
+    return sum(i * i for i in range(200000))
+
+def test_perfil_desligado(monkeypatch):
+    monkeypatch.delenv("PERFILAMENTO", raising=False)
+    assert perfilamento.iniciar_perfil("pagina:Dashboard") is None
+    assert perfilamento.encerrar_perfil() is None
+
+def test_perfil_job_grava_arquivos(monkeypatch, tmp_path):
+    monkeypatch.setenv("PERFILAMENTO", "ambos")
+    monkeypatch.setenv("PERFIS_DIR", str(tmp_path))
+
+    @perfilamento.perfilar_job("job:teste")
+    def job():
+        return descriptografar_dados()
+
+    job()
+    resumos = list(tmp_path.glob("*job_teste*.json"))
+    assert len(resumos) == 1
+    resumo = json.loads(resumos[0].read_text(encoding="utf-8"))
+    assert resumo["nome"] == "job:teste"
+    assert resumo["destaques_s"]["descriptografar_dados"] > 0
+    assert os.path.exists(resumo["arquivos"]["cprofile"])
+    assert os.path.exists(resumo["arquivos"]["folded"])
@@ -0,0 +1,100 @@
+import sys
+import os
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import perfis_alerta
+from alertas import PARAMETROS_PADRAO, avaliar_alertas
+
+VAZIO = (None,) * 7
+
+class BancoFalso:
+    """Responde às consultas do índice a partir de dicionários em memória."""
+
+    def __init__(self):
+        self.perfis = {1: ("DPOC", (None, None, None, None, 85, None, None)), 2: ("Pediátrico", (None, None, 70, 160, None, None, None))}
+        self.profissionais = {10: 2}
+        self.pacientes = {100: (10, 1, VAZIO), 101: (10, None, VAZIO), 102: (11, None, (None, 37.5, None, None, None, None, None))}
+        self.consultas = []
+        self.conexoes = 0
+
+    def __call__(self):
+        self.conexoes += 1
+        return self
+
+    def cursor(self):
+        return self
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+    def execute(self, sql, params=None):
+        self.consultas.append(sql)
+        ids = set(params[0]) if params else None
+        if "parametros_alerta" in sql:
+            self.linhas = []
+        elif "FROM perfis_alerta" in sql:
+            self.linhas = [(id_, nome, *v) for id_, (nome, v) in self.perfis.items() if ids is None or id_ in ids]
+        elif "FROM profissionais" in sql:
+            self.linhas = [(id_, p) for id_, p in self.profissionais.items() if ids is None or id_ in ids]
+        else:
+            self.linhas = [(id_, prof, perfil, *v) for id_, (prof, perfil, v) in self.pacientes.items() if ids is None or id_ in ids]
+
+    def fetchone(self):
+        return self.linhas[0] if self.linhas else None
+
+    def fetchall(self):
+        return self.linhas
+
+def test_validar_e_compilar_limites():
+    assert perfis_alerta.validar_limites({"temp_min": 38.0, "temp_max": 37.0, "pressao_max": "14/9x"}) == [
+        "temp_min deve ser menor que temp_max", "pressao_max deve estar no formato 120/80"
+    ]
+    assert perfis_alerta.validar_limites({"temp_min": 36.0}) == []
+    limites = perfis_alerta.compilar_limites(PARAMETROS_PADRAO, {"sat_min": 85, "freq_max": None}, None, (None, 37.5) + (None,) * 5)
+    assert limites == dict(PARAMETROS_PADRAO, sat_min=85, temp_max=37.5)
+
+def test_indice_resolve_camadas_sem_consultas_por_leitura():
+    banco = BancoFalso()
+    indice = perfis_alerta.IndiceLimites()
+    indice.sincronizar(banco, [100])
+    consultas = len(banco.consultas)
+    # Perfil do paciente (DPOC) sobre o do profissional (Pediátrico)
+    assert indice.limites(100) == dict(PARAMETROS_PADRAO, sat_min=85, freq_min=70, freq_max=160)
+    assert indice.limites(101)["sat_min"] == 90 and indice.limites(101)["freq_max"] == 160
+    assert indice.limites(102) == dict(PARAMETROS_PADRAO, temp_max=37.5)
+    assert indice.limites(None) == PARAMETROS_PADRAO
+    assert indice.limites(100) is indice.limites(100)
+    sinais = {"temperatura": 36.5, "pressao": "120/80", "frequencia": 80, "saturacao": 87}
+    assert avaliar_alertas(sinais, indice.limites(100)) == []
+    assert len(avaliar_alertas(sinais, indice.limites(101))) == 1
+    indice.sincronizar(banco, [100, 101])
+    assert len(banco.consultas) == consultas and banco.conexoes == 1
+
+def test_indice_atualiza_apenas_o_que_mudou():
+    banco = BancoFalso()
+    indice = perfis_alerta.IndiceLimites()
+    indice.sincronizar(banco)
+    antes_102 = indice.limites(102)
+    banco.perfis[1] = ("DPOC", (None, None, None, None, 88, None, None))
+    banco.profissionais[11] = 1
+    for origem, id_ in (("perfis_alerta", 1), ("profissionais", 11)):
+        evento = {"tabela": perfis_alerta.TABELA_EVENTOS, "origem": origem, "id": id_}
+        assert indice.interessa(evento)
+        indice.notificar(evento)
+    assert not indice.interessa({"tabela": "alertas", "id": 1})
+    banco.consultas.clear()
+    indice.sincronizar(banco)
+    assert len(banco.consultas) == 2 and not any("FROM pacientes" in sql for sql in banco.consultas)
+    assert indice.limites(100)["sat_min"] == 88
+    assert indice.limites(102) == dict(antes_102, sat_min=88)
+    # Paciente criado depois da carga é buscado uma única vez
+    banco.pacientes[103] = (10, None, VAZIO)
+    banco.consultas.clear()
+    indice.sincronizar(banco, [103])
+    indice.sincronizar(banco, [103])
+    assert len(banco.consultas) == 1 and indice.limites(103)["freq_max"] == 160
@@ -0,0 +1,67 @@
+import sys
+import os
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import pytest
+
+import seletores
+from consultas import montar_consulta_seletor
+
+class ConexaoFalsa:
+    def __init__(self, linhas):
+        self.linhas = linhas
+        self.executados = []
+        self.fechada = False
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        self.executados.append((sql, params))
+
+    def fetchall(self):
+        return self.linhas
+
+    def close(self):
+        self.fechada = True
+
+def test_montar_consulta_seletor_trigrama_e_prefixo():
+    query, params = montar_consulta_seletor("profissionais", "Silva_", 5)
+    assert "u.tipo IN ('Profissional', 'Profissional de Saúde')" in query and "(u.nome ILIKE %s OR u.email ILIKE %s)" in query
+    assert params == ("%silva\\_%", "%silva\\_%", "silva\\_%", "Silva_", 5)
+    query, params = montar_consulta_seletor("pacientes", "An")
+    assert query.startswith("SELECT p.id") and "lower(u.nome) LIKE %s" in query and "ILIKE" not in query
+    assert params == ("an%", 10)
+    query, _ = montar_consulta_seletor("profissionais_ativos", "Silva")
+    assert "u.status IS NOT FALSE" in query
+    with pytest.raises(ValueError):
+        montar_consulta_seletor("usuarios", "  ")
+
+def test_cache_busca_lru_e_validade():
+    agora = [0.0]
+    cache = seletores.CacheBusca(tamanho=2, validade=60, relogio=lambda: agora[0])
+    cache.guardar("a", [1])
+    cache.guardar("b", [2])
+    assert cache.obter("a") == [1]
+    cache.guardar("c", [3])  # "b" é a menos usada
+    assert cache.obter("b") is None and cache.obter("c") == [3]
+    agora[0] = 61
+    assert cache.obter("a") is None
+
+def test_buscar_opcoes_usa_cache():
+    conexoes = []
+
+    def conectar():
+        conexoes.append(ConexaoFalsa([(7, "Ana Souza", "ana@x.com")]))
+        return conexoes[-1]
+
+    cache = seletores.CacheBusca()
+    assert seletores.buscar_opcoes(conectar, "usuarios", "  ", cache) == []
+    opcoes = seletores.buscar_opcoes(conectar, "usuarios", "Ana ", cache)
+    assert opcoes == [(7, "Ana Souza · ana@x.com (ID 7)")]
+    assert seletores.buscar_opcoes(conectar, "usuarios", "ana", cache) == opcoes
+    assert len(conexoes) == 1 and conexoes[0].fechada
+    seletores.buscar_opcoes(conectar, "pacientes", "ana", cache)
+    assert len(conexoes) == 2
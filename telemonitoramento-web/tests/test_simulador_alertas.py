@@ -0,0 +1,101 @@
+import sys
+import os
+import random
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import numpy as np
+import pandas as pd
+
+import simulador_alertas
+from alertas import PARAMETROS_PADRAO, avaliar_alertas
+
+ESTRITOS = dict(PARAMETROS_PADRAO, temp_max=37.5, sat_min=93, pressao_max="130/85")
+
+class CursorFalso:
+    def __init__(self):
+        self.executados = []
+        self.copiado = None
+
+    def execute(self, sql, params=None):
+        self.executados.append((sql, params))
+
+    def copy_expert(self, sql, arquivo):
+        self.copiado = (sql, arquivo.read())
+
+class CursorCopia:
+    """Devolve um CSV fixo no COPY ... TO STDOUT (NULL = campo vazio, como no PostgreSQL)."""
+
+    def __init__(self, csv):
+        self.csv = csv
+
+    def mogrify(self, sql, params=None):
+        return sql.encode()
+
+    def copy_expert(self, sql, arquivo):
+        arquivo.write(self.csv)
+
+def gerar_leituras(n, pacientes, semente=7):
+    rng = random.Random(semente)
+    linhas = []
+    for i in range(n):
+        pressao = rng.choice(["120/80", "150/95", "85/55", "100/65", "12/8", "abc", "135/88"])
+        sist, diast = (map(int, pressao.split("/")) if "/" in pressao and len(pressao) >= 5 else (np.nan, np.nan))
+        linhas.append((rng.choice(pacientes), f"2024-01-{1 + i % 3:02d} 10:00:00", round(rng.uniform(34.5, 39.0), 1),
+                       pressao, rng.randint(40, 130), rng.randint(85, 100), sist, diast))
+    return pd.DataFrame(linhas, columns=simulador_alertas.COLUNAS_LEITURAS)
+
+def test_avaliacao_vetorizada_igual_a_avaliar_alertas():
+    leituras = gerar_leituras(300, [1])
+    limites = simulador_alertas.matriz_limites([ESTRITOS] * len(leituras))
+    vetorizado = simulador_alertas.avaliar_vetorizado(leituras, limites)
+    for i, linha in enumerate(leituras.to_dict("records")):
+        sinais = {"temperatura": linha["temperatura"], "pressao": linha["pressao"],
+                  "frequencia": linha["frequencia"], "saturacao": linha["saturacao"]}
+        esperado = avaliar_alertas(sinais, ESTRITOS)
+        gerados = [simulador_alertas.descrever_alerta(v, linha, ESTRITOS) for v in simulador_alertas.VITAIS if vetorizado[v][i]]
+        assert sorted(gerados) == sorted(esperado)
+
+def test_avaliar_particao_contagens_e_alertas_novos():
+    pacientes = np.array([1, 2])
+    leituras = gerar_leituras(200, [1, 2])
+    atuais = simulador_alertas.matriz_limites([PARAMETROS_PADRAO, PARAMETROS_PADRAO])
+    candidatos = simulador_alertas.matriz_limites([ESTRITOS, PARAMETROS_PADRAO])
+    contagens, linhas = simulador_alertas.avaliar_particao(
+        leituras, pacientes, atuais, candidatos, np.array([10, 20]), [ESTRITOS, PARAMETROS_PADRAO]
+    )
+    assert contagens["leituras"] == 200
+    assert set(contagens["dia"]) == {"2024-01-01", "2024-01-02", "2024-01-03"}
+    # Só o paciente 1 (profissional 10) recebeu limites mais estritos
+    atual_20, candidato_20 = contagens["profissional"][20]
+    assert atual_20 == candidato_20
+    atual_10, candidato_10 = contagens["profissional"][10]
+    assert candidato_10 > atual_10
+    assert sum(c - a for a, c in contagens["vital"].values()) == len(linhas) == candidato_10 - atual_10
+    assert {paciente for paciente, *_ in linhas} == {1}
+    assert all(status == simulador_alertas.STATUS_RETROATIVO for _, _, _, status, _ in linhas)
+
+def test_leituras_sem_temperatura_e_pressao_nao_geram_alerta():
+    csv = ("1,2024-01-01 10:00:00,,,80,97,,\n"
+           "1,2024-01-01 11:00:00,36.5,abc,80,97,,\n")
+    leituras = simulador_alertas.ler_leituras(CursorCopia(csv), [1], "2024-01-01", "2024-01-02")
+    assert leituras["temperatura"].isna().tolist() == [True, False]
+    assert leituras["pressao"].isna().tolist() == [True, False]
+    limites = simulador_alertas.matriz_limites([ESTRITOS] * len(leituras))
+    resultado = simulador_alertas.avaliar_vetorizado(leituras, limites)
+    assert not any(resultado[vital][0] for vital in simulador_alertas.VITAIS)
+    assert resultado["pressao_invalida"].tolist() == [False, True]
+
+def test_mesclar_e_gravar_alertas():
+    total = {"leituras": 0, "dia": {}, "vital": {}, "profissional": {}}
+    for parcial in ({"leituras": 2, "dia": {"d": [1, 2]}, "vital": {}, "profissional": {}},
+                    {"leituras": 3, "dia": {"d": [0, 1]}, "vital": {"saturacao": [1, 1]}, "profissional": {}}):
+        simulador_alertas.mesclar_contagens(total, parcial)
+    assert total["leituras"] == 5 and total["dia"] == {"d": [1, 3]} and total["vital"] == {"saturacao": [1, 1]}
+    cursor = CursorFalso()
+    linhas = [(1, "Sinais vitais", "Saturação baixa: 91% (Mínimo: 93%)", "retroativo", "2024-01-01 10:00:00")]
+    assert simulador_alertas.gravar_alertas(cursor, linhas, "2024-01-01", "2024-02-01") == 1
+    assert cursor.executados[0][0].startswith("DELETE FROM alertas WHERE status = %s")
+    assert cursor.copiado[0].startswith("COPY alertas (paciente_id, tipo_alerta, descricao, status, data_hora)")
+    assert "Saturação baixa: 91% (Mínimo: 93%)" in cursor.copiado[1]
@@ -0,0 +1,89 @@
+import sys
+import os
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import numpy as np
+import pandas as pd
+
+import tendencias
+
+class CursorFalso:
+    def __init__(self, estado=None):
+        self.estado = estado
+        self.executados = []
+
+    def execute(self, sql, params=None):
+        self.executados.append((sql, params))
+        # ON CONFLICT DO NOTHING: só cria a linha se ainda não existe
+        if sql == tendencias.SQL_CRIAR_ESTADO and self.estado is None:
+            self.estado = params[1].adapted
+
+    def fetchone(self):
+        return (self.estado,) if self.estado is not None else None
+
+def leituras_estaveis(n, semente=3):
+    rng = np.random.default_rng(semente)
+    return [(36.6 + rng.normal(0, 0.15), f"{120 + int(rng.integers(-5, 6))}/80", 75 + int(rng.integers(-4, 5)),
+             97 + int(rng.integers(-1, 2))) for _ in range(n)]
+
+def test_febre_lenta_gera_um_alerta_de_tendencia():
+    estado = tendencias.novo_estado()
+    for leitura in leituras_estaveis(30):
+        assert tendencias.atualizar_estado(estado, tendencias.valores_leitura(*leitura)) == []
+    gerados = []
+    # Subida de 0,1 °C por leitura: nenhum limite fixo cruzado no início
+    for passo in range(1, 15):
+        gerados += tendencias.atualizar_estado(estado, tendencias.valores_leitura(36.6 + 0.1 * passo, "120/80", 75, 97))
+    assert [g[0] for g in gerados] == [tendencias.VITAIS.index("temperatura")]
+    descricao = tendencias.descrever_desvio(*gerados[0])
+    assert descricao.startswith("Tendência de alta: Temperatura recente") and "desvios)" in descricao
+
+def test_saturacao_alerta_apenas_em_queda():
+    estado = tendencias.novo_estado()
+    for leitura in leituras_estaveis(30):
+        tendencias.atualizar_estado(estado, tendencias.valores_leitura(*leitura))
+    subida = [d for _ in range(10) for d in tendencias.atualizar_estado(estado, tendencias.valores_leitura(36.6, "120/80", 75, 100))]
+    assert not subida
+    queda = [d for _ in range(10) for d in tendencias.atualizar_estado(estado, tendencias.valores_leitura(36.6, "120/80", 75, 92))]
+    assert [d[0] for d in queda] == [tendencias.VITAIS.index("saturacao")]
+
+def test_lote_equivale_a_atualizacao_incremental():
+    leituras = leituras_estaveis(25) + [(38.4, "abc", 118, 91)] * 6 + leituras_estaveis(3, semente=9)
+    linhas, estados = [], {}
+    # Históricos de tamanhos bem diferentes (grupos distintos) e do mesmo grupo (2 e 3)
+    for paciente, quantidade in ((1, len(leituras)), (2, 5), (3, 7), (4, 1)):
+        estados[paciente] = tendencias.novo_estado()
+        for leitura in leituras[:quantidade]:
+            valores = tendencias.valores_leitura(*leitura)
+            tendencias.atualizar_estado(estados[paciente], valores)
+            linhas.append((paciente, *valores))
+    historico = pd.DataFrame(linhas, columns=["paciente_id", *tendencias.VITAIS])
+    ids, lote = tendencias.estados_em_lote(historico)
+    assert estados[1]["em_alerta"].any()
+    assert list(ids) == [1, 2, 3, 4]
+    for paciente, calculado in zip(ids, lote):
+        esperado = estados[paciente]
+        assert calculado.tobytes() == esperado.tobytes()
+
+def test_registrar_leitura_persiste_estado():
+    estado = tendencias.novo_estado()
+    tendencias.atualizar_estado(estado, tendencias.valores_leitura(36.5, "120/80", 70, 98))
+    cursor = CursorFalso(estado.tobytes())
+    assert tendencias.registrar_leitura(cursor, 5, 42, 36.7, "12/8", 72, 97) == []
+    assert cursor.executados[0][0] == tendencias.SQL_CRIAR_ESTADO
+    assert cursor.executados[1] == (tendencias.SQL_LER_ESTADO, (5,))
+    sql, (paciente, dados, sinal) = cursor.executados[2]
+    assert sql == tendencias.SQL_GRAVAR_ESTADO and (paciente, sinal) == (5, 42)
+    gravado = tendencias.desserializar(dados.adapted)
+    # Pressão fora do formato não entra na linha de base
+    assert gravado["contagem"].tolist() == [2, 2, 2, 1, 1]
+    assert len(dados.adapted) == tendencias.DTYPE_ESTADO.itemsize
+
+def test_primeira_leitura_cria_linha_antes_do_for_update():
+    cursor = CursorFalso()
+    tendencias.registrar_leitura(cursor, 5, 42, 36.7, "120/80", 72, 97)
+    assert [sql for sql, _ in cursor.executados] == [tendencias.SQL_CRIAR_ESTADO, tendencias.SQL_LER_ESTADO, tendencias.SQL_GRAVAR_ESTADO]
+    assert tendencias.desserializar(cursor.executados[0][1][1].adapted).tobytes() == tendencias.novo_estado().tobytes()
+    assert tendencias.desserializar(cursor.executados[2][1][1].adapted)["contagem"].tolist() == [1, 1, 1, 1, 1]
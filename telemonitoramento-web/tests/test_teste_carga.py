@@ -0,0 +1,29 @@
+import sys
+import os
+from email.mime.text import MIMEText
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+from scripts.teste_carga import CaixaPostal, criar_smtp_falso, resumir_latencias, dentro_do_slo
+
+def test_smtp_falso_entrega_codigo():
+    caixa = CaixaPostal()
+    msg = MIMEText("Seu código de verificação 2FA: 123456")
+    msg["Subject"] = "2FA"
+    msg["To"] = "prof1@bench.local"
+    with criar_smtp_falso(caixa)('smtp.gmail.com', 587) as server:
+        server.starttls()
+        server.login("x", "y")
+        server.send_message(msg)
+    assert caixa.ultimo_codigo("prof1@bench.local") == "123456"
+    assert caixa.ultimo_codigo("outro@bench.local") is None
+
+def test_resumir_latencias_e_slo():
+    resumo = resumir_latencias([("login", 100.0), ("navegar:Pacientes", 50.0), ("navegar:Ajuda", 150.0)])
+    assert resumo["navegar"]["amostras"] == 2
+    assert resumo["navegar:Pacientes"]["p50_ms"] == 50.0
+    nivel = {"sessoes_ok": 10, "erros": 0, "latencias": resumo}
+    assert dentro_do_slo(nivel, 200, 0.01)
+    assert not dentro_do_slo(nivel, 100, 0.01)
+    assert not dentro_do_slo(dict(nivel, erros=1), 200, 0.01)
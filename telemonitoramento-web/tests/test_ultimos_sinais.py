@@ -0,0 +1,52 @@
+import sys
+import os
+from datetime import datetime
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import ultimos_sinais
+
+class CursorFalso:
+    def __init__(self, linhas):
+        self.linhas = linhas
+        self.executados = []
+
+    def execute(self, sql, params=None):
+        self.executados.append((sql, params))
+
+    def fetchall(self):
+        return self.linhas
+
+AGORA = datetime(2024, 5, 10, 12, 0)
+
+def test_selos_de_situacao():
+    assert ultimos_sinais.situacao(None, None, None, None, AGORA) == "⚪ Sem leitura"
+    assert ultimos_sinais.situacao(0, "Baixo", datetime(2024, 5, 10, 8, 0), "resolvido", AGORA) == "🟢 Baixo"
+    assert ultimos_sinais.situacao(8, "Alto", datetime(2024, 5, 7, 8, 0), "pendente", AGORA) == \
+        "🔴 Alto · 🚨 alerta pendente · 💤 sem leitura há 3 dia(s)"
+
+def test_visao_geral_em_uma_consulta():
+    linhas = [
+        (1, "Ana", 7, datetime(2024, 5, 10, 9, 0), 38.5, "95/60", 115, 93,
+         [37.0, 38.5], [80, None, 115], [97, 93], [120, 95], [80, 60],
+         "Sinais vitais", "Temperatura alta", "pendente", datetime(2024, 5, 10, 9, 0)),
+        (2, "Bruno", None, None, None, None, None, None, None, None, None, None, None, None, None, None, None),
+    ]
+    cursor = CursorFalso(linhas)
+    visao = ultimos_sinais.listar_visao_geral(cursor, 42, agora=AGORA)
+    assert len(cursor.executados) == 1 and cursor.executados[0][1] == (42, ultimos_sinais.LIMITE_VISAO_GERAL)
+    ana, bruno = visao
+    assert ana["nivel"] == "Alto" and ana["situacao"] == "🔴 Alto · 🚨 alerta pendente"
+    assert ana["frequencias"] == [80, 115] and ana["sistolicas"] == [120, 95]
+    assert ana["alerta"] == "Sinais vitais: Temperatura alta"
+    assert bruno["nivel"] is None and bruno["situacao"] == "⚪ Sem leitura"
+    assert bruno["temperaturas"] == [] and bruno["alerta"] is None
+
+def test_upsert_corta_as_series():
+    sql = ultimos_sinais.sql_atualizar_leituras("novas")
+    fatia = f"cardinality(COALESCE(u.temperaturas, '{{}}') || EXCLUDED.temperaturas) - {ultimos_sinais.TAMANHO_SERIE - 1}):]"
+    assert fatia in sql
+    assert "FROM novas o GROUP BY paciente_id" in sql
+    assert "EXCLUDED.data_registro >= u.data_registro" in sql
+    assert "WHERE u.alerta_em IS NULL" in ultimos_sinais.sql_atualizar_alertas("novas")
@@ -0,0 +1,84 @@
+import sys
+import os
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+import pytest
+
+import usuarios
+from usuarios import ler_csv_usuarios, alterar_status_em_lote, importar_usuarios
+from consultas import montar_consulta_usuarios
+
+class CursorFalso:
+    def __init__(self, retorno):
+        self.retorno = retorno
+        self.comandos = []
+
+    def execute(self, sql, params=None):
+        self.comandos.append((sql, params))
+
+    def fetchall(self):
+        return self.retorno
+
+def test_ler_csv_usuarios():
+    conteudo = (
+        "nome;email;senha;tipo;status\n"
+        "Ana;Ana@Exemplo.com;123;Profissional;\n"
+        "Bruno;bruno@exemplo;123;Paciente;sim\n"
+        "Carla;carla@exemplo.com;123;Gerente;sim\n"
+        "Ana 2;ana@exemplo.com;123;Administrador;não\n"
+        "Davi;davi@exemplo.com;;Paciente;sim\n"
+        "Eva;eva@exemplo.com;123;Profissional de Saúde;inativo\n"
+        "Fábio;fabio@exemplo.com;123;Paciente;sim\n"
+    ).encode("utf-8-sig")
+    validas, erros = ler_csv_usuarios(conteudo)
+    assert validas == [
+        ("Ana", "ana@exemplo.com", "123", "Profissional", True),
+        ("Eva", "eva@exemplo.com", "123", "Profissional de Saúde", False),
+    ]
+    assert [numero for numero, _ in erros] == [3, 4, 5, 6, 8]
+    assert "repetido" in erros[2][1] and "Importar Pacientes" in erros[4][1]
+
+def test_ler_csv_usuarios_sem_coluna():
+    with pytest.raises(ValueError, match="senha"):
+        ler_csv_usuarios("nome,email,tipo\nAna,ana@exemplo.com,Paciente\n")
+
+def test_importar_usuarios_cria_profissionais_na_mesma_transacao(monkeypatch):
+    comandos = []
+
+    def execute_values(cursor, sql, valores, page_size=None, fetch=False):
+        comandos.append((sql, valores))
+        if fetch:
+            # ana@exemplo.com já existe
+            return [(10 + i, valor[1]) for i, valor in enumerate(valores) if valor[1] != "ana@exemplo.com"]
+
+    monkeypatch.setattr(usuarios, "execute_values", execute_values)
+    cursor = CursorFalso([])
+    linhas = [("Ana", "ana@exemplo.com", "1", "Profissional", True), ("Bia", "bia@exemplo.com", "1", "Administrador", True),
+              ("Caio", "caio@exemplo.com", "1", "Profissional", True), ("Eva", "eva@exemplo.com", "1", "Profissional de Saúde", True)]
+    inseridos, existentes = importar_usuarios(cursor, linhas, 9)
+    assert inseridos == {"bia@exemplo.com": 11, "caio@exemplo.com": 12, "eva@exemplo.com": 13} and existentes == ["ana@exemplo.com"]
+    sql_profissionais, valores = comandos[1]
+    assert "INSERT INTO profissionais" in sql_profissionais and valores == [(12,), (13,)]
+    assert len(cursor.comandos) == 1
+
+def test_alterar_status_em_lote_um_update_e_uma_auditoria():
+    cursor = CursorFalso([(3,), (1,)])
+    assert alterar_status_em_lote(cursor, [3, "1", 3, 2], False, 9) == [1, 3]
+    (sql_update, params_update), (sql_auditoria, params_auditoria) = cursor.comandos
+    assert "id = ANY(%s)" in sql_update and params_update == (False, [1, 2, 3], False)
+    assert params_auditoria == (9, "Inativação de usuários em lote", "2 usuários: 1, 3")
+
+    cursor = CursorFalso([])
+    assert alterar_status_em_lote(cursor, [5], True, 9) == []
+    assert len(cursor.comandos) == 1
+    assert alterar_status_em_lote(cursor, [], True, 9) == []
+    assert len(cursor.comandos) == 1
+
+def test_montar_consulta_usuarios():
+    query, params = montar_consulta_usuarios("50%_a", "Paciente", 51, 100)
+    assert "ILIKE" in query and "u.tipo = %s" in query and query.endswith("LIMIT %s OFFSET %s")
+    assert params == ("%50\\%\\_a%", "%50\\%\\_a%", "Paciente", 51, 100)
+    query, params = montar_consulta_usuarios()
+    assert "WHERE" not in query and params == (50,)
@@ -0,0 +1,52 @@
+import sys
+import os
+from datetime import date, datetime
+
+# Adicionar o diretório telemonitoramento ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'telemonitoramento'))
+
+from scripts.verificar_planos import enumerar_formas, analisar_plano, verificar
+
+AMOSTRA = {"paciente_id": 1, "profissional_id": 2, "usuario_id": 3, "acao": "Login", "email": "a@b", "senha": "x",
+           "data_inicio": date(2024, 1, 1), "data_fim": date(2024, 1, 8), "termo": "febre", "marca": (datetime(2024, 1, 8), 10),
+           "diagnostico_indice": "ab" * 16, "faixas": [40, 50]}
+
+PLANO = {
+    "Node Type": "Limit", "Total Cost": 42.0, "Plan Rows": 100,
+    "Plans": [{"Node Type": "Nested Loop", "Total Cost": 40.0, "Plan Rows": 100, "Plans": [
+        {"Node Type": "Index Scan", "Index Name": "idx_sinais_data", "Relation Name": "sinais_vitais", "Total Cost": 10.0, "Plan Rows": 100},
+        {"Node Type": "Seq Scan", "Relation Name": "usuarios", "Total Cost": 20.0, "Plan Rows": 1},
+    ]}],
+}
+
+def test_enumerar_todas_as_combinacoes():
+    nomes = [nome for nome, _, _, _ in enumerar_formas(AMOSTRA)]
+    assert len([n for n in nomes if n.startswith("sinais_vitais[")]) == 32
+    assert len([n for n in nomes if n.startswith("mensagens[")]) == 8
+    assert len([n for n in nomes if n.startswith("pacientes[")]) == 7
+    assert "pacientes[]" not in nomes
+    assert "auditoria[usuario_id+acao+data_inicio+data_fim+termo]" in nomes
+    assert "dashboard:total_pacientes" in nomes
+    assert {"fila_prioridade", "visao_geral", "cache_leituras", "lembretes:nao_aderentes", "amostras:blocos"} <= set(nomes)
+    assert {"seletor:pacientes[prefixo]", "seletor:usuarios[trigrama]"} <= set(nomes)
+    assert len(nomes) == len(set(nomes))
+
+def test_analisar_plano():
+    resumo = analisar_plano(PLANO)
+    assert resumo["custo_total"] == 42.0
+    assert resumo["seq_scans"] == ["usuarios"]
+    assert resumo["indices"] == ["idx_sinais_data"]
+    assert resumo["forma"] == "Limit(Nested Loop(Index Scan[idx_sinais_data], Seq Scan[usuarios]))"
+
+def test_verificar_seq_scan_e_custo():
+    plano = dict(analisar_plano(PLANO), seq_scan_permitido=[])
+    falhas, _ = verificar({"q": plano}, {}, {"usuarios": 50000}, 10000, 2.0)
+    assert len(falhas) == 1 and "Seq Scan em 'usuarios'" in falhas[0]
+    falhas, _ = verificar({"q": plano}, {}, {"usuarios": 500}, 10000, 2.0)
+    assert falhas == []
+    referencia = dict(plano, custo_total=10.0)
+    falhas, avisos = verificar({"q": plano}, {"q": referencia}, {}, 10000, 2.0)
+    assert len(falhas) == 1 and "custo estimado" in falhas[0]
+    plano_permitido = dict(plano, seq_scan_permitido=["usuarios"])
+    falhas, _ = verificar({"q": plano_permitido}, {"q": plano}, {"usuarios": 50000}, 10000, 2.0)
+    assert falhas == []